@@ -0,0 +1,42 @@
+"""add created_at indexes to artifacts and actions for data retention
+
+Revision ID: 3f2c9d8e7a41
+Revises: 7d16d496abc1
+Create Date: 2025-06-10 09:00:00.000000+00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f2c9d8e7a41"
+down_revision: Union[str, None] = "7d16d496abc1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the tables are large, build the indexes without locking the writes. CONCURRENTLY can't run in a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "artifact_created_at_org_index",
+            "artifacts",
+            ["created_at", "organization_id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "action_created_at_index",
+            "actions",
+            ["created_at"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("action_created_at_index", table_name="actions", postgresql_concurrently=True)
+        op.drop_index("artifact_created_at_org_index", table_name="artifacts", postgresql_concurrently=True)
@@ -0,0 +1,83 @@
+import json
+import statistics
+import time
+from typing import Annotated, Callable
+
+import typer
+
+from skyvern.forge.sdk.core import skyvern_context
+from skyvern.forge.sdk.core.skyvern_context import SkyvernContext
+from skyvern.webeye.scraper.scraper import (
+    ElementTreeFormat,
+    ScrapedPage,
+    copy_element_tree,
+    elements_to_html,
+    trim_element_tree,
+)
+
+
+def time_ms(function: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def build_scraped_page(element_tree: list[dict]) -> ScrapedPage:
+    return ScrapedPage(
+        elements=[],
+        id_to_css_dict={},
+        id_to_element_hash={},
+        hash_to_element_ids={},
+        element_tree=element_tree,
+        element_tree_trimmed=trim_element_tree(copy_element_tree(element_tree)),
+        screenshots=[],
+        url="",
+        html="",
+        _browser_state=None,
+        _clean_up_func=None,
+        _scrape_exclude=None,
+    )
+
+
+def build_prompt_trees(scraped_page: ScrapedPage) -> None:
+    scraped_page.build_element_tree(ElementTreeFormat.HTML)
+    scraped_page.build_economy_elements_tree(ElementTreeFormat.HTML)
+
+
+def main(
+    element_tree_paths: Annotated[
+        list[str], typer.Argument(help="Recorded element trees, e.g. the visible_elements_tree artifacts of steps")
+    ],
+    repeat: Annotated[int, typer.Option(help="Runs per element tree, the median is reported")] = 10,
+) -> None:
+    """
+    Benchmark the conversion of recorded element trees to the HTML sent in the prompts: with elements_to_html, and
+    through a scraped page building the prompt tree then the economy tree with the subtrees cached, the first time
+    (cold) and again (warm), like the retries of a step do.
+    """
+    skyvern_context.set(SkyvernContext())
+    print(f"{'element tree':<40}{'html ms':>10}{'page cold ms':>14}{'page warm ms':>14}{'KB':>10}")
+    for path in element_tree_paths:
+        with open(path) as f:
+            element_tree = json.load(f)
+        scraped_page = build_scraped_page(element_tree)
+        element_tree_trimmed = scraped_page.element_tree_trimmed
+
+        def build_prompt_trees_cold() -> None:
+            build_prompt_trees(build_scraped_page(element_tree))
+
+        html_ms = time_ms(lambda: elements_to_html(element_tree_trimmed), repeat)
+        # the trimming is part of the cold run, time it apart to leave it out
+        trim_ms = time_ms(lambda: trim_element_tree(copy_element_tree(element_tree)), repeat)
+        page_cold_ms = time_ms(build_prompt_trees_cold, repeat) - trim_ms
+        build_prompt_trees(scraped_page)
+        page_warm_ms = time_ms(lambda: build_prompt_trees(scraped_page), repeat)
+        html_kb = len(elements_to_html(element_tree_trimmed)) / 1024
+        print(f"{path[-40:]:<40}{html_ms:>10.2f}{page_cold_ms:>14.2f}{page_warm_ms:>14.2f}{html_kb:>10.1f}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,106 @@
+import asyncio
+import statistics
+import time
+from typing import Annotated, Any, Optional
+
+import typer
+from playwright.async_api import Page, async_playwright
+
+from skyvern.webeye.scraper.scraper import JS_FUNCTION_DEFS, decode_compact_element_tree
+
+LEGACY_JS_SCRIPT = "async () => await buildTreeFromBody('main.frame', 0)"
+COMPACT_JS_SCRIPT = "async () => await buildCompactTreeFromBody('main.frame', 0)"
+# the size of the payloads as json, measured in the page
+LEGACY_SIZE_JS_SCRIPT = "async () => JSON.stringify(await buildTreeFromBody('main.frame', 0)).length"
+COMPACT_SIZE_JS_SCRIPT = "async () => JSON.stringify(await buildCompactTreeFromBody('main.frame', 0)).length"
+
+
+def build_fixture_page(row_count: int) -> str:
+    """
+    A large page mixing the elements of a real one: a navigation, a form and a table of links, buttons and inputs.
+    """
+    nav = "".join(f'<li><a href="/section/{i}" class="nav-link">Section {i}</a></li>' for i in range(row_count // 10))
+    form = "".join(
+        f'<div class="form-row"><label for="field-{i}">Field {i}</label>'
+        f'<input id="field-{i}" name="field-{i}" type="text" placeholder="Value {i}" aria-required="true"></div>'
+        for i in range(row_count // 2)
+    )
+    rows = "".join(
+        f'<tr><td>Item {i}</td><td><span class="price">{i}.99</span></td>'
+        f'<td><a href="/item/{i}" title="Item {i}">Open</a></td>'
+        f'<td><button type="button" class="btn btn-primary" data-item="{i}">Add to cart</button></td>'
+        f'<td><select name="quantity-{i}"><option>1</option><option>2</option></select></td></tr>'
+        for i in range(row_count)
+    )
+    return (
+        f"<html><body><nav><ul>{nav}</ul></nav><form>{form}</form>"
+        f"<table><thead><tr><th>Name</th><th>Price</th><th></th><th></th><th></th></tr></thead>"
+        f"<tbody>{rows}</tbody></table></body></html>"
+    )
+
+
+async def time_transfer(page: Page, repeat: int) -> dict[str, Any]:
+    legacy_timings = []
+    compact_timings = []
+    legacy_result: Any = None
+    compact_result: Any = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        legacy_result = await page.evaluate(LEGACY_JS_SCRIPT)
+        legacy_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        compact_result = decode_compact_element_tree(await page.evaluate(COMPACT_JS_SCRIPT))
+        compact_timings.append(time.perf_counter() - start)
+
+    if legacy_result != list(compact_result):
+        raise typer.BadParameter("The compact element tree doesn't decode to the legacy one")
+
+    return {
+        "element_count": len(compact_result[0]),
+        "legacy_ms": statistics.median(legacy_timings) * 1000,
+        "compact_ms": statistics.median(compact_timings) * 1000,
+        "legacy_bytes": await page.evaluate(LEGACY_SIZE_JS_SCRIPT),
+        "compact_bytes": await page.evaluate(COMPACT_SIZE_JS_SCRIPT),
+    }
+
+
+async def run_benchmark(url: str | None, row_counts: list[int], repeat: int) -> list[dict[str, Any]]:
+    results = []
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        page = await browser.new_page()
+        if url:
+            await page.goto(url, wait_until="load")
+            await page.evaluate(JS_FUNCTION_DEFS)
+            results.append({"page": url, **await time_transfer(page, repeat)})
+        else:
+            for row_count in row_counts:
+                await page.set_content(build_fixture_page(row_count))
+                await page.evaluate(JS_FUNCTION_DEFS)
+                results.append({"page": f"fixture-{row_count}-rows", **await time_transfer(page, repeat)})
+        await browser.close()
+    return results
+
+
+def main(
+    url: Annotated[Optional[str], typer.Option(help="Benchmark this page instead of the fixture pages")] = None,
+    row_counts: Annotated[list[int], typer.Option("--row-count", help="Rows of the fixture pages")] = [500, 2000, 5000],
+    repeat: Annotated[int, typer.Option(help="Runs per page, the median is reported")] = 5,
+) -> None:
+    """
+    Compare the transfer of the element tree from the page as nested objects with the compact format of
+    buildCompactTreeFromBody, decoding included.
+    """
+    results = asyncio.run(run_benchmark(url, row_counts, repeat))
+    print(f"{'page':<24}{'elements':>10}{'legacy ms':>12}{'compact ms':>12}{'legacy KB':>12}{'compact KB':>12}")
+    for result in results:
+        print(
+            f"{result['page']:<24}{result['element_count']:>10}{result['legacy_ms']:>12.1f}"
+            f"{result['compact_ms']:>12.1f}{result['legacy_bytes'] / 1024:>12.1f}"
+            f"{result['compact_bytes'] / 1024:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,81 @@
+import asyncio
+import io
+import json
+import tempfile
+from datetime import datetime
+
+from PIL import Image
+
+from skyvern.forge.sdk.artifact.models import Artifact, ArtifactType
+from skyvern.forge.sdk.artifact.storage.local import LocalStorage
+from skyvern.forge.sdk.core import skyvern_context
+from skyvern.forge.sdk.core.skyvern_context import SkyvernContext
+from skyvern.utils.image_resizer import Resolution, resize_screenshots
+from skyvern.webeye.scraper.scraper import elements_to_html
+
+CONCURRENT_STEPS = 2
+ACTIONS_PER_STEP = 5
+
+
+def build_element_tree(width: int, depth: int) -> list[dict]:
+    if depth == 0:
+        return []
+    return [
+        {
+            "id": f"{depth}_{index}",
+            "tagName": "div",
+            "interactable": index % 2 == 0,
+            "attributes": {"class": "row", "href": f"https://example.com/{depth}/{index}"},
+            "text": f"element {index}",
+            "children": build_element_tree(width, depth - 1),
+        }
+        for index in range(width)
+    ]
+
+
+def build_screenshot() -> bytes:
+    image = Image.new("RGB", (1920, 1080), color=(255, 255, 255))
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+async def run_step(step_index: int, storage: LocalStorage, artifact_path: str, screenshot: bytes) -> None:
+    """
+    The synchronous work of an agent step at the size of a real page, without the browser and the LLM calls.
+    """
+    skyvern_context.set(SkyvernContext())
+    element_tree = build_element_tree(width=6, depth=4)
+    for action_index in range(ACTIONS_PER_STEP):
+        # the agent awaits the browser between these, each one runs in its own callback of the loop
+        resize_screenshots([screenshot], Resolution(width=1366, height=768))
+        await asyncio.sleep(0)
+        elements_to_html(element_tree)
+        await asyncio.sleep(0)
+        json.dumps(element_tree, indent=2)
+        await asyncio.sleep(0)
+        artifact_id = f"a_{step_index}_{action_index}"
+        await storage.store_artifact(
+            Artifact(
+                artifact_id=artifact_id,
+                artifact_type=ArtifactType.SCREENSHOT_LLM,
+                uri=f"file://{artifact_path}/{artifact_id}.png",
+                created_at=datetime.utcnow(),
+                modified_at=datetime.utcnow(),
+            ),
+            screenshot,
+        )
+        # the browser and the LLM calls of the action
+        await asyncio.sleep(0.01)
+
+
+async def run() -> None:
+    """
+    Benchmark workload of scripts/detect_blocking_calls.py, running a few agent steps concurrently.
+    """
+    screenshot = build_screenshot()
+    with tempfile.TemporaryDirectory() as artifact_path:
+        storage = LocalStorage(artifact_path=artifact_path)
+        await asyncio.gather(
+            *[run_step(step_index, storage, artifact_path, screenshot) for step_index in range(CONCURRENT_STEPS)]
+        )
@@ -0,0 +1,51 @@
+import asyncio
+import importlib
+import json
+from typing import Annotated, Any, Optional
+
+import typer
+
+from skyvern.forge.sdk.core.loop_watchdog import LoopWatchdog
+
+
+async def run_workload(workload: str, threshold_ms: float, sample_interval_seconds: float) -> dict[str, Any]:
+    module_name, _, function_name = workload.partition(":")
+    workload_function = getattr(importlib.import_module(module_name), function_name)
+
+    watchdog = LoopWatchdog(threshold_ms=threshold_ms, sample_interval_seconds=sample_interval_seconds)
+    watchdog.start()
+    try:
+        await workload_function()
+        # let the heartbeat report the last blocking call
+        await asyncio.sleep(sample_interval_seconds * 2)
+    finally:
+        watchdog.stop()
+    return watchdog.snapshot()
+
+
+def main(
+    workload: Annotated[str, typer.Argument(help="Async function running the benchmark, as module.path:function")],
+    threshold_ms: Annotated[float, typer.Option(help="Report the calls blocking the loop for longer than this")] = 100,
+    sample_interval_seconds: Annotated[float, typer.Option()] = 0.05,
+    max_blocking_calls: Annotated[int, typer.Option(help="Fail when more blocking calls are detected")] = 0,
+    report_path: Annotated[Optional[str], typer.Option(help="Write the report as json to this file")] = None,
+) -> None:
+    """
+    Run a benchmark workload under the event loop watchdog and fail when it blocks the event loop, e.g. in CI.
+    """
+    report = asyncio.run(run_workload(workload, threshold_ms, sample_interval_seconds))
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print(f"Max event loop lag: {report['max_lag_ms']:.1f}ms")
+    for blocking_call in report["blocking_calls"]:
+        print(f"\nEvent loop blocked for {blocking_call['blocked_ms']:.1f}ms:")
+        print("".join(blocking_call["stack"]))
+    if report["blocking_call_count"] > max_blocking_calls:
+        print(f"{report['blocking_call_count']} blocking calls detected, allowed at most {max_blocking_calls}")
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -25,14 +25,41 @@ class Settings(BaseSettings):
     MAX_STEPS_PER_TASK_V2: int = 25
     MAX_ITERATIONS_PER_TASK_V2: int = 10
     MAX_NUM_SCREENSHOTS: int = 10
+    # "scroll" takes a screenshot after every scroll of the page, "cdp_clip" clips the screenshots out of the full page
+    # with the chrome devtools protocol, without scrolling. cdp_clip falls back to scroll on the other browsers
+    SCREENSHOT_CAPTURE_ENGINE: str = "scroll"
+    # png, jpeg or webp, for the cdp_clip engine. the quality (0-100) applies to jpeg and webp
+    SCREENSHOT_FORMAT: str = "png"
+    SCREENSHOT_QUALITY: int | None = None
+    # the scrapes of the steps only reading the page reuse the previous scrape of the page for this long, as long as
+    # the page doesn't change. 0 disables it
+    SCRAPE_CACHE_TTL_SECONDS: int = 30
+    # pruning rules applied to the element trees sent to the LLM on top of the trimming, see PRUNING_RULES in
+    # skyvern/webeye/scraper/scraper.py, e.g. ["collapse_purgeable_wrappers", "dedupe_siblings", "cap_text_length"]
+    ELEMENT_TREE_PRUNING_RULES: list[str] = []
+    # let the agent scrape only the viewport when the previous step didn't need more, see AgentFunction.get_scrape_mode
+    ENABLE_ADAPTIVE_SCRAPE_MODE: bool = False
     # Ratio should be between 0 and 1.
     # If the task has been running for more steps than this ratio of the max steps per run, then we'll log a warning.
     LONG_RUNNING_TASK_WARNING_RATIO: float = 0.95
     MAX_RETRIES_PER_STEP: int = 5
     DEBUG_MODE: bool = False
     DATABASE_STRING: str = "postgresql+psycopg://skyvern@localhost/skyvern"
+    # optional read replica serving the list and timeline queries of the dashboard
+    DATABASE_REPLICA_STRING: str | None = None
     DATABASE_STATEMENT_TIMEOUT_MS: int = 60000
     DISABLE_CONNECTION_POOL: bool = False
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_POOL_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT_SECONDS: int = 30
+    # -1 means connections are never recycled
+    DATABASE_POOL_RECYCLE_SECONDS: int = -1
+    DATABASE_POOL_PRE_PING: bool = False
+    # None keeps the driver default. 0 disables prepared statements, which is needed behind pgbouncer
+    DATABASE_STATEMENT_CACHE_SIZE: int | None = None
+    DATABASE_SLOW_QUERY_THRESHOLD_MS: int = 1000
+    # serves the stats of the whole process under /internal, they cover the runs of every organization
+    ENABLE_INTERNAL_STATS_ENDPOINTS: bool = False
     PROMPT_ACTION_HISTORY_WINDOW: int = 1
     TASK_RESPONSE_ACTION_SCREENSHOT_COUNT: int = 3
 
@@ -71,9 +98,36 @@ class Settings(BaseSettings):
     MAX_UPLOAD_FILE_SIZE: int = 10 * 1024 * 1024  # 10 MB
     PRESIGNED_URL_EXPIRATION: int = 60 * 60 * 24  # 24 hours
 
+    # artifact upload settings
+    ARTIFACT_UPLOAD_CONCURRENCY: int = 8
+    # the uploads overflowing the queue are spilled to ARTIFACT_UPLOAD_SPILL_PATH and replayed later
+    ARTIFACT_UPLOAD_QUEUE_SIZE: int = 1000
+    ARTIFACT_UPLOAD_QUEUE_MAX_BYTES: int = 256 * 1024 * 1024  # 256 MB
+    ARTIFACT_UPLOAD_MAX_ATTEMPTS: int = 5
+    ARTIFACT_UPLOAD_MAX_RETRY_DELAY_SECONDS: float = 30.0
+    ARTIFACT_UPLOAD_SPILL_PATH: str = "./artifact_upload_spill"
+    ARTIFACT_UPLOAD_SPILL_REPLAY_INTERVAL_SECONDS: float = 30.0
+    ARTIFACT_UPLOAD_WAIT_TIMEOUT_SECONDS: int = 30
+
     SKYVERN_TELEMETRY: bool = True
     ANALYTICS_ID: str = "anonymous"
 
+    # profiler settings
+    # records the time spent by every step in each phase (scrape, llm, actions, ...) into the step and an artifact
+    ENABLE_STEP_PROFILER: bool = False
+    # the phases are also exported as OpenTelemetry spans when set. requires the opentelemetry sdk and otlp exporter
+    OTEL_EXPORTER_OTLP_ENDPOINT: str | None = None
+    OTEL_SERVICE_NAME: str = "skyvern"
+
+    # metrics settings
+    # serves the prometheus metrics on /metrics of the api server and on WORKER_METRICS_PORT of the run job worker
+    ENABLE_METRICS_ENDPOINT: bool = False
+    WORKER_METRICS_PORT: int = 9090
+    EVENT_LOOP_LAG_SAMPLE_INTERVAL_SECONDS: float = 0.5
+    # logs the stack of the calls blocking the event loop for longer than the threshold, with the task and step ids
+    ENABLE_EVENT_LOOP_WATCHDOG: bool = False
+    EVENT_LOOP_WATCHDOG_THRESHOLD_MS: int = 200
+
     # browser settings
     BROWSER_LOCALE: str = "en-US"
     BROWSER_TIMEZONE: str = "America/New_York"
@@ -84,6 +138,49 @@ class Settings(BaseSettings):
     ENABLE_CRON_WORKFLOWS: bool = False
     DEFAULT_CRON_TIMEZONE: str = "UTC"
     CRON_WORKFLOW_REFRESH_INTERVAL_SECONDS: int = 5 * 60
+    CRON_WORKFLOW_POLL_INTERVAL_SECONDS: float = 10.0
+    # the replicas of the scheduler elect a leader through a lease, only the leader syncs and fires the schedules
+    CRON_SCHEDULER_LEASE_SECONDS: int = 60
+    CRON_WORKFLOW_SYNC_BATCH_SIZE: int = 500
+    # Supported catch up policies for the missed fires: skip, once, all
+    CRON_WORKFLOW_CATCH_UP_POLICY: str = "skip"
+    # a fire running late by less than this is on time and never skipped
+    CRON_WORKFLOW_MISFIRE_GRACE_SECONDS: int = 60
+    CRON_WORKFLOW_MAX_CATCH_UP_RUNS: int = 10
+    # a claimed fire failing to create its workflow run is retried by the next leader up to this many times
+    CRON_WORKFLOW_MAX_FIRE_ATTEMPTS: int = 3
+
+    # async executor settings
+    # Supported executor types: background, db_queue
+    # db_queue enqueues the runs into the run_jobs table, they are executed by `python -m skyvern.worker`
+    ASYNC_EXECUTOR_TYPE: str = "background"
+    RUN_JOB_WORKER_CONCURRENCY: int = 4
+    RUN_JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    RUN_JOB_HEARTBEAT_INTERVAL_SECONDS: int = 30
+    # a running job whose lock isn't renewed by a heartbeat within this timeout is claimed again by another worker
+    RUN_JOB_VISIBILITY_TIMEOUT_SECONDS: int = 120
+    RUN_JOB_MAX_ATTEMPTS: int = 3
+    # admission control of the db_queue executor. the concurrency caps are counted across all the workers
+    RUN_JOB_MAX_CONCURRENT_RUNS: int | None = None
+    RUN_JOB_MAX_CONCURRENT_RUNS_PER_ORG: int | None = None
+    # new runs of an organization with this many queued runs are rejected and marked as failed
+    RUN_JOB_MAX_QUEUED_RUNS_PER_ORG: int | None = None
+    # weights of the fair queuing between organizations, e.g. {"o_123": 2.0}. organizations default to 1.0
+    RUN_JOB_ORGANIZATION_WEIGHTS: dict[str, float] = {}
+
+    # maximum number of root blocks running at once in the workflow runs using the dag execution mode
+    WORKFLOW_DAG_MAX_PARALLEL_BLOCKS: int = 4
+
+    # data retention settings
+    # list of RetentionPolicy, e.g. [{"table": "artifacts", "retention_days": 30, "artifact_types": ["har"]}]
+    DATA_RETENTION_POLICIES: list[dict] = []
+    DATA_RETENTION_INTERVAL_SECONDS: int = 60 * 60
+    DATA_RETENTION_BATCH_SIZE: int = 1000
+    DATA_RETENTION_MAX_BATCHES_PER_RUN: int = 100
+    # minimum pause between two batches. the pause is at least as long as the previous batch took
+    DATA_RETENTION_BATCH_PAUSE_SECONDS: float = 1.0
+    ARTIFACT_ARCHIVE_PREFIX: str = "archive"
+    ARTIFACT_ARCHIVE_S3_STORAGE_CLASS: str = "GLACIER_IR"
 
     # Add extension folders name here to load extension in your browser
     EXTENSIONS_BASE_PATH: str = "./extensions"
@@ -9,6 +9,7 @@ REPO_ROOT_DIR = SKYVERN_DIR.parent
 INPUT_TEXT_TIMEOUT = 120000  # 2 minutes
 PAGE_CONTENT_TIMEOUT = 300  # 5 mins
 BUILDING_ELEMENT_TREE_TIMEOUT_MS = 60 * 1000  # 1 minute
+MAX_CONCURRENT_FRAME_SCRAPES = 5
 BROWSER_CLOSE_TIMEOUT = 180  # 3 minute
 BROWSER_DOWNLOAD_MAX_WAIT_TIME = 1200  # 20 minute
 BROWSER_DOWNLOAD_TIMEOUT = 600  # 10 minute
@@ -687,3 +687,8 @@ class SkyvernContextWindowExceededError(SkyvernException):
 class LLMCallerNotFoundError(SkyvernException):
     def __init__(self, uid: str) -> None:
         super().__init__(f"LLM caller for {uid} is not found")
+
+
+class ArtifactUploadFailed(SkyvernException):
+    def __init__(self, uri: str) -> None:
+        super().__init__(f"Failed to upload the artifact to {uri}")
@@ -5,12 +5,14 @@ import os
 import random
 import string
 from asyncio.exceptions import CancelledError
+from collections import OrderedDict
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any, Tuple, cast
 
 import httpx
 import structlog
+from cachetools import TTLCache
 from openai.types.responses.response import Response as OpenAIResponse
 from playwright._impl._errors import TargetClosedError
 from playwright.async_api import Page
@@ -60,7 +62,7 @@ from skyvern.forge.sdk.api.files import (
 )
 from skyvern.forge.sdk.api.llm.api_handler_factory import LLMCaller, LLMCallerManager
 from skyvern.forge.sdk.artifact.models import ArtifactType
-from skyvern.forge.sdk.core import skyvern_context
+from skyvern.forge.sdk.core import metrics, profiler, skyvern_context
 from skyvern.forge.sdk.core.security import generate_skyvern_webhook_headers
 from skyvern.forge.sdk.db.enums import TaskType
 from skyvern.forge.sdk.log_artifacts import save_step_logs, save_task_logs
@@ -94,11 +96,14 @@ from skyvern.webeye.actions.models import AgentStepOutput, DetailedAgentStepOutp
 from skyvern.webeye.actions.parse_actions import parse_actions, parse_anthropic_actions, parse_cua_actions
 from skyvern.webeye.actions.responses import ActionResult, ActionSuccess
 from skyvern.webeye.browser_factory import BrowserState
-from skyvern.webeye.scraper.scraper import ElementTreeFormat, ScrapedPage, scrape_website
+from skyvern.webeye.scraper.scraper import ElementTreeFormat, ScrapedPage, ScrapeMode, scrape_website
 from skyvern.webeye.utils.page import SkyvernFrame
 
 LOG = structlog.get_logger()
 
+ACTION_HISTORY_CACHE_SIZE = 1000
+ACTION_HISTORY_CACHE_TTL_SECONDS = 60 * 60
+
 
 class ActionLinkedNode:
     def __init__(self, action: Action) -> None:
@@ -106,6 +111,29 @@ class ActionLinkedNode:
         self.next: ActionLinkedNode | None = None
 
 
+class ActionHistoryWindow:
+    """
+    The latest steps of a running task, kept in memory and updated on every step update, so building the action
+    history for a prompt doesn't need to read all the steps of the task from the db.
+    """
+
+    def __init__(self, steps: list[Step], size: int) -> None:
+        self.size = size
+        self.steps: OrderedDict[str, Step] = OrderedDict()
+        for step in steps:
+            self.record(step)
+
+    def record(self, step: Step) -> None:
+        self.steps[step.step_id] = step
+        # keep one more step than the window: the latest step is the executing one and it's excluded from the history
+        while len(self.steps) > self.size + 1:
+            self.steps.popitem(last=False)
+
+    def get_window_steps(self) -> list[Step]:
+        steps = list(self.steps.values())
+        return steps[-1 - self.size : -1]
+
+
 class ForgeAgent:
     def __init__(self) -> None:
         if settings.ADDITIONAL_MODULES:
@@ -117,6 +145,10 @@ class ForgeAgent:
                 modules=settings.ADDITIONAL_MODULES,
             )
         self.async_operation_pool = AsyncOperationPool()
+        # task_id -> ActionHistoryWindow
+        self.action_history_windows: TTLCache = TTLCache(
+            maxsize=ACTION_HISTORY_CACHE_SIZE, ttl=ACTION_HISTORY_CACHE_TTL_SECONDS
+        )
 
     async def create_task_and_step_from_block(
         self,
@@ -390,17 +422,26 @@ class ForgeAgent:
                         llm_caller = LLMCaller(llm_key=settings.ANTHROPIC_CUA_LLM_KEY, screenshot_scaling_enabled=True)
                         LLMCallerManager.set_llm_caller(task.task_id, llm_caller)
 
-            step, detailed_output = await self.agent_step(
-                task,
-                step,
-                browser_state,
-                organization=organization,
-                task_block=task_block,
-                complete_verification=complete_verification,
-                engine=engine,
-                cua_response=cua_response,
-                llm_caller=llm_caller,
-            )
+            with profiler.profile_step(task_id=task.task_id, step_id=step.step_id) as step_profile:
+                step, detailed_output = await self.agent_step(
+                    task,
+                    step,
+                    browser_state,
+                    organization=organization,
+                    task_block=task_block,
+                    complete_verification=complete_verification,
+                    engine=engine,
+                    cua_response=cua_response,
+                    llm_caller=llm_caller,
+                )
+            if step_profile:
+                step = await self.save_step_profile(step, step_profile)
+            if step.status in (StepStatus.completed, StepStatus.failed):
+                metrics.STEP_DURATION.observe(
+                    (datetime.now(UTC) - step.created_at.replace(tzinfo=UTC)).total_seconds(),
+                    engine=engine,
+                    status=step.status,
+                )
             await app.AGENT_FUNCTION.post_step_execution(task, step)
             task = await self.update_task_errors_from_detailed_output(task, detailed_output)
             retry = False
@@ -1028,13 +1069,15 @@ class ForgeAgent:
                     # Do not verify the complete action when complete_verification is False
                     # set verified to True will skip the completion verification
                     action.verified = True
-                results = await ActionHandler.handle_action(scraped_page, task, step, current_page, action)
+                with profiler.span(f"action.{action.action_type}"):
+                    results = await ActionHandler.handle_action(scraped_page, task, step, current_page, action)
                 detailed_agent_step_output.actions_and_results[action_idx] = (
                     action,
                     results,
                 )
                 # wait random time between actions to avoid detection
-                await asyncio.sleep(random.uniform(0.5, 1.0))
+                with profiler.span("sleep"):
+                    await asyncio.sleep(random.uniform(0.5, 1.0))
                 await self.record_artifacts_after_action(task, step, browser_state, engine)
                 for result in results:
                     result.step_retry_number = step.retry_index
@@ -1168,9 +1211,10 @@ class ForgeAgent:
                         complete_action.step_id = step.step_id
                         complete_action.step_order = step.order
                         complete_action.action_order = len(detailed_agent_step_output.actions_and_results)
-                        complete_results = await ActionHandler.handle_action(
-                            scraped_page, task, step, working_page, complete_action
-                        )
+                        with profiler.span(f"action.{complete_action.action_type}"):
+                            complete_results = await ActionHandler.handle_action(
+                                scraped_page, task, step, working_page, complete_action
+                            )
                         detailed_agent_step_output.actions_and_results.append((complete_action, complete_results))
                         await self.record_artifacts_after_action(task, step, browser_state, engine)
 
@@ -1187,9 +1231,10 @@ class ForgeAgent:
                 assert refreshed_task is not None
                 task = refreshed_task
                 extract_action = await self.create_extract_action(task, step, scraped_page)
-                extract_results = await ActionHandler.handle_action(
-                    scraped_page, task, step, working_page, extract_action
-                )
+                with profiler.span(f"action.{extract_action.action_type}"):
+                    extract_results = await ActionHandler.handle_action(
+                        scraped_page, task, step, working_page, extract_action
+                    )
                 detailed_agent_step_output.actions_and_results.append((extract_action, extract_results))
 
             # If no action errors return the agent state and output
@@ -1483,7 +1528,7 @@ class ForgeAgent:
         if run_obj and run_obj.task_run_type in CUA_RUN_TYPES:
             scroll = False
 
-        scraped_page_refreshed = await scraped_page.refresh(draw_boxes=False, scroll=scroll)
+        scraped_page_refreshed = await scraped_page.refresh(draw_boxes=False, scroll=scroll, reuse_cached_scrape=True)
 
         actions_and_results_str = ""
         if task.include_action_history_in_verification:
@@ -1555,7 +1600,11 @@ class ForgeAgent:
             fullpage_screenshot = False
 
         try:
-            screenshot = await browser_state.take_screenshot(full_page=fullpage_screenshot)
+            if fullpage_screenshot:
+                screenshot = await browser_state.take_screenshot(full_page=True)
+            else:
+                # the screenshot of the next step reuses it when the page doesn't change in between
+                screenshot = await SkyvernFrame.take_reusable_screenshot(page=working_page)
             await app.ARTIFACT_MANAGER.create_artifact(
                 step=step,
                 artifact_type=ArtifactType.SCREENSHOT_ACTION,
@@ -1655,6 +1704,7 @@ class ForgeAgent:
         browser_state: BrowserState,
         scrape_type: ScrapeType,
         engine: RunEngine,
+        scrape_mode: ScrapeMode = ScrapeMode.FULL,
     ) -> ScrapedPage:
         if scrape_type == ScrapeType.NORMAL:
             pass
@@ -1689,8 +1739,12 @@ class ForgeAgent:
             max_screenshot_number=max_screenshot_number,
             draw_boxes=draw_boxes,
             scroll=scroll,
+            scrape_mode=scrape_mode,
+            # the tasks without a navigation goal only read the page, like the extraction and validation blocks
+            reuse_cached_scrape=scrape_type == ScrapeType.NORMAL and not task.navigation_goal,
         )
 
+    @profiler.profiled("prompt_build")
     async def build_and_record_step_prompt(
         self,
         task: Task,
@@ -1708,6 +1762,9 @@ class ForgeAgent:
         # second time: try again the normal scrape, (stopping window loading before scraping barely helps, but causing problem)
         # third time: reload the page before scraping
         scraped_page: ScrapedPage | None = None
+        scrape_mode = ScrapeMode.FULL
+        if engine not in CUA_ENGINES:
+            scrape_mode = await app.AGENT_FUNCTION.get_scrape_mode(task=task, step=step)
         for idx, scrape_type in enumerate(SCRAPE_TYPE_ORDER):
             try:
                 scraped_page = await self._scrape_with_type(
@@ -1716,6 +1773,7 @@ class ForgeAgent:
                     browser_state=browser_state,
                     scrape_type=scrape_type,
                     engine=engine,
+                    scrape_mode=scrape_mode,
                 )
                 break
             except (FailedToTakeScreenshot, ScrapingFailed) as e:
@@ -1745,6 +1803,7 @@ class ForgeAgent:
             step_retry=step.retry_index,
             num_elements=len(scraped_page.elements),
             url=task.url,
+            scrape_mode=scraped_page.scrape_mode,
         )
         # TODO: we only use HTML element for now, introduce a way to switch in the future
         element_tree_format = ElementTreeFormat.HTML
@@ -1898,9 +1957,8 @@ class ForgeAgent:
         """
 
         # Get action results from the last app.SETTINGS.PROMPT_ACTION_HISTORY_WINDOW steps
-        steps = await app.DATABASE.get_task_steps(task_id=task.task_id, organization_id=task.organization_id)
         # the last step is always the newly created one and it should be excluded from the history window
-        window_steps = steps[-1 - settings.PROMPT_ACTION_HISTORY_WINDOW : -1]
+        window_steps = (await self._get_action_history_window(task)).get_window_steps()
         if current_step:
             window_steps.append(current_step)
 
@@ -1933,6 +1991,25 @@ class ForgeAgent:
         ]
         return json.dumps(action_history)
 
+    async def _get_action_history_window(self, task: Task) -> ActionHistoryWindow:
+        """
+        Get the in-memory action history window of the task.
+        When the task has no window in this process yet (first prompt, or the task is resumed by another process),
+        the window is loaded from the latest steps in the db and kept up to date by update_step afterwards.
+        """
+        action_history_window = self.action_history_windows.get(task.task_id)
+        if action_history_window is not None and action_history_window.size == settings.PROMPT_ACTION_HISTORY_WINDOW:
+            return action_history_window
+
+        steps = await app.DATABASE.get_latest_task_steps(
+            task_id=task.task_id,
+            limit=settings.PROMPT_ACTION_HISTORY_WINDOW + 1,
+            organization_id=task.organization_id,
+        )
+        action_history_window = ActionHistoryWindow(steps=steps, size=settings.PROMPT_ACTION_HISTORY_WINDOW)
+        self.action_history_windows[task.task_id] = action_history_window
+        return action_history_window
+
     async def get_extracted_information_for_task(self, task: Task) -> dict[str, Any] | list | str | None:
         """
         Find the last successful ScrapeAction for the task and return the extracted information.
@@ -2363,12 +2440,41 @@ class ForgeAgent:
 
         await save_step_logs(step.step_id)
 
-        return await app.DATABASE.update_step(
+        updated_step = await app.DATABASE.update_step(
             task_id=step.task_id,
             step_id=step.step_id,
             organization_id=step.organization_id,
             **updates,
         )
+        # only windows loaded from the db are complete, so we never start a new window from a single step
+        if action_history_window := self.action_history_windows.get(step.task_id):
+            action_history_window.record(updated_step)
+        return updated_step
+
+    async def save_step_profile(self, step: Step, step_profile: profiler.StepProfile) -> Step:
+        profile = step_profile.to_dict()
+        LOG.info(
+            "Step profile",
+            task_id=step.task_id,
+            step_id=step.step_id,
+            total_ms=profile["total_ms"],
+            phases={phase: timing["total_ms"] for phase, timing in profile["phases"].items()},
+        )
+        try:
+            await app.ARTIFACT_MANAGER.create_artifact(
+                step=step,
+                artifact_type=ArtifactType.STEP_PROFILE,
+                data=json.dumps(profile, indent=2).encode("utf-8"),
+            )
+            return await app.DATABASE.update_step(
+                task_id=step.task_id,
+                step_id=step.step_id,
+                organization_id=step.organization_id,
+                profile=profile,
+            )
+        except Exception:
+            LOG.warning("Failed to save the step profile", task_id=step.task_id, step_id=step.step_id, exc_info=True)
+            return step
 
     async def update_task(
         self,
@@ -2408,6 +2514,9 @@ class ForgeAgent:
                 organization_id=task.organization_id,
             )
 
+        if status is not None and status.is_final():
+            self.action_history_windows.pop(task.task_id, None)
+
         await save_task_logs(task.task_id)
         LOG.info("Updating task in db", task_id=task.task_id, diff=update_comparison)
         return await app.DATABASE.update_task(
@@ -1,6 +1,7 @@
 import asyncio
 import copy
 import hashlib
+from collections import deque
 from datetime import timedelta
 from typing import Dict, List
 
@@ -14,13 +15,14 @@ from skyvern.forge import app
 from skyvern.forge.async_operations import AsyncOperation
 from skyvern.forge.prompts import prompt_engine
 from skyvern.forge.sdk.api.llm.exceptions import LLMProviderError
-from skyvern.forge.sdk.core import skyvern_context
+from skyvern.forge.sdk.core import profiler, skyvern_context
 from skyvern.forge.sdk.models import Step, StepStatus
 from skyvern.forge.sdk.schemas.organizations import Organization
 from skyvern.forge.sdk.schemas.tasks import Task, TaskStatus
 from skyvern.forge.sdk.workflow.models.block import BlockTypeVar
+from skyvern.webeye.actions.actions import ActionType
 from skyvern.webeye.browser_factory import BrowserState
-from skyvern.webeye.scraper.scraper import ELEMENT_NODE_ATTRIBUTES, CleanupElementTreeFunc, json_to_html
+from skyvern.webeye.scraper.scraper import ELEMENT_NODE_ATTRIBUTES, CleanupElementTreeFunc, ScrapeMode, json_to_html
 from skyvern.webeye.utils.dom import SkyvernElement
 from skyvern.webeye.utils.page import SkyvernFrame
 
@@ -30,6 +32,9 @@ USELESS_SHAPE_ATTRIBUTE = [SKYVERN_ID_ATTR, "id", "aria-describedby"]
 SVG_SHAPE_CONVERTION_ATTEMPTS = 3
 CSS_SHAPE_CONVERTION_ATTEMPTS = 1
 INVALID_SHAPE = "N/A"
+# after these actions the page keeps the scroll position of the elements acted on, so the next fields to fill are in
+# the viewport
+VIEWPORT_SCRAPE_SAFE_ACTION_TYPES = {ActionType.INPUT_TEXT, ActionType.SELECT_OPTION, ActionType.CHECKBOX}
 
 
 def _remove_rect(element: dict) -> None:
@@ -482,6 +487,34 @@ class AgentFunction:
     async def post_step_execution(self, task: Task, step: Step) -> None:
         return
 
+    async def get_scrape_mode(self, task: Task, step: Step) -> ScrapeMode:
+        """
+        Choose the cheapest scrape mode that is safe for the step, given the actions of the previous step.
+        The whole page is scraped unless ENABLE_ADAPTIVE_SCRAPE_MODE is on.
+        """
+        if not settings.ENABLE_ADAPTIVE_SCRAPE_MODE or step.order == 0 or step.retry_index > 0:
+            return ScrapeMode.FULL
+
+        latest_steps = await app.DATABASE.get_latest_task_steps(
+            task_id=task.task_id, limit=2, organization_id=task.organization_id
+        )
+        previous_step = next((s for s in reversed(latest_steps) if s.step_id != step.step_id), None)
+        if (
+            previous_step is None
+            or previous_step.status != StepStatus.completed
+            or previous_step.output is None
+            or not previous_step.output.actions_and_results
+        ):
+            return ScrapeMode.FULL
+
+        # only a successful form filling keeps the elements needed next in the viewport
+        for action, action_results in previous_step.output.actions_and_results:
+            if action.action_type not in VIEWPORT_SCRAPE_SAFE_ACTION_TYPES:
+                return ScrapeMode.FULL
+            if not action_results or not action_results[-1].success:
+                return ScrapeMode.FULL
+        return ScrapeMode.VIEWPORT
+
     async def generate_async_operations(
         self,
         organization: Organization,
@@ -511,15 +544,12 @@ class AgentFunction:
             skyvern_frame = await SkyvernFrame.create_instance(frame=frame)
             current_frame_index = context.frame_index_map.get(frame, 0)
 
-            queue = []
+            queue: deque[dict] = deque(element_tree)
             element_cnt = 0
             eligible_svgs = []  # List to store eligible SVGs and their frames
 
-            for element in element_tree:
-                queue.append(element)
-
             while queue:
-                queue_ele = queue.pop(0)
+                queue_ele = queue.popleft()
 
                 element_cnt += 1
                 if element_cnt == MAX_ELEMENT_CNT:
@@ -557,7 +587,10 @@ class AgentFunction:
 
             # Convert all eligible SVGs in parallel
             if eligible_svgs:
-                await asyncio.gather(*[_convert_svg_to_string(element, task, step) for element, frame in eligible_svgs])
+                with profiler.span("scrape.svg"):
+                    await asyncio.gather(
+                        *[_convert_svg_to_string(element, task, step) for element, frame in eligible_svgs]
+                    )
 
             return element_tree
 
@@ -1,6 +1,7 @@
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Awaitable, Callable
+from typing import AsyncIterator, Awaitable, Callable
 
 import structlog
 from fastapi import FastAPI, Response, status
@@ -15,7 +16,8 @@ from starlette_context.plugins.base import Plugin
 from skyvern.config import settings
 from skyvern.exceptions import SkyvernHTTPException
 from skyvern.forge import app as forge_app
-from skyvern.forge.sdk.core import skyvern_context
+from skyvern.forge.sdk.core import metrics, skyvern_context
+from skyvern.forge.sdk.core.loop_watchdog import start_event_loop_monitoring
 from skyvern.forge.sdk.core.skyvern_context import SkyvernContext
 from skyvern.forge.sdk.db.exceptions import NotFoundError
 from skyvern.forge.sdk.routes.routers import base_router, legacy_base_router, legacy_v2_router
@@ -48,12 +50,22 @@ def custom_openapi() -> dict:
     return app.openapi_schema
 
 
+@asynccontextmanager
+async def lifespan(fastapi_app: FastAPI) -> AsyncIterator[None]:
+    stop_event_loop_monitoring = start_event_loop_monitoring()
+    try:
+        yield
+    finally:
+        if stop_event_loop_monitoring:
+            stop_event_loop_monitoring()
+
+
 def get_agent_app() -> FastAPI:
     """
     Start the agent server.
     """
 
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
 
     # Add CORS middleware
     app.add_middleware(
@@ -79,6 +91,12 @@ def get_agent_app() -> FastAPI:
         ),
     )
 
+    if settings.ENABLE_METRICS_ENDPOINT:
+
+        @app.get("/metrics", include_in_schema=False)
+        async def get_metrics() -> Response:
+            return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
     @app.exception_handler(NotFoundError)
     async def handle_not_found_error(request: Request, exc: NotFoundError) -> Response:
         return Response(status_code=status.HTTP_404_NOT_FOUND)
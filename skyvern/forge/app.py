@@ -25,6 +25,7 @@ SETTINGS_MANAGER = SettingsManager.get_settings()
 DATABASE = AgentDB(
     SettingsManager.get_settings().DATABASE_STRING,
     debug_enabled=SettingsManager.get_settings().DEBUG_MODE,
+    replica_database_string=SettingsManager.get_settings().DATABASE_REPLICA_STRING,
 )
 if SettingsManager.get_settings().SKYVERN_STORAGE_TYPE == "s3":
     StorageFactory.set_storage(S3Storage())
@@ -127,6 +127,42 @@ class AsyncAWSClient:
                 LOG.exception("S3 download failed", uri=uri)
             return None
 
+    async def copy_file(self, source_uri: str, target_uri: str, storage_class: str | None = None) -> str | None:
+        try:
+            async with self.session.client(AWSClientType.S3, region_name=self.region_name) as client:
+                parsed_source_uri = S3Uri(source_uri)
+                parsed_target_uri = S3Uri(target_uri)
+                params: dict[str, Any] = {
+                    "CopySource": {"Bucket": parsed_source_uri.bucket, "Key": parsed_source_uri.key},
+                    "Bucket": parsed_target_uri.bucket,
+                    "Key": parsed_target_uri.key,
+                }
+                if storage_class:
+                    params["StorageClass"] = storage_class
+                await client.copy_object(**params)
+                return target_uri
+        except Exception:
+            LOG.exception("S3 copy failed.", source_uri=source_uri, target_uri=target_uri)
+            return None
+
+    async def delete_files(self, uris: list[str]) -> None:
+        keys_by_bucket: dict[str, list[str]] = {}
+        for uri in uris:
+            parsed_uri = S3Uri(uri)
+            keys_by_bucket.setdefault(parsed_uri.bucket, []).append(parsed_uri.key)
+        try:
+            async with self.session.client(AWSClientType.S3, region_name=self.region_name) as client:
+                for bucket, keys in keys_by_bucket.items():
+                    # delete_objects accepts at most 1000 keys per request
+                    for i in range(0, len(keys), 1000):
+                        await client.delete_objects(
+                            Bucket=bucket,
+                            Delete={"Objects": [{"Key": key} for key in keys[i : i + 1000]], "Quiet": True},
+                        )
+        except Exception:
+            LOG.exception("S3 delete failed.", uris=uris)
+            raise
+
     async def get_file_metadata(
         self,
         uri: str,
@@ -25,7 +25,7 @@ from skyvern.forge.sdk.api.llm.exceptions import (
 from skyvern.forge.sdk.api.llm.models import LLMAPIHandler, LLMConfig, LLMRouterConfig, dummy_llm_api_handler
 from skyvern.forge.sdk.api.llm.utils import llm_messages_builder, llm_messages_builder_with_history, parse_api_response
 from skyvern.forge.sdk.artifact.models import ArtifactType
-from skyvern.forge.sdk.core import skyvern_context
+from skyvern.forge.sdk.core import metrics, profiler, skyvern_context
 from skyvern.forge.sdk.models import Step
 from skyvern.forge.sdk.schemas.ai_suggestions import AISuggestion
 from skyvern.forge.sdk.schemas.task_v2 import TaskV2, Thought
@@ -137,7 +137,8 @@ class LLMAPIHandlerFactory:
                 ai_suggestion=ai_suggestion,
             )
             try:
-                response = await router.acompletion(model=main_model_group, messages=messages, **parameters)
+                with profiler.span("llm"), metrics.LLM_IN_FLIGHT_REQUESTS.track_inprogress(llm_key=llm_key):
+                    response = await router.acompletion(model=main_model_group, messages=messages, **parameters)
             except litellm.exceptions.APIError as e:
                 raise LLMProviderErrorRetryableTask(llm_key) from e
             except litellm.exceptions.ContextWindowExceededError as e:
@@ -186,6 +187,13 @@ class LLMAPIHandlerFactory:
                 cached_token_detail = response.get("usage", {}).get("prompt_tokens_details")
                 if cached_token_detail:
                     cached_tokens = cached_token_detail.cached_tokens or 0
+                metrics.record_llm_tokens(
+                    llm_key,
+                    input_tokens=prompt_tokens,
+                    output_tokens=completion_tokens,
+                    reasoning_tokens=reasoning_tokens,
+                    cached_tokens=cached_tokens,
+                )
                 if step:
                     await app.DATABASE.update_step(
                         task_id=step.task_id,
@@ -232,6 +240,7 @@ class LLMAPIHandlerFactory:
 
             # Track LLM API handler duration
             duration_seconds = time.time() - start_time
+            metrics.LLM_REQUEST_DURATION.observe(duration_seconds, llm_key=llm_key, prompt_name=prompt_name)
             LOG.info(
                 "LLM API handler duration metrics",
                 llm_key=llm_key,
@@ -335,12 +344,13 @@ class LLMAPIHandlerFactory:
                 # TODO (kerem): add a timeout to this call
                 # TODO (kerem): add a retry mechanism to this call (acompletion_with_retries)
                 # TODO (kerem): use litellm fallbacks? https://litellm.vercel.app/docs/tutorials/fallbacks#how-does-completion_with_fallbacks-work
-                response = await litellm.acompletion(
-                    model=model_name,
-                    messages=messages,
-                    timeout=settings.LLM_CONFIG_TIMEOUT,
-                    **active_parameters,
-                )
+                with profiler.span("llm"), metrics.LLM_IN_FLIGHT_REQUESTS.track_inprogress(llm_key=local_llm_key):
+                    response = await litellm.acompletion(
+                        model=model_name,
+                        messages=messages,
+                        timeout=settings.LLM_CONFIG_TIMEOUT,
+                        **active_parameters,
+                    )
             except litellm.exceptions.APIError as e:
                 raise LLMProviderErrorRetryableTask(local_llm_key) from e
             except litellm.exceptions.ContextWindowExceededError as e:
@@ -388,6 +398,13 @@ class LLMAPIHandlerFactory:
                 cached_token_detail = response.get("usage", {}).get("prompt_tokens_details")
                 if cached_token_detail:
                     cached_tokens = cached_token_detail.cached_tokens or 0
+                metrics.record_llm_tokens(
+                    local_llm_key,
+                    input_tokens=prompt_tokens,
+                    output_tokens=completion_tokens,
+                    reasoning_tokens=reasoning_tokens,
+                    cached_tokens=cached_tokens,
+                )
                 if step:
                     await app.DATABASE.update_step(
                         task_id=step.task_id,
@@ -434,6 +451,7 @@ class LLMAPIHandlerFactory:
 
             # Track LLM API handler duration
             duration_seconds = time.time() - start_time
+            metrics.LLM_REQUEST_DURATION.observe(duration_seconds, llm_key=local_llm_key, prompt_name=prompt_name)
             LOG.info(
                 "LLM API handler duration metrics",
                 llm_key=local_llm_key,
@@ -647,6 +665,13 @@ class LLMCaller:
 
         if step or thought:
             call_stats = await self.get_call_stats(response)
+            metrics.record_llm_tokens(
+                self.llm_key,
+                input_tokens=call_stats.input_tokens,
+                output_tokens=call_stats.output_tokens,
+                reasoning_tokens=call_stats.reasoning_tokens,
+                cached_tokens=call_stats.cached_tokens,
+            )
             if step:
                 await app.DATABASE.update_step(
                     task_id=step.task_id,
@@ -670,6 +695,7 @@ class LLMCaller:
                 )
         # Track LLM API handler duration
         duration_seconds = time.perf_counter() - start_time
+        metrics.LLM_REQUEST_DURATION.observe(duration_seconds, llm_key=self.llm_key, prompt_name=prompt_name or "")
         LOG.info(
             "LLM API handler duration metrics",
             llm_key=self.llm_key,
@@ -713,6 +739,7 @@ class LLMCaller:
             return get_resize_target_dimension(window_dimension)
         return self.screenshot_resize_target_dimension
 
+    @profiler.profiled("llm")
     async def _dispatch_llm_call(
         self,
         messages: list[dict[str, Any]],
@@ -720,12 +747,13 @@ class LLMCaller:
         timeout: float = settings.LLM_CONFIG_TIMEOUT,
         **active_parameters: dict[str, Any],
     ) -> ModelResponse | CustomStreamWrapper | AnthropicMessage:
-        if self.llm_key and "ANTHROPIC" in self.llm_key:
-            return await self._call_anthropic(messages, tools, timeout, **active_parameters)
+        with metrics.LLM_IN_FLIGHT_REQUESTS.track_inprogress(llm_key=self.llm_key):
+            if self.llm_key and "ANTHROPIC" in self.llm_key:
+                return await self._call_anthropic(messages, tools, timeout, **active_parameters)
 
-        return await litellm.acompletion(
-            model=self.llm_config.model_name, messages=messages, tools=tools, timeout=timeout, **active_parameters
-        )
+            return await litellm.acompletion(
+                model=self.llm_config.model_name, messages=messages, tools=tools, timeout=timeout, **active_parameters
+            )
 
     async def _call_anthropic(
         self,
@@ -15,6 +15,15 @@ from skyvern.forge.sdk.api.llm.exceptions import EmptyLLMResponseError, InvalidL
 LOG = structlog.get_logger()
 
 
+def get_image_media_type(image: bytes) -> str:
+    # the screenshots are png unless SCREENSHOT_FORMAT is set for the cdp_clip capture engine
+    if image.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if image[:4] == b"RIFF" and image[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/png"
+
+
 async def llm_messages_builder(
     prompt: str,
     screenshots: list[bytes] | None = None,
@@ -36,7 +45,7 @@ async def llm_messages_builder(
                     "type": "image",
                     "source": {
                         "type": "base64",
-                        "media_type": "image/png",
+                        "media_type": get_image_media_type(screenshot),
                         "data": encoded_image,
                     },
                 }
@@ -44,7 +53,7 @@ async def llm_messages_builder(
                 message = {
                     "type": "image_url",
                     "image_url": {
-                        "url": f"data:image/png;base64,{encoded_image}",
+                        "url": f"data:{get_image_media_type(screenshot)};base64,{encoded_image}",
                     },
                 }
             messages.append(message)
@@ -85,7 +94,7 @@ async def llm_messages_builder_with_history(
                     "type": "image",
                     "source": {
                         "type": "base64",
-                        "media_type": "image/png",
+                        "media_type": get_image_media_type(screenshot),
                         "data": encoded_image,
                     },
                 }
@@ -93,7 +102,7 @@ async def llm_messages_builder_with_history(
                 message = {
                     "type": "image_url",
                     "image_url": {
-                        "url": f"data:image/png;base64,{encoded_image}",
+                        "url": f"data:{get_image_media_type(screenshot)};base64,{encoded_image}",
                     },
                 }
             current_user_messages.append(message)
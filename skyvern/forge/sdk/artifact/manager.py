@@ -1,11 +1,12 @@
-import asyncio
 import time
-from collections import defaultdict
 
 import structlog
 
+from skyvern.config import settings
 from skyvern.forge import app
 from skyvern.forge.sdk.artifact.models import Artifact, ArtifactType, LogEntityType
+from skyvern.forge.sdk.artifact.upload_queue import ArtifactUploadQueue
+from skyvern.forge.sdk.core import profiler
 from skyvern.forge.sdk.db.id import generate_artifact_id
 from skyvern.forge.sdk.models import Step
 from skyvern.forge.sdk.schemas.ai_suggestions import AISuggestion
@@ -16,9 +17,10 @@ LOG = structlog.get_logger(__name__)
 
 
 class ArtifactManager:
-    # task_id -> list of aio_tasks for uploading artifacts
-    upload_aiotasks_map: dict[str, list[asyncio.Task[None]]] = defaultdict(list)
+    def __init__(self) -> None:
+        self.upload_queue = ArtifactUploadQueue()
 
+    @profiler.profiled("artifact")
     async def _create_artifact(
         self,
         aio_task_primary_key: str,
@@ -54,13 +56,9 @@ class ArtifactManager:
             ai_suggestion_id=ai_suggestion_id,
         )
         if data:
-            # Fire and forget
-            aio_task = asyncio.create_task(app.STORAGE.store_artifact(artifact, data))
-            self.upload_aiotasks_map[aio_task_primary_key].append(aio_task)
+            await self.upload_queue.enqueue(artifact, aio_task_primary_key, data=data)
         elif path:
-            # Fire and forget
-            aio_task = asyncio.create_task(app.STORAGE.store_artifact_from_path(artifact, path))
-            self.upload_aiotasks_map[aio_task_primary_key].append(aio_task)
+            await self.upload_queue.enqueue(artifact, aio_task_primary_key, path=path)
 
         return artifact_id
 
@@ -267,12 +265,9 @@ class ArtifactManager:
         artifact = await app.DATABASE.get_artifact_by_id(artifact_id, organization_id)
         if not artifact:
             return
-        # Fire and forget
-        aio_task = asyncio.create_task(app.STORAGE.store_artifact(artifact, data))
-
         if not artifact[primary_key]:
             raise ValueError(f"{primary_key} is required to update artifact data.")
-        self.upload_aiotasks_map[artifact[primary_key]].append(aio_task)
+        await self.upload_queue.enqueue(artifact, artifact[primary_key], data=data)
 
     async def retrieve_artifact(self, artifact: Artifact) -> bytes | None:
         return await app.STORAGE.retrieve_artifact(artifact)
@@ -284,27 +279,18 @@ class ArtifactManager:
         return await app.STORAGE.get_share_links(artifacts)
 
     async def wait_for_upload_aiotasks(self, primary_keys: list[str]) -> None:
-        try:
-            st = time.time()
-            async with asyncio.timeout(30):
-                await asyncio.gather(
-                    *[
-                        aio_task
-                        for primary_key in primary_keys
-                        for aio_task in self.upload_aiotasks_map[primary_key]
-                        if not aio_task.done()
-                    ]
-                )
+        st = time.time()
+        timeout = settings.ARTIFACT_UPLOAD_WAIT_TIMEOUT_SECONDS
+        if await self.upload_queue.wait(primary_keys, timeout=timeout):
             LOG.info(
                 f"S3 upload aio tasks for primary_keys={primary_keys} completed in {time.time() - st:.2f}s",
                 primary_keys=primary_keys,
                 duration=time.time() - st,
             )
-        except asyncio.TimeoutError:
-            LOG.error(
-                f"Timeout (30s) while waiting for upload aio tasks for primary_keys={primary_keys}",
+        else:
+            # the uploads go on in the background
+            LOG.warning(
+                f"Timeout ({timeout}s) while waiting for upload aio tasks for primary_keys={primary_keys}",
                 primary_keys=primary_keys,
+                pending_uploads=[self.upload_queue.pending_count(primary_key) for primary_key in primary_keys],
             )
-
-        for primary_key in primary_keys:
-            del self.upload_aiotasks_map[primary_key]
@@ -48,6 +48,7 @@ class ArtifactType(StrEnum):
     # Debugging
     TRACE = "trace"
     HAR = "har"
+    STEP_PROFILE = "step_profile"
 
 
 class Artifact(BaseModel):
@@ -31,6 +31,7 @@ FILE_EXTENTSION_MAP: dict[ArtifactType, str] = {
     ArtifactType.TRACE: "zip",
     ArtifactType.HAR: "har",
     ArtifactType.HASHED_HREF_MAP: "json",
+    ArtifactType.STEP_PROFILE: "json",
     # DEPRECATED: we're using CSS selector map now
     ArtifactType.VISIBLE_ELEMENTS_ID_XPATH_MAP: "json",
 }
@@ -77,6 +78,17 @@ class BaseStorage(ABC):
     async def retrieve_artifact(self, artifact: Artifact) -> bytes | None:
         pass
 
+    @abstractmethod
+    async def archive_artifact(self, artifact: Artifact) -> str | None:
+        """
+        Move the artifact file under the archive prefix of the storage. Returns the new uri, None if it failed.
+        """
+        pass
+
+    @abstractmethod
+    async def delete_artifacts(self, artifacts: list[Artifact]) -> None:
+        pass
+
     @abstractmethod
     async def get_share_link(self, artifact: Artifact) -> str | None:
         pass
@@ -107,6 +107,30 @@ class LocalStorage(BaseStorage):
             )
             return None
 
+    async def archive_artifact(self, artifact: Artifact) -> str | None:
+        file_path = None
+        try:
+            file_path = Path(parse_uri_to_path(artifact.uri))
+            archive_path = Path(self.artifact_path) / settings.ARTIFACT_ARCHIVE_PREFIX
+            archive_path = archive_path / file_path.relative_to(self.artifact_path)
+            self._create_directories_if_not_exists(archive_path)
+            file_path.replace(archive_path)
+            return f"file://{archive_path}"
+        except Exception:
+            LOG.exception(
+                "Failed to archive local artifact.",
+                file_path=file_path,
+                artifact=artifact,
+            )
+            return None
+
+    async def delete_artifacts(self, artifacts: list[Artifact]) -> None:
+        for artifact in artifacts:
+            try:
+                Path(parse_uri_to_path(artifact.uri)).unlink(missing_ok=True)
+            except Exception:
+                LOG.exception("Failed to delete local artifact.", artifact=artifact)
+
     async def get_share_link(self, artifact: Artifact) -> str:
         return artifact.uri
 
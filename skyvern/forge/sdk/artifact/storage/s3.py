@@ -6,7 +6,8 @@ import structlog
 
 from skyvern.config import settings
 from skyvern.constants import DOWNLOAD_FILE_PREFIX
-from skyvern.forge.sdk.api.aws import AsyncAWSClient
+from skyvern.exceptions import ArtifactUploadFailed
+from skyvern.forge.sdk.api.aws import AsyncAWSClient, S3Uri
 from skyvern.forge.sdk.api.files import (
     calculate_sha256_for_file,
     create_named_temporary_file,
@@ -67,11 +68,25 @@ class S3Storage(BaseStorage):
         return f"s3://{self.bucket}/{settings.ENV}/ai_suggestions/{ai_suggestion.ai_suggestion_id}/{datetime.utcnow().isoformat()}_{artifact_id}_{artifact_type}.{file_ext}"
 
     async def store_artifact(self, artifact: Artifact, data: bytes) -> None:
-        await self.async_client.upload_file(artifact.uri, data)
+        if not await self.async_client.upload_file(artifact.uri, data):
+            raise ArtifactUploadFailed(artifact.uri)
 
     async def retrieve_artifact(self, artifact: Artifact) -> bytes | None:
         return await self.async_client.download_file(artifact.uri)
 
+    async def archive_artifact(self, artifact: Artifact) -> str | None:
+        parsed_uri = S3Uri(artifact.uri)
+        archive_uri = f"s3://{parsed_uri.bucket}/{settings.ARTIFACT_ARCHIVE_PREFIX}/{parsed_uri.key}"
+        if not await self.async_client.copy_file(
+            artifact.uri, archive_uri, storage_class=settings.ARTIFACT_ARCHIVE_S3_STORAGE_CLASS
+        ):
+            return None
+        await self.async_client.delete_files([artifact.uri])
+        return archive_uri
+
+    async def delete_artifacts(self, artifacts: list[Artifact]) -> None:
+        await self.async_client.delete_files([artifact.uri for artifact in artifacts])
+
     async def get_share_link(self, artifact: Artifact) -> str | None:
         share_urls = await self.async_client.create_presigned_urls([artifact.uri])
         return share_urls[0] if share_urls else None
@@ -80,7 +95,7 @@ class S3Storage(BaseStorage):
         return await self.async_client.create_presigned_urls([artifact.uri for artifact in artifacts])
 
     async def store_artifact_from_path(self, artifact: Artifact, path: str) -> None:
-        await self.async_client.upload_file_from_path(artifact.uri, path)
+        await self.async_client.upload_file_from_path(artifact.uri, path, raise_exception=True)
 
     async def save_streaming_file(self, organization_id: str, file_name: str) -> None:
         from_path = f"{get_skyvern_temp_dir()}/{organization_id}/{file_name}"
@@ -0,0 +1,298 @@
+import asyncio
+import contextvars
+import json
+import os
+import random
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from skyvern.config import settings
+from skyvern.forge import app
+from skyvern.forge.sdk.artifact.models import Artifact
+
+LOG = structlog.get_logger()
+
+SPILL_METADATA_SUFFIX = ".json"
+SPILL_DATA_SUFFIX = ".data"
+SPILL_CLAIMED_SUFFIX = ".claimed"
+# a spilled upload claimed by a process that died is replayed again after this delay
+SPILL_CLAIM_EXPIRATION_SECONDS = 60 * 60
+
+
+@dataclass
+class UploadJob:
+    artifact: Artifact
+    primary_key: str
+    data: bytes | None = None
+    path: str | None = None
+    # id of the spilled upload this job replays. its files are deleted once uploaded
+    spill_id: str | None = None
+    # whether the job counts in the pending uploads of its primary key
+    tracked: bool = True
+
+    @property
+    def size(self) -> int:
+        return len(self.data) if self.data else 0
+
+    def log_fields(self) -> dict[str, Any]:
+        # the workers run outside of the context of the task that enqueued the upload
+        return {
+            "artifact_id": self.artifact.artifact_id,
+            "organization_id": self.artifact.organization_id,
+            "task_id": self.artifact.task_id,
+            "step_id": self.artifact.step_id,
+            "workflow_run_id": self.artifact.workflow_run_id,
+        }
+
+
+class ArtifactUploadQueue:
+    """
+    Upload the artifacts with a bounded pool of workers.
+
+    The uploads wait in a queue bounded in count and in bytes. The uploads overflowing the queue, and the ones still
+    failing after their retries, are spilled to ARTIFACT_UPLOAD_SPILL_PATH and replayed from there in the background,
+    including the ones spilled by a previous process.
+
+    The pending uploads are counted per primary key (task, workflow run, ...) and a key is dropped as soon as its
+    uploads are done, whether anyone waits for them or not.
+    """
+
+    def __init__(
+        self,
+        concurrency: int | None = None,
+        max_queue_size: int | None = None,
+        max_queue_bytes: int | None = None,
+        max_attempts: int | None = None,
+        spill_path: str | None = None,
+    ) -> None:
+        self.concurrency = concurrency or settings.ARTIFACT_UPLOAD_CONCURRENCY
+        self.max_queue_size = max_queue_size or settings.ARTIFACT_UPLOAD_QUEUE_SIZE
+        self.max_queue_bytes = max_queue_bytes or settings.ARTIFACT_UPLOAD_QUEUE_MAX_BYTES
+        self.max_attempts = max_attempts or settings.ARTIFACT_UPLOAD_MAX_ATTEMPTS
+        self.spill_path = Path(spill_path or settings.ARTIFACT_UPLOAD_SPILL_PATH)
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.queue: asyncio.Queue[UploadJob] | None = None
+        self.queued_bytes = 0
+        self.workers: list[asyncio.Task] = []
+        self.replay_task: asyncio.Task | None = None
+        # primary key -> number of uploads not done yet, and the event set once they are done
+        self.pending_counts: dict[str, int] = {}
+        self.done_events: dict[str, asyncio.Event] = {}
+
+    def _ensure_started(self) -> asyncio.Queue[UploadJob]:
+        loop = asyncio.get_running_loop()
+        if self.queue is None or self.loop is not loop:
+            # the workers of a previous event loop are gone with it
+            self.loop = loop
+            self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self.queued_bytes = 0
+            self.pending_counts = {}
+            self.done_events = {}
+            # the workers outlive the task that starts them, they don't take its context (and its skyvern context log)
+            self.workers = [
+                asyncio.create_task(self._work(), context=contextvars.Context()) for _ in range(self.concurrency)
+            ]
+            self.replay_task = asyncio.create_task(self._replay_spilled_uploads(), context=contextvars.Context())
+        return self.queue
+
+    def pending_count(self, primary_key: str | None = None) -> int:
+        if primary_key is not None:
+            return self.pending_counts.get(primary_key, 0)
+        return sum(self.pending_counts.values())
+
+    async def enqueue(
+        self,
+        artifact: Artifact,
+        primary_key: str,
+        data: bytes | None = None,
+        path: str | None = None,
+    ) -> None:
+        queue = self._ensure_started()
+        job = UploadJob(artifact=artifact, primary_key=primary_key, data=data, path=path)
+        self.pending_counts[primary_key] = self.pending_counts.get(primary_key, 0) + 1
+        if queue.full() or self.queued_bytes + job.size > self.max_queue_bytes:
+            LOG.warning(
+                "Artifact upload queue is full, spilling the upload to disk",
+                artifact_id=artifact.artifact_id,
+                queue_size=queue.qsize(),
+                queued_bytes=self.queued_bytes,
+            )
+            await self._spill(job)
+            self._mark_done(job)
+            return
+        self.queued_bytes += job.size
+        queue.put_nowait(job)
+
+    async def wait(self, primary_keys: list[str], timeout: float) -> bool:
+        """
+        Wait for the pending uploads of the primary keys. Returns False on timeout, the uploads go on in the background.
+        """
+        events = []
+        for primary_key in primary_keys:
+            if self.pending_counts.get(primary_key):
+                events.append(self.done_events.setdefault(primary_key, asyncio.Event()))
+        if not events:
+            return True
+        try:
+            async with asyncio.timeout(timeout):
+                await asyncio.gather(*[event.wait() for event in events])
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _mark_done(self, job: UploadJob) -> None:
+        if not job.tracked:
+            return
+        pending_count = self.pending_counts.get(job.primary_key, 0) - 1
+        if pending_count > 0:
+            self.pending_counts[job.primary_key] = pending_count
+            return
+        self.pending_counts.pop(job.primary_key, None)
+        if event := self.done_events.pop(job.primary_key, None):
+            event.set()
+
+    async def _work(self) -> None:
+        assert self.queue is not None
+        queue = self.queue
+        while True:
+            job = await queue.get()
+            self.queued_bytes -= job.size
+            try:
+                await self._upload(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                LOG.exception("Unexpected error in the artifact upload worker", **job.log_fields())
+            finally:
+                self._mark_done(job)
+                queue.task_done()
+
+    async def _upload(self, job: UploadJob) -> None:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                if job.data is not None:
+                    await app.STORAGE.store_artifact(job.artifact, job.data)
+                elif job.path is not None:
+                    await app.STORAGE.store_artifact_from_path(job.artifact, job.path)
+                if job.spill_id:
+                    await asyncio.to_thread(self._delete_spilled_upload, job.spill_id)
+                return
+            except Exception:
+                if attempt == self.max_attempts:
+                    break
+                # exponential backoff with full jitter
+                delay = random.uniform(0, min(settings.ARTIFACT_UPLOAD_MAX_RETRY_DELAY_SECONDS, 2**attempt))
+                LOG.warning(
+                    "Failed to upload the artifact, retrying",
+                    **job.log_fields(),
+                    attempt=attempt,
+                    retry_in_seconds=delay,
+                    exc_info=True,
+                )
+                await asyncio.sleep(delay)
+
+        LOG.error(
+            "Failed to upload the artifact, spilling it to disk to replay it later",
+            **job.log_fields(),
+            attempts=self.max_attempts,
+        )
+        if job.spill_id:
+            await asyncio.to_thread(self._release_spilled_upload, job.spill_id)
+        else:
+            await self._spill(job)
+
+    async def _spill(self, job: UploadJob) -> None:
+        try:
+            await asyncio.to_thread(self._write_spilled_upload, job)
+        except Exception:
+            LOG.exception("Failed to spill the artifact upload to disk", **job.log_fields())
+
+    def _write_spilled_upload(self, job: UploadJob) -> None:
+        self.spill_path.mkdir(parents=True, exist_ok=True)
+        spill_id = f"{int(time.time() * 1000)}_{uuid.uuid4().hex}"
+        data_path = self.spill_path / f"{spill_id}{SPILL_DATA_SUFFIX}"
+        # the file of a path artifact may be deleted before the replay
+        if job.data is not None:
+            data_path.write_bytes(job.data)
+        elif job.path is not None:
+            shutil.copyfile(job.path, data_path)
+        metadata = {"artifact": job.artifact.model_dump(mode="json"), "primary_key": job.primary_key}
+        # the metadata is written last, a spilled upload is only replayed once complete
+        tmp_metadata_path = self.spill_path / f"{spill_id}{SPILL_METADATA_SUFFIX}.tmp"
+        tmp_metadata_path.write_text(json.dumps(metadata))
+        os.rename(tmp_metadata_path, self.spill_path / f"{spill_id}{SPILL_METADATA_SUFFIX}")
+
+    def _claim_spilled_uploads(self, limit: int) -> list[UploadJob]:
+        if not self.spill_path.is_dir():
+            return []
+        now = time.time()
+        for claimed_path in self.spill_path.glob(f"*{SPILL_METADATA_SUFFIX}{SPILL_CLAIMED_SUFFIX}"):
+            try:
+                if now - claimed_path.stat().st_mtime > SPILL_CLAIM_EXPIRATION_SECONDS:
+                    os.rename(claimed_path, str(claimed_path).removesuffix(SPILL_CLAIMED_SUFFIX))
+            except FileNotFoundError:
+                pass
+
+        jobs: list[UploadJob] = []
+        for metadata_path in sorted(self.spill_path.glob(f"*{SPILL_METADATA_SUFFIX}")):
+            if len(jobs) >= limit:
+                break
+            claimed_path = Path(f"{metadata_path}{SPILL_CLAIMED_SUFFIX}")
+            try:
+                # the rename is atomic, only one process replays a spilled upload
+                os.rename(metadata_path, claimed_path)
+                # refresh the mtime so the claim doesn't expire while the upload is retried
+                os.utime(claimed_path)
+                metadata = json.loads(claimed_path.read_text())
+            except FileNotFoundError:
+                continue
+            spill_id = metadata_path.name.removesuffix(SPILL_METADATA_SUFFIX)
+            jobs.append(
+                UploadJob(
+                    artifact=Artifact.model_validate(metadata["artifact"]),
+                    primary_key=metadata["primary_key"],
+                    path=str(self.spill_path / f"{spill_id}{SPILL_DATA_SUFFIX}"),
+                    spill_id=spill_id,
+                    tracked=False,
+                )
+            )
+        return jobs
+
+    def _release_spilled_upload(self, spill_id: str) -> None:
+        claimed_path = self.spill_path / f"{spill_id}{SPILL_METADATA_SUFFIX}{SPILL_CLAIMED_SUFFIX}"
+        try:
+            os.rename(claimed_path, self.spill_path / f"{spill_id}{SPILL_METADATA_SUFFIX}")
+        except FileNotFoundError:
+            pass
+
+    def _delete_spilled_upload(self, spill_id: str) -> None:
+        for suffix in (f"{SPILL_METADATA_SUFFIX}{SPILL_CLAIMED_SUFFIX}", SPILL_DATA_SUFFIX):
+            (self.spill_path / f"{spill_id}{suffix}").unlink(missing_ok=True)
+
+    async def _replay_spilled_uploads(self) -> None:
+        assert self.queue is not None
+        queue = self.queue
+        while True:
+            await asyncio.sleep(settings.ARTIFACT_UPLOAD_SPILL_REPLAY_INTERVAL_SECONDS)
+            # replay into the free half of the queue, leaving room for the new uploads
+            limit = self.max_queue_size // 2 - queue.qsize()
+            if limit <= 0:
+                continue
+            try:
+                jobs = await asyncio.to_thread(self._claim_spilled_uploads, limit)
+            except Exception:
+                LOG.exception("Failed to load the spilled artifact uploads")
+                continue
+            if jobs:
+                LOG.info("Replaying the spilled artifact uploads", count=len(jobs))
+            for job in jobs:
+                if not queue.full():
+                    queue.put_nowait(job)
+                elif job.spill_id is not None:
+                    await asyncio.to_thread(self._release_spilled_upload, job.spill_id)
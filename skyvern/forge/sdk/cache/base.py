@@ -14,3 +14,7 @@ class BaseCache(ABC):
     @abstractmethod
     async def get(self, key: str) -> Any:
         pass
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        pass
@@ -18,3 +18,6 @@ class LocalCache(BaseCache):
 
     async def set(self, key: str, value: Any, ex: Union[int, timedelta, None] = CACHE_EXPIRE_TIME) -> None:
         self.cache[key] = value
+
+    async def delete(self, key: str) -> None:
+        self.cache.pop(key, None)
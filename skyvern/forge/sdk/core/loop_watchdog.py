@@ -0,0 +1,191 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from types import FrameType
+from typing import Any, Callable
+
+import structlog
+
+from skyvern.config import settings
+from skyvern.forge.sdk.core import metrics
+
+LOG = structlog.get_logger()
+
+MAX_BLOCKING_CALLS = 100
+MAX_STACK_DEPTH = 50
+
+
+@dataclass
+class BlockingCall:
+    # how long the event loop didn't run any callback. 0 until the loop runs again
+    blocked_ms: float
+    stack: list[str]
+    asyncio_task_name: str | None = None
+    task_id: str | None = None
+    step_id: str | None = None
+    workflow_run_id: str | None = None
+    detected_at: str = field(default_factory=lambda: datetime.now(UTC).isoformat())
+
+
+def _find_run_ids(frame: FrameType | None) -> dict[str, str]:
+    """
+    Ids of the run being executed, from the `task`, `step` and `workflow_run` locals of the frames in the stack.
+    """
+    run_ids: dict[str, str] = {}
+    while frame is not None:
+        frame_locals = frame.f_locals
+        for local_name, id_name in (("task", "task_id"), ("step", "step_id"), ("workflow_run", "workflow_run_id")):
+            value = getattr(frame_locals.get(local_name), id_name, None)
+            if isinstance(value, str):
+                run_ids.setdefault(id_name, value)
+        frame = frame.f_back
+    return run_ids
+
+
+class LoopWatchdog:
+    """
+    Detect the calls blocking the event loop.
+
+    A heartbeat task measures how late the loop wakes it up and reports the lag to the metrics. A thread checks the
+    heartbeat and, once the loop is blocked for longer than `threshold_ms`, captures the stack of the loop thread, i.e.
+    the blocking call, with the ids of the task and step it runs for.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float | None = None,
+        sample_interval_seconds: float | None = None,
+        max_blocking_calls: int = MAX_BLOCKING_CALLS,
+    ) -> None:
+        self.threshold_seconds = (threshold_ms or settings.EVENT_LOOP_WATCHDOG_THRESHOLD_MS) / 1000
+        self.sample_interval_seconds = sample_interval_seconds or settings.EVENT_LOOP_LAG_SAMPLE_INTERVAL_SECONDS
+        self.blocking_calls: deque[BlockingCall] = deque(maxlen=max_blocking_calls)
+        self.blocking_call_count = 0
+        self.max_lag_seconds = 0.0
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.loop_thread_id: int | None = None
+        # monotonic time the loop is expected to run the heartbeat again
+        self.next_heartbeat_at = 0.0
+        self.pending_blocking_call: BlockingCall | None = None
+        self.heartbeat_task: asyncio.Task | None = None
+        self.watch_thread: threading.Thread | None = None
+        self.stop_event = threading.Event()
+
+    def start(self) -> None:
+        """
+        Start watching the running event loop. Must be called from the loop.
+        """
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.next_heartbeat_at = time.monotonic() + self.sample_interval_seconds
+        self.stop_event.clear()
+        self.heartbeat_task = asyncio.create_task(self._heartbeat())
+        self.watch_thread = threading.Thread(target=self._watch, name="event-loop-watchdog", daemon=True)
+        self.watch_thread.start()
+        LOG.info(
+            "Event loop watchdog started",
+            threshold_ms=self.threshold_seconds * 1000,
+            sample_interval_seconds=self.sample_interval_seconds,
+        )
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+            self.heartbeat_task = None
+        if self.watch_thread:
+            self.watch_thread.join(timeout=self.sample_interval_seconds)
+            self.watch_thread = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self.next_heartbeat_at = time.monotonic() + self.sample_interval_seconds
+            await asyncio.sleep(self.sample_interval_seconds)
+            lag_seconds = max(0.0, time.monotonic() - self.next_heartbeat_at)
+            metrics.EVENT_LOOP_LAG.observe(lag_seconds)
+            self.max_lag_seconds = max(self.max_lag_seconds, lag_seconds)
+            blocking_call = self.pending_blocking_call
+            self.pending_blocking_call = None
+            # a stack captured while the loop was waking up isn't a blocking call
+            if blocking_call and lag_seconds >= self.threshold_seconds:
+                blocking_call.blocked_ms = lag_seconds * 1000
+                self.blocking_calls.append(blocking_call)
+                self.blocking_call_count += 1
+                LOG.warning(
+                    "Event loop was blocked",
+                    blocked_ms=blocking_call.blocked_ms,
+                    asyncio_task_name=blocking_call.asyncio_task_name,
+                    task_id=blocking_call.task_id,
+                    step_id=blocking_call.step_id,
+                    workflow_run_id=blocking_call.workflow_run_id,
+                    stack="".join(blocking_call.stack),
+                )
+
+    def _watch(self) -> None:
+        check_interval_seconds = min(self.sample_interval_seconds, self.threshold_seconds) / 2
+        while not self.stop_event.wait(check_interval_seconds):
+            if self.pending_blocking_call is not None:
+                continue
+            if time.monotonic() - self.next_heartbeat_at < self.threshold_seconds:
+                continue
+            try:
+                self.pending_blocking_call = self._capture_blocking_call()
+            except Exception:
+                LOG.warning("Failed to capture the blocking call", exc_info=True)
+
+    def _capture_blocking_call(self) -> BlockingCall | None:
+        if self.loop_thread_id is None:
+            return None
+        frame = sys._current_frames().get(self.loop_thread_id)
+        if frame is None:
+            return None
+        stack = traceback.format_stack(frame, limit=MAX_STACK_DEPTH)
+        run_ids = _find_run_ids(frame)
+        asyncio_task = asyncio.current_task(self.loop) if self.loop else None
+        return BlockingCall(
+            blocked_ms=0.0,
+            stack=stack,
+            asyncio_task_name=asyncio_task.get_name() if asyncio_task else None,
+            task_id=run_ids.get("task_id"),
+            step_id=run_ids.get("step_id"),
+            workflow_run_id=run_ids.get("workflow_run_id"),
+        )
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold_seconds * 1000,
+            "max_lag_ms": self.max_lag_seconds * 1000,
+            "blocking_call_count": self.blocking_call_count,
+            "blocking_calls": [asdict(blocking_call) for blocking_call in self.blocking_calls],
+        }
+
+
+_watchdog: LoopWatchdog | None = None
+
+
+def get_watchdog() -> LoopWatchdog | None:
+    return _watchdog
+
+
+def start_event_loop_monitoring() -> Callable[[], Any] | None:
+    """
+    Start the watchdog when ENABLE_EVENT_LOOP_WATCHDOG is on, or only the lag sampling of the metrics when
+    ENABLE_METRICS_ENDPOINT is on. Returns the function stopping it.
+    """
+    global _watchdog
+    if settings.ENABLE_EVENT_LOOP_WATCHDOG:
+        watchdog = LoopWatchdog()
+        watchdog.start()
+        _watchdog = watchdog
+        return watchdog.stop
+    if settings.ENABLE_METRICS_ENDPOINT:
+        lag_monitor_task = asyncio.create_task(
+            metrics.monitor_event_loop_lag(settings.EVENT_LOOP_LAG_SAMPLE_INTERVAL_SECONDS)
+        )
+        return lag_monitor_task.cancel
+    return None
@@ -0,0 +1,335 @@
+import asyncio
+import math
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+import structlog
+
+LOG = structlog.get_logger()
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LLM_LATENCY_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+STEP_DURATION_BUCKETS = (1.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+LabelValues = tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels.items()) + "}"
+
+
+class Metric(ABC):
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        REGISTRY.register(self)
+
+    def _label_values(self, labelvalues: tuple[str, ...], labelkwargs: dict[str, str]) -> LabelValues:
+        if labelkwargs:
+            labelvalues = tuple(str(labelkwargs[name]) for name in self.labelnames)
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects the labels {self.labelnames}")
+        return tuple(str(value) for value in labelvalues)
+
+    @abstractmethod
+    def collect(self) -> list[tuple[str, dict[str, str], float]]:
+        pass
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for name, labels, value in self.collect():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, *labelvalues: str, **labelkwargs: str) -> None:
+        key = self._label_values(labelvalues, labelkwargs)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def collect(self) -> list[tuple[str, dict[str, str], float]]:
+        return [
+            (f"{self.name}_total", dict(zip(self.labelnames, key)), value) for key, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Metric):
+    """
+    Gauge set by the code, or read from `function` at every scrape when it's given. The function returns the value,
+    or the value of every label values when the gauge has labels.
+    """
+
+    metric_type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        function: Callable[[], float | dict[LabelValues, float]] | None = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[LabelValues, float] = {}
+        self.function = function
+
+    def set(self, value: float, *labelvalues: str, **labelkwargs: str) -> None:
+        self.values[self._label_values(labelvalues, labelkwargs)] = value
+
+    def inc(self, amount: float = 1, *labelvalues: str, **labelkwargs: str) -> None:
+        key = self._label_values(labelvalues, labelkwargs)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, *labelvalues: str, **labelkwargs: str) -> None:
+        self.inc(-amount, *labelvalues, **labelkwargs)
+
+    @contextmanager
+    def track_inprogress(self, *labelvalues: str, **labelkwargs: str) -> Iterator[None]:
+        self.inc(1, *labelvalues, **labelkwargs)
+        try:
+            yield
+        finally:
+            self.dec(1, *labelvalues, **labelkwargs)
+
+    def collect(self) -> list[tuple[str, dict[str, str], float]]:
+        values = self.values
+        if self.function:
+            try:
+                result = self.function()
+            except Exception:
+                LOG.warning("Failed to collect the gauge", metric=self.name, exc_info=True)
+                return []
+            values = result if isinstance(result, dict) else {(): result}
+        return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> (bucket counts, sum)
+        self.values: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labelvalues: str, **labelkwargs: str) -> None:
+        key = self._label_values(labelvalues, labelkwargs)
+        if key not in self.values:
+            self.values[key] = ([0] * len(self.buckets), [0.0])
+        bucket_counts, total = self.values[key]
+        for index, upper_bound in enumerate(self.buckets):
+            if value <= upper_bound:
+                bucket_counts[index] += 1
+                break
+        total[0] += value
+
+    @contextmanager
+    def time(self, *labelvalues: str, **labelkwargs: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues, **labelkwargs)
+
+    def collect(self) -> list[tuple[str, dict[str, str], float]]:
+        samples: list[tuple[str, dict[str, str], float]] = []
+        for key, (bucket_counts, total) in sorted(self.values.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative_count = 0
+            for upper_bound, count in zip(self.buckets, bucket_counts):
+                cumulative_count += count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(upper_bound)}, cumulative_count))
+            samples.append((f"{self.name}_sum", labels, total[0]))
+            samples.append((f"{self.name}_count", labels, cumulative_count))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Metrics of this process, rendered in the Prometheus text exposition format.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _count_active_browser_states() -> float:
+    from skyvern.forge import app
+
+    # the browser state of a workflow run is shared by the tasks of its blocks
+    return len({id(browser_state) for browser_state in app.BROWSER_MANAGER.pages.values()})
+
+
+def _count_pending_artifact_uploads() -> float:
+    from skyvern.forge import app
+
+    return app.ARTIFACT_MANAGER.upload_queue.pending_count()
+
+
+def _get_db_pool_usage() -> dict[LabelValues, float]:
+    from skyvern.forge import app
+    from skyvern.forge.sdk.db.stats import get_pool_stats
+
+    usage: dict[LabelValues, float] = {}
+    engines = [("primary", app.DATABASE.engine)]
+    if app.DATABASE.replica_engine is not None:
+        engines.append(("replica", app.DATABASE.replica_engine))
+    for pool_name, engine in engines:
+        pool_stats = get_pool_stats(engine)
+        for state in ("size", "checked_in", "checked_out", "overflow"):
+            if state in pool_stats:
+                usage[(pool_name, state)] = pool_stats[state]
+    return usage
+
+
+ACTIVE_BROWSER_STATES = Gauge(
+    "skyvern_active_browser_states",
+    "Browser states open in this process.",
+    function=_count_active_browser_states,
+)
+PENDING_ARTIFACT_UPLOADS = Gauge(
+    "skyvern_pending_artifact_uploads",
+    "Artifact uploads started and not finished yet.",
+    function=_count_pending_artifact_uploads,
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "skyvern_db_pool_connections",
+    "Connections of the database pools by state.",
+    labelnames=("pool", "state"),
+    function=_get_db_pool_usage,
+)
+LLM_IN_FLIGHT_REQUESTS = Gauge(
+    "skyvern_llm_in_flight_requests",
+    "LLM requests waiting for a response.",
+    labelnames=("llm_key",),
+)
+LLM_REQUEST_DURATION = Histogram(
+    "skyvern_llm_request_duration_seconds",
+    "Duration of the LLM API handler calls, including the artifacts and the response parsing.",
+    labelnames=("llm_key", "prompt_name"),
+    buckets=LLM_LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "skyvern_llm_tokens",
+    "Tokens used by the LLM requests.",
+    labelnames=("llm_key", "token_type"),
+)
+STEP_DURATION = Histogram(
+    "skyvern_step_duration_seconds",
+    "Duration of the finished steps.",
+    labelnames=("engine", "status"),
+    buckets=STEP_DURATION_BUCKETS,
+)
+ELEMENT_TREE_PRUNED_TOKENS = Counter(
+    "skyvern_element_tree_pruned_tokens",
+    "Tokens saved by the element tree pruning rules, estimated from the characters removed.",
+    labelnames=("rule",),
+)
+EVENT_LOOP_LAG = Histogram(
+    "skyvern_event_loop_lag_seconds",
+    "Delay of the event loop in running a callback scheduled on time.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+def record_llm_tokens(
+    llm_key: str | None,
+    input_tokens: int | None = None,
+    output_tokens: int | None = None,
+    reasoning_tokens: int | None = None,
+    cached_tokens: int | None = None,
+) -> None:
+    llm_key = llm_key or ""
+    for token_type, token_count in (
+        ("input", input_tokens),
+        ("output", output_tokens),
+        ("reasoning", reasoning_tokens),
+        ("cached", cached_tokens),
+    ):
+        if token_count:
+            LLM_TOKENS.inc(token_count, llm_key=llm_key, token_type=token_type)
+
+
+async def monitor_event_loop_lag(interval_seconds: float = 0.5) -> None:
+    """
+    Sample the event loop lag until cancelled: the time a sleep of `interval_seconds` overshoots.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval_seconds)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - start - interval_seconds))
+
+
+async def _handle_metrics_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = await reader.readline()
+        # drain the headers
+        while await reader.readline() not in (b"\r\n", b"\n", b""):
+            pass
+        method, path = (request_line.decode("latin-1").split(" ") + ["", ""])[:2]
+        if method == "GET" and path.split("?")[0] == "/metrics":
+            status, content_type, body = "200 OK", CONTENT_TYPE, REGISTRY.render().encode("utf-8")
+        else:
+            status, content_type, body = "404 Not Found", "text/plain", b"Not Found"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1")
+            + body
+        )
+        await writer.drain()
+    except Exception:
+        LOG.warning("Failed to serve the metrics", exc_info=True)
+    finally:
+        writer.close()
+
+
+async def serve_metrics(port: int, host: str = "0.0.0.0") -> None:
+    """
+    Serve /metrics over plain http until cancelled, for the processes without an api server like the run job worker.
+    """
+    server = await asyncio.start_server(_handle_metrics_request, host, port)
+    LOG.info("Serving the metrics", host=host, port=port)
+    async with server:
+        await server.serve_forever()
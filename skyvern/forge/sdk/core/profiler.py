@@ -0,0 +1,174 @@
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Iterator, TypeVar
+
+import structlog
+
+from skyvern.config import settings
+
+LOG = structlog.get_logger()
+
+T = TypeVar("T")
+
+# None until the first profiled step, False when the spans aren't exported
+_otel_tracer: Any = None
+
+
+def _get_otel_tracer() -> Any:
+    global _otel_tracer
+    if _otel_tracer is not None:
+        return _otel_tracer or None
+    _otel_tracer = False
+    if not settings.OTEL_EXPORTER_OTLP_ENDPOINT:
+        return None
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        LOG.warning("OTEL_EXPORTER_OTLP_ENDPOINT is set but opentelemetry isn't installed, not exporting the spans")
+        return None
+
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.OTEL_EXPORTER_OTLP_ENDPOINT)))
+    trace.set_tracer_provider(provider)
+    _otel_tracer = trace.get_tracer("skyvern.profiler")
+    return _otel_tracer
+
+
+class StepProfile:
+    """
+    Time spent by a step in every phase. The phases nest, e.g. the db writes of an action are also counted in the
+    action, and the concurrent spans of a phase add up, so the phases don't sum up to the step duration.
+    """
+
+    def __init__(self, task_id: str | None = None, step_id: str | None = None) -> None:
+        self.task_id = task_id
+        self.step_id = step_id
+        self.started_at = time.perf_counter()
+        self.finished_at: float | None = None
+        # phase -> [count, total seconds, max seconds]
+        self.phases: dict[str, list[float]] = {}
+
+    def record(self, phase: str, duration_seconds: float) -> None:
+        if timing := self.phases.get(phase):
+            timing[0] += 1
+            timing[1] += duration_seconds
+            timing[2] = max(timing[2], duration_seconds)
+        else:
+            self.phases[phase] = [1, duration_seconds, duration_seconds]
+
+    def finish(self) -> None:
+        self.finished_at = time.perf_counter()
+
+    def to_dict(self) -> dict[str, Any]:
+        finished_at = self.finished_at or time.perf_counter()
+        return {
+            "total_ms": round((finished_at - self.started_at) * 1000, 1),
+            "phases": {
+                phase: {
+                    "count": int(count),
+                    "total_ms": round(total_seconds * 1000, 1),
+                    "max_ms": round(max_seconds * 1000, 1),
+                }
+                for phase, (count, total_seconds, max_seconds) in sorted(self.phases.items())
+            },
+        }
+
+
+_current_profile: ContextVar[StepProfile | None] = ContextVar("step_profile", default=None)
+
+
+class _Span:
+    __slots__ = ("phase", "profile", "start", "otel_span")
+
+    def __init__(self, phase: str, profile: StepProfile) -> None:
+        self.phase = phase
+        self.profile = profile
+        self.start = 0.0
+        self.otel_span: Any = None
+
+    def __enter__(self) -> "_Span":
+        if tracer := _get_otel_tracer():
+            self.otel_span = tracer.start_as_current_span(self.phase)
+            self.otel_span.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.profile.record(self.phase, time.perf_counter() - self.start)
+        if self.otel_span is not None:
+            self.otel_span.__exit__(*exc_info)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(phase: str) -> _Span | _NoopSpan:
+    """
+    Time the block in `phase` of the step being profiled. A no-op outside of a profiled step.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return _NOOP_SPAN
+    return _Span(phase, profile)
+
+
+def record(phase: str, duration_seconds: float) -> None:
+    if profile := _current_profile.get():
+        profile.record(phase, duration_seconds)
+
+
+def profiled(phase: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            if _current_profile.get() is None:
+                return await func(*args, **kwargs)
+            with span(phase):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def profile_step(task_id: str | None = None, step_id: str | None = None) -> Iterator[StepProfile | None]:
+    """
+    Profile everything running in the current context, and the tasks it starts, until the block exits.
+    Yields None when ENABLE_STEP_PROFILER is off.
+    """
+    if not settings.ENABLE_STEP_PROFILER:
+        yield None
+        return
+
+    profile = StepProfile(task_id=task_id, step_id=step_id)
+    token = _current_profile.set(profile)
+    otel_span = None
+    if tracer := _get_otel_tracer():
+        otel_span = tracer.start_as_current_span(
+            "step", attributes={"task_id": task_id or "", "step_id": step_id or ""}
+        )
+        otel_span.__enter__()
+    try:
+        yield profile
+    finally:
+        profile.finish()
+        if otel_span is not None:
+            otel_span.__exit__(None, None, None)
+        _current_profile.reset(token)
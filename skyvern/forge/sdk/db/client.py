@@ -3,9 +3,10 @@ from datetime import datetime, timedelta
 from typing import Any, List, Sequence
 
 import structlog
-from sqlalchemy import and_, delete, distinct, func, pool, select, tuple_, update
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy import and_, delete, distinct, func, or_, pool, select, tuple_, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from skyvern.config import settings
 from skyvern.exceptions import WorkflowParameterNotFound, WorkflowRunNotFound
@@ -22,11 +23,13 @@ from skyvern.forge.sdk.db.models import (
     BitwardenSensitiveInformationParameterModel,
     CredentialModel,
     CredentialParameterModel,
+    CronSchedulerLeaseModel,
     OrganizationAuthTokenModel,
     OrganizationBitwardenCollectionModel,
     OrganizationModel,
     OutputParameterModel,
     PersistentBrowserSessionModel,
+    RunJobModel,
     StepModel,
     TaskGenerationModel,
     TaskModel,
@@ -37,9 +40,20 @@ from skyvern.forge.sdk.db.models import (
     WorkflowModel,
     WorkflowParameterModel,
     WorkflowRunBlockModel,
+    WorkflowRunCheckpointLoopIterationModel,
+    WorkflowRunCheckpointModel,
     WorkflowRunModel,
     WorkflowRunOutputParameterModel,
     WorkflowRunParameterModel,
+    WorkflowScheduleFireModel,
+    WorkflowScheduleModel,
+)
+from skyvern.forge.sdk.db.routing import read_only, should_use_read_replica, track_primary_writes
+from skyvern.forge.sdk.db.stats import (
+    DBStats,
+    InstrumentedAsyncAdaptedQueuePool,
+    get_pool_stats,
+    instrument_db_methods,
 )
 from skyvern.forge.sdk.db.utils import (
     _custom_json_serializer,
@@ -59,6 +73,7 @@ from skyvern.forge.sdk.db.utils import (
     convert_to_workflow_run_output_parameter,
     convert_to_workflow_run_parameter,
 )
+from skyvern.forge.sdk.executor.scheduling import select_fair_run_jobs
 from skyvern.forge.sdk.log_artifacts import save_workflow_run_logs
 from skyvern.forge.sdk.models import Step, StepStatus
 from skyvern.forge.sdk.schemas.ai_suggestions import AISuggestion
@@ -66,13 +81,16 @@ from skyvern.forge.sdk.schemas.credentials import Credential, CredentialType
 from skyvern.forge.sdk.schemas.organization_bitwarden_collections import OrganizationBitwardenCollection
 from skyvern.forge.sdk.schemas.organizations import Organization, OrganizationAuthToken
 from skyvern.forge.sdk.schemas.persistent_browser_sessions import PersistentBrowserSession
+from skyvern.forge.sdk.schemas.run_jobs import RunJob, RunJobStatus, RunJobType
 from skyvern.forge.sdk.schemas.runs import Run
 from skyvern.forge.sdk.schemas.task_generations import TaskGeneration
 from skyvern.forge.sdk.schemas.task_v2 import TaskV2, TaskV2Status, Thought, ThoughtType
 from skyvern.forge.sdk.schemas.tasks import OrderBy, SortDirection, Task, TaskStatus
 from skyvern.forge.sdk.schemas.totp_codes import TOTPCode
 from skyvern.forge.sdk.schemas.workflow_runs import WorkflowRunBlock
+from skyvern.forge.sdk.schemas.workflow_schedules import CronSchedulerLease, WorkflowSchedule, WorkflowScheduleFire
 from skyvern.forge.sdk.workflow.models.block import BlockStatus, BlockType
+from skyvern.forge.sdk.workflow.models.checkpoint import WorkflowRunCheckpoint
 from skyvern.forge.sdk.workflow.models.parameter import (
     AWSSecretParameter,
     BitwardenCreditCardDataParameter,
@@ -97,25 +115,87 @@ from skyvern.webeye.actions.models import AgentStepOutput
 
 LOG = structlog.get_logger()
 
-DB_CONNECT_ARGS: dict[str, Any] = {}
 
-if "postgresql+psycopg" in settings.DATABASE_STRING:
-    DB_CONNECT_ARGS = {"options": f"-c statement_timeout={settings.DATABASE_STATEMENT_TIMEOUT_MS}"}
-elif "postgresql+asyncpg" in settings.DATABASE_STRING:
-    DB_CONNECT_ARGS = {"server_settings": {"statement_timeout": str(settings.DATABASE_STATEMENT_TIMEOUT_MS)}}
+def create_db_engine(database_string: str, stats: DBStats) -> AsyncEngine:
+    """
+    Create the async engine with the pool and prepared statement settings.
+    Pool sizing only applies to postgres; sqlite keeps the pool sqlalchemy picks for it.
+    """
+    url = make_url(database_string)
+    # the connect args depend on the driver of each database, the replica may not use the driver of the primary
+    connect_args: dict[str, Any] = {}
+    if url.drivername == "postgresql+psycopg":
+        connect_args["options"] = f"-c statement_timeout={settings.DATABASE_STATEMENT_TIMEOUT_MS}"
+    elif url.drivername == "postgresql+asyncpg":
+        connect_args["server_settings"] = {"statement_timeout": str(settings.DATABASE_STATEMENT_TIMEOUT_MS)}
+    engine_kwargs: dict[str, Any] = {}
+
+    if settings.DATABASE_STATEMENT_CACHE_SIZE is not None:
+        if url.drivername == "postgresql+asyncpg":
+            connect_args["statement_cache_size"] = settings.DATABASE_STATEMENT_CACHE_SIZE
+            url = url.update_query_dict(
+                {"prepared_statement_cache_size": str(settings.DATABASE_STATEMENT_CACHE_SIZE)},
+            )
+        elif url.drivername == "postgresql+psycopg" and settings.DATABASE_STATEMENT_CACHE_SIZE == 0:
+            connect_args["prepare_threshold"] = None
+
+    if settings.DISABLE_CONNECTION_POOL:
+        engine_kwargs["poolclass"] = pool.NullPool
+    elif url.get_backend_name() == "postgresql":
+        engine_kwargs.update(
+            poolclass=InstrumentedAsyncAdaptedQueuePool,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_POOL_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        )
+
+    engine = create_async_engine(
+        url,
+        json_serializer=_custom_json_serializer,
+        connect_args=connect_args,
+        **engine_kwargs,
+    )
+    if isinstance(engine.pool, InstrumentedAsyncAdaptedQueuePool):
+        engine.pool.stats = stats
+    stats.listen(engine)
+    return engine
 
 
+@instrument_db_methods
 class AgentDB:
-    def __init__(self, database_string: str, debug_enabled: bool = False) -> None:
+    def __init__(
+        self,
+        database_string: str,
+        debug_enabled: bool = False,
+        replica_database_string: str | None = None,
+    ) -> None:
         super().__init__()
         self.debug_enabled = debug_enabled
-        self.engine = create_async_engine(
-            database_string,
-            json_serializer=_custom_json_serializer,
-            connect_args=DB_CONNECT_ARGS,
-            poolclass=pool.NullPool if settings.DISABLE_CONNECTION_POOL else None,
-        )
-        self.Session = async_sessionmaker(bind=self.engine)
+        self.stats = DBStats(slow_query_threshold_ms=settings.DATABASE_SLOW_QUERY_THRESHOLD_MS)
+        self.engine = create_db_engine(database_string, self.stats)
+        self.PrimarySession = async_sessionmaker(bind=self.engine)
+        self.replica_engine: AsyncEngine | None = None
+        self.ReplicaSession: async_sessionmaker[AsyncSession] | None = None
+        if replica_database_string:
+            self.replica_engine = create_db_engine(replica_database_string, self.stats)
+            self.ReplicaSession = async_sessionmaker(bind=self.replica_engine)
+            track_primary_writes(self.engine)
+
+    def Session(self) -> AsyncSession:
+        """
+        Open a session on the read replica for the methods marked with @read_only, on the primary otherwise.
+        """
+        if self.ReplicaSession is not None and should_use_read_replica():
+            return self.ReplicaSession()
+        return self.PrimarySession()
+
+    def get_stats(self) -> dict[str, Any]:
+        stats = self.stats.snapshot(self.engine)
+        if self.replica_engine is not None:
+            stats["replica_pool"] = get_pool_stats(self.replica_engine)
+        return stats
 
     async def create_task(
         self,
@@ -332,6 +412,30 @@ class AgentDB:
             LOG.error("UnexpectedError", exc_info=True)
             raise
 
+    async def get_latest_task_steps(self, task_id: str, limit: int, organization_id: str | None = None) -> list[Step]:
+        """
+        Get the last `limit` steps of a task, ordered by (order, retry_index) ascending.
+        """
+        try:
+            async with self.Session() as session:
+                steps = (
+                    await session.scalars(
+                        select(StepModel)
+                        .filter_by(task_id=task_id)
+                        .filter_by(organization_id=organization_id)
+                        .order_by(StepModel.order.desc())
+                        .order_by(StepModel.retry_index.desc())
+                        .limit(limit)
+                    )
+                ).all()
+                return [convert_to_step(step, debug_enabled=self.debug_enabled) for step in reversed(steps)]
+        except SQLAlchemyError:
+            LOG.error("SQLAlchemyError", exc_info=True)
+            raise
+        except Exception:
+            LOG.error("UnexpectedError", exc_info=True)
+            raise
+
     async def get_steps_by_task_ids(self, task_ids: list[str], organization_id: str | None = None) -> list[Step]:
         try:
             async with self.Session() as session:
@@ -411,6 +515,7 @@ class AgentDB:
             LOG.error("UnexpectedError", exc_info=True)
             raise
 
+    @read_only
     async def get_tasks_actions(self, task_ids: list[str], organization_id: str | None = None) -> list[Action]:
         try:
             async with self.Session() as session:
@@ -498,6 +603,7 @@ class AgentDB:
         incremental_output_tokens: int | None = None,
         incremental_reasoning_tokens: int | None = None,
         incremental_cached_tokens: int | None = None,
+        profile: dict[str, Any] | None = None,
     ) -> Step:
         try:
             async with self.Session() as session:
@@ -527,6 +633,8 @@ class AgentDB:
                         step.reasoning_token_count = incremental_reasoning_tokens + (step.reasoning_token_count or 0)
                     if incremental_cached_tokens is not None:
                         step.cached_token_count = incremental_cached_tokens + (step.cached_token_count or 0)
+                    if profile is not None:
+                        step.profile = profile
 
                     await session.commit()
                     updated_step = await self.get_step(task_id, step_id, organization_id)
@@ -623,6 +731,7 @@ class AgentDB:
             LOG.error("UnexpectedError", exc_info=True)
             raise
 
+    @read_only
     async def get_tasks(
         self,
         page: int = 1,
@@ -685,6 +794,7 @@ class AgentDB:
             LOG.error("UnexpectedError", exc_info=True)
             raise
 
+    @read_only
     async def get_tasks_count(
         self,
         organization_id: str,
@@ -971,6 +1081,7 @@ class AgentDB:
             LOG.exception("UnexpectedError")
             raise
 
+    @read_only
     async def get_artifacts_by_entity_id(
         self,
         artifact_type: ArtifactType | None = None,
@@ -1444,6 +1555,7 @@ class AgentDB:
         totp_verification_url: str | None = None,
         totp_identifier: str | None = None,
         parent_workflow_run_id: str | None = None,
+        workflow_run_id: str | None = None,
     ) -> WorkflowRun:
         try:
             async with self.Session() as session:
@@ -1458,6 +1570,8 @@ class AgentDB:
                     totp_identifier=totp_identifier,
                     parent_workflow_run_id=parent_workflow_run_id,
                 )
+                if workflow_run_id:
+                    workflow_run.workflow_run_id = workflow_run_id
                 session.add(workflow_run)
                 await session.commit()
                 await session.refresh(workflow_run)
@@ -1483,6 +1597,7 @@ class AgentDB:
             else:
                 raise WorkflowRunNotFound(workflow_run_id)
 
+    @read_only
     async def get_all_runs(
         self, organization_id: str, page: int = 1, page_size: int = 10, status: list[WorkflowRunStatus] | None = None
     ) -> list[WorkflowRun | Task]:
@@ -1546,6 +1661,7 @@ class AgentDB:
             LOG.error("SQLAlchemyError", exc_info=True)
             raise
 
+    @read_only
     async def get_workflow_runs(
         self,
         organization_id: str,
@@ -1600,6 +1716,7 @@ class AgentDB:
             LOG.error("SQLAlchemyError", exc_info=True)
             raise
 
+    @read_only
     async def get_workflow_runs_count(
         self,
         organization_id: str,
@@ -1619,6 +1736,7 @@ class AgentDB:
             LOG.error("SQLAlchemyError", exc_info=True)
             raise
 
+    @read_only
     async def get_workflow_runs_for_workflow_permanent_id(
         self,
         workflow_permanent_id: str,
@@ -2092,6 +2210,162 @@ class AgentDB:
             await session.execute(stmt)
             await session.commit()
 
+    async def get_artifacts_created_before(
+        self,
+        created_before: datetime,
+        limit: int,
+        organization_id: str | None = None,
+        artifact_types: list[ArtifactType] | None = None,
+        exclude_organization_ids: list[str] | None = None,
+        exclude_artifact_types: list[ArtifactType] | None = None,
+        exclude_organization_artifact_types: dict[str, list[ArtifactType]] | None = None,
+        exclude_archived: bool = False,
+    ) -> list[Artifact]:
+        """
+        Get the oldest artifacts created before the given time, used by the data retention.
+        """
+        try:
+            async with self.Session() as session:
+                query = select(ArtifactModel).filter(ArtifactModel.created_at < created_before)
+                if organization_id:
+                    query = query.filter(ArtifactModel.organization_id == organization_id)
+                if exclude_organization_ids:
+                    query = query.filter(
+                        or_(
+                            ArtifactModel.organization_id.is_(None),
+                            ArtifactModel.organization_id.not_in(exclude_organization_ids),
+                        )
+                    )
+                if artifact_types:
+                    query = query.filter(ArtifactModel.artifact_type.in_(artifact_types))
+                if exclude_artifact_types:
+                    query = query.filter(ArtifactModel.artifact_type.not_in(exclude_artifact_types))
+                for excluded_organization_id, excluded_artifact_types in (
+                    exclude_organization_artifact_types or {}
+                ).items():
+                    query = query.filter(
+                        or_(
+                            ArtifactModel.organization_id.is_(None),
+                            ArtifactModel.organization_id != excluded_organization_id,
+                            ArtifactModel.artifact_type.not_in(excluded_artifact_types),
+                        )
+                    )
+                if exclude_archived:
+                    query = query.filter(ArtifactModel.archived_at.is_(None))
+                query = query.order_by(ArtifactModel.created_at).limit(limit)
+                artifacts = (await session.scalars(query)).all()
+                return [convert_to_artifact(artifact, self.debug_enabled) for artifact in artifacts]
+        except SQLAlchemyError:
+            LOG.error("SQLAlchemyError", exc_info=True)
+            raise
+        except Exception:
+            LOG.error("UnexpectedError", exc_info=True)
+            raise
+
+    async def mark_artifacts_archived(self, archived_uris: dict[str, str]) -> None:
+        """
+        Point the artifacts to their archived files, `archived_uris` maps the artifact ids to the archived uris.
+        """
+        archived_at = datetime.utcnow()
+        try:
+            async with self.Session() as session:
+                await session.execute(
+                    update(ArtifactModel),
+                    [
+                        {"artifact_id": artifact_id, "uri": uri, "archived_at": archived_at, "modified_at": archived_at}
+                        for artifact_id, uri in archived_uris.items()
+                    ],
+                )
+                await session.commit()
+        except SQLAlchemyError:
+            LOG.error("SQLAlchemyError", exc_info=True)
+            raise
+        except Exception:
+            LOG.error("UnexpectedError", exc_info=True)
+            raise
+
+    async def delete_artifacts_by_ids(self, artifact_ids: list[str]) -> None:
+        try:
+            async with self.Session() as session:
+                await session.execute(delete(ArtifactModel).where(ArtifactModel.artifact_id.in_(artifact_ids)))
+                await session.commit()
+        except SQLAlchemyError:
+            LOG.error("SQLAlchemyError", exc_info=True)
+            raise
+        except Exception:
+            LOG.error("UnexpectedError", exc_info=True)
+            raise
+
+    async def delete_actions_created_before(
+        self,
+        created_before: datetime,
+        limit: int,
+        organization_id: str | None = None,
+        exclude_organization_ids: list[str] | None = None,
+    ) -> int:
+        """
+        Delete at most `limit` of the oldest actions created before the given time. Returns the number of deleted rows.
+        """
+        try:
+            async with self.Session() as session:
+                query = select(ActionModel.action_id).filter(ActionModel.created_at < created_before)
+                if organization_id:
+                    query = query.filter(ActionModel.organization_id == organization_id)
+                if exclude_organization_ids:
+                    query = query.filter(
+                        or_(
+                            ActionModel.organization_id.is_(None),
+                            ActionModel.organization_id.not_in(exclude_organization_ids),
+                        )
+                    )
+                action_ids = (await session.scalars(query.order_by(ActionModel.created_at).limit(limit))).all()
+                if not action_ids:
+                    return 0
+                await session.execute(delete(ActionModel).where(ActionModel.action_id.in_(action_ids)))
+                await session.commit()
+                return len(action_ids)
+        except SQLAlchemyError:
+            LOG.error("SQLAlchemyError", exc_info=True)
+            raise
+        except Exception:
+            LOG.error("UnexpectedError", exc_info=True)
+            raise
+
+    async def delete_steps_created_before(
+        self,
+        created_before: datetime,
+        limit: int,
+        organization_id: str | None = None,
+        exclude_organization_ids: list[str] | None = None,
+    ) -> int:
+        """
+        Delete at most `limit` of the oldest steps created before the given time. Returns the number of deleted rows.
+        """
+        try:
+            async with self.Session() as session:
+                query = select(StepModel.step_id).filter(StepModel.created_at < created_before)
+                if organization_id:
+                    query = query.filter(StepModel.organization_id == organization_id)
+                if exclude_organization_ids:
+                    query = query.filter(
+                        or_(
+                            StepModel.organization_id.is_(None),
+                            StepModel.organization_id.not_in(exclude_organization_ids),
+                        )
+                    )
+                step_ids = (await session.scalars(query.order_by(StepModel.created_at).limit(limit))).all()
+                if not step_ids:
+                    return 0
+                await session.execute(delete(StepModel).where(StepModel.step_id.in_(step_ids)))
+                await session.commit()
+                return len(step_ids)
+        except SQLAlchemyError:
+            LOG.error("SQLAlchemyError", exc_info=True)
+            raise
+        except Exception:
+            LOG.error("UnexpectedError", exc_info=True)
+            raise
+
     async def create_task_generation(
         self,
         organization_id: str,
@@ -2335,6 +2609,7 @@ class AgentDB:
                 return Thought.model_validate(thought)
             return None
 
+    @read_only
     async def get_thoughts(
         self,
         task_v2_id: str,
@@ -2670,6 +2945,7 @@ class AgentDB:
                 return convert_to_workflow_run_block(workflow_run_block, task=task)
             raise NotFoundError(f"WorkflowRunBlock {workflow_run_block_id} not found")
 
+    @read_only
     async def get_workflow_run_blocks(
         self,
         workflow_run_id: str,
@@ -2691,6 +2967,95 @@ class AgentDB:
                 for workflow_run_block in workflow_run_blocks
             ]
 
+    @read_only
+    async def get_timeline_child_workflow_run_ids(
+        self,
+        workflow_run_id: str,
+        organization_id: str | None = None,
+    ) -> list[str]:
+        """
+        Get the ids of the inner workflow runs of the top level task v2 blocks, recursively, with one recursive query.
+        These are the runs flattened into the timeline of the workflow run.
+        """
+        async with self.Session() as session:
+            child_runs = (
+                select(WorkflowRunBlockModel.block_workflow_run_id.label("workflow_run_id"))
+                .filter(WorkflowRunBlockModel.workflow_run_id == workflow_run_id)
+                .filter(WorkflowRunBlockModel.organization_id == organization_id)
+                .filter(WorkflowRunBlockModel.block_type == BlockType.TaskV2)
+                .filter(WorkflowRunBlockModel.parent_workflow_run_block_id.is_(None))
+                .filter(WorkflowRunBlockModel.block_workflow_run_id.is_not(None))
+                .cte(name="child_workflow_runs", recursive=True)
+            )
+            child_runs = child_runs.union(
+                select(WorkflowRunBlockModel.block_workflow_run_id)
+                .join(child_runs, WorkflowRunBlockModel.workflow_run_id == child_runs.c.workflow_run_id)
+                .filter(WorkflowRunBlockModel.organization_id == organization_id)
+                .filter(WorkflowRunBlockModel.block_type == BlockType.TaskV2)
+                .filter(WorkflowRunBlockModel.parent_workflow_run_block_id.is_(None))
+                .filter(WorkflowRunBlockModel.block_workflow_run_id.is_not(None))
+            )
+            return list((await session.scalars(select(child_runs.c.workflow_run_id))).all())
+
+    @read_only
+    async def get_workflow_run_blocks_by_workflow_run_ids(
+        self,
+        workflow_run_ids: list[str],
+        organization_id: str | None = None,
+    ) -> list[WorkflowRunBlock]:
+        async with self.Session() as session:
+            workflow_run_blocks = (
+                await session.scalars(
+                    select(WorkflowRunBlockModel)
+                    .filter(WorkflowRunBlockModel.workflow_run_id.in_(workflow_run_ids))
+                    .filter_by(organization_id=organization_id)
+                    .order_by(WorkflowRunBlockModel.created_at.desc())
+                )
+            ).all()
+            tasks = (
+                await session.scalars(select(TaskModel).filter(TaskModel.workflow_run_id.in_(workflow_run_ids)))
+            ).all()
+            tasks_dict = {task.task_id: convert_to_task(task, debug_enabled=self.debug_enabled) for task in tasks}
+            return [
+                convert_to_workflow_run_block(workflow_run_block, task=tasks_dict.get(workflow_run_block.task_id))
+                for workflow_run_block in workflow_run_blocks
+            ]
+
+    @read_only
+    async def get_task_v2s_by_workflow_run_ids(
+        self,
+        workflow_run_ids: list[str],
+        organization_id: str | None = None,
+    ) -> list[TaskV2]:
+        async with self.Session() as session:
+            task_v2s = (
+                await session.scalars(
+                    select(TaskV2Model)
+                    .filter(TaskV2Model.workflow_run_id.in_(workflow_run_ids))
+                    .filter_by(organization_id=organization_id)
+                )
+            ).all()
+            return [TaskV2.model_validate(task_v2) for task_v2 in task_v2s]
+
+    @read_only
+    async def get_thoughts_by_task_v2_ids(
+        self,
+        task_v2_ids: list[str],
+        thought_types: list[ThoughtType] | None = None,
+        organization_id: str | None = None,
+    ) -> list[Thought]:
+        async with self.Session() as session:
+            query = (
+                select(ThoughtModel)
+                .filter(ThoughtModel.observer_cruise_id.in_(task_v2_ids))
+                .filter_by(organization_id=organization_id)
+                .order_by(ThoughtModel.created_at)
+            )
+            if thought_types:
+                query = query.filter(ThoughtModel.observer_thought_type.in_(thought_types))
+            thoughts = (await session.scalars(query)).all()
+            return [Thought.model_validate(thought) for thought in thoughts]
+
     async def get_active_persistent_browser_sessions(self, organization_id: str) -> list[PersistentBrowserSession]:
         """Get all active persistent browser sessions for an organization."""
         try:
@@ -3136,3 +3501,542 @@ class AgentDB:
                 query = query.filter_by(organization_id=organization_id)
             task_run = (await session.scalars(query)).first()
             return Run.model_validate(task_run) if task_run else None
+
+    async def create_run_job(
+        self,
+        organization_id: str,
+        job_type: RunJobType,
+        run_id: str,
+        max_attempts: int,
+        payload: dict[str, Any] | None = None,
+        priority: int = 0,
+    ) -> RunJob:
+        async with self.Session() as session:
+            run_job = RunJobModel(
+                organization_id=organization_id,
+                job_type=job_type,
+                run_id=run_id,
+                status=RunJobStatus.queued,
+                priority=priority,
+                attempts=0,
+                max_attempts=max_attempts,
+                payload=payload,
+            )
+            session.add(run_job)
+            await session.commit()
+            await session.refresh(run_job)
+            return RunJob.model_validate(run_job)
+
+    async def claim_run_jobs(
+        self,
+        worker_id: str,
+        limit: int,
+        visibility_timeout_seconds: int,
+        max_concurrent_runs: int | None = None,
+        max_concurrent_runs_per_org: int | None = None,
+        organization_weights: dict[str, float] | None = None,
+    ) -> list[RunJob]:
+        """
+        Claim up to `limit` jobs with SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers never claim the same job.
+        Running jobs whose lock expired belong to a worker that stopped heartbeating and are claimed again.
+
+        The jobs are shared between the organizations with weighted fair queuing. The concurrency caps are counted
+        across all workers. Workers claiming at the same time can go over them by at most one claim batch.
+        """
+        now = datetime.utcnow()
+        claimable = or_(
+            RunJobModel.status == RunJobStatus.queued,
+            and_(RunJobModel.status == RunJobStatus.running, RunJobModel.locked_until < now),
+        )
+        try:
+            async with self.Session() as session:
+                running_counts: dict[str, int] = {
+                    organization_id: count
+                    for organization_id, count in (
+                        await session.execute(
+                            select(RunJobModel.organization_id, func.count())
+                            .filter(RunJobModel.status == RunJobStatus.running)
+                            .filter(RunJobModel.locked_until >= now)
+                            .group_by(RunJobModel.organization_id)
+                        )
+                    ).all()
+                }
+                if max_concurrent_runs is not None:
+                    limit = min(limit, max_concurrent_runs - sum(running_counts.values()))
+                if limit <= 0:
+                    return []
+
+                # the first `limit` jobs of every organization are the only ones that can be selected
+                ranked_run_jobs = (
+                    select(
+                        RunJobModel.run_job_id,
+                        func.row_number()
+                        .over(
+                            partition_by=RunJobModel.organization_id,
+                            order_by=(RunJobModel.priority.desc(), RunJobModel.created_at.asc()),
+                        )
+                        .label("organization_rank"),
+                    )
+                    .filter(claimable)
+                    .subquery()
+                )
+                query = (
+                    select(RunJobModel)
+                    .filter(
+                        RunJobModel.run_job_id.in_(
+                            select(ranked_run_jobs.c.run_job_id).filter(ranked_run_jobs.c.organization_rank <= limit)
+                        )
+                    )
+                    .filter(claimable)
+                    .with_for_update(skip_locked=True)
+                )
+                run_job_models = {run_job.run_job_id: run_job for run_job in (await session.scalars(query)).all()}
+                selected_run_jobs = select_fair_run_jobs(
+                    [RunJob.model_validate(run_job) for run_job in run_job_models.values()],
+                    running_counts=running_counts,
+                    limit=limit,
+                    max_concurrent_runs_per_org=max_concurrent_runs_per_org,
+                    organization_weights=organization_weights,
+                )
+                for selected_run_job in selected_run_jobs:
+                    run_job = run_job_models[selected_run_job.run_job_id]
+                    run_job.status = RunJobStatus.running
+                    run_job.worker_id = worker_id
+                    run_job.attempts += 1
+                    run_job.locked_until = now + timedelta(seconds=visibility_timeout_seconds)
+                    run_job.heartbeat_at = now
+                    if not run_job.started_at:
+                        run_job.started_at = now
+                await session.flush()
+                claimed_run_jobs = [
+                    RunJob.model_validate(run_job_models[selected_run_job.run_job_id])
+                    for selected_run_job in selected_run_jobs
+                ]
+                await session.commit()
+                return claimed_run_jobs
+        except SQLAlchemyError:
+            LOG.error("SQLAlchemyError", exc_info=True)
+            raise
+
+    async def heartbeat_run_jobs(self, run_job_ids: list[str], worker_id: str, visibility_timeout_seconds: int) -> None:
+        if not run_job_ids:
+            return
+        now = datetime.utcnow()
+        async with self.Session() as session:
+            await session.execute(
+                update(RunJobModel)
+                .where(RunJobModel.run_job_id.in_(run_job_ids))
+                .where(RunJobModel.worker_id == worker_id)
+                .where(RunJobModel.status == RunJobStatus.running)
+                .values(heartbeat_at=now, locked_until=now + timedelta(seconds=visibility_timeout_seconds))
+            )
+            await session.commit()
+
+    async def update_run_job_status(
+        self,
+        run_job_id: str,
+        worker_id: str,
+        status: RunJobStatus,
+        failure_reason: str | None = None,
+    ) -> None:
+        """
+        Only the worker holding the job can update it, a job claimed again by another worker is left untouched.
+        A job set back to queued is released so any worker can claim it.
+        """
+        values: dict[str, Any] = {"status": status, "failure_reason": failure_reason}
+        if status.is_final():
+            values["finished_at"] = datetime.utcnow()
+        if status == RunJobStatus.queued:
+            values["worker_id"] = None
+            values["locked_until"] = None
+        async with self.Session() as session:
+            await session.execute(
+                update(RunJobModel)
+                .where(RunJobModel.run_job_id == run_job_id)
+                .where(RunJobModel.worker_id == worker_id)
+                .values(**values)
+            )
+            await session.commit()
+
+    async def get_run_job(self, run_id: str, organization_id: str | None = None) -> RunJob | None:
+        async with self.Session() as session:
+            query = select(RunJobModel).filter_by(run_id=run_id)
+            if organization_id:
+                query = query.filter_by(organization_id=organization_id)
+            run_job = (await session.scalars(query.order_by(RunJobModel.created_at.desc()))).first()
+            return RunJob.model_validate(run_job) if run_job else None
+
+    async def count_queued_run_jobs(self, organization_id: str) -> int:
+        async with self.Session() as session:
+            return (
+                await session.scalar(
+                    select(func.count())
+                    .select_from(RunJobModel)
+                    .filter_by(organization_id=organization_id)
+                    .filter_by(status=RunJobStatus.queued)
+                )
+            ) or 0
+
+    async def get_run_job_queue_position(self, run_job: RunJob) -> int:
+        """
+        1-based position of a queued job in its organization's queue.
+        """
+        async with self.Session() as session:
+            ahead_count = await session.scalar(
+                select(func.count())
+                .select_from(RunJobModel)
+                .filter_by(organization_id=run_job.organization_id)
+                .filter_by(status=RunJobStatus.queued)
+                .filter(
+                    or_(
+                        RunJobModel.priority > run_job.priority,
+                        and_(RunJobModel.priority == run_job.priority, RunJobModel.created_at < run_job.created_at),
+                    )
+                )
+            )
+            return (ahead_count or 0) + 1
+
+    async def get_average_run_job_duration(self, organization_id: str, sample_size: int = 50) -> float | None:
+        """
+        Average duration in seconds of the organization's latest completed jobs.
+        """
+        async with self.Session() as session:
+            rows = (
+                await session.execute(
+                    select(RunJobModel.started_at, RunJobModel.finished_at)
+                    .filter_by(organization_id=organization_id)
+                    .filter_by(status=RunJobStatus.completed)
+                    .filter(RunJobModel.started_at.isnot(None))
+                    .filter(RunJobModel.finished_at.isnot(None))
+                    .order_by(RunJobModel.finished_at.desc())
+                    .limit(sample_size)
+                )
+            ).all()
+            if not rows:
+                return None
+            return sum((finished_at - started_at).total_seconds() for started_at, finished_at in rows) / len(rows)
+
+    async def get_workflow_run_checkpoint(
+        self, workflow_run_id: str, organization_id: str | None = None
+    ) -> WorkflowRunCheckpoint | None:
+        async with self.Session() as session:
+            query = select(WorkflowRunCheckpointModel).filter_by(workflow_run_id=workflow_run_id)
+            if organization_id:
+                query = query.filter_by(organization_id=organization_id)
+            checkpoint = (await session.scalars(query)).first()
+            if not checkpoint:
+                return None
+            iterations = (
+                await session.scalars(
+                    select(WorkflowRunCheckpointLoopIterationModel).filter_by(workflow_run_id=workflow_run_id)
+                )
+            ).all()
+            loop_iterations: dict[str, dict[int, Any]] = {}
+            for iteration in iterations:
+                # the iterations of the completed loop blocks aren't needed anymore
+                if iteration.block_label in checkpoint.completed_blocks:
+                    continue
+                loop_iterations.setdefault(iteration.block_label, {})[iteration.loop_idx] = iteration.iteration
+            return WorkflowRunCheckpoint(
+                workflow_run_id=checkpoint.workflow_run_id,
+                organization_id=checkpoint.organization_id,
+                completed_blocks=checkpoint.completed_blocks,
+                loop_iterations=loop_iterations,
+                context_values=checkpoint.context_values,
+                blocks_metadata=checkpoint.blocks_metadata,
+                created_at=checkpoint.created_at,
+                modified_at=checkpoint.modified_at,
+            )
+
+    async def create_or_update_workflow_run_checkpoint(
+        self,
+        workflow_run_id: str,
+        organization_id: str,
+        completed_blocks: dict[str, Any],
+        context_values: dict[str, Any],
+        blocks_metadata: dict[str, Any],
+    ) -> None:
+        try:
+            async with self.Session() as session:
+                checkpoint = (
+                    await session.scalars(select(WorkflowRunCheckpointModel).filter_by(workflow_run_id=workflow_run_id))
+                ).first()
+                if not checkpoint:
+                    checkpoint = WorkflowRunCheckpointModel(
+                        workflow_run_id=workflow_run_id,
+                        organization_id=organization_id,
+                    )
+                    session.add(checkpoint)
+                checkpoint.completed_blocks = completed_blocks
+                checkpoint.context_values = context_values
+                checkpoint.blocks_metadata = blocks_metadata
+                await session.commit()
+        except SQLAlchemyError:
+            LOG.error("SQLAlchemyError", exc_info=True)
+            raise
+
+    async def create_workflow_run_checkpoint_loop_iteration(
+        self,
+        workflow_run_id: str,
+        organization_id: str,
+        block_label: str,
+        loop_idx: int,
+        iteration: dict[str, Any],
+    ) -> None:
+        try:
+            async with self.Session() as session:
+                # an iteration executed again after a resume replaces the previous one
+                await session.merge(
+                    WorkflowRunCheckpointLoopIterationModel(
+                        workflow_run_id=workflow_run_id,
+                        block_label=block_label,
+                        loop_idx=loop_idx,
+                        organization_id=organization_id,
+                        iteration=iteration,
+                    )
+                )
+                await session.commit()
+        except SQLAlchemyError:
+            LOG.error("SQLAlchemyError", exc_info=True)
+            raise
+
+    async def delete_workflow_run_checkpoint(self, workflow_run_id: str) -> None:
+        async with self.Session() as session:
+            await session.execute(
+                delete(WorkflowRunCheckpointLoopIterationModel).where(
+                    WorkflowRunCheckpointLoopIterationModel.workflow_run_id == workflow_run_id
+                )
+            )
+            await session.execute(
+                delete(WorkflowRunCheckpointModel).where(WorkflowRunCheckpointModel.workflow_run_id == workflow_run_id)
+            )
+            await session.commit()
+
+    async def get_workflows_modified_since(
+        self,
+        modified_after: datetime | None,
+        limit: int,
+        after: tuple[datetime, str] | None = None,
+        only_with_cron_schedule: bool = False,
+    ) -> list[tuple[str, str, datetime, str]]:
+        """
+        (workflow_permanent_id, organization_id, modified_at, workflow_id) of the workflow versions modified after
+        `modified_after`, deleted ones included, ordered by modified_at. `after` is the (modified_at, workflow_id) of
+        the last row of the previous page.
+        """
+        async with self.Session() as session:
+            query = select(
+                WorkflowModel.workflow_permanent_id,
+                WorkflowModel.organization_id,
+                WorkflowModel.modified_at,
+                WorkflowModel.workflow_id,
+            )
+            if modified_after:
+                query = query.filter(WorkflowModel.modified_at >= modified_after)
+            if after:
+                query = query.filter(tuple_(WorkflowModel.modified_at, WorkflowModel.workflow_id) > after)
+            if only_with_cron_schedule:
+                query = query.filter(WorkflowModel.cron_schedule.isnot(None))
+            rows = (
+                await session.execute(query.order_by(WorkflowModel.modified_at, WorkflowModel.workflow_id).limit(limit))
+            ).all()
+            return [tuple(row) for row in rows]
+
+    async def get_workflow_schedule(self, workflow_permanent_id: str) -> WorkflowSchedule | None:
+        async with self.Session() as session:
+            schedule = (
+                await session.scalars(
+                    select(WorkflowScheduleModel).filter_by(workflow_permanent_id=workflow_permanent_id)
+                )
+            ).first()
+            return WorkflowSchedule.model_validate(schedule) if schedule else None
+
+    async def create_or_update_workflow_schedule(
+        self,
+        workflow_permanent_id: str,
+        organization_id: str,
+        workflow_id: str,
+        cron_schedule: str,
+        cron_timezone: str,
+        next_fire_at: datetime | None,
+    ) -> WorkflowSchedule:
+        try:
+            async with self.Session() as session:
+                schedule = (
+                    await session.scalars(
+                        select(WorkflowScheduleModel).filter_by(workflow_permanent_id=workflow_permanent_id)
+                    )
+                ).first()
+                if not schedule:
+                    schedule = WorkflowScheduleModel(workflow_permanent_id=workflow_permanent_id)
+                    session.add(schedule)
+                schedule.organization_id = organization_id
+                schedule.workflow_id = workflow_id
+                schedule.cron_schedule = cron_schedule
+                schedule.cron_timezone = cron_timezone
+                schedule.next_fire_at = next_fire_at
+                await session.commit()
+                await session.refresh(schedule)
+                return WorkflowSchedule.model_validate(schedule)
+        except SQLAlchemyError:
+            LOG.error("SQLAlchemyError", exc_info=True)
+            raise
+
+    async def delete_workflow_schedule(self, workflow_permanent_id: str) -> None:
+        async with self.Session() as session:
+            await session.execute(
+                delete(WorkflowScheduleModel).where(
+                    WorkflowScheduleModel.workflow_permanent_id == workflow_permanent_id
+                )
+            )
+            await session.commit()
+
+    async def get_due_workflow_schedules(self, due_before: datetime, limit: int) -> list[WorkflowSchedule]:
+        async with self.Session() as session:
+            schedules = (
+                await session.scalars(
+                    select(WorkflowScheduleModel)
+                    .filter(WorkflowScheduleModel.next_fire_at <= due_before)
+                    .order_by(WorkflowScheduleModel.next_fire_at)
+                    .limit(limit)
+                )
+            ).all()
+            return [WorkflowSchedule.model_validate(schedule) for schedule in schedules]
+
+    async def claim_workflow_schedule_fire(
+        self,
+        workflow_permanent_id: str,
+        organization_id: str,
+        fire_at: datetime,
+        next_fire_at: datetime | None,
+        fire_times: list[datetime],
+    ) -> list[WorkflowScheduleFire] | None:
+        """
+        Move the schedule from the fire at `fire_at` to the next one and record the fires to run at `fire_times` in
+        the same transaction. Only one of the schedulers racing for the same fire succeeds, None for the others.
+        """
+        async with self.Session() as session:
+            result = await session.execute(
+                update(WorkflowScheduleModel)
+                .where(WorkflowScheduleModel.workflow_permanent_id == workflow_permanent_id)
+                .where(WorkflowScheduleModel.next_fire_at == fire_at)
+                .values(next_fire_at=next_fire_at, last_fired_at=datetime.utcnow())
+            )
+            if result.rowcount != 1:
+                await session.rollback()
+                return None
+            fires = [
+                WorkflowScheduleFireModel(
+                    workflow_permanent_id=workflow_permanent_id,
+                    fire_at=fire_time,
+                    organization_id=organization_id,
+                )
+                for fire_time in fire_times
+            ]
+            session.add_all(fires)
+            await session.commit()
+            for fire in fires:
+                await session.refresh(fire)
+            return [WorkflowScheduleFire.model_validate(fire) for fire in fires]
+
+    async def get_pending_workflow_schedule_fires(
+        self, claimed_before: datetime, limit: int
+    ) -> list[WorkflowScheduleFire]:
+        async with self.Session() as session:
+            fires = (
+                await session.scalars(
+                    select(WorkflowScheduleFireModel)
+                    .filter(WorkflowScheduleFireModel.modified_at <= claimed_before)
+                    .order_by(WorkflowScheduleFireModel.fire_at)
+                    .limit(limit)
+                )
+            ).all()
+            return [WorkflowScheduleFire.model_validate(fire) for fire in fires]
+
+    async def increment_workflow_schedule_fire_attempts(self, workflow_permanent_id: str, fire_at: datetime) -> None:
+        async with self.Session() as session:
+            await session.execute(
+                update(WorkflowScheduleFireModel)
+                .where(WorkflowScheduleFireModel.workflow_permanent_id == workflow_permanent_id)
+                .where(WorkflowScheduleFireModel.fire_at == fire_at)
+                .values(attempts=WorkflowScheduleFireModel.attempts + 1)
+            )
+            await session.commit()
+
+    async def delete_workflow_schedule_fire(self, workflow_permanent_id: str, fire_at: datetime) -> None:
+        async with self.Session() as session:
+            await session.execute(
+                delete(WorkflowScheduleFireModel)
+                .where(WorkflowScheduleFireModel.workflow_permanent_id == workflow_permanent_id)
+                .where(WorkflowScheduleFireModel.fire_at == fire_at)
+            )
+            await session.commit()
+
+    async def get_cron_scheduler_lease(self, scheduler_name: str) -> CronSchedulerLease | None:
+        async with self.Session() as session:
+            lease = (
+                await session.scalars(select(CronSchedulerLeaseModel).filter_by(scheduler_name=scheduler_name))
+            ).first()
+            return CronSchedulerLease.model_validate(lease) if lease else None
+
+    async def acquire_cron_scheduler_lease(self, scheduler_name: str, leader_id: str, lease_seconds: int) -> bool:
+        """
+        Take or renew the lease of the scheduler. Returns whether `leader_id` holds the lease.
+        """
+        now = datetime.utcnow()
+        lease_expires_at = now + timedelta(seconds=lease_seconds)
+        async with self.Session() as session:
+            result = await session.execute(
+                update(CronSchedulerLeaseModel)
+                .where(CronSchedulerLeaseModel.scheduler_name == scheduler_name)
+                .where(
+                    or_(
+                        CronSchedulerLeaseModel.leader_id == leader_id,
+                        CronSchedulerLeaseModel.lease_expires_at < now,
+                    )
+                )
+                .values(leader_id=leader_id, lease_expires_at=lease_expires_at)
+            )
+            await session.commit()
+            if result.rowcount == 1:
+                return True
+            if await session.scalar(
+                select(CronSchedulerLeaseModel.scheduler_name).filter_by(scheduler_name=scheduler_name)
+            ):
+                return False
+            try:
+                session.add(
+                    CronSchedulerLeaseModel(
+                        scheduler_name=scheduler_name,
+                        leader_id=leader_id,
+                        lease_expires_at=lease_expires_at,
+                    )
+                )
+                await session.commit()
+                return True
+            except IntegrityError:
+                # another scheduler created the lease first
+                await session.rollback()
+                return False
+
+    async def release_cron_scheduler_lease(self, scheduler_name: str, leader_id: str) -> None:
+        async with self.Session() as session:
+            await session.execute(
+                update(CronSchedulerLeaseModel)
+                .where(CronSchedulerLeaseModel.scheduler_name == scheduler_name)
+                .where(CronSchedulerLeaseModel.leader_id == leader_id)
+                .values(lease_expires_at=datetime.utcnow())
+            )
+            await session.commit()
+
+    async def update_cron_scheduler_workflows_synced_at(
+        self, scheduler_name: str, leader_id: str, workflows_synced_at: datetime
+    ) -> None:
+        async with self.Session() as session:
+            await session.execute(
+                update(CronSchedulerLeaseModel)
+                .where(CronSchedulerLeaseModel.scheduler_name == scheduler_name)
+                .where(CronSchedulerLeaseModel.leader_id == leader_id)
+                .values(workflows_synced_at=workflows_synced_at)
+            )
+            await session.commit()
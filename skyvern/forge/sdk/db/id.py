@@ -43,6 +43,7 @@ ORGANIZATION_AUTH_TOKEN_PREFIX = "oat"
 ORG_PREFIX = "o"
 OUTPUT_PARAMETER_PREFIX = "op"
 PERSISTENT_BROWSER_SESSION_ID = "pbs"
+RUN_JOB_PREFIX = "rj"
 STEP_PREFIX = "stp"
 TASK_GENERATION_PREFIX = "tg"
 TASK_PREFIX = "tsk"
@@ -176,6 +177,11 @@ def generate_task_run_id() -> str:
     return f"{TASK_RUN_PREFIX}_{int_id}"
 
 
+def generate_run_job_id() -> str:
+    int_id = generate_id()
+    return f"{RUN_JOB_PREFIX}_{int_id}"
+
+
 def generate_credential_parameter_id() -> str:
     int_id = generate_id()
     return f"{CREDENTIAL_PARAMETER_PREFIX}_{int_id}"
@@ -34,6 +34,7 @@ from skyvern.forge.sdk.db.id import (
     generate_organization_bitwarden_collection_id,
     generate_output_parameter_id,
     generate_persistent_browser_session_id,
+    generate_run_job_id,
     generate_step_id,
     generate_task_generation_id,
     generate_task_id,
@@ -121,6 +122,7 @@ class StepModel(Base):
     reasoning_token_count = Column(Integer, default=0)
     cached_token_count = Column(Integer, default=0)
     step_cost = Column(Numeric, default=0)
+    profile = Column(JSON, nullable=True)
 
 
 class OrganizationModel(Base):
@@ -170,7 +172,10 @@ class OrganizationAuthTokenModel(Base):
 
 class ArtifactModel(Base):
     __tablename__ = "artifacts"
-    __table_args__ = (Index("org_task_step_index", "organization_id", "task_id", "step_id"),)
+    __table_args__ = (
+        Index("org_task_step_index", "organization_id", "task_id", "step_id"),
+        Index("artifact_created_at_org_index", "created_at", "organization_id"),
+    )
 
     artifact_id = Column(String, primary_key=True, index=True, default=generate_artifact_id)
     organization_id = Column(String, ForeignKey("organizations.organization_id"))
@@ -183,6 +188,8 @@ class ArtifactModel(Base):
     step_id = Column(String, index=True)
     artifact_type = Column(String)
     uri = Column(String)
+    # set when the data retention moved the file under the archive prefix, the uri is then the archived one
+    archived_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
     modified_at = Column(
         DateTime,
@@ -204,6 +211,7 @@ class WorkflowModel(Base):
         Index("permanent_id_version_idx", "workflow_permanent_id", "version"),
         Index("organization_id_title_idx", "organization_id", "title"),
         Index("workflow_oid_status_idx", "organization_id", "status"),
+        Index("workflow_modified_at_idx", "modified_at"),
     )
 
     workflow_id = Column(String, primary_key=True, index=True, default=generate_workflow_id)
@@ -505,6 +513,7 @@ class ActionModel(Base):
     __table_args__ = (
         Index("action_org_task_step_index", "organization_id", "task_id", "step_id"),
         Index("action_org_created_at_index", "organization_id", desc("created_at")),
+        Index("action_created_at_index", "created_at"),
     )
 
     action_id = Column(String, primary_key=True, index=True, default=generate_action_id)
@@ -663,6 +672,32 @@ class TaskRunModel(Base):
     modified_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, nullable=False)
 
 
+class RunJobModel(Base):
+    __tablename__ = "run_jobs"
+    __table_args__ = (
+        Index("run_job_status_priority_index", "status", "priority", "created_at"),
+        Index("run_job_org_run_id_index", "organization_id", "run_id"),
+    )
+
+    run_job_id = Column(String, primary_key=True, default=generate_run_job_id)
+    organization_id = Column(String, nullable=False)
+    job_type = Column(String, nullable=False)
+    run_id = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    priority = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    payload = Column(JSON, nullable=True)
+    worker_id = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    failure_reason = Column(String, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    modified_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, nullable=False)
+
+
 class OrganizationBitwardenCollectionModel(Base):
     __tablename__ = "organization_bitwarden_collections"
 
@@ -690,3 +725,68 @@ class CredentialModel(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
     modified_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, nullable=False)
     deleted_at = Column(DateTime, nullable=True)
+
+
+class WorkflowRunCheckpointModel(Base):
+    __tablename__ = "workflow_run_checkpoints"
+
+    workflow_run_id = Column(String, primary_key=True)
+    organization_id = Column(String, nullable=False)
+    completed_blocks = Column(JSON, nullable=False)
+    context_values = Column(JSON, nullable=False)
+    blocks_metadata = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    modified_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, nullable=False)
+
+
+class WorkflowRunCheckpointLoopIterationModel(Base):
+    """
+    A completed iteration of a root loop block, one row each so checkpointing an iteration doesn't rewrite the others.
+    """
+
+    __tablename__ = "workflow_run_checkpoint_loop_iterations"
+
+    workflow_run_id = Column(String, primary_key=True)
+    block_label = Column(String, primary_key=True)
+    loop_idx = Column(Integer, primary_key=True)
+    organization_id = Column(String, nullable=False)
+    iteration = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+
+
+class WorkflowScheduleModel(Base):
+    __tablename__ = "workflow_schedules"
+    __table_args__ = (Index("workflow_schedule_next_fire_at_index", "next_fire_at"),)
+
+    workflow_permanent_id = Column(String, primary_key=True)
+    organization_id = Column(String, nullable=False)
+    workflow_id = Column(String, nullable=False)
+    cron_schedule = Column(String, nullable=False)
+    cron_timezone = Column(String, nullable=False)
+    next_fire_at = Column(DateTime, nullable=True)
+    last_fired_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    modified_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, nullable=False)
+
+
+class WorkflowScheduleFireModel(Base):
+    __tablename__ = "workflow_schedule_fires"
+
+    workflow_permanent_id = Column(String, primary_key=True)
+    fire_at = Column(DateTime, primary_key=True)
+    organization_id = Column(String, nullable=False)
+    workflow_run_id = Column(String, nullable=False, default=generate_workflow_run_id)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    modified_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, nullable=False)
+
+
+class CronSchedulerLeaseModel(Base):
+    __tablename__ = "cron_scheduler_leases"
+
+    scheduler_name = Column(String, primary_key=True)
+    leader_id = Column(String, nullable=False)
+    lease_expires_at = Column(DateTime, nullable=False)
+    workflows_synced_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    modified_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, nullable=False)
@@ -0,0 +1,52 @@
+import functools
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from skyvern.forge.sdk.core import skyvern_context
+
+T = TypeVar("T")
+
+_use_read_replica: ContextVar[bool] = ContextVar("use_read_replica", default=False)
+
+
+def read_only(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """
+    Mark a db client method as safe to be served by the read replica.
+    Reads stay on the primary once the current context has committed a write, so a request always sees its own writes.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        token = _use_read_replica.set(not has_written_to_primary())
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _use_read_replica.reset(token)
+
+    return wrapper
+
+
+def should_use_read_replica() -> bool:
+    return _use_read_replica.get()
+
+
+def has_written_to_primary() -> bool:
+    context = skyvern_context.current()
+    return context is not None and context.database_written
+
+
+def track_primary_writes(engine: AsyncEngine) -> None:
+    """
+    Flag the current context as soon as a transaction commits on the primary.
+    """
+
+    def on_commit(conn: Connection) -> None:
+        context = skyvern_context.current()
+        if context is not None:
+            context.database_written = True
+
+    event.listen(engine.sync_engine, "commit", on_commit)
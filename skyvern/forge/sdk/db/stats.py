@@ -0,0 +1,174 @@
+import functools
+import inspect
+import time
+from collections import deque
+from datetime import UTC, datetime
+from typing import Any, Awaitable, Callable, TypeVar
+
+import structlog
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from skyvern.forge.sdk.core import profiler
+
+LOG = structlog.get_logger()
+
+LATENCY_SAMPLE_SIZE = 1000
+MAX_SLOW_QUERIES = 100
+MAX_SLOW_QUERY_STATEMENT_LENGTH = 1000
+
+T = TypeVar("T")
+
+
+def _percentile(sorted_samples: list[float], percentile: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(percentile / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+class LatencyStats:
+    """
+    Call count, total time and a window of the latest samples used for the percentiles.
+    """
+
+    def __init__(self, sample_size: int = LATENCY_SAMPLE_SIZE) -> None:
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.samples: deque[float] = deque(maxlen=sample_size)
+
+    def record(self, duration_seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += duration_seconds
+        self.max_seconds = max(self.max_seconds, duration_seconds)
+        self.samples.append(duration_seconds)
+
+    def to_dict(self) -> dict[str, Any]:
+        sorted_samples = sorted(self.samples)
+        return {
+            "count": self.count,
+            "avg_ms": self.total_seconds / self.count * 1000 if self.count else 0.0,
+            "p50_ms": _percentile(sorted_samples, 50) * 1000,
+            "p99_ms": _percentile(sorted_samples, 99) * 1000,
+            "max_ms": self.max_seconds * 1000,
+        }
+
+
+class DBStats:
+    def __init__(self, slow_query_threshold_ms: int) -> None:
+        self.slow_query_threshold_ms = slow_query_threshold_ms
+        self.method_latencies: dict[str, LatencyStats] = {}
+        self.checkout_waits = LatencyStats()
+        self.slow_queries: deque[dict[str, Any]] = deque(maxlen=MAX_SLOW_QUERIES)
+
+    def record_method(self, method_name: str, duration_seconds: float) -> None:
+        if method_name not in self.method_latencies:
+            self.method_latencies[method_name] = LatencyStats()
+        self.method_latencies[method_name].record(duration_seconds)
+
+    def record_checkout_wait(self, duration_seconds: float) -> None:
+        self.checkout_waits.record(duration_seconds)
+
+    def record_query(self, statement: str, duration_seconds: float) -> None:
+        duration_ms = duration_seconds * 1000
+        if duration_ms < self.slow_query_threshold_ms:
+            return
+        statement = statement[:MAX_SLOW_QUERY_STATEMENT_LENGTH]
+        LOG.warning("Slow database query", duration_ms=duration_ms, statement=statement)
+        self.slow_queries.append(
+            {
+                "statement": statement,
+                "duration_ms": duration_ms,
+                "finished_at": datetime.now(UTC).isoformat(),
+            }
+        )
+
+    def listen(self, engine: AsyncEngine) -> None:
+        """
+        Time every statement executed by the engine to collect the slow queries.
+        """
+
+        def before_cursor_execute(conn: Connection, *args: Any) -> None:
+            conn.info.setdefault("skyvern_query_start_time", []).append(time.perf_counter())
+
+        def after_cursor_execute(conn: Connection, cursor: Any, statement: str, *args: Any) -> None:
+            start_times = conn.info.get("skyvern_query_start_time")
+            if start_times:
+                self.record_query(statement, time.perf_counter() - start_times.pop())
+
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+
+    def snapshot(self, engine: AsyncEngine) -> dict[str, Any]:
+        return {
+            "pool": get_pool_stats(engine),
+            "checkout_waits": self.checkout_waits.to_dict(),
+            "methods": {name: latency.to_dict() for name, latency in sorted(self.method_latencies.items())},
+            "slow_query_threshold_ms": self.slow_query_threshold_ms,
+            "slow_queries": list(self.slow_queries),
+        }
+
+
+def get_pool_stats(engine: AsyncEngine) -> dict[str, Any]:
+    pool_stats: dict[str, Any] = {"pool_class": type(engine.pool).__name__}
+    if isinstance(engine.pool, QueuePool):
+        pool_stats.update(
+            {
+                "size": engine.pool.size(),
+                "checked_in": engine.pool.checkedin(),
+                "checked_out": engine.pool.checkedout(),
+                "overflow": engine.pool.overflow(),
+                "timeout_seconds": engine.pool.timeout(),
+            }
+        )
+    return pool_stats
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that reports how long each connection checkout waited for a free connection.
+    """
+
+    stats: DBStats | None = None
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.stats:
+                self.stats.record_checkout_wait(time.perf_counter() - start)
+
+    def recreate(self) -> "InstrumentedAsyncAdaptedQueuePool":
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def timed_db_method(method_name: str, func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    @functools.wraps(func)
+    async def wrapper(self: Any, *args: Any, **kwargs: Any) -> T:
+        start = time.perf_counter()
+        try:
+            return await func(self, *args, **kwargs)
+        finally:
+            duration_seconds = time.perf_counter() - start
+            if stats := getattr(self, "stats", None):
+                stats.record_method(method_name, duration_seconds)
+            profiler.record("db", duration_seconds)
+
+    return wrapper
+
+
+def instrument_db_methods(cls: type[T]) -> type[T]:
+    """
+    Class decorator timing every public coroutine method of the db client.
+    """
+    for name, attr in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(attr):
+            continue
+        setattr(cls, name, timed_db_method(name, attr))
+    return cls
@@ -3,16 +3,19 @@ import abc
 import structlog
 from fastapi import BackgroundTasks, Request
 
+from skyvern.config import settings
 from skyvern.exceptions import OrganizationNotFound
 from skyvern.forge import app
 from skyvern.forge.sdk.core import skyvern_context
 from skyvern.forge.sdk.core.skyvern_context import SkyvernContext
 from skyvern.forge.sdk.schemas.organizations import Organization
+from skyvern.forge.sdk.schemas.run_jobs import RunJobType
 from skyvern.forge.sdk.schemas.task_v2 import TaskV2Status
 from skyvern.forge.sdk.schemas.tasks import TaskStatus
 from skyvern.forge.sdk.workflow.models.workflow import WorkflowRunStatus
 from skyvern.schemas.runs import RunEngine, RunType
 from skyvern.services import task_v2_service
+from skyvern.services.run_job_worker import fail_run
 
 LOG = structlog.get_logger()
 
@@ -28,6 +31,7 @@ class AsyncExecutor(abc.ABC):
         max_steps_override: int | None,
         api_key: str | None,
         browser_session_id: str | None,
+        priority: int = 0,
         **kwargs: dict,
     ) -> None:
         pass
@@ -43,6 +47,7 @@ class AsyncExecutor(abc.ABC):
         max_steps_override: int | None,
         api_key: str | None,
         browser_session_id: str | None,
+        priority: int = 0,
         **kwargs: dict,
     ) -> None:
         pass
@@ -56,12 +61,15 @@ class AsyncExecutor(abc.ABC):
         task_v2_id: str,
         max_steps_override: int | str | None,
         browser_session_id: str | None,
+        priority: int = 0,
         **kwargs: dict,
     ) -> None:
         pass
 
 
 class BackgroundTaskExecutor(AsyncExecutor):
+    # the background tasks start right away, the run priority only orders the runs of the DBQueueExecutor
+
     async def execute_task(
         self,
         request: Request | None,
@@ -71,6 +79,7 @@ class BackgroundTaskExecutor(AsyncExecutor):
         max_steps_override: int | None,
         api_key: str | None,
         browser_session_id: str | None,
+        priority: int = 0,
         **kwargs: dict,
     ) -> None:
         LOG.info("Executing task using background task executor", task_id=task_id)
@@ -127,6 +136,7 @@ class BackgroundTaskExecutor(AsyncExecutor):
         max_steps_override: int | None,
         api_key: str | None,
         browser_session_id: str | None,
+        priority: int = 0,
         **kwargs: dict,
     ) -> None:
         LOG.info(
@@ -151,6 +161,7 @@ class BackgroundTaskExecutor(AsyncExecutor):
         task_v2_id: str,
         max_steps_override: int | str | None,
         browser_session_id: str | None,
+        priority: int = 0,
         **kwargs: dict,
     ) -> None:
         LOG.info(
@@ -185,3 +196,150 @@ class BackgroundTaskExecutor(AsyncExecutor):
                 max_steps_override=max_steps_override,
                 browser_session_id=browser_session_id,
             )
+
+
+async def _enqueue_run_job(
+    organization_id: str,
+    job_type: RunJobType,
+    run_id: str,
+    max_steps_override: int | str | None,
+    browser_session_id: str | None,
+    priority: int = 0,
+) -> None:
+    """
+    Reject the run by marking it as failed when the organization's queue is full, the client sees it in the run status.
+    """
+    if settings.RUN_JOB_MAX_QUEUED_RUNS_PER_ORG is not None:
+        queued_count = await app.DATABASE.count_queued_run_jobs(organization_id)
+        if queued_count >= settings.RUN_JOB_MAX_QUEUED_RUNS_PER_ORG:
+            LOG.warning(
+                "Run rejected, too many runs queued for the organization",
+                run_id=run_id,
+                organization_id=organization_id,
+                queued_count=queued_count,
+            )
+            await fail_run(
+                job_type,
+                run_id,
+                organization_id,
+                failure_reason=f"Run rejected: the organization already has {queued_count} runs queued. "
+                "Please retry once some of them are finished.",
+            )
+            return
+
+    await app.DATABASE.create_run_job(
+        organization_id=organization_id,
+        job_type=job_type,
+        run_id=run_id,
+        max_attempts=settings.RUN_JOB_MAX_ATTEMPTS,
+        payload={
+            "max_steps_override": max_steps_override,
+            "browser_session_id": browser_session_id,
+        },
+        priority=priority,
+    )
+
+
+class DBQueueExecutor(AsyncExecutor):
+    """
+    Enqueue the runs into the run_jobs table. The runs are executed by the worker processes started with
+    `python -m skyvern.worker`, so they survive API restarts and don't share the API process resources.
+    The api key isn't persisted in the queue, the workers use the organization's api token.
+    """
+
+    async def execute_task(
+        self,
+        request: Request | None,
+        background_tasks: BackgroundTasks | None,
+        task_id: str,
+        organization_id: str,
+        max_steps_override: int | None,
+        api_key: str | None,
+        browser_session_id: str | None,
+        priority: int = 0,
+        **kwargs: dict,
+    ) -> None:
+        LOG.info("Enqueuing task using db queue executor", task_id=task_id)
+
+        await app.DATABASE.update_task(
+            task_id,
+            status=TaskStatus.queued,
+            organization_id=organization_id,
+        )
+        await _enqueue_run_job(
+            organization_id=organization_id,
+            job_type=RunJobType.task,
+            run_id=task_id,
+            max_steps_override=max_steps_override,
+            browser_session_id=browser_session_id,
+            priority=priority,
+        )
+
+    async def execute_workflow(
+        self,
+        request: Request | None,
+        background_tasks: BackgroundTasks | None,
+        organization: Organization,
+        workflow_id: str,
+        workflow_run_id: str,
+        max_steps_override: int | None,
+        api_key: str | None,
+        browser_session_id: str | None,
+        priority: int = 0,
+        **kwargs: dict,
+    ) -> None:
+        LOG.info(
+            "Enqueuing workflow using db queue executor",
+            workflow_run_id=workflow_run_id,
+        )
+
+        await app.DATABASE.update_workflow_run(
+            workflow_run_id=workflow_run_id,
+            status=WorkflowRunStatus.queued,
+        )
+        await _enqueue_run_job(
+            organization_id=organization.organization_id,
+            job_type=RunJobType.workflow,
+            run_id=workflow_run_id,
+            max_steps_override=max_steps_override,
+            browser_session_id=browser_session_id,
+            priority=priority,
+        )
+
+    async def execute_task_v2(
+        self,
+        request: Request | None,
+        background_tasks: BackgroundTasks | None,
+        organization_id: str,
+        task_v2_id: str,
+        max_steps_override: int | str | None,
+        browser_session_id: str | None,
+        priority: int = 0,
+        **kwargs: dict,
+    ) -> None:
+        LOG.info(
+            "Enqueuing task v2 using db queue executor",
+            task_v2_id=task_v2_id,
+        )
+
+        task_v2 = await app.DATABASE.get_task_v2(task_v2_id=task_v2_id, organization_id=organization_id)
+        if not task_v2 or not task_v2.workflow_run_id:
+            raise ValueError("No task v2 or no workflow run associated with task v2")
+
+        await app.DATABASE.update_task_v2(
+            task_v2_id=task_v2_id,
+            status=TaskV2Status.queued,
+            organization_id=organization_id,
+        )
+        await app.DATABASE.update_workflow_run(
+            workflow_run_id=task_v2.workflow_run_id,
+            status=WorkflowRunStatus.queued,
+        )
+        await _enqueue_run_job(
+            organization_id=organization_id,
+            job_type=RunJobType.task_v2,
+            run_id=task_v2_id,
+            max_steps_override=max_steps_override,
+            browser_session_id=browser_session_id,
+            priority=priority,
+        )
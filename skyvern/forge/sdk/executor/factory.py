@@ -1,8 +1,15 @@
-from skyvern.forge.sdk.executor.async_executor import AsyncExecutor, BackgroundTaskExecutor
+from skyvern.config import settings
+from skyvern.forge.sdk.executor.async_executor import AsyncExecutor, BackgroundTaskExecutor, DBQueueExecutor
+
+
+def _create_default_executor() -> AsyncExecutor:
+    if settings.ASYNC_EXECUTOR_TYPE == "db_queue":
+        return DBQueueExecutor()
+    return BackgroundTaskExecutor()
 
 
 class AsyncExecutorFactory:
-    __instance: AsyncExecutor = BackgroundTaskExecutor()
+    __instance: AsyncExecutor = _create_default_executor()
 
     @staticmethod
     def set_executor(executor: AsyncExecutor) -> None:
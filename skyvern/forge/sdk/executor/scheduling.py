@@ -0,0 +1,55 @@
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+
+from skyvern.forge.sdk.schemas.run_jobs import RunJob
+
+
+def select_fair_run_jobs(
+    candidates: list[RunJob],
+    running_counts: dict[str, int],
+    limit: int,
+    max_concurrent_runs_per_org: int | None = None,
+    organization_weights: dict[str, float] | None = None,
+) -> list[RunJob]:
+    """
+    Weighted fair queuing across organizations.
+
+    Every slot goes to the organization with the lowest running runs / weight ratio that still has queued jobs and
+    is below its concurrency cap, the oldest queue head breaks the ties. Within an organization the jobs are picked
+    by priority, then by age.
+    """
+    weights = organization_weights or {}
+    queues: dict[str, deque[RunJob]] = defaultdict(deque)
+    for run_job in sorted(candidates, key=lambda run_job: (-run_job.priority, run_job.created_at)):
+        queues[run_job.organization_id].append(run_job)
+
+    counts = defaultdict(int, running_counts)
+    selected: list[RunJob] = []
+    while len(selected) < limit:
+        eligible_organization_ids = [
+            organization_id
+            for organization_id, queue in queues.items()
+            if queue and (max_concurrent_runs_per_org is None or counts[organization_id] < max_concurrent_runs_per_org)
+        ]
+        if not eligible_organization_ids:
+            break
+        organization_id = min(
+            eligible_organization_ids,
+            key=lambda organization_id: (
+                counts[organization_id] / weights.get(organization_id, 1.0),
+                queues[organization_id][0].created_at,
+            ),
+        )
+        selected.append(queues[organization_id].popleft())
+        counts[organization_id] += 1
+    return selected
+
+
+def estimate_start_time(queue_position: int, average_duration_seconds: float | None, slots: int) -> datetime | None:
+    """
+    The organization's slots free up at a rate of `slots / average_duration_seconds`, and the run starts once a slot
+    freed up for every run ahead of it and for itself.
+    """
+    if average_duration_seconds is None or slots <= 0:
+        return None
+    return datetime.utcnow() + timedelta(seconds=queue_position / slots * average_duration_seconds)
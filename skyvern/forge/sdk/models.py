@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import StrEnum
+from typing import Any
 
 from pydantic import BaseModel
 
@@ -55,6 +56,8 @@ class Step(BaseModel):
     reasoning_token_count: int | None = None
     cached_token_count: int | None = None
     step_cost: float = 0
+    # time spent in each phase of the step, when ENABLE_STEP_PROFILER is on
+    profile: dict[str, Any] | None = None
 
     def validate_update(
         self,
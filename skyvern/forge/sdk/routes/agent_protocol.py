@@ -17,7 +17,7 @@ from skyvern.forge.prompts import prompt_engine
 from skyvern.forge.sdk.api.aws import aws_client
 from skyvern.forge.sdk.api.llm.exceptions import LLMProviderError
 from skyvern.forge.sdk.artifact.models import Artifact
-from skyvern.forge.sdk.core import skyvern_context
+from skyvern.forge.sdk.core import loop_watchdog, skyvern_context
 from skyvern.forge.sdk.core.permissions.permission_checker_factory import PermissionCheckerFactory
 from skyvern.forge.sdk.core.security import generate_skyvern_signature
 from skyvern.forge.sdk.db.enums import OrganizationAuthTokenType
@@ -64,7 +64,6 @@ from skyvern.forge.sdk.workflow.exceptions import (
     InvalidTemplateWorkflowPermanentId,
     WorkflowParameterMissingRequiredValue,
 )
-from skyvern.forge.sdk.workflow.models.block import BlockType
 from skyvern.forge.sdk.workflow.models.workflow import (
     RunWorkflowResponse,
     Workflow,
@@ -168,6 +167,7 @@ async def run_task(
             totp_verification_url=run_request.totp_url,
             totp_identifier=run_request.totp_identifier,
             include_action_history_in_verification=run_request.include_action_history_in_verification,
+            priority=run_request.priority,
         )
         task_v1_response = await task_v1_service.run_task(
             task=task_v1_request,
@@ -205,6 +205,7 @@ async def run_task(
                 data_extraction_schema=task_v1_response.extracted_information_schema,
                 error_code_mapping=task_v1_response.error_code_mapping,
                 browser_session_id=run_request.browser_session_id,
+                priority=run_request.priority,
             ),
         )
     if run_request.engine == RunEngine.skyvern_v2:
@@ -235,6 +236,7 @@ async def run_task(
             task_v2_id=task_v2.observer_cruise_id,
             max_steps_override=run_request.max_steps,
             browser_session_id=run_request.browser_session_id,
+            priority=run_request.priority,
         )
         refreshed_task_v2 = await app.DATABASE.get_task_v2(
             task_v2_id=task_v2.observer_cruise_id, organization_id=current_org.organization_id
@@ -262,6 +264,7 @@ async def run_task(
                 error_code_mapping=task_v2.error_code_mapping,
                 data_extraction_schema=task_v2.extracted_information_schema,
                 publish_workflow=run_request.publish_workflow,
+                priority=run_request.priority,
             ),
         )
     LOG.error("Invalid agent engine", engine=run_request.engine, organization_id=current_org.organization_id)
@@ -317,6 +320,7 @@ async def run_workflow(
         totp_identifier=workflow_run_request.totp_identifier,
         totp_url=workflow_run_request.totp_url,
         browser_session_id=workflow_run_request.browser_session_id,
+        priority=workflow_run_request.priority,
     )
     workflow_run = await workflow_service.run_workflow(
         workflow_id=workflow_id,
@@ -732,6 +736,47 @@ async def retry_run_webhook(
     await run_service.retry_run_webhook(run_id, organization_id=current_org.organization_id, api_key=x_api_key)
 
 
+@base_router.post(
+    "/runs/{run_id}/resume",
+    tags=["Workflows"],
+    response_model=RunResponse,
+    openapi_extra={
+        "x-fern-sdk-group-name": "workflows",
+        "x-fern-sdk-method-name": "resume_workflow_run",
+    },
+    description="Resume a stopped workflow run from its last completed block",
+    summary="Resume a workflow run",
+    responses={
+        200: {"description": "Successfully resumed workflow run"},
+        404: {"description": "Workflow run not found"},
+        409: {"description": "Workflow run can't be resumed from its current status"},
+    },
+)
+@base_router.post("/runs/{run_id}/resume/", response_model=RunResponse, include_in_schema=False)
+async def resume_workflow_run(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    run_id: str = Path(..., description="The id of the workflow run to resume.", examples=["wr_123"]),
+    current_org: Organization = Depends(org_auth_service.get_current_org),
+    x_api_key: Annotated[str | None, Header()] = None,
+) -> RunResponse:
+    analytics.capture("skyvern-oss-agent-workflow-run-resume")
+    await workflow_service.resume_workflow_run(
+        workflow_run_id=run_id,
+        organization=current_org,
+        api_key=x_api_key,
+        request=request,
+        background_tasks=background_tasks,
+    )
+    run_response = await run_service.get_run_response(run_id, organization_id=current_org.organization_id)
+    if not run_response:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Workflow run not found {run_id}",
+        )
+    return run_response
+
+
 ################# Legacy Endpoints #################
 @legacy_base_router.post(
     "/webhook",
@@ -795,6 +840,41 @@ async def heartbeat() -> Response:
     return Response(content="Server is running.", status_code=200, headers={"X-Skyvern-API-Version": __version__})
 
 
+def _ensure_internal_stats_enabled() -> None:
+    # the stats are of the whole process and cover every organization, they aren't served to the organizations
+    if not settings.ENABLE_INTERNAL_STATS_ENDPOINTS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+@legacy_base_router.get("/internal/db-stats", include_in_schema=False)
+@legacy_base_router.get("/internal/db-stats/", include_in_schema=False)
+async def get_db_stats(
+    current_org: Organization = Depends(org_auth_service.get_current_org),
+) -> dict[str, Any]:
+    """
+    Database pool saturation, connection checkout waits, slow queries and latency percentiles per AgentDB method
+    for this process.
+    """
+    _ensure_internal_stats_enabled()
+    return app.DATABASE.get_stats()
+
+
+@legacy_base_router.get("/internal/event-loop-stats", include_in_schema=False)
+@legacy_base_router.get("/internal/event-loop-stats/", include_in_schema=False)
+async def get_event_loop_stats(
+    current_org: Organization = Depends(org_auth_service.get_current_org),
+) -> dict[str, Any]:
+    """
+    Max event loop lag and the latest calls blocking the event loop of this process, caught by the event loop
+    watchdog.
+    """
+    _ensure_internal_stats_enabled()
+    watchdog = loop_watchdog.get_watchdog()
+    if not watchdog:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="The event loop watchdog is disabled")
+    return watchdog.snapshot()
+
+
 @legacy_base_router.get(
     "/models",
     tags=["agent"],
@@ -1386,7 +1466,10 @@ async def get_workflow_run_timeline(
     page_size: int = Query(20, ge=1),
     current_org: Organization = Depends(org_auth_service.get_current_org),
 ) -> list[WorkflowRunTimeline]:
-    return await _flatten_workflow_run_timeline(current_org.organization_id, workflow_run_id)
+    return await app.WORKFLOW_SERVICE.get_flattened_workflow_run_timeline(
+        workflow_run_id=workflow_run_id,
+        organization_id=current_org.organization_id,
+    )
 
 
 @legacy_base_router.get(
@@ -1786,6 +1869,7 @@ async def run_task_v2(
         task_v2_id=task_v2.observer_cruise_id,
         max_steps_override=x_max_steps_override or x_max_iterations_override,
         browser_session_id=data.browser_session_id,
+        priority=data.priority,
     )
     return task_v2.model_dump(by_alias=True)
 
@@ -1810,52 +1894,3 @@ async def get_task_v2(
     if not task_v2:
         raise HTTPException(status_code=404, detail=f"Task v2 {task_id} not found")
     return task_v2.model_dump(by_alias=True)
-
-
-async def _flatten_workflow_run_timeline(organization_id: str, workflow_run_id: str) -> list[WorkflowRunTimeline]:
-    """
-    Get the timeline workflow runs including the nested workflow runs in a flattened list
-    """
-
-    # get task v2 by workflow run id
-    task_v2_obj = await app.DATABASE.get_task_v2_by_workflow_run_id(
-        workflow_run_id=workflow_run_id,
-        organization_id=organization_id,
-    )
-    # get all the workflow run blocks
-    workflow_run_block_timeline = await app.WORKFLOW_SERVICE.get_workflow_run_timeline(
-        workflow_run_id=workflow_run_id,
-        organization_id=organization_id,
-    )
-    # loop through the run block timeline, find the task_v2 blocks, flatten the timeline for task_v2
-    final_workflow_run_block_timeline = []
-    for timeline in workflow_run_block_timeline:
-        if not timeline.block:
-            continue
-        if timeline.block.block_type != BlockType.TaskV2:
-            # flatten the timeline for task_v2
-            final_workflow_run_block_timeline.append(timeline)
-            continue
-        if not timeline.block.block_workflow_run_id:
-            LOG.warning(
-                "Block workflow run id is not set for task_v2 block",
-                workflow_run_id=workflow_run_id,
-                organization_id=organization_id,
-                task_v2_id=task_v2_obj.observer_cruise_id if task_v2_obj else None,
-            )
-            continue
-        # in the future if we want to nested taskv2 shows up as a nested block, we should not flatten the timeline
-        workflow_blocks = await _flatten_workflow_run_timeline(
-            organization_id=organization_id,
-            workflow_run_id=timeline.block.block_workflow_run_id,
-        )
-        final_workflow_run_block_timeline.extend(workflow_blocks)
-
-    if task_v2_obj and task_v2_obj.observer_cruise_id:
-        thought_timeline = await task_v2_service.get_thought_timelines(
-            task_v2_id=task_v2_obj.observer_cruise_id,
-            organization_id=organization_id,
-        )
-        final_workflow_run_block_timeline.extend(thought_timeline)
-    final_workflow_run_block_timeline.sort(key=lambda x: x.created_at, reverse=True)
-    return final_workflow_run_block_timeline
@@ -0,0 +1,41 @@
+from enum import StrEnum
+
+from pydantic import BaseModel, Field, model_validator
+
+from skyvern.forge.sdk.artifact.models import ArtifactType
+
+
+class RetentionTable(StrEnum):
+    artifacts = "artifacts"
+    actions = "actions"
+    steps = "steps"
+
+
+class RetentionAction(StrEnum):
+    delete = "delete"
+    # move the artifact files under the archive prefix of the storage, the rows are kept and point to them
+    archive = "archive"
+
+
+class RetentionPolicy(BaseModel):
+    """
+    Rows of the table older than retention_days are removed, or archived for the archive action.
+    A policy for an organization replaces the policies without organization for that organization and the artifact
+    types it covers, and a policy for artifact types replaces the policy without artifact types of the same
+    organization scope for those types.
+    """
+
+    table: RetentionTable
+    retention_days: int = Field(gt=0)
+    organization_id: str | None = None
+    artifact_types: list[ArtifactType] | None = None
+    action: RetentionAction = RetentionAction.delete
+
+    @model_validator(mode="after")
+    def validate_artifact_only_fields(self) -> "RetentionPolicy":
+        if self.table != RetentionTable.artifacts:
+            if self.artifact_types:
+                raise ValueError("artifact_types can only be set on an artifacts retention policy")
+            if self.action == RetentionAction.archive:
+                raise ValueError("Only artifacts can be archived")
+        return self
@@ -0,0 +1,43 @@
+from datetime import datetime
+from enum import StrEnum
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict
+
+
+class RunJobType(StrEnum):
+    task = "task"
+    workflow = "workflow"
+    task_v2 = "task_v2"
+
+
+class RunJobStatus(StrEnum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+    def is_final(self) -> bool:
+        return self in [RunJobStatus.completed, RunJobStatus.failed]
+
+
+class RunJob(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    run_job_id: str
+    organization_id: str
+    job_type: RunJobType
+    run_id: str
+    status: RunJobStatus
+    priority: int = 0
+    attempts: int = 0
+    max_attempts: int
+    payload: dict[str, Any] | None = None
+    worker_id: str | None = None
+    locked_until: datetime | None = None
+    heartbeat_at: datetime | None = None
+    failure_reason: str | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    created_at: datetime
+    modified_at: datetime
@@ -125,6 +125,8 @@ class TaskV2Request(BaseModel):
     publish_workflow: bool = False
     extracted_information_schema: dict | list | str | None = None
     error_code_mapping: dict[str, str] | None = None
+    # position in the queue of the organization when the runs are queued in the database, higher first
+    priority: int = 0
 
     @field_validator("url", "webhook_callback_url", "totp_verification_url")
     @classmethod
@@ -110,6 +110,8 @@ class TaskRequest(TaskBase):
     )
     totp_verification_url: str | None = None
     browser_session_id: str | None = None
+    # position in the queue of the organization when the runs are queued in the database, higher first
+    priority: int = 0
 
     @model_validator(mode="after")
     def validate_url(self) -> Self:
@@ -0,0 +1,56 @@
+from datetime import datetime
+from enum import StrEnum
+
+from pydantic import BaseModel, ConfigDict
+
+
+class CronCatchUpPolicy(StrEnum):
+    # drop the fires missed beyond the misfire grace time
+    skip = "skip"
+    # run the workflow once for all the missed fires
+    once = "once"
+    # run the workflow for every missed fire, up to CRON_WORKFLOW_MAX_CATCH_UP_RUNS
+    all = "all"
+
+
+class WorkflowSchedule(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    workflow_permanent_id: str
+    organization_id: str
+    workflow_id: str
+    cron_schedule: str
+    cron_timezone: str
+    next_fire_at: datetime | None = None
+    last_fired_at: datetime | None = None
+    created_at: datetime
+    modified_at: datetime
+
+
+class WorkflowScheduleFire(BaseModel):
+    """
+    A claimed fire of a workflow schedule, it's deleted once its workflow run is created.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    workflow_permanent_id: str
+    fire_at: datetime
+    organization_id: str
+    # generated with the claim, a fire retried after a failure creates the same workflow run at most once
+    workflow_run_id: str
+    attempts: int
+    created_at: datetime
+    modified_at: datetime
+
+
+class CronSchedulerLease(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    scheduler_name: str
+    leader_id: str
+    lease_expires_at: datetime
+    # the workflows modified before this time are synced into the workflow schedules
+    workflows_synced_at: datetime | None = None
+    created_at: datetime
+    modified_at: datetime
@@ -0,0 +1,135 @@
+from typing import Any
+
+import structlog
+from jinja2 import Environment, TemplateSyntaxError, meta
+
+from skyvern.forge.sdk.workflow.models.block import BlockType, BlockTypeVar, ForLoopBlock
+from skyvern.forge.sdk.workflow.models.parameter import ContextParameter, OutputParameter
+
+LOG = structlog.get_logger()
+
+# blocks that never touch the browser page of the workflow run. every other block shares the page, so they run one
+# at a time in the order of the workflow definition
+BROWSERLESS_BLOCK_TYPES = {
+    BlockType.TEXT_PROMPT,
+    BlockType.DOWNLOAD_TO_S3,
+    BlockType.UPLOAD_TO_S3,
+    BlockType.FILE_UPLOAD,
+    BlockType.SEND_EMAIL,
+    BlockType.FILE_URL_PARSER,
+    BlockType.PDF_PARSER,
+    BlockType.WAIT,
+}
+
+# blocks reading the files downloaded by the browser blocks before them
+DOWNLOADED_FILES_BLOCK_TYPES = {
+    BlockType.UPLOAD_TO_S3,
+    BlockType.FILE_UPLOAD,
+    BlockType.SEND_EMAIL,
+}
+
+_jinja_env = Environment()
+
+
+def _iter_blocks(block: BlockTypeVar) -> list[BlockTypeVar]:
+    blocks = [block]
+    if isinstance(block, ForLoopBlock):
+        for loop_block in block.loop_blocks:
+            blocks.extend(_iter_blocks(loop_block))
+    return blocks
+
+
+def uses_browser(block: BlockTypeVar) -> bool:
+    return any(inner_block.block_type not in BROWSERLESS_BLOCK_TYPES for inner_block in _iter_blocks(block))
+
+
+def _collect_template_strings(value: Any, templates: list[str]) -> None:
+    if isinstance(value, str):
+        if "{{" in value or "{%" in value:
+            templates.append(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_template_strings(item, templates)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _collect_template_strings(item, templates)
+
+
+def _get_referenced_names(block: BlockTypeVar) -> set[str] | None:
+    """
+    Variables referenced by the jinja templates of the block. None when a template can't be parsed.
+    """
+    templates: list[str] = []
+    _collect_template_strings(block.model_dump(exclude={"output_parameter"}), templates)
+    names: set[str] = set()
+    for template in templates:
+        try:
+            names |= meta.find_undeclared_variables(_jinja_env.parse(template))
+        except TemplateSyntaxError:
+            return None
+    return names
+
+
+def _get_source_output_parameter_keys(workflow_run_id: str, block: BlockTypeVar) -> set[str]:
+    keys: set[str] = set()
+    for inner_block in _iter_blocks(block):
+        for parameter in inner_block.get_all_parameters(workflow_run_id):
+            # a context parameter gets its value from the output parameter at the end of its source chain
+            while isinstance(parameter, ContextParameter):
+                parameter = parameter.source
+            if isinstance(parameter, OutputParameter):
+                keys.add(parameter.key)
+    return keys
+
+
+def get_block_dependencies(blocks: list[BlockTypeVar], workflow_run_id: str) -> dict[str, set[str]]:
+    """
+    Labels of the root blocks every root block has to wait for.
+
+    A block depends on the earlier blocks whose output it references through its parameters or its jinja templates.
+    The blocks using the browser depend on the previous block using the browser, the blocks reading the downloaded
+    files depend on all the earlier blocks using the browser and a wait block is a barrier between the blocks before
+    and after it. A block whose templates can't be parsed depends on all the earlier blocks.
+    """
+    dependencies: dict[str, set[str]] = {}
+    # label and output parameter key of every block, including the blocks inside the loops, to the root block label
+    producers: dict[str, str] = {}
+    browser_block_labels: list[str] = []
+    last_barrier_label: str | None = None
+
+    for block in blocks:
+        block_dependencies: set[str] = set()
+        if last_barrier_label:
+            block_dependencies.add(last_barrier_label)
+
+        referenced_keys = _get_source_output_parameter_keys(workflow_run_id, block)
+        referenced_names = _get_referenced_names(block)
+        if referenced_names is None:
+            LOG.warning(
+                "Failed to parse the templates of the block, running it after all the previous blocks",
+                block_label=block.label,
+                workflow_run_id=workflow_run_id,
+            )
+            block_dependencies |= set(dependencies)
+        else:
+            referenced_keys |= referenced_names
+        block_dependencies |= {producers[key] for key in referenced_keys if key in producers}
+
+        if block.block_type == BlockType.WAIT:
+            block_dependencies |= set(dependencies)
+            last_barrier_label = block.label
+        if uses_browser(block) and browser_block_labels:
+            block_dependencies.add(browser_block_labels[-1])
+        if block.block_type in DOWNLOADED_FILES_BLOCK_TYPES:
+            block_dependencies |= set(browser_block_labels)
+
+        block_dependencies.discard(block.label)
+        dependencies[block.label] = block_dependencies
+
+        for inner_block in _iter_blocks(block):
+            producers[inner_block.label] = block.label
+            producers[inner_block.output_parameter.key] = block.label
+        if uses_browser(block):
+            browser_block_labels.append(block.label)
+
+    return dependencies
@@ -1,6 +1,10 @@
+import asyncio
 import copy
+import json
 import uuid
-from typing import TYPE_CHECKING, Any, Self
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Iterator, Self
 
 import structlog
 
@@ -18,6 +22,11 @@ from skyvern.forge.sdk.schemas.organizations import Organization
 from skyvern.forge.sdk.schemas.tasks import TaskStatus
 from skyvern.forge.sdk.services.bitwarden import BitwardenConstants, BitwardenService
 from skyvern.forge.sdk.workflow.exceptions import OutputParameterKeyCollisionError
+from skyvern.forge.sdk.workflow.models.checkpoint import (
+    CheckpointedBlockResult,
+    CheckpointedLoopIteration,
+    WorkflowRunCheckpoint,
+)
 from skyvern.forge.sdk.workflow.models.parameter import (
     PARAMETER_TYPE,
     AWSSecretParameter,
@@ -40,6 +49,19 @@ LOG = structlog.get_logger()
 
 BlockMetadata = dict[str, str | int | float | bool | dict | list]
 
+SECRET_PARAMETER_TYPES = (
+    AWSSecretParameter,
+    BitwardenLoginCredentialParameter,
+    BitwardenCreditCardDataParameter,
+    BitwardenSensitiveInformationParameter,
+    CredentialParameter,
+)
+
+# workflow run context of the loop iteration running in the current asyncio task, keyed by workflow run id
+_scoped_workflow_run_context: ContextVar[tuple[str, "WorkflowRunContext"] | None] = ContextVar(
+    "scoped_workflow_run_context", default=None
+)
+
 
 class WorkflowRunContext:
     @classmethod
@@ -112,6 +134,81 @@ class WorkflowRunContext:
         self.parameters: dict[str, PARAMETER_TYPE] = {}
         self.values: dict[str, Any] = {}
         self.secrets: dict[str, Any] = {}
+        # progress persisted in the checkpoint of the workflow run, only the root loop blocks checkpoint their
+        # iterations. shared with the copies of the loop iterations
+        self.root_block_labels: set[str] = set()
+        self.checkpointed_blocks: dict[str, CheckpointedBlockResult] = {}
+        self.checkpointed_loop_iterations: dict[str, dict[int, CheckpointedLoopIteration]] = {}
+        self.checkpoint_lock = asyncio.Lock()
+
+    def copy_for_loop_iteration(self) -> "WorkflowRunContext":
+        """
+        Copy of the context for one loop iteration running in parallel with the others. The values and the block
+        metadata are scoped to the iteration, the secrets are shared.
+        """
+        iteration_context = WorkflowRunContext()
+        iteration_context.blocks_metadata = copy.deepcopy(self.blocks_metadata)
+        iteration_context.parameters = dict(self.parameters)
+        iteration_context.values = dict(self.values)
+        iteration_context.secrets = self.secrets
+        iteration_context.root_block_labels = self.root_block_labels
+        iteration_context.checkpointed_blocks = self.checkpointed_blocks
+        iteration_context.checkpointed_loop_iterations = self.checkpointed_loop_iterations
+        iteration_context.checkpoint_lock = self.checkpoint_lock
+        return iteration_context
+
+    def merge_loop_iteration(self, iteration_context: "WorkflowRunContext", base_values: dict[str, Any]) -> None:
+        """
+        Apply the values set by a loop iteration. Merging the iterations in order leaves the values of the last one,
+        like a sequential loop does.
+        """
+        for key, parameter in iteration_context.parameters.items():
+            self.parameters.setdefault(key, parameter)
+        for key, value in iteration_context.values.items():
+            if key not in base_values or base_values[key] is not value:
+                self.values[key] = value
+
+    def _is_secret_value(self, key: str, value: Any) -> bool:
+        parameter = self.parameters.get(key)
+        if isinstance(parameter, SECRET_PARAMETER_TYPES):
+            return True
+        if (
+            isinstance(parameter, WorkflowParameter)
+            and parameter.workflow_parameter_type == WorkflowParameterType.CREDENTIAL_ID
+        ):
+            return True
+        return isinstance(value, str) and value in self.secrets
+
+    def get_checkpoint_values(self) -> dict[str, Any]:
+        """
+        The values persisted in the checkpoint of the workflow run. The secrets and the values that can't be
+        serialized are left out, the secrets are registered again when the workflow run resumes.
+        """
+        checkpoint_values: dict[str, Any] = {}
+        for key, value in self.values.items():
+            if self._is_secret_value(key, value):
+                continue
+            try:
+                json.dumps(value)
+            except (TypeError, ValueError):
+                LOG.debug("Value can't be serialized, leaving it out of the checkpoint", key=key)
+                continue
+            checkpoint_values[key] = value
+        return checkpoint_values
+
+    def restore_checkpoint(self, checkpoint: WorkflowRunCheckpoint) -> None:
+        for key, value in checkpoint.context_values.items():
+            if self._is_secret_value(key, value):
+                continue
+            parameter = self.parameters.get(key)
+            if isinstance(parameter, ContextParameter):
+                parameter.value = value
+            self.values[key] = value
+        for label, metadata in checkpoint.blocks_metadata.items():
+            self.update_block_metadata(label, metadata)
+        self.checkpointed_blocks.update(checkpoint.completed_blocks)
+        for label, iterations in checkpoint.loop_iterations.items():
+            self.checkpointed_loop_iterations[label] = dict(iterations)
 
     def get_parameter(self, key: str) -> Parameter:
         return self.parameters[key]
@@ -775,22 +872,108 @@ class WorkflowContextManager:
 
     def get_workflow_run_context(self, workflow_run_id: str) -> WorkflowRunContext:
         self._validate_workflow_run_context(workflow_run_id)
+        scoped_workflow_run_context = _scoped_workflow_run_context.get()
+        if scoped_workflow_run_context and scoped_workflow_run_context[0] == workflow_run_id:
+            return scoped_workflow_run_context[1]
         return self.workflow_run_contexts[workflow_run_id]
 
+    @staticmethod
+    @contextmanager
+    def scope_workflow_run_context(workflow_run_id: str, workflow_run_context: WorkflowRunContext) -> Iterator[None]:
+        """
+        Serve `workflow_run_context` for the workflow run to everything running in the current asyncio task.
+        """
+        token = _scoped_workflow_run_context.set((workflow_run_id, workflow_run_context))
+        try:
+            yield
+        finally:
+            _scoped_workflow_run_context.reset(token)
+
+    async def save_checkpoint(self, workflow_run_id: str, organization_id: str) -> None:
+        """
+        Persist the progress of the workflow run, so an interrupted run resumes after its last completed root block.
+        The loop iterations are persisted one by one in checkpoint_loop_iteration. A failure is only logged, the
+        workflow run goes on without its checkpoint.
+        """
+        # the progress is tracked on the workflow run context, never on the copies of the loop iterations
+        workflow_run_context = self.workflow_run_contexts.get(workflow_run_id)
+        if not workflow_run_context:
+            return
+        try:
+            async with workflow_run_context.checkpoint_lock:
+                await app.DATABASE.create_or_update_workflow_run_checkpoint(
+                    workflow_run_id=workflow_run_id,
+                    organization_id=organization_id,
+                    completed_blocks={
+                        label: block_result.model_dump(mode="json")
+                        for label, block_result in workflow_run_context.checkpointed_blocks.items()
+                    },
+                    context_values=workflow_run_context.get_checkpoint_values(),
+                    blocks_metadata=json.loads(json.dumps(workflow_run_context.blocks_metadata, default=str)),
+                )
+        except Exception:
+            LOG.warning("Failed to save the workflow run checkpoint", workflow_run_id=workflow_run_id, exc_info=True)
+
+    async def checkpoint_block(
+        self,
+        workflow_run_id: str,
+        organization_id: str,
+        label: str,
+        block_result: CheckpointedBlockResult,
+    ) -> None:
+        workflow_run_context = self.workflow_run_contexts.get(workflow_run_id)
+        if not workflow_run_context:
+            return
+        workflow_run_context.checkpointed_blocks[label] = block_result
+        # the iterations of a loop block are only needed until the block is done
+        workflow_run_context.checkpointed_loop_iterations.pop(label, None)
+        await self.save_checkpoint(workflow_run_id, organization_id)
+
+    async def checkpoint_loop_iteration(
+        self,
+        workflow_run_id: str,
+        organization_id: str,
+        label: str,
+        loop_idx: int,
+        iteration: CheckpointedLoopIteration,
+    ) -> None:
+        workflow_run_context = self.workflow_run_contexts.get(workflow_run_id)
+        if not workflow_run_context:
+            return
+        if label not in workflow_run_context.checkpointed_loop_iterations:
+            # the first iteration of the loop block also saves the progress of the run up to the loop block, the
+            # iterations are saved on their own rows
+            await self.save_checkpoint(workflow_run_id, organization_id)
+        workflow_run_context.checkpointed_loop_iterations.setdefault(label, {})[loop_idx] = iteration
+        try:
+            await app.DATABASE.create_workflow_run_checkpoint_loop_iteration(
+                workflow_run_id=workflow_run_id,
+                organization_id=organization_id,
+                block_label=label,
+                loop_idx=loop_idx,
+                iteration=iteration.model_dump(mode="json"),
+            )
+        except Exception:
+            LOG.warning(
+                "Failed to save the loop iteration checkpoint",
+                workflow_run_id=workflow_run_id,
+                label=label,
+                loop_idx=loop_idx,
+                exc_info=True,
+            )
+
     async def register_block_parameters_for_workflow_run(
         self,
         workflow_run_id: str,
         parameters: list[PARAMETER_TYPE],
         organization: Organization,
     ) -> None:
-        self._validate_workflow_run_context(workflow_run_id)
-        await self.workflow_run_contexts[workflow_run_id].register_block_parameters(
+        await self.get_workflow_run_context(workflow_run_id).register_block_parameters(
             self.aws_client, parameters, organization
         )
 
     def add_context_parameter(self, workflow_run_id: str, context_parameter: ContextParameter) -> None:
-        self._validate_workflow_run_context(workflow_run_id)
-        self.workflow_run_contexts[workflow_run_id].parameters[context_parameter.key] = context_parameter
+        self.get_workflow_run_context(workflow_run_id).parameters[context_parameter.key] = context_parameter
 
     async def set_parameter_values_for_output_parameter_dependent_blocks(
         self,
@@ -798,8 +981,7 @@ class WorkflowContextManager:
         output_parameter: OutputParameter,
         value: dict[str, Any] | list | str | None,
     ) -> None:
-        self._validate_workflow_run_context(workflow_run_id)
-        await self.workflow_run_contexts[workflow_run_id].set_parameter_values_for_output_parameter_dependent_blocks(
+        await self.get_workflow_run_context(workflow_run_id).set_parameter_values_for_output_parameter_dependent_blocks(
             output_parameter,
             value,
         )
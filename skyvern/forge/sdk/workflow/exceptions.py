@@ -146,3 +146,11 @@ class CustomizedCodeException(SkyvernException):
         super().__init__(
             f"Failed to execute code block. Reason: {exception.__class__.__name__}: {str(exception)}",
         )
+
+
+class WorkflowRunNotResumable(BaseWorkflowHTTPException):
+    def __init__(self, workflow_run_id: str, workflow_run_status: str) -> None:
+        super().__init__(
+            f"Workflow run {workflow_run_id} can't be resumed from status {workflow_run_status}",
+            status_code=status.HTTP_409_CONFLICT,
+        )
@@ -3,6 +3,7 @@ from __future__ import annotations
 import abc
 import ast
 import asyncio
+import copy
 import csv
 import json
 import os
@@ -63,6 +64,7 @@ from skyvern.forge.sdk.workflow.exceptions import (
     NoIterableValueFound,
     NoValidEmailRecipient,
 )
+from skyvern.forge.sdk.workflow.models.checkpoint import CheckpointedBlockResult, CheckpointedLoopIteration
 from skyvern.forge.sdk.workflow.models.constants import FileStorageType
 from skyvern.forge.sdk.workflow.models.parameter import (
     PARAMETER_TYPE,
@@ -793,6 +795,15 @@ class TaskBlock(BaseTaskBlock):
     block_type: Literal[BlockType.TASK] = BlockType.TASK
 
 
+@dataclass(frozen=True)
+class LoopIterationResult:
+    output_values: list[dict[str, Any]]
+    block_outputs: list[BlockResult]
+    last_block: BlockTypeVar | None
+    # a block was canceled or failed without continue_on_failure, the loop doesn't go on
+    stopped: bool = False
+
+
 class LoopBlockExecutedResult(BaseModel):
     outputs_with_loop_values: list[list[dict[str, Any]]]
     block_outputs: list[BlockResult]
@@ -840,6 +851,8 @@ class ForLoopBlock(Block):
     loop_over: PARAMETER_TYPE | None = None
     loop_variable_reference: str | None = None
     complete_if_empty: bool = False
+    # iterations run in parallel when above 1. a run with a persistent browser session always loops sequentially
+    max_concurrency: int | None = None
 
     def get_all_parameters(
         self,
@@ -935,6 +948,166 @@ class ForLoopBlock(Block):
             # TODO (kerem): Should we raise an error here?
             return [parameter_value]
 
+    async def execute_loop_iteration(
+        self,
+        workflow_run_id: str,
+        workflow_run_block_id: str,
+        workflow_run_context: WorkflowRunContext,
+        loop_idx: int,
+        loop_over_value: Any,
+        organization_id: str | None = None,
+    ) -> LoopIterationResult:
+        if checkpointed_iteration := self.get_checkpointed_iteration(workflow_run_context, loop_idx, loop_over_value):
+            LOG.info(
+                "ForLoopBlock: Skipping the loop iteration completed before the workflow run resumed",
+                workflow_run_id=workflow_run_id,
+                block_label=self.label,
+                loop_idx=loop_idx,
+            )
+            return self.build_checkpointed_iteration_result(checkpointed_iteration, loop_over_value)
+
+        context_parameters_with_value = self.get_loop_block_context_parameters(workflow_run_id, loop_over_value)
+        for context_parameter in context_parameters_with_value:
+            workflow_run_context.set_value(context_parameter.key, context_parameter.value)
+
+        each_loop_output_values: list[dict[str, Any]] = []
+        block_outputs: list[BlockResult] = []
+        current_block: BlockTypeVar | None = None
+        for block_idx, loop_block in enumerate(self.loop_blocks):
+            metadata: BlockMetadata = {
+                "current_index": loop_idx,
+                "current_value": loop_over_value,
+                "current_item": loop_over_value,
+            }
+            workflow_run_context.update_block_metadata(self.label, metadata)
+            workflow_run_context.update_block_metadata(loop_block.label, metadata)
+
+            original_loop_block = loop_block
+            loop_block = loop_block.copy()
+            current_block = loop_block
+
+            block_output = await loop_block.execute_safe(
+                workflow_run_id=workflow_run_id,
+                parent_workflow_run_block_id=workflow_run_block_id,
+                organization_id=organization_id,
+            )
+
+            output_value = (
+                workflow_run_context.get_value(block_output.output_parameter.key)
+                if workflow_run_context.has_value(block_output.output_parameter.key)
+                else None
+            )
+            each_loop_output_values.append(
+                {
+                    "loop_value": loop_over_value,
+                    "output_parameter": block_output.output_parameter,
+                    "output_value": output_value,
+                }
+            )
+            try:
+                if block_output.workflow_run_block_id:
+                    await app.DATABASE.update_workflow_run_block(
+                        workflow_run_block_id=block_output.workflow_run_block_id,
+                        organization_id=organization_id,
+                        current_value=str(loop_over_value),
+                        current_index=loop_idx,
+                    )
+            except Exception:
+                LOG.warning(
+                    "Failed to update workflow run block",
+                    workflow_run_block_id=block_output.workflow_run_block_id,
+                    loop_over_value=loop_over_value,
+                    loop_idx=loop_idx,
+                )
+            loop_block = original_loop_block
+            block_outputs.append(block_output)
+            if block_output.status == BlockStatus.canceled:
+                LOG.info(
+                    f"ForLoopBlock: Block with type {loop_block.block_type} at index {block_idx} during loop {loop_idx} was canceled for workflow run {workflow_run_id}, canceling for loop",
+                    block_type=loop_block.block_type,
+                    workflow_run_id=workflow_run_id,
+                    block_idx=block_idx,
+                    block_result=block_outputs,
+                )
+                return LoopIterationResult(each_loop_output_values, block_outputs, current_block, stopped=True)
+
+            if not block_output.success and not loop_block.continue_on_failure:
+                LOG.info(
+                    f"ForLoopBlock: Encountered a failure processing block {block_idx} during loop {loop_idx}, terminating early",
+                    block_outputs=block_outputs,
+                    loop_idx=loop_idx,
+                    block_idx=block_idx,
+                    loop_over_value=loop_over_value,
+                    loop_block_continue_on_failure=loop_block.continue_on_failure,
+                    failure_reason=block_output.failure_reason,
+                )
+                return LoopIterationResult(each_loop_output_values, block_outputs, current_block, stopped=True)
+
+        if organization_id and self.label in workflow_run_context.root_block_labels:
+            await app.WORKFLOW_CONTEXT_MANAGER.checkpoint_loop_iteration(
+                workflow_run_id=workflow_run_id,
+                organization_id=organization_id,
+                label=self.label,
+                loop_idx=loop_idx,
+                iteration=CheckpointedLoopIteration(
+                    loop_value=loop_over_value,
+                    output_values=[output["output_value"] for output in each_loop_output_values],
+                    block_results=[
+                        CheckpointedBlockResult(
+                            success=block_output.success,
+                            status=block_output.status,
+                            failure_reason=block_output.failure_reason,
+                        )
+                        for block_output in block_outputs
+                    ],
+                ),
+            )
+        return LoopIterationResult(each_loop_output_values, block_outputs, current_block)
+
+    def get_checkpointed_iteration(
+        self, workflow_run_context: WorkflowRunContext, loop_idx: int, loop_over_value: Any
+    ) -> CheckpointedLoopIteration | None:
+        """
+        The iteration of a root loop block persisted in the checkpoint of the workflow run before it resumed.
+        """
+        if self.label not in workflow_run_context.root_block_labels:
+            return None
+        checkpointed_iteration = workflow_run_context.checkpointed_loop_iterations.get(self.label, {}).get(loop_idx)
+        if (
+            checkpointed_iteration is None
+            or checkpointed_iteration.loop_value != loop_over_value
+            or len(checkpointed_iteration.block_results) != len(self.loop_blocks)
+            or len(checkpointed_iteration.output_values) != len(self.loop_blocks)
+        ):
+            return None
+        return checkpointed_iteration
+
+    def build_checkpointed_iteration_result(
+        self, checkpointed_iteration: CheckpointedLoopIteration, loop_over_value: Any
+    ) -> LoopIterationResult:
+        output_values: list[dict[str, Any]] = []
+        block_outputs: list[BlockResult] = []
+        for loop_block, output_value, block_result in zip(
+            self.loop_blocks, checkpointed_iteration.output_values, checkpointed_iteration.block_results
+        ):
+            output_values.append(
+                {
+                    "loop_value": loop_over_value,
+                    "output_parameter": loop_block.output_parameter,
+                    "output_value": output_value,
+                }
+            )
+            block_outputs.append(
+                BlockResult(
+                    success=block_result.success,
+                    output_parameter=loop_block.output_parameter,
+                    output_parameter_value=output_value,
+                    status=BlockStatus(block_result.status) if block_result.status else None,
+                    failure_reason=block_result.failure_reason,
+                )
+            )
+        return LoopIterationResult(output_values, block_outputs, self.loop_blocks[-1])
+
     async def execute_loop_helper(
         self,
         workflow_run_id: str,
@@ -948,92 +1121,158 @@ class ForLoopBlock(Block):
         current_block: BlockTypeVar | None = None
 
         for loop_idx, loop_over_value in enumerate(loop_over_values):
-            context_parameters_with_value = self.get_loop_block_context_parameters(workflow_run_id, loop_over_value)
-            for context_parameter in context_parameters_with_value:
-                workflow_run_context.set_value(context_parameter.key, context_parameter.value)
-
-            each_loop_output_values: list[dict[str, Any]] = []
-            for block_idx, loop_block in enumerate(self.loop_blocks):
-                metadata: BlockMetadata = {
-                    "current_index": loop_idx,
-                    "current_value": loop_over_value,
-                    "current_item": loop_over_value,
-                }
-                workflow_run_context.update_block_metadata(self.label, metadata)
-                workflow_run_context.update_block_metadata(loop_block.label, metadata)
+            iteration_result = await self.execute_loop_iteration(
+                workflow_run_id=workflow_run_id,
+                workflow_run_block_id=workflow_run_block_id,
+                workflow_run_context=workflow_run_context,
+                loop_idx=loop_idx,
+                loop_over_value=loop_over_value,
+                organization_id=organization_id,
+            )
+            outputs_with_loop_values.append(iteration_result.output_values)
+            block_outputs.extend(iteration_result.block_outputs)
+            current_block = iteration_result.last_block or current_block
+            if iteration_result.stopped:
+                break
 
-                original_loop_block = loop_block
-                loop_block = loop_block.copy()
-                current_block = loop_block
+        return LoopBlockExecutedResult(
+            outputs_with_loop_values=outputs_with_loop_values,
+            block_outputs=block_outputs,
+            last_block=current_block,
+        )
 
-                block_output = await loop_block.execute_safe(
-                    workflow_run_id=workflow_run_id,
-                    parent_workflow_run_block_id=workflow_run_block_id,
+    async def persist_loop_iteration_artifacts(
+        self,
+        browser_state: BrowserState,
+        workflow_run_id: str,
+        workflow_run_block_id: str,
+        organization_id: str | None = None,
+    ) -> None:
+        """
+        Upload the recordings and the HAR of an iteration's browser once it's closed. The workflow run only persists
+        the ones of its own browser.
+        """
+        try:
+            video_artifacts = await app.BROWSER_MANAGER.get_video_artifacts(
+                workflow_run_id=workflow_run_id,
+                browser_state=browser_state,
+            )
+            for video_artifact in video_artifacts:
+                await app.ARTIFACT_MANAGER.update_artifact_data(
+                    artifact_id=video_artifact.video_artifact_id,
                     organization_id=organization_id,
+                    data=video_artifact.video_data,
                 )
 
-                output_value = (
-                    workflow_run_context.get_value(block_output.output_parameter.key)
-                    if workflow_run_context.has_value(block_output.output_parameter.key)
-                    else None
+            har_data = await app.BROWSER_MANAGER.get_har_data(
+                workflow_run_id=workflow_run_id,
+                browser_state=browser_state,
+            )
+            if har_data:
+                workflow_run_block = await app.DATABASE.get_workflow_run_block(
+                    workflow_run_block_id,
+                    organization_id=organization_id,
                 )
-                each_loop_output_values.append(
-                    {
-                        "loop_value": loop_over_value,
-                        "output_parameter": block_output.output_parameter,
-                        "output_value": output_value,
-                    }
+                await app.ARTIFACT_MANAGER.create_workflow_run_block_artifact(
+                    workflow_run_block=workflow_run_block,
+                    artifact_type=ArtifactType.HAR,
+                    data=har_data,
                 )
+        except Exception:
+            LOG.exception(
+                "Failed to persist the browser artifacts of the loop iteration",
+                workflow_run_id=workflow_run_id,
+                workflow_run_block_id=workflow_run_block_id,
+            )
+
+    async def execute_loop_parallel_helper(
+        self,
+        workflow_run_id: str,
+        workflow_run_block_id: str,
+        workflow_run_context: WorkflowRunContext,
+        loop_over_values: list[Any],
+        max_concurrency: int,
+        organization_id: str | None = None,
+    ) -> LoopBlockExecutedResult:
+        """
+        Run up to `max_concurrency` iterations at once. Every iteration gets its own browser and its own copy of the
+        workflow run context. Once an iteration is canceled or fails on a block without continue_on_failure, the
+        iterations after it are canceled and the result is the one of a sequential loop stopping at that iteration.
+        An iteration raising cancels all the others and the error is raised.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        stop_event = asyncio.Event()
+        base_values = dict(workflow_run_context.values)
+        iteration_results: dict[int, tuple[LoopIterationResult, WorkflowRunContext]] = {}
+        iteration_tasks: dict[int, asyncio.Task[None]] = {}
+
+        def cancel_iterations(after_idx: int, current_idx: int) -> None:
+            stop_event.set()
+            for loop_idx, task in iteration_tasks.items():
+                if loop_idx > after_idx and loop_idx != current_idx:
+                    task.cancel()
+
+        async def run_iteration(loop_idx: int, loop_over_value: Any) -> None:
+            async with semaphore:
+                if stop_event.is_set():
+                    return
+                # the iterations mutate the skyvern context while running tasks, each one needs its own
+                if context := skyvern_context.current():
+                    skyvern_context.set(copy.copy(context))
+                iteration_context = workflow_run_context.copy_for_loop_iteration()
+                browser_state_scope = f"{workflow_run_block_id}_{loop_idx}"
                 try:
-                    if block_output.workflow_run_block_id:
-                        await app.DATABASE.update_workflow_run_block(
-                            workflow_run_block_id=block_output.workflow_run_block_id,
+                    with (
+                        app.WORKFLOW_CONTEXT_MANAGER.scope_workflow_run_context(workflow_run_id, iteration_context),
+                        app.BROWSER_MANAGER.scope_browser_state(browser_state_scope),
+                    ):
+                        iteration_result = await self.execute_loop_iteration(
+                            workflow_run_id=workflow_run_id,
+                            workflow_run_block_id=workflow_run_block_id,
+                            workflow_run_context=iteration_context,
+                            loop_idx=loop_idx,
+                            loop_over_value=loop_over_value,
                             organization_id=organization_id,
-                            current_value=str(loop_over_value),
-                            current_index=loop_idx,
                         )
                 except Exception:
-                    LOG.warning(
-                        "Failed to update workflow run block",
-                        workflow_run_block_id=block_output.workflow_run_block_id,
-                        loop_over_value=loop_over_value,
-                        loop_idx=loop_idx,
-                    )
-                loop_block = original_loop_block
-                block_outputs.append(block_output)
-                if block_output.status == BlockStatus.canceled:
-                    LOG.info(
-                        f"ForLoopBlock: Block with type {loop_block.block_type} at index {block_idx} during loop {loop_idx} was canceled for workflow run {workflow_run_id}, canceling for loop",
-                        block_type=loop_block.block_type,
-                        workflow_run_id=workflow_run_id,
-                        block_idx=block_idx,
-                        block_result=block_outputs,
-                    )
-                    outputs_with_loop_values.append(each_loop_output_values)
-                    return LoopBlockExecutedResult(
-                        outputs_with_loop_values=outputs_with_loop_values,
-                        block_outputs=block_outputs,
-                        last_block=current_block,
-                    )
+                    cancel_iterations(after_idx=-1, current_idx=loop_idx)
+                    raise
+                finally:
+                    browser_state = await app.BROWSER_MANAGER.cleanup_for_scope(workflow_run_id, browser_state_scope)
+                    if browser_state:
+                        await self.persist_loop_iteration_artifacts(
+                            browser_state=browser_state,
+                            workflow_run_id=workflow_run_id,
+                            workflow_run_block_id=workflow_run_block_id,
+                            organization_id=organization_id,
+                        )
+                iteration_results[loop_idx] = (iteration_result, iteration_context)
+                if iteration_result.stopped:
+                    # the results of the iterations after a stopped one are dropped, no need to finish them
+                    cancel_iterations(after_idx=loop_idx, current_idx=loop_idx)
 
-                if not block_output.success and not loop_block.continue_on_failure:
-                    LOG.info(
-                        f"ForLoopBlock: Encountered a failure processing block {block_idx} during loop {loop_idx}, terminating early",
-                        block_outputs=block_outputs,
-                        loop_idx=loop_idx,
-                        block_idx=block_idx,
-                        loop_over_value=loop_over_value,
-                        loop_block_continue_on_failure=loop_block.continue_on_failure,
-                        failure_reason=block_output.failure_reason,
-                    )
-                    outputs_with_loop_values.append(each_loop_output_values)
-                    return LoopBlockExecutedResult(
-                        outputs_with_loop_values=outputs_with_loop_values,
-                        block_outputs=block_outputs,
-                        last_block=current_block,
-                    )
+        for loop_idx, loop_over_value in enumerate(loop_over_values):
+            iteration_tasks[loop_idx] = asyncio.create_task(run_iteration(loop_idx, loop_over_value))
+        # the canceled iterations end with a CancelledError, which isn't an Exception
+        for result in await asyncio.gather(*iteration_tasks.values(), return_exceptions=True):
+            if isinstance(result, Exception):
+                raise result
 
-            outputs_with_loop_values.append(each_loop_output_values)
+        outputs_with_loop_values: list[list[dict[str, Any]]] = []
+        block_outputs: list[BlockResult] = []
+        current_block: BlockTypeVar | None = None
+        first_stopped_idx = min(
+            (loop_idx for loop_idx, (result, _) in iteration_results.items() if result.stopped),
+            default=len(loop_over_values),
+        )
+        for loop_idx in sorted(iteration_results):
+            if loop_idx > first_stopped_idx:
+                break
+            iteration_result, iteration_context = iteration_results[loop_idx]
+            workflow_run_context.merge_loop_iteration(iteration_context, base_values)
+            outputs_with_loop_values.append(iteration_result.output_values)
+            block_outputs.extend(iteration_result.block_outputs)
+            current_block = iteration_result.last_block or current_block
 
         return LoopBlockExecutedResult(
             outputs_with_loop_values=outputs_with_loop_values,
@@ -1116,13 +1355,23 @@ class ForLoopBlock(Block):
                 organization_id=organization_id,
             )
 
-        loop_executed_result = await self.execute_loop_helper(
-            workflow_run_id=workflow_run_id,
-            workflow_run_block_id=workflow_run_block_id,
-            workflow_run_context=workflow_run_context,
-            loop_over_values=loop_over_values,
-            organization_id=organization_id,
-        )
+        if self.max_concurrency and self.max_concurrency > 1 and not browser_session_id:
+            loop_executed_result = await self.execute_loop_parallel_helper(
+                workflow_run_id=workflow_run_id,
+                workflow_run_block_id=workflow_run_block_id,
+                workflow_run_context=workflow_run_context,
+                loop_over_values=loop_over_values,
+                max_concurrency=self.max_concurrency,
+                organization_id=organization_id,
+            )
+        else:
+            loop_executed_result = await self.execute_loop_helper(
+                workflow_run_id=workflow_run_id,
+                workflow_run_block_id=workflow_run_block_id,
+                workflow_run_context=workflow_run_context,
+                loop_over_values=loop_over_values,
+                organization_id=organization_id,
+            )
         await self.record_output_parameter_value(
             workflow_run_context, workflow_run_id, loop_executed_result.outputs_with_loop_values
         )
@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict
+
+
+class CheckpointedBlockResult(BaseModel):
+    success: bool
+    status: str | None = None
+    failure_reason: str | None = None
+
+
+class CheckpointedLoopIteration(BaseModel):
+    loop_value: Any = None
+    # output value and result of every loop block of the iteration, in order
+    output_values: list[Any]
+    block_results: list[CheckpointedBlockResult]
+
+
+class WorkflowRunCheckpoint(BaseModel):
+    """
+    Progress of a workflow run: the root blocks it went through, the iterations the running loop blocks went
+    through and the values of the workflow run context, secrets excluded.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    workflow_run_id: str
+    organization_id: str
+    completed_blocks: dict[str, CheckpointedBlockResult]
+    loop_iterations: dict[str, dict[int, CheckpointedLoopIteration]]
+    context_values: dict[str, Any]
+    blocks_metadata: dict[str, dict[str, Any]]
+    created_at: datetime
+    modified_at: datetime
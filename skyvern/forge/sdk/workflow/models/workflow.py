@@ -23,6 +23,8 @@ class WorkflowRequestBody(BaseModel):
     totp_verification_url: str | None = None
     totp_identifier: str | None = None
     browser_session_id: str | None = None
+    # position in the queue of the organization when the runs are queued in the database, higher first
+    priority: int = 0
 
     @field_validator("webhook_callback_url", "totp_verification_url")
     @classmethod
@@ -38,9 +40,17 @@ class RunWorkflowResponse(BaseModel):
     workflow_run_id: str
 
 
+class WorkflowExecutionMode(StrEnum):
+    # the blocks run one after the other in the order of the definition
+    sequential = "sequential"
+    # the blocks run as soon as the blocks they depend on are finished
+    dag = "dag"
+
+
 class WorkflowDefinition(BaseModel):
     parameters: list[PARAMETER_TYPE]
     blocks: List[BlockTypeVar]
+    execution_mode: WorkflowExecutionMode = WorkflowExecutionMode.sequential
 
     def validate(self) -> None:
         labels: set[str] = set()
@@ -7,7 +7,7 @@ from skyvern.config import settings
 from skyvern.forge.sdk.workflow.models.block import BlockType, FileType
 from skyvern.forge.sdk.workflow.models.constants import FileStorageType
 from skyvern.forge.sdk.workflow.models.parameter import ParameterType, WorkflowParameterType
-from skyvern.forge.sdk.workflow.models.workflow import WorkflowStatus
+from skyvern.forge.sdk.workflow.models.workflow import WorkflowExecutionMode, WorkflowStatus
 from skyvern.schemas.runs import ProxyLocation, RunEngine
 
 
@@ -159,6 +159,7 @@ class ForLoopBlockYAML(BlockYAML):
     loop_over_parameter_key: str = ""
     loop_variable_reference: str | None = None
     complete_if_empty: bool = False
+    max_concurrency: int | None = Field(default=None, ge=1)
 
 
 class CodeBlockYAML(BlockYAML):
@@ -404,6 +405,7 @@ BLOCK_YAML_TYPES = Annotated[BLOCK_YAML_SUBCLASSES, Field(discriminator="block_t
 class WorkflowDefinitionYAML(BaseModel):
     parameters: list[PARAMETER_YAML_TYPES]
     blocks: list[BLOCK_YAML_TYPES]
+    execution_mode: WorkflowExecutionMode = WorkflowExecutionMode.sequential
 
 
 class WorkflowCreateYAMLRequest(BaseModel):
@@ -1,6 +1,8 @@
 import asyncio
+import copy
 import json
-from datetime import UTC, datetime
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
 from typing import Any
 
 import httpx
@@ -25,8 +27,10 @@ from skyvern.forge.sdk.db.enums import TaskType
 from skyvern.forge.sdk.models import Step, StepStatus
 from skyvern.forge.sdk.schemas.files import FileInfo
 from skyvern.forge.sdk.schemas.organizations import Organization
+from skyvern.forge.sdk.schemas.task_v2 import ThoughtType
 from skyvern.forge.sdk.schemas.tasks import Task
 from skyvern.forge.sdk.schemas.workflow_runs import WorkflowRunBlock, WorkflowRunTimeline, WorkflowRunTimelineType
+from skyvern.forge.sdk.workflow.block_dag import get_block_dependencies
 from skyvern.forge.sdk.workflow.exceptions import (
     ContextParameterSourceNotDefined,
     InvalidWaitBlockTime,
@@ -37,6 +41,7 @@ from skyvern.forge.sdk.workflow.exceptions import (
 )
 from skyvern.forge.sdk.workflow.models.block import (
     ActionBlock,
+    BlockResult,
     BlockStatus,
     BlockType,
     BlockTypeVar,
@@ -59,6 +64,7 @@ from skyvern.forge.sdk.workflow.models.block import (
     ValidationBlock,
     WaitBlock,
 )
+from skyvern.forge.sdk.workflow.models.checkpoint import CheckpointedBlockResult
 from skyvern.forge.sdk.workflow.models.parameter import (
     PARAMETER_TYPE,
     RESERVED_PARAMETER_KEYS,
@@ -77,6 +83,7 @@ from skyvern.forge.sdk.workflow.models.parameter import (
 from skyvern.forge.sdk.workflow.models.workflow import (
     Workflow,
     WorkflowDefinition,
+    WorkflowExecutionMode,
     WorkflowRequestBody,
     WorkflowRun,
     WorkflowRunOutputParameter,
@@ -96,6 +103,13 @@ from skyvern.webeye.browser_factory import BrowserState
 
 LOG = structlog.get_logger()
 
+WORKFLOW_RUN_TIMELINE_CACHE_KEY_PREFIX = "workflow_run_timeline"
+WORKFLOW_RUN_TIMELINE_CACHE_TTL = timedelta(days=1)
+
+
+def get_workflow_run_timeline_cache_key(workflow_run_id: str, organization_id: str | None) -> str:
+    return f"{WORKFLOW_RUN_TIMELINE_CACHE_KEY_PREFIX}:{organization_id}:{workflow_run_id}"
+
 
 class WorkflowService:
     async def setup_workflow_run(
@@ -108,6 +122,7 @@ class WorkflowService:
         version: int | None = None,
         max_steps_override: int | None = None,
         parent_workflow_run_id: str | None = None,
+        workflow_run_id: str | None = None,
     ) -> WorkflowRun:
         """
         Create a workflow run and its parameters. Validate the workflow and the organization. If there are missing
@@ -117,6 +132,7 @@ class WorkflowService:
         :param workflow_id: The workflow id to run.
         :param organization_id: The organization id for the workflow.
         :param max_steps_override: The max steps override for the workflow run, if any.
+        :param workflow_run_id: The id of the created workflow run, a new one is generated if None.
         :return: The created workflow run.
         """
         # Validate the workflow and the organization
@@ -140,6 +156,7 @@ class WorkflowService:
             workflow_id=workflow_id,
             organization_id=organization.organization_id,
             parent_workflow_run_id=parent_workflow_run_id,
+            workflow_run_id=workflow_run_id,
         )
         LOG.info(
             f"Created workflow run {workflow_run.workflow_run_id} for workflow {workflow.workflow_id}",
@@ -279,8 +296,24 @@ class WorkflowService:
             )
             return workflow_run
 
-        # Execute workflow blocks
-        blocks = workflow.workflow_definition.blocks
+        # Execute workflow blocks, skipping the ones completed before the workflow run resumed
+        blocks = await self._restore_workflow_run_checkpoint(
+            workflow_run_id=workflow_run_id,
+            organization_id=organization_id,
+            blocks=workflow.workflow_definition.blocks,
+        )
+        if workflow.workflow_definition.execution_mode == WorkflowExecutionMode.dag:
+            if finalized_workflow_run := await self._execute_workflow_blocks_as_dag(
+                workflow=workflow,
+                workflow_run=workflow_run,
+                blocks=blocks,
+                organization=organization,
+                api_key=api_key,
+                browser_session_id=browser_session_id,
+            ):
+                return finalized_workflow_run
+            # all the blocks went through, nothing left to run sequentially
+            blocks = []
         blocks_cnt = len(blocks)
         block_result = None
         for block_idx, block in enumerate(blocks):
@@ -476,6 +509,7 @@ class WorkflowService:
                         block_label=block.label,
                     )
 
+                await self._checkpoint_workflow_run_block(workflow_run_id, organization_id, block, block_result)
             except Exception as e:
                 LOG.exception(
                     f"Error while executing workflow run {workflow_run.workflow_run_id}",
@@ -514,6 +548,7 @@ class WorkflowService:
                 WorkflowRunStatus.timed_out,
             ):
                 workflow_run = await self.mark_workflow_run_as_completed(workflow_run_id=workflow_run.workflow_run_id)
+                await app.DATABASE.delete_workflow_run_checkpoint(workflow_run_id)
             else:
                 LOG.info(
                     "Workflow run is already timed_out, canceled, failed, or terminated, not marking as completed",
@@ -541,6 +576,216 @@ class WorkflowService:
 
         return workflow_run
 
+    async def _execute_workflow_blocks_as_dag(
+        self,
+        workflow: Workflow,
+        workflow_run: WorkflowRun,
+        blocks: list[BlockTypeVar],
+        organization: Organization,
+        api_key: str,
+        browser_session_id: str | None = None,
+    ) -> WorkflowRun | None:
+        """
+        Run every root block as soon as the blocks it depends on are finished, with at most
+        WORKFLOW_DAG_MAX_PARALLEL_BLOCKS blocks running at once.
+        Once a block stops the workflow run, no new block starts and the workflow run is finalized after the running
+        blocks are done. Returns the finalized workflow run in this case, None when all the blocks went through.
+        """
+        workflow_run_id = workflow_run.workflow_run_id
+        dependencies = get_block_dependencies(blocks, workflow_run_id)
+        pending_blocks = list(blocks)
+        running_blocks: dict[asyncio.Task, BlockTypeVar] = {}
+        finished_labels: set[str] = set()
+        final_status: WorkflowRunStatus | None = None
+        failure_reason: str | None = None
+        # canceled or timed out from outside, the workflow run is already marked
+        stopped_by_workflow_run_status = False
+
+        while running_blocks or (pending_blocks and final_status is None):
+            if final_status is None:
+                if refreshed_workflow_run := await app.DATABASE.get_workflow_run(
+                    workflow_run_id=workflow_run_id,
+                    organization_id=organization.organization_id,
+                ):
+                    workflow_run = refreshed_workflow_run
+                    if workflow_run.status in (WorkflowRunStatus.canceled, WorkflowRunStatus.timed_out):
+                        LOG.info(
+                            f"Workflow run is {workflow_run.status}, stopping execution inside workflow execution dag",
+                            workflow_run_id=workflow_run_id,
+                        )
+                        final_status = workflow_run.status
+                        stopped_by_workflow_run_status = True
+
+            if final_status is None:
+                ready_blocks = [block for block in pending_blocks if dependencies[block.label] <= finished_labels]
+                for block in ready_blocks[: settings.WORKFLOW_DAG_MAX_PARALLEL_BLOCKS - len(running_blocks)]:
+                    pending_blocks.remove(block)
+                    LOG.info(
+                        f"Executing root block {block.block_type} in dag for workflow run {workflow_run_id}",
+                        workflow_run_id=workflow_run_id,
+                        block_type=block.block_type,
+                        block_label=block.label,
+                        dependencies=sorted(dependencies[block.label]),
+                    )
+                    running_blocks[
+                        asyncio.create_task(
+                            self._execute_root_block(workflow_run_id, block, organization, browser_session_id)
+                        )
+                    ] = block
+
+            if not running_blocks:
+                break
+
+            done_tasks, _ = await asyncio.wait(running_blocks, return_when=asyncio.FIRST_COMPLETED)
+            for done_task in done_tasks:
+                block = running_blocks.pop(done_task)
+                finished_labels.add(block.label)
+                try:
+                    block_result = done_task.result()
+                except Exception as e:
+                    LOG.exception(
+                        f"Error while executing workflow run {workflow_run_id}",
+                        workflow_run_id=workflow_run_id,
+                        block_type=block.block_type,
+                        block_label=block.label,
+                    )
+                    exception_message = f"Unexpected error: {str(e)}"
+                    if isinstance(e, SkyvernException):
+                        exception_message = f"unexpected SkyvernException({e.__class__.__name__}): {str(e)}"
+                    if final_status is None:
+                        final_status = WorkflowRunStatus.failed
+                        failure_reason = f"{block.block_type} block failed. failure reason: {exception_message}"
+                    continue
+
+                if final_status is not None:
+                    continue
+                if block_result.status == BlockStatus.canceled:
+                    final_status = WorkflowRunStatus.canceled
+                elif block.continue_on_failure:
+                    pass
+                elif block_result.status == BlockStatus.failed:
+                    final_status = WorkflowRunStatus.failed
+                    failure_reason = f"{block.block_type} block failed. failure reason: {block_result.failure_reason}"
+                elif block_result.status == BlockStatus.terminated:
+                    final_status = WorkflowRunStatus.terminated
+                    failure_reason = f"{block.block_type} block terminated. Reason: {block_result.failure_reason}"
+                elif block_result.status == BlockStatus.timed_out:
+                    final_status = WorkflowRunStatus.failed
+                    failure_reason = f"{block.block_type} block timed out. Reason: {block_result.failure_reason}"
+                if final_status is None:
+                    await self._checkpoint_workflow_run_block(
+                        workflow_run_id, organization.organization_id, block, block_result
+                    )
+                else:
+                    LOG.info(
+                        f"Block with type {block.block_type} stopped the workflow run {workflow_run_id}",
+                        workflow_run_id=workflow_run_id,
+                        block_type=block.block_type,
+                        block_label=block.label,
+                        block_result=block_result,
+                    )
+
+        if final_status is None:
+            return None
+
+        need_call_webhook = True
+        if stopped_by_workflow_run_status:
+            LOG.info("Workflow run was stopped from outside", workflow_run_id=workflow_run_id, status=final_status)
+        elif final_status == WorkflowRunStatus.canceled:
+            # We're not sending a webhook here because the workflow run is manually marked as canceled.
+            workflow_run = await self.mark_workflow_run_as_canceled(workflow_run_id=workflow_run_id)
+            need_call_webhook = False
+        elif final_status == WorkflowRunStatus.terminated:
+            workflow_run = await self.mark_workflow_run_as_terminated(
+                workflow_run_id=workflow_run_id, failure_reason=failure_reason
+            )
+        else:
+            workflow_run = await self.mark_workflow_run_as_failed(
+                workflow_run_id=workflow_run_id, failure_reason=failure_reason
+            )
+        await self.clean_up_workflow(
+            workflow=workflow,
+            workflow_run=workflow_run,
+            api_key=api_key,
+            need_call_webhook=need_call_webhook,
+            close_browser_on_completion=browser_session_id is None,
+            browser_session_id=browser_session_id,
+        )
+        return workflow_run
+
+    async def _restore_workflow_run_checkpoint(
+        self,
+        workflow_run_id: str,
+        organization_id: str,
+        blocks: list[BlockTypeVar],
+    ) -> list[BlockTypeVar]:
+        """
+        Restore the progress of a resumed workflow run from its checkpoint. Returns the root blocks left to execute.
+        """
+        workflow_run_context = app.WORKFLOW_CONTEXT_MANAGER.get_workflow_run_context(workflow_run_id)
+        workflow_run_context.root_block_labels.update(block.label for block in blocks)
+        try:
+            checkpoint = await app.DATABASE.get_workflow_run_checkpoint(
+                workflow_run_id=workflow_run_id,
+                organization_id=organization_id,
+            )
+        except Exception:
+            LOG.exception(
+                "Failed to get the workflow run checkpoint, executing all the blocks",
+                workflow_run_id=workflow_run_id,
+            )
+            return blocks
+        if not checkpoint:
+            return blocks
+
+        workflow_run_context.restore_checkpoint(checkpoint)
+        remaining_blocks = [block for block in blocks if block.label not in checkpoint.completed_blocks]
+        LOG.info(
+            "Resuming workflow run from its checkpoint",
+            workflow_run_id=workflow_run_id,
+            completed_block_labels=sorted(checkpoint.completed_blocks),
+            remaining_block_count=len(remaining_blocks),
+        )
+        return remaining_blocks
+
+    async def _checkpoint_workflow_run_block(
+        self,
+        workflow_run_id: str,
+        organization_id: str,
+        block: BlockTypeVar,
+        block_result: BlockResult,
+    ) -> None:
+        await app.WORKFLOW_CONTEXT_MANAGER.checkpoint_block(
+            workflow_run_id=workflow_run_id,
+            organization_id=organization_id,
+            label=block.label,
+            block_result=CheckpointedBlockResult(
+                success=block_result.success,
+                status=block_result.status,
+                failure_reason=block_result.failure_reason,
+            ),
+        )
+
+    async def _execute_root_block(
+        self,
+        workflow_run_id: str,
+        block: BlockTypeVar,
+        organization: Organization,
+        browser_session_id: str | None = None,
+    ) -> BlockResult:
+        # the root blocks run concurrently and mutate the skyvern context while running tasks, each one needs its own
+        if context := skyvern_context.current():
+            skyvern_context.set(copy.copy(context))
+        parameters = block.get_all_parameters(workflow_run_id)
+        await app.WORKFLOW_CONTEXT_MANAGER.register_block_parameters_for_workflow_run(
+            workflow_run_id, parameters, organization
+        )
+        return await block.execute_safe(
+            workflow_run_id=workflow_run_id,
+            organization_id=organization.organization_id,
+            browser_session_id=browser_session_id,
+        )
+
     async def create_workflow(
         self,
         organization_id: str,
@@ -732,6 +977,7 @@ class WorkflowService:
         workflow_id: str,
         organization_id: str,
         parent_workflow_run_id: str | None = None,
+        workflow_run_id: str | None = None,
     ) -> WorkflowRun:
         return await app.DATABASE.create_workflow_run(
             workflow_permanent_id=workflow_permanent_id,
@@ -742,6 +988,7 @@ class WorkflowService:
             totp_verification_url=workflow_request.totp_verification_url,
             totp_identifier=workflow_request.totp_identifier,
             parent_workflow_run_id=parent_workflow_run_id,
+            workflow_run_id=workflow_run_id,
         )
 
     async def mark_workflow_run_as_completed(self, workflow_run_id: str) -> WorkflowRun:
@@ -1598,7 +1845,11 @@ class WorkflowService:
                 block_label_mapping[block.label] = block
 
             # Set the blocks for the workflow definition
-            workflow_definition = WorkflowDefinition(parameters=parameters.values(), blocks=blocks)
+            workflow_definition = WorkflowDefinition(
+                parameters=parameters.values(),
+                blocks=blocks,
+                execution_mode=request.workflow_definition.execution_mode,
+            )
             workflow = await self.update_workflow(
                 workflow_id=workflow.workflow_id,
                 organization_id=organization_id,
@@ -1720,6 +1971,7 @@ class WorkflowService:
                 output_parameter=output_parameter,
                 continue_on_failure=block_yaml.continue_on_failure,
                 complete_if_empty=block_yaml.complete_if_empty,
+                max_concurrency=block_yaml.max_concurrency,
             )
         elif block_yaml.block_type == BlockType.CODE:
             return CodeBlock(
@@ -2039,43 +2291,148 @@ class WorkflowService:
             workflow_run_id=workflow_run_id,
             organization_id=organization_id,
         )
+        await self._attach_actions_to_workflow_run_blocks(workflow_run_blocks, organization_id=organization_id)
+        return self._build_workflow_run_block_trees(workflow_run_blocks).get(workflow_run_id, [])
+
+    async def get_flattened_workflow_run_timeline(
+        self,
+        workflow_run_id: str,
+        organization_id: str | None = None,
+    ) -> list[WorkflowRunTimeline]:
+        """
+        Get the timeline of the workflow run, with the timelines of the inner workflow runs of the task v2 blocks
+        flattened into it, newest first.
+        The blocks, actions and thoughts of all the runs are loaded with a fixed number of queries, and the timeline of
+        a finished workflow run is cached.
+        """
+        cache_key = get_workflow_run_timeline_cache_key(workflow_run_id, organization_id)
+        cached_timeline = await app.CACHE.get(cache_key)
+        if cached_timeline is not None:
+            return [WorkflowRunTimeline.model_validate(timeline) for timeline in cached_timeline]
+
+        workflow_run = await app.DATABASE.get_workflow_run(
+            workflow_run_id=workflow_run_id,
+            organization_id=organization_id,
+        )
+        child_workflow_run_ids = await app.DATABASE.get_timeline_child_workflow_run_ids(
+            workflow_run_id=workflow_run_id,
+            organization_id=organization_id,
+        )
+        workflow_run_ids = [workflow_run_id, *child_workflow_run_ids]
+        workflow_run_blocks = await app.DATABASE.get_workflow_run_blocks_by_workflow_run_ids(
+            workflow_run_ids=workflow_run_ids,
+            organization_id=organization_id,
+        )
+        await self._attach_actions_to_workflow_run_blocks(workflow_run_blocks, organization_id=organization_id)
+        block_trees = self._build_workflow_run_block_trees(workflow_run_blocks)
+
+        task_v2s = await app.DATABASE.get_task_v2s_by_workflow_run_ids(
+            workflow_run_ids=workflow_run_ids,
+            organization_id=organization_id,
+        )
+        task_v2_id_to_workflow_run_id = {
+            task_v2.observer_cruise_id: task_v2.workflow_run_id for task_v2 in task_v2s if task_v2.workflow_run_id
+        }
+        thoughts = await app.DATABASE.get_thoughts_by_task_v2_ids(
+            task_v2_ids=list(task_v2_id_to_workflow_run_id.keys()),
+            thought_types=[ThoughtType.plan, ThoughtType.user_goal_check],
+            organization_id=organization_id,
+        )
+        thought_timelines: dict[str, list[WorkflowRunTimeline]] = defaultdict(list)
+        for thought in thoughts:
+            thought_timelines[task_v2_id_to_workflow_run_id[thought.observer_cruise_id]].append(
+                WorkflowRunTimeline(
+                    type=WorkflowRunTimelineType.thought,
+                    thought=thought,
+                    created_at=thought.created_at,
+                    modified_at=thought.modified_at,
+                )
+            )
+
+        timeline: list[WorkflowRunTimeline] = []
+        flattened_workflow_run_ids: set[str] = set()
+        workflow_run_ids_to_flatten = [workflow_run_id]
+        while workflow_run_ids_to_flatten:
+            current_workflow_run_id = workflow_run_ids_to_flatten.pop()
+            if current_workflow_run_id in flattened_workflow_run_ids:
+                continue
+            flattened_workflow_run_ids.add(current_workflow_run_id)
+            for block_timeline in block_trees.get(current_workflow_run_id, []):
+                if not block_timeline.block:
+                    continue
+                if block_timeline.block.block_type != BlockType.TaskV2:
+                    timeline.append(block_timeline)
+                    continue
+                if not block_timeline.block.block_workflow_run_id:
+                    LOG.warning(
+                        "Block workflow run id is not set for task_v2 block",
+                        workflow_run_id=current_workflow_run_id,
+                        workflow_run_block_id=block_timeline.block.workflow_run_block_id,
+                        organization_id=organization_id,
+                    )
+                    continue
+                # in the future if we want nested taskv2 to show up as a nested block, we should not flatten it
+                workflow_run_ids_to_flatten.append(block_timeline.block.block_workflow_run_id)
+            timeline.extend(thought_timelines.get(current_workflow_run_id, []))
+        timeline.sort(key=lambda x: x.created_at, reverse=True)
+
+        if workflow_run and workflow_run.status.is_final():
+            await app.CACHE.set(
+                cache_key,
+                [workflow_run_timeline.model_dump(mode="json") for workflow_run_timeline in timeline],
+                ex=WORKFLOW_RUN_TIMELINE_CACHE_TTL,
+            )
+        return timeline
+
+    @staticmethod
+    async def _attach_actions_to_workflow_run_blocks(
+        workflow_run_blocks: list[WorkflowRunBlock],
+        organization_id: str | None = None,
+    ) -> None:
         # get all the actions for all workflow run blocks
-        task_ids = [block.task_id for block in workflow_run_blocks if block.task_id]
         task_id_to_block: dict[str, WorkflowRunBlock] = {
             block.task_id: block for block in workflow_run_blocks if block.task_id
         }
-        actions = await app.DATABASE.get_tasks_actions(task_ids=task_ids, organization_id=organization_id)
+        if not task_id_to_block:
+            return
+        actions = await app.DATABASE.get_tasks_actions(
+            task_ids=list(task_id_to_block.keys()),
+            organization_id=organization_id,
+        )
         for action in actions:
-            if not action.task_id:
+            if not action.task_id or action.task_id not in task_id_to_block:
                 continue
-            task_block = task_id_to_block[action.task_id]
-            task_block.actions.append(action)
-
-        result = []
-        block_map: dict[str, WorkflowRunTimeline] = {}
-        counter = 0
-        while workflow_run_blocks:
-            counter += 1
-            block = workflow_run_blocks.pop(0)
-            workflow_run_timeline = WorkflowRunTimeline(
+            task_id_to_block[action.task_id].actions.append(action)
+
+    @staticmethod
+    def _build_workflow_run_block_trees(
+        workflow_run_blocks: list[WorkflowRunBlock],
+    ) -> dict[str, list[WorkflowRunTimeline]]:
+        """
+        Build the block trees of the workflow runs in one pass over the blocks, indexed by the block id.
+        Returns the top level block timelines for each workflow run id, in the same order as the given blocks.
+        """
+        block_map: dict[str, WorkflowRunTimeline] = {
+            block.workflow_run_block_id: WorkflowRunTimeline(
                 type=WorkflowRunTimelineType.block,
                 block=block,
                 created_at=block.created_at,
                 modified_at=block.modified_at,
             )
-            if block.parent_workflow_run_block_id:
-                if block.parent_workflow_run_block_id in block_map:
-                    block_map[block.parent_workflow_run_block_id].children.append(workflow_run_timeline)
-                    block_map[block.workflow_run_block_id] = workflow_run_timeline
-                else:
-                    # put the block back to the queue
-                    workflow_run_blocks.append(block)
+            for block in workflow_run_blocks
+        }
+        result: dict[str, list[WorkflowRunTimeline]] = defaultdict(list)
+        for block in workflow_run_blocks:
+            workflow_run_timeline = block_map[block.workflow_run_block_id]
+            if not block.parent_workflow_run_block_id:
+                result[block.workflow_run_id].append(workflow_run_timeline)
+            elif parent_timeline := block_map.get(block.parent_workflow_run_block_id):
+                parent_timeline.children.append(workflow_run_timeline)
             else:
-                result.append(workflow_run_timeline)
-                block_map[block.workflow_run_block_id] = workflow_run_timeline
-
-            if counter > 1000:
-                LOG.error("Too many blocks in the workflow run", workflow_run_id=workflow_run_id)
-                break
-
+                LOG.warning(
+                    "Parent block of the workflow run block not found",
+                    workflow_run_id=block.workflow_run_id,
+                    workflow_run_block_id=block.workflow_run_block_id,
+                    parent_workflow_run_block_id=block.parent_workflow_run_block_id,
+                )
         return result
@@ -0,0 +1,9 @@
+import asyncio
+
+from dotenv import load_dotenv
+
+from skyvern.services.retention_service import start_retention_loop
+
+if __name__ == "__main__":
+    load_dotenv()
+    asyncio.run(start_retention_loop())
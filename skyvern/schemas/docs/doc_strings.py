@@ -61,3 +61,7 @@ URL that serves TOTP/2FA/MFA codes for Skyvern to use during the workflow run. R
 BROWSER_SESSION_ID_DOC_STRING = """
 Run the task or workflow in the specific Skyvern browser session. Having a browser session can persist the real-time state of the browser, so that the next run can continue from where the previous run left off.
 """
+
+RUN_PRIORITY_DOC_STRING = """
+Priority of the run among the queued runs of your organization, the runs with a higher priority start first. Only applies when the runs are queued in the database (ASYNC_EXECUTOR_TYPE=db_queue).
+"""
@@ -22,6 +22,7 @@ from skyvern.schemas.docs.doc_strings import (
     ERROR_CODE_MAPPING_DOC_STRING,
     MAX_STEPS_DOC_STRING,
     PROXY_LOCATION_DOC_STRING,
+    RUN_PRIORITY_DOC_STRING,
     TASK_ENGINE_DOC_STRING,
     TASK_PROMPT_DOC_STRING,
     TASK_URL_DOC_STRING,
@@ -270,6 +271,7 @@ class TaskRunRequest(BaseModel):
     include_action_history_in_verification: bool | None = Field(
         default=False, description="Whether to include action history when verifying that the task is complete"
     )
+    priority: int = Field(default=0, description=RUN_PRIORITY_DOC_STRING)
 
     @field_validator("url", "webhook_url", "totp_url")
     @classmethod
@@ -317,6 +319,7 @@ class WorkflowRunRequest(BaseModel):
         default=None,
         description="ID of a Skyvern browser session to reuse, having it continue from the current screen state",
     )
+    priority: int = Field(default=0, description=RUN_PRIORITY_DOC_STRING)
 
     @field_validator("webhook_url", "totp_url")
     @classmethod
@@ -355,6 +358,16 @@ class BaseRunResponse(BaseModel):
         description="URL to the application UI where the run can be viewed",
         examples=["https://app.skyvern.com/tasks/tsk_123", "https://app.skyvern.com/workflows/wpid_123/wr_123"],
     )
+    queue_position: int | None = Field(
+        default=None,
+        description="Position of the run in the organization's queue, only set while the run is queued",
+        examples=[3],
+    )
+    estimated_start_at: datetime | None = Field(
+        default=None,
+        description="Estimated time the queued run starts, based on the duration of the organization's latest runs",
+        examples=["2025-01-01T00:10:00Z"],
+    )
 
 
 class TaskRunResponse(BaseRunResponse):
@@ -1,68 +1,352 @@
 import asyncio
+import os
+import signal
+import socket
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
 import structlog
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from fastapi import BackgroundTasks
 
 from skyvern.config import settings
 from skyvern.forge import app
-from skyvern.config import settings
+from skyvern.forge.sdk.db.enums import OrganizationAuthTokenType
 from skyvern.forge.sdk.schemas.organizations import Organization
-from skyvern.forge.sdk.workflow.models.workflow import Workflow, WorkflowRequestBody
+from skyvern.forge.sdk.schemas.workflow_schedules import CronCatchUpPolicy, WorkflowSchedule, WorkflowScheduleFire
+from skyvern.forge.sdk.workflow.models.workflow import WorkflowRequestBody
 from skyvern.services import workflow_service
 
 LOG = structlog.get_logger(__name__)
 
-scheduler = AsyncIOScheduler()
+CRON_SCHEDULER_NAME = "cron_workflows"
+# the workflows modified shortly before the last sync are synced again, their transaction may have committed late
+SYNC_OVERLAP_SECONDS = 60
+DUE_SCHEDULES_BATCH_SIZE = 100
+# bound on the missed fires enumerated for a schedule left behind for a long time
+MAX_MISSED_FIRES_SCANNED = 10_000
 
 
-async def schedule_workflow(workflow: Workflow, organization: Organization) -> None:
-    if not settings.ENABLE_CRON_WORKFLOWS:
-        return
+def build_trigger(cron_schedule: str, cron_timezone: str) -> CronTrigger:
+    return CronTrigger.from_crontab(cron_schedule, timezone=ZoneInfo(cron_timezone))
 
-    cron_schedule = getattr(workflow, "cron_schedule", None)
-    if not cron_schedule:
-        return
 
-    timezone_name = getattr(workflow, "cron_timezone", None) or settings.DEFAULT_CRON_TIMEZONE
-    trigger = CronTrigger.from_crontab(cron_schedule, timezone=ZoneInfo(timezone_name))
-    scheduler.add_job(
-        workflow_service.run_workflow,
-        trigger=trigger,
-        args=[workflow.workflow_permanent_id, organization, WorkflowRequestBody()],
-        id=f"{organization.organization_id}_{workflow.workflow_permanent_id}",
-        replace_existing=True,
-    )
-
-async def load_workflows() -> None:
-    """Load all workflows from the database and schedule them."""
-
-    organizations = await app.DATABASE.get_all_organizations()
-    for organization in organizations:
-        workflows = await app.WORKFLOW_SERVICE.get_workflows_by_organization_id(
-            organization_id=organization.organization_id,
-            page_size=1000,
+def get_next_fire_time(trigger: CronTrigger, after: datetime) -> datetime | None:
+    """
+    The first fire time of the trigger strictly after `after`, both as naive UTC datetimes.
+    """
+    after_utc = after.replace(tzinfo=timezone.utc)
+    next_fire_time = trigger.get_next_fire_time(after_utc, after_utc)
+    return next_fire_time.astimezone(timezone.utc).replace(tzinfo=None) if next_fire_time else None
+
+
+def get_fire_times(
+    trigger: CronTrigger,
+    next_fire_at: datetime,
+    now: datetime,
+    catch_up_policy: CronCatchUpPolicy,
+    misfire_grace_seconds: int,
+    max_catch_up_runs: int,
+) -> tuple[list[datetime], datetime | None]:
+    """
+    The fire times to run for a schedule due at `next_fire_at` and its next fire time after `now`.
+    """
+    missed_fire_times: deque[datetime] = deque(maxlen=max(max_catch_up_runs, 1))
+    fire_time: datetime | None = next_fire_at
+    for _ in range(MAX_MISSED_FIRES_SCANNED):
+        if fire_time is None or fire_time > now:
+            break
+        missed_fire_times.append(fire_time)
+        fire_time = get_next_fire_time(trigger, fire_time)
+    else:
+        fire_time = get_next_fire_time(trigger, now)
+
+    if catch_up_policy == CronCatchUpPolicy.all:
+        return list(missed_fire_times), fire_time
+    if catch_up_policy == CronCatchUpPolicy.once:
+        return list(missed_fire_times)[-1:], fire_time
+    on_time_fire_times = [
+        missed_fire_time
+        for missed_fire_time in missed_fire_times
+        if (now - missed_fire_time).total_seconds() <= misfire_grace_seconds
+    ]
+    return on_time_fire_times, fire_time
+
+
+class CronScheduler:
+    """
+    Run the workflows on their cron schedules.
+
+    The replicas compete for a lease and only its holder syncs the schedules and fires them. The schedules are synced
+    from the workflows modified since the last sync. Every fire is claimed by moving the next fire time of its
+    schedule in the database, so a fire runs once even when two replicas hold the lease at the same time. The claim
+    records the fire with the id of its workflow run, and the fires left without a run by a failed or stopped
+    scheduler are retried. The id makes a retried fire create its workflow run at most once.
+    """
+
+    def __init__(self, scheduler_id: str | None = None) -> None:
+        self.scheduler_id = scheduler_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.stop_event = asyncio.Event()
+        self.is_leader = False
+        self.last_synced_at: float | None = None
+        self.running_tasks: set[asyncio.Task] = set()
+
+    def stop(self) -> None:
+        LOG.info("Stopping cron scheduler", scheduler_id=self.scheduler_id)
+        self.stop_event.set()
+
+    async def start(self) -> None:
+        LOG.info("Cron scheduler started", scheduler_id=self.scheduler_id)
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    await self._tick()
+                except Exception:
+                    LOG.exception("Failed to run the cron scheduler", scheduler_id=self.scheduler_id)
+                try:
+                    await asyncio.wait_for(self.stop_event.wait(), timeout=settings.CRON_WORKFLOW_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self.is_leader:
+                await app.DATABASE.release_cron_scheduler_lease(CRON_SCHEDULER_NAME, self.scheduler_id)
+            if self.running_tasks:
+                await asyncio.gather(*self.running_tasks, return_exceptions=True)
+        LOG.info("Cron scheduler stopped", scheduler_id=self.scheduler_id)
+
+    async def _tick(self) -> None:
+        is_leader = await app.DATABASE.acquire_cron_scheduler_lease(
+            CRON_SCHEDULER_NAME, self.scheduler_id, settings.CRON_SCHEDULER_LEASE_SECONDS
         )
-        for workflow in workflows:
-            await schedule_workflow(workflow, organization)
+        if is_leader != self.is_leader:
+            LOG.info("Cron scheduler leadership changed", scheduler_id=self.scheduler_id, is_leader=is_leader)
+            self.is_leader = is_leader
+            self.last_synced_at = None
+        if not is_leader:
+            return
 
-async def _poll_workflows(interval_seconds: int) -> None:
-    """Periodically reload workflows so schedule changes take effect."""
+        if (
+            self.last_synced_at is None
+            or time.monotonic() - self.last_synced_at >= settings.CRON_WORKFLOW_REFRESH_INTERVAL_SECONDS
+        ):
+            await self.sync_workflows()
+            self.last_synced_at = time.monotonic()
+        await self.fire_due_schedules()
+        await self.retry_pending_fires()
 
-    while True:
-        await asyncio.sleep(interval_seconds)
+    async def sync_workflows(self) -> None:
+        """
+        Sync the schedules of the workflows modified since the last sync. The very first sync only looks at the
+        workflows with a cron schedule since there is no schedule to remove yet.
+        """
+        lease = await app.DATABASE.get_cron_scheduler_lease(CRON_SCHEDULER_NAME)
+        workflows_synced_at = lease.workflows_synced_at if lease else None
+        modified_after = workflows_synced_at - timedelta(seconds=SYNC_OVERLAP_SECONDS) if workflows_synced_at else None
+        sync_started_at = datetime.utcnow()
+
+        # workflow permanent id to organization id
+        modified_workflows: dict[str, str] = {}
+        after: tuple[datetime, str] | None = None
+        while True:
+            rows = await app.DATABASE.get_workflows_modified_since(
+                modified_after=modified_after,
+                limit=settings.CRON_WORKFLOW_SYNC_BATCH_SIZE,
+                after=after,
+                only_with_cron_schedule=modified_after is None,
+            )
+            for workflow_permanent_id, organization_id, _, _ in rows:
+                modified_workflows[workflow_permanent_id] = organization_id
+            if len(rows) < settings.CRON_WORKFLOW_SYNC_BATCH_SIZE:
+                break
+            _, _, modified_at, workflow_id = rows[-1]
+            after = (modified_at, workflow_id)
+
+        for workflow_permanent_id, organization_id in modified_workflows.items():
+            try:
+                await self.sync_workflow(workflow_permanent_id, organization_id)
+            except Exception:
+                LOG.exception("Failed to sync workflow schedule", workflow_permanent_id=workflow_permanent_id)
+
+        await app.DATABASE.update_cron_scheduler_workflows_synced_at(
+            CRON_SCHEDULER_NAME, self.scheduler_id, sync_started_at
+        )
+        LOG.info(
+            "Workflow schedules synced",
+            scheduler_id=self.scheduler_id,
+            modified_after=modified_after,
+            synced_workflow_count=len(modified_workflows),
+        )
+
+    async def sync_workflow(self, workflow_permanent_id: str, organization_id: str) -> None:
+        workflow = await app.DATABASE.get_workflow_by_permanent_id(
+            workflow_permanent_id=workflow_permanent_id,
+            organization_id=organization_id,
+        )
+        if not workflow or not workflow.cron_schedule:
+            await app.DATABASE.delete_workflow_schedule(workflow_permanent_id)
+            return
+
+        cron_timezone = workflow.cron_timezone or settings.DEFAULT_CRON_TIMEZONE
         try:
-            await load_workflows()
-        except Exception:  # noqa: BLE001
-            LOG.exception("Failed to reload workflows")
+            trigger = build_trigger(workflow.cron_schedule, cron_timezone)
+        except (ValueError, KeyError):
+            LOG.warning(
+                "Invalid cron schedule, the workflow won't be scheduled",
+                workflow_permanent_id=workflow_permanent_id,
+                cron_schedule=workflow.cron_schedule,
+                cron_timezone=cron_timezone,
+            )
+            await app.DATABASE.delete_workflow_schedule(workflow_permanent_id)
+            return
+
+        schedule = await app.DATABASE.get_workflow_schedule(workflow_permanent_id)
+        if schedule and schedule.cron_schedule == workflow.cron_schedule and schedule.cron_timezone == cron_timezone:
+            # the schedule is unchanged, keep its next fire time so the fires missed meanwhile can catch up
+            next_fire_at = schedule.next_fire_at
+        else:
+            next_fire_at = get_next_fire_time(trigger, datetime.utcnow())
+        await app.DATABASE.create_or_update_workflow_schedule(
+            workflow_permanent_id=workflow_permanent_id,
+            organization_id=organization_id,
+            workflow_id=workflow.workflow_id,
+            cron_schedule=workflow.cron_schedule,
+            cron_timezone=cron_timezone,
+            next_fire_at=next_fire_at,
+        )
+
+    async def fire_due_schedules(self) -> None:
+        now = datetime.utcnow()
+        schedules = await app.DATABASE.get_due_workflow_schedules(due_before=now, limit=DUE_SCHEDULES_BATCH_SIZE)
+        for schedule in schedules:
+            try:
+                await self.fire_schedule(schedule, now)
+            except Exception:
+                LOG.exception("Failed to fire workflow schedule", workflow_permanent_id=schedule.workflow_permanent_id)
+
+    async def fire_schedule(self, schedule: WorkflowSchedule, now: datetime) -> None:
+        if schedule.next_fire_at is None:
+            return
+        trigger = build_trigger(schedule.cron_schedule, schedule.cron_timezone)
+        fire_times, next_fire_at = get_fire_times(
+            trigger,
+            next_fire_at=schedule.next_fire_at,
+            now=now,
+            catch_up_policy=CronCatchUpPolicy(settings.CRON_WORKFLOW_CATCH_UP_POLICY),
+            misfire_grace_seconds=settings.CRON_WORKFLOW_MISFIRE_GRACE_SECONDS,
+            max_catch_up_runs=settings.CRON_WORKFLOW_MAX_CATCH_UP_RUNS,
+        )
+        fires = await app.DATABASE.claim_workflow_schedule_fire(
+            workflow_permanent_id=schedule.workflow_permanent_id,
+            organization_id=schedule.organization_id,
+            fire_at=schedule.next_fire_at,
+            next_fire_at=next_fire_at,
+            fire_times=fire_times,
+        )
+        if fires is None:
+            LOG.info(
+                "Workflow schedule fire already claimed by another scheduler",
+                workflow_permanent_id=schedule.workflow_permanent_id,
+                fire_at=schedule.next_fire_at,
+            )
+            return
+        if not fires:
+            LOG.warning(
+                "Skipping the missed fires of the workflow schedule",
+                workflow_permanent_id=schedule.workflow_permanent_id,
+                missed_since=schedule.next_fire_at,
+                catch_up_policy=settings.CRON_WORKFLOW_CATCH_UP_POLICY,
+            )
+            return
+        for fire in fires:
+            await self.run_fire(fire)
+
+    async def retry_pending_fires(self) -> None:
+        """
+        Retry the fires claimed without creating their workflow run, their scheduler failed or stopped in between.
+        The fires claimed within the lease duration may still be running on the previous leader, they're left to it.
+        """
+        claimed_before = datetime.utcnow() - timedelta(seconds=settings.CRON_SCHEDULER_LEASE_SECONDS)
+        fires = await app.DATABASE.get_pending_workflow_schedule_fires(
+            claimed_before=claimed_before, limit=DUE_SCHEDULES_BATCH_SIZE
+        )
+        for fire in fires:
+            try:
+                await self.run_fire(fire)
+            except Exception:
+                LOG.exception(
+                    "Failed to retry workflow schedule fire",
+                    workflow_permanent_id=fire.workflow_permanent_id,
+                    fire_at=fire.fire_at,
+                )
+
+    async def run_fire(self, fire: WorkflowScheduleFire) -> None:
+        if fire.attempts >= settings.CRON_WORKFLOW_MAX_FIRE_ATTEMPTS:
+            LOG.error(
+                "Giving up the workflow schedule fire",
+                workflow_permanent_id=fire.workflow_permanent_id,
+                fire_at=fire.fire_at,
+                attempts=fire.attempts,
+            )
+            await app.DATABASE.delete_workflow_schedule_fire(fire.workflow_permanent_id, fire.fire_at)
+            return
+        await app.DATABASE.increment_workflow_schedule_fire_attempts(fire.workflow_permanent_id, fire.fire_at)
+
+        if await app.DATABASE.get_workflow_run(fire.workflow_run_id, organization_id=fire.organization_id):
+            # a previous attempt created the workflow run but failed before deleting the fire
+            LOG.info(
+                "Workflow run of the schedule fire already created",
+                workflow_permanent_id=fire.workflow_permanent_id,
+                workflow_run_id=fire.workflow_run_id,
+                fire_at=fire.fire_at,
+            )
+        else:
+            organization = await app.DATABASE.get_organization(fire.organization_id)
+            if not organization:
+                LOG.warning(
+                    "Organization of the workflow schedule not found",
+                    workflow_permanent_id=fire.workflow_permanent_id,
+                    organization_id=fire.organization_id,
+                )
+            else:
+                await self.run_workflow(fire, organization)
+        await app.DATABASE.delete_workflow_schedule_fire(fire.workflow_permanent_id, fire.fire_at)
+
+    async def run_workflow(self, fire: WorkflowScheduleFire, organization: Organization) -> None:
+        token = await app.DATABASE.get_valid_org_auth_token(organization.organization_id, OrganizationAuthTokenType.api)
+        background_tasks = BackgroundTasks()
+        workflow_run = await workflow_service.run_workflow(
+            workflow_id=fire.workflow_permanent_id,
+            organization=organization,
+            workflow_request=WorkflowRequestBody(),
+            api_key=token.token if token else None,
+            background_tasks=background_tasks,
+            workflow_run_id=fire.workflow_run_id,
+        )
+        LOG.info(
+            "Cron workflow run created",
+            workflow_permanent_id=fire.workflow_permanent_id,
+            workflow_run_id=workflow_run.workflow_run_id,
+            fire_time=fire.fire_at,
+        )
+        # the background executor leaves the execution to the background tasks, they run in the scheduler process
+        if background_tasks.tasks:
+            task = asyncio.create_task(background_tasks())
+            self.running_tasks.add(task)
+            task.add_done_callback(self.running_tasks.discard)
 
 
 async def start_scheduler() -> None:
-    """Start the cron scheduler and refresh workflows periodically."""
+    """Start the cron scheduler, it runs until SIGINT or SIGTERM."""
+
+    if not settings.ENABLE_CRON_WORKFLOWS:
+        LOG.warning("Cron workflows are disabled, set ENABLE_CRON_WORKFLOWS to schedule them")
+        return
 
-    await load_workflows()
-    scheduler.start()
-    asyncio.create_task(_poll_workflows(settings.CRON_WORKFLOW_REFRESH_INTERVAL_SECONDS))
-    LOG.info("Cron trigger started successfully")
-    await asyncio.Event().wait()
+    scheduler = CronScheduler()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, scheduler.stop)
+    await scheduler.start()
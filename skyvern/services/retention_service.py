@@ -0,0 +1,220 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import structlog
+
+from skyvern.config import settings
+from skyvern.forge import app
+from skyvern.forge.sdk.artifact.models import ArtifactType
+from skyvern.forge.sdk.schemas.retention import RetentionAction, RetentionPolicy, RetentionTable
+
+LOG = structlog.get_logger()
+
+
+def load_retention_policies() -> list[RetentionPolicy]:
+    return [RetentionPolicy.model_validate(policy) for policy in settings.DATA_RETENTION_POLICIES]
+
+
+def _get_organization_artifact_types(
+    policy: RetentionPolicy, policies: list[RetentionPolicy]
+) -> dict[str, list[ArtifactType] | None]:
+    """
+    Map the organizations with their own policies for the table to the artifact types those policies cover, None when
+    they cover all the artifact types.
+    """
+    organization_artifact_types: dict[str, list[ArtifactType] | None] = {}
+    for other_policy in policies:
+        organization_id = other_policy.organization_id
+        if other_policy.table != policy.table or not organization_id:
+            continue
+        artifact_types = organization_artifact_types.get(organization_id, [])
+        if artifact_types is None:
+            continue
+        if other_policy.artifact_types:
+            organization_artifact_types[organization_id] = [*artifact_types, *other_policy.artifact_types]
+        else:
+            organization_artifact_types[organization_id] = None
+    return organization_artifact_types
+
+
+def _get_excluded_organization_ids(policy: RetentionPolicy, policies: list[RetentionPolicy]) -> list[str]:
+    """
+    Organizations with their own policies covering all the artifact types of the policy are handled by those policies
+    only.
+    """
+    if policy.organization_id:
+        return []
+    return sorted(
+        organization_id
+        for organization_id, artifact_types in _get_organization_artifact_types(policy, policies).items()
+        if artifact_types is None or (policy.artifact_types and set(policy.artifact_types) <= set(artifact_types))
+    )
+
+
+def _get_excluded_organization_artifact_types(
+    policy: RetentionPolicy, policies: list[RetentionPolicy]
+) -> dict[str, list[ArtifactType]]:
+    """
+    Organizations with their own policies for some of the artifact types of the policy are handled by those policies
+    for those types only, the policy still applies to their other artifact types.
+    """
+    if policy.organization_id:
+        return {}
+    excluded_artifact_types: dict[str, list[ArtifactType]] = {}
+    for organization_id, artifact_types in _get_organization_artifact_types(policy, policies).items():
+        if artifact_types is None:
+            continue
+        covered_artifact_types = set(artifact_types)
+        if policy.artifact_types:
+            covered_artifact_types &= set(policy.artifact_types)
+            if covered_artifact_types == set(policy.artifact_types):
+                # excluded by _get_excluded_organization_ids
+                continue
+        if covered_artifact_types:
+            excluded_artifact_types[organization_id] = sorted(covered_artifact_types)
+    return excluded_artifact_types
+
+
+def _get_excluded_artifact_types(policy: RetentionPolicy, policies: list[RetentionPolicy]) -> list[ArtifactType]:
+    """
+    Artifact types with their own policies in the same organization scope are handled by those policies only.
+    """
+    if policy.artifact_types:
+        return []
+    return sorted(
+        {
+            artifact_type
+            for other_policy in policies
+            if other_policy.table == policy.table
+            and other_policy.organization_id == policy.organization_id
+            and other_policy.artifact_types
+            for artifact_type in other_policy.artifact_types
+        }
+    )
+
+
+async def _pause_between_batches(batch_duration_seconds: float) -> None:
+    # back off for at least as long as the last batch took, so the retention never uses more than half of the
+    # database time it competes for with the agents
+    await asyncio.sleep(max(settings.DATA_RETENTION_BATCH_PAUSE_SECONDS, batch_duration_seconds))
+
+
+async def _purge_artifacts_batch(
+    policy: RetentionPolicy,
+    created_before: datetime,
+    exclude_organization_ids: list[str],
+    exclude_artifact_types: list[ArtifactType],
+    exclude_organization_artifact_types: dict[str, list[ArtifactType]] | None = None,
+) -> int:
+    artifacts = await app.DATABASE.get_artifacts_created_before(
+        created_before=created_before,
+        limit=settings.DATA_RETENTION_BATCH_SIZE,
+        organization_id=policy.organization_id,
+        artifact_types=policy.artifact_types,
+        exclude_organization_ids=exclude_organization_ids,
+        exclude_artifact_types=exclude_artifact_types,
+        exclude_organization_artifact_types=exclude_organization_artifact_types,
+        # the archived artifacts are kept, they'd be archived again
+        exclude_archived=policy.action == RetentionAction.archive,
+    )
+    if not artifacts:
+        return 0
+
+    if policy.action == RetentionAction.archive:
+        # artifact id to the uri of its archived file
+        archived_uris: dict[str, str] = {}
+        for artifact in artifacts:
+            if archived_uri := await app.STORAGE.archive_artifact(artifact):
+                archived_uris[artifact.artifact_id] = archived_uri
+        if archived_uris:
+            await app.DATABASE.mark_artifacts_archived(archived_uris)
+        if len(archived_uris) < len(artifacts):
+            # the artifacts failed to be archived are kept and retried by the next run.
+            # a short batch also ends the current run of the policy so it doesn't spin on the same artifacts
+            LOG.warning(
+                "Failed to archive some artifacts",
+                failed_count=len(artifacts) - len(archived_uris),
+                organization_id=policy.organization_id,
+            )
+        return len(archived_uris)
+
+    await app.STORAGE.delete_artifacts(artifacts)
+    await app.DATABASE.delete_artifacts_by_ids([artifact.artifact_id for artifact in artifacts])
+    return len(artifacts)
+
+
+async def apply_retention_policy(policy: RetentionPolicy, policies: list[RetentionPolicy]) -> int:
+    """
+    Remove or archive the expired rows of one policy in bounded batches. Returns the number of processed rows.
+    """
+    created_before = datetime.utcnow() - timedelta(days=policy.retention_days)
+    exclude_organization_ids = _get_excluded_organization_ids(policy, policies)
+    exclude_artifact_types = _get_excluded_artifact_types(policy, policies)
+    exclude_organization_artifact_types = _get_excluded_organization_artifact_types(policy, policies)
+
+    total_count = 0
+    for _ in range(settings.DATA_RETENTION_MAX_BATCHES_PER_RUN):
+        batch_start = time.monotonic()
+        if policy.table == RetentionTable.artifacts:
+            count = await _purge_artifacts_batch(
+                policy,
+                created_before=created_before,
+                exclude_organization_ids=exclude_organization_ids,
+                exclude_artifact_types=exclude_artifact_types,
+                exclude_organization_artifact_types=exclude_organization_artifact_types,
+            )
+        elif policy.table == RetentionTable.actions:
+            count = await app.DATABASE.delete_actions_created_before(
+                created_before=created_before,
+                limit=settings.DATA_RETENTION_BATCH_SIZE,
+                organization_id=policy.organization_id,
+                exclude_organization_ids=exclude_organization_ids,
+            )
+        else:
+            count = await app.DATABASE.delete_steps_created_before(
+                created_before=created_before,
+                limit=settings.DATA_RETENTION_BATCH_SIZE,
+                organization_id=policy.organization_id,
+                exclude_organization_ids=exclude_organization_ids,
+            )
+        total_count += count
+        if count < settings.DATA_RETENTION_BATCH_SIZE:
+            break
+        await _pause_between_batches(time.monotonic() - batch_start)
+
+    LOG.info(
+        "Retention policy applied",
+        table=policy.table,
+        action=policy.action,
+        organization_id=policy.organization_id,
+        artifact_types=policy.artifact_types,
+        retention_days=policy.retention_days,
+        removed_count=total_count,
+    )
+    return total_count
+
+
+async def apply_retention_policies(policies: list[RetentionPolicy] | None = None) -> int:
+    if policies is None:
+        policies = load_retention_policies()
+    total_count = 0
+    for policy in policies:
+        try:
+            total_count += await apply_retention_policy(policy, policies)
+        except Exception:
+            LOG.exception("Failed to apply retention policy", policy=policy.model_dump())
+    return total_count
+
+
+async def start_retention_loop() -> None:
+    """
+    Apply the retention policies every DATA_RETENTION_INTERVAL_SECONDS.
+    """
+    policies = load_retention_policies()
+    if not policies:
+        LOG.warning("No data retention policy configured")
+        return
+    while True:
+        await apply_retention_policies(policies)
+        await asyncio.sleep(settings.DATA_RETENTION_INTERVAL_SECONDS)
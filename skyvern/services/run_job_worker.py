@@ -0,0 +1,282 @@
+import asyncio
+import functools
+import os
+import signal
+import socket
+import uuid
+
+import structlog
+
+from skyvern.config import settings
+from skyvern.exceptions import OrganizationNotFound
+from skyvern.forge import app
+from skyvern.forge.sdk.core import metrics, skyvern_context
+from skyvern.forge.sdk.core.loop_watchdog import start_event_loop_monitoring
+from skyvern.forge.sdk.core.skyvern_context import SkyvernContext
+from skyvern.forge.sdk.db.enums import OrganizationAuthTokenType
+from skyvern.forge.sdk.schemas.organizations import Organization
+from skyvern.forge.sdk.schemas.run_jobs import RunJob, RunJobStatus, RunJobType
+from skyvern.forge.sdk.schemas.tasks import TaskStatus
+from skyvern.schemas.runs import RunEngine, RunType
+from skyvern.services import task_v2_service
+
+LOG = structlog.get_logger()
+
+
+async def _get_api_key(organization_id: str) -> str | None:
+    token = await app.DATABASE.get_valid_org_auth_token(organization_id, OrganizationAuthTokenType.api)
+    return token.token if token else None
+
+
+async def _execute_task_job(run_job: RunJob, organization: Organization) -> None:
+    payload = run_job.payload or {}
+    browser_session_id = payload.get("browser_session_id")
+    task = await app.DATABASE.get_task(run_job.run_id, organization_id=organization.organization_id)
+    if not task:
+        raise ValueError(f"Task {run_job.run_id} not found")
+    if task.status.is_final():
+        LOG.info("Task is already finalized, skipping the job", task_id=task.task_id, status=task.status)
+        return
+
+    # a job claimed again after a worker crash continues the task with a new step
+    latest_step = await app.DATABASE.get_latest_step(task.task_id, organization_id=organization.organization_id)
+    step = await app.DATABASE.create_step(
+        task.task_id,
+        order=latest_step.order + 1 if latest_step else 0,
+        retry_index=0,
+        organization_id=organization.organization_id,
+    )
+    task = await app.DATABASE.update_task(
+        task.task_id,
+        status=TaskStatus.running,
+        organization_id=organization.organization_id,
+    )
+    run_obj = await app.DATABASE.get_run(run_id=task.task_id, organization_id=organization.organization_id)
+    engine = RunEngine.skyvern_v1
+    if run_obj and run_obj.task_run_type == RunType.openai_cua:
+        engine = RunEngine.openai_cua
+    elif run_obj and run_obj.task_run_type == RunType.anthropic_cua:
+        engine = RunEngine.anthropic_cua
+
+    context = skyvern_context.ensure_context()
+    context.task_id = task.task_id
+    context.max_steps_override = payload.get("max_steps_override")
+
+    await app.agent.execute_step(
+        organization,
+        task,
+        step,
+        await _get_api_key(organization.organization_id),
+        close_browser_on_completion=browser_session_id is None,
+        browser_session_id=browser_session_id,
+        engine=engine,
+    )
+
+
+async def _execute_workflow_job(run_job: RunJob, organization: Organization) -> None:
+    workflow_run = await app.DATABASE.get_workflow_run(
+        workflow_run_id=run_job.run_id, organization_id=organization.organization_id
+    )
+    if not workflow_run:
+        raise ValueError(f"Workflow run {run_job.run_id} not found")
+    if workflow_run.status.is_final():
+        LOG.info(
+            "Workflow run is already finalized, skipping the job",
+            workflow_run_id=workflow_run.workflow_run_id,
+            status=workflow_run.status,
+        )
+        return
+
+    await app.WORKFLOW_SERVICE.execute_workflow(
+        workflow_run_id=workflow_run.workflow_run_id,
+        api_key=await _get_api_key(organization.organization_id),  # type: ignore
+        organization=organization,
+        browser_session_id=(run_job.payload or {}).get("browser_session_id"),
+    )
+
+
+async def _execute_task_v2_job(run_job: RunJob, organization: Organization) -> None:
+    task_v2 = await app.DATABASE.get_task_v2(run_job.run_id, organization_id=organization.organization_id)
+    if task_v2 and task_v2.status.is_final():
+        LOG.info("Task v2 is already finalized, skipping the job", task_v2_id=task_v2.observer_cruise_id)
+        return
+
+    payload = run_job.payload or {}
+    await task_v2_service.run_task_v2(
+        organization=organization,
+        task_v2_id=run_job.run_id,
+        max_steps_override=payload.get("max_steps_override"),
+        browser_session_id=payload.get("browser_session_id"),
+    )
+
+
+async def execute_run_job(run_job: RunJob) -> None:
+    organization = await app.DATABASE.get_organization(run_job.organization_id)
+    if organization is None:
+        raise OrganizationNotFound(run_job.organization_id)
+
+    if run_job.job_type == RunJobType.task:
+        await _execute_task_job(run_job, organization)
+    elif run_job.job_type == RunJobType.workflow:
+        await _execute_workflow_job(run_job, organization)
+    elif run_job.job_type == RunJobType.task_v2:
+        await _execute_task_v2_job(run_job, organization)
+    else:
+        raise ValueError(f"Unsupported run job type: {run_job.job_type}")
+
+
+async def fail_run(job_type: RunJobType, run_id: str, organization_id: str, failure_reason: str) -> None:
+    """
+    Mark the run of a job that can't be executed as failed, so it doesn't stay queued or running forever.
+    """
+    if job_type == RunJobType.task:
+        await app.DATABASE.update_task(
+            run_id,
+            status=TaskStatus.failed,
+            failure_reason=failure_reason,
+            organization_id=organization_id,
+        )
+    elif job_type == RunJobType.workflow:
+        await app.WORKFLOW_SERVICE.mark_workflow_run_as_failed(workflow_run_id=run_id, failure_reason=failure_reason)
+    elif job_type == RunJobType.task_v2:
+        task_v2 = await app.DATABASE.get_task_v2(run_id, organization_id=organization_id)
+        await task_v2_service.mark_task_v2_as_failed(
+            run_id,
+            workflow_run_id=task_v2.workflow_run_id if task_v2 else None,
+            failure_reason=failure_reason,
+            organization_id=organization_id,
+        )
+
+
+class RunJobWorker:
+    """
+    Claim the queued run jobs and execute them, at most `concurrency` at a time.
+
+    The lock of every running job is renewed by a heartbeat. When a worker dies, its jobs are claimed again by
+    the other workers once their lock expires, until they reach their max attempts.
+    """
+
+    def __init__(self, concurrency: int | None = None, worker_id: str | None = None) -> None:
+        self.concurrency = concurrency or settings.RUN_JOB_WORKER_CONCURRENCY
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.running_jobs: dict[str, asyncio.Task] = {}
+        self.stop_event = asyncio.Event()
+
+    def stop(self) -> None:
+        LOG.info("Stopping run job worker, waiting for the running jobs", worker_id=self.worker_id)
+        self.stop_event.set()
+
+    async def start(self) -> None:
+        LOG.info("Run job worker started", worker_id=self.worker_id, concurrency=self.concurrency)
+        heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        try:
+            while not self.stop_event.is_set():
+                claimed_count = await self._claim_jobs()
+                if claimed_count == 0:
+                    try:
+                        await asyncio.wait_for(self.stop_event.wait(), timeout=settings.RUN_JOB_POLL_INTERVAL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+            if self.running_jobs:
+                await asyncio.gather(*self.running_jobs.values(), return_exceptions=True)
+        finally:
+            heartbeat_task.cancel()
+        LOG.info("Run job worker stopped", worker_id=self.worker_id)
+
+    async def _claim_jobs(self) -> int:
+        available_slots = self.concurrency - len(self.running_jobs)
+        if available_slots <= 0:
+            return 0
+        try:
+            run_jobs = await app.DATABASE.claim_run_jobs(
+                worker_id=self.worker_id,
+                limit=available_slots,
+                visibility_timeout_seconds=settings.RUN_JOB_VISIBILITY_TIMEOUT_SECONDS,
+                max_concurrent_runs=settings.RUN_JOB_MAX_CONCURRENT_RUNS,
+                max_concurrent_runs_per_org=settings.RUN_JOB_MAX_CONCURRENT_RUNS_PER_ORG,
+                organization_weights=settings.RUN_JOB_ORGANIZATION_WEIGHTS,
+            )
+        except Exception:
+            LOG.exception("Failed to claim run jobs", worker_id=self.worker_id)
+            return 0
+        for run_job in run_jobs:
+            task = asyncio.create_task(self._run_job(run_job))
+            self.running_jobs[run_job.run_job_id] = task
+            task.add_done_callback(functools.partial(self._on_job_done, run_job.run_job_id))
+        return len(run_jobs)
+
+    def _on_job_done(self, run_job_id: str, task: asyncio.Task) -> None:
+        self.running_jobs.pop(run_job_id, None)
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.RUN_JOB_HEARTBEAT_INTERVAL_SECONDS)
+            try:
+                await app.DATABASE.heartbeat_run_jobs(
+                    run_job_ids=list(self.running_jobs.keys()),
+                    worker_id=self.worker_id,
+                    visibility_timeout_seconds=settings.RUN_JOB_VISIBILITY_TIMEOUT_SECONDS,
+                )
+            except Exception:
+                LOG.exception("Failed to heartbeat run jobs", worker_id=self.worker_id)
+
+    async def _run_job(self, run_job: RunJob) -> None:
+        # every job runs in its own asyncio task, so the context set here is isolated from the other jobs
+        skyvern_context.set(SkyvernContext(organization_id=run_job.organization_id))
+        log = LOG.bind(
+            run_job_id=run_job.run_job_id,
+            job_type=run_job.job_type,
+            run_id=run_job.run_id,
+            attempts=run_job.attempts,
+            worker_id=self.worker_id,
+        )
+        try:
+            if run_job.attempts > run_job.max_attempts:
+                failure_reason = f"The run was interrupted {run_job.max_attempts} times and won't be retried"
+                log.warning("Run job exceeded its max attempts")
+                await fail_run(run_job.job_type, run_job.run_id, run_job.organization_id, failure_reason)
+                await self._update_status(run_job, RunJobStatus.failed, failure_reason)
+                return
+
+            log.info("Executing run job")
+            try:
+                await execute_run_job(run_job)
+            except Exception as e:
+                log.exception("Failed to execute run job")
+                failure_reason = f"Unexpected error: {e.__class__.__name__}: {str(e)}"
+                await fail_run(run_job.job_type, run_job.run_id, run_job.organization_id, failure_reason)
+                await self._update_status(run_job, RunJobStatus.failed, failure_reason)
+                return
+            await self._update_status(run_job, RunJobStatus.completed)
+            log.info("Run job completed")
+        except Exception:
+            # the job keeps its lock and is claimed again once it expires
+            log.exception("Failed to finalize run job")
+        finally:
+            skyvern_context.reset()
+
+    async def _update_status(self, run_job: RunJob, status: RunJobStatus, failure_reason: str | None = None) -> None:
+        await app.DATABASE.update_run_job_status(
+            run_job_id=run_job.run_job_id,
+            worker_id=self.worker_id,
+            status=status,
+            failure_reason=failure_reason,
+        )
+
+
+async def start_worker() -> None:
+    worker = RunJobWorker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    metrics_server_task: asyncio.Task | None = None
+    if settings.ENABLE_METRICS_ENDPOINT:
+        metrics_server_task = asyncio.create_task(metrics.serve_metrics(settings.WORKER_METRICS_PORT))
+    stop_event_loop_monitoring = start_event_loop_monitoring()
+    try:
+        await worker.start()
+    finally:
+        if metrics_server_task:
+            metrics_server_task.cancel()
+        if stop_event_loop_monitoring:
+            stop_event_loop_monitoring()
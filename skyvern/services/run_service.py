@@ -3,13 +3,39 @@ from fastapi import HTTPException, status
 from skyvern.config import settings
 from skyvern.exceptions import TaskNotFound, WorkflowRunNotFound
 from skyvern.forge import app
+from skyvern.forge.sdk.executor.scheduling import estimate_start_time
+from skyvern.forge.sdk.schemas.run_jobs import RunJobStatus
 from skyvern.forge.sdk.schemas.tasks import TaskStatus
 from skyvern.forge.sdk.workflow.models.workflow import WorkflowRunStatus
-from skyvern.schemas.runs import RunEngine, RunResponse, RunType, TaskRunRequest, TaskRunResponse
+from skyvern.schemas.runs import RunEngine, RunResponse, RunStatus, RunType, TaskRunRequest, TaskRunResponse
 from skyvern.services import task_v1_service, task_v2_service, workflow_service
 
 
 async def get_run_response(run_id: str, organization_id: str | None = None) -> RunResponse | None:
+    run_response = await _build_run_response(run_id, organization_id=organization_id)
+    if run_response and run_response.status == RunStatus.queued:
+        await _add_queue_info(run_response, organization_id=organization_id)
+    return run_response
+
+
+async def _add_queue_info(run_response: RunResponse, organization_id: str | None = None) -> None:
+    """
+    Queue position and estimated start time of a run waiting in the db queue.
+    """
+    run_job = await app.DATABASE.get_run_job(run_response.run_id, organization_id=organization_id)
+    if not run_job or run_job.status != RunJobStatus.queued:
+        return
+    run_response.queue_position = await app.DATABASE.get_run_job_queue_position(run_job)
+    run_response.estimated_start_at = estimate_start_time(
+        run_response.queue_position,
+        average_duration_seconds=await app.DATABASE.get_average_run_job_duration(run_job.organization_id),
+        slots=settings.RUN_JOB_MAX_CONCURRENT_RUNS_PER_ORG
+        or settings.RUN_JOB_MAX_CONCURRENT_RUNS
+        or settings.RUN_JOB_WORKER_CONCURRENCY,
+    )
+
+
+async def _build_run_response(run_id: str, organization_id: str | None = None) -> RunResponse | None:
     run = await app.DATABASE.get_run(run_id, organization_id=organization_id)
     if not run:
         # try to see if it's a workflow run id for task v2
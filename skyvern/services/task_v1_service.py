@@ -113,6 +113,7 @@ async def run_task(
         max_steps_override=x_max_steps_override,
         browser_session_id=task.browser_session_id,
         api_key=x_api_key,
+        priority=task.priority,
     )
     return created_task
 
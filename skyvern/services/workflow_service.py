@@ -2,15 +2,24 @@ import structlog
 from fastapi import BackgroundTasks, Request
 
 from skyvern.config import settings
+from skyvern.exceptions import WorkflowRunNotFound
 from skyvern.forge import app
 from skyvern.forge.sdk.executor.factory import AsyncExecutorFactory
 from skyvern.forge.sdk.schemas.organizations import Organization
-from skyvern.forge.sdk.workflow.exceptions import InvalidTemplateWorkflowPermanentId
-from skyvern.forge.sdk.workflow.models.workflow import WorkflowRequestBody, WorkflowRun
+from skyvern.forge.sdk.workflow.exceptions import InvalidTemplateWorkflowPermanentId, WorkflowRunNotResumable
+from skyvern.forge.sdk.workflow.models.workflow import WorkflowRequestBody, WorkflowRun, WorkflowRunStatus
+from skyvern.forge.sdk.workflow.service import get_workflow_run_timeline_cache_key
 from skyvern.schemas.runs import RunStatus, RunType, WorkflowRunRequest, WorkflowRunResponse
 
 LOG = structlog.get_logger(__name__)
 
+RESUMABLE_WORKFLOW_RUN_STATUSES = [
+    WorkflowRunStatus.failed,
+    WorkflowRunStatus.terminated,
+    WorkflowRunStatus.timed_out,
+    WorkflowRunStatus.canceled,
+]
+
 
 async def run_workflow(
     workflow_id: str,
@@ -23,6 +32,7 @@ async def run_workflow(
     request_id: str | None = None,
     request: Request | None = None,
     background_tasks: BackgroundTasks | None = None,
+    workflow_run_id: str | None = None,
 ) -> WorkflowRun:
     if template:
         if workflow_id not in await app.STORAGE.retrieve_global_workflows():
@@ -36,6 +46,7 @@ async def run_workflow(
         version=version,
         max_steps_override=max_steps,
         is_template_workflow=template,
+        workflow_run_id=workflow_run_id,
     )
     workflow = await app.WORKFLOW_SERVICE.get_workflow_by_permanent_id(
         workflow_permanent_id=workflow_id,
@@ -59,6 +70,45 @@ async def run_workflow(
         max_steps_override=max_steps,
         browser_session_id=workflow_request.browser_session_id,
         api_key=api_key,
+        priority=workflow_request.priority,
+    )
+    return workflow_run
+
+
+async def resume_workflow_run(
+    workflow_run_id: str,
+    organization: Organization,
+    api_key: str | None = None,
+    browser_session_id: str | None = None,
+    request: Request | None = None,
+    background_tasks: BackgroundTasks | None = None,
+) -> WorkflowRun:
+    """
+    Execute a stopped workflow run again. The blocks and the loop iterations completed before it stopped are skipped.
+    """
+    workflow_run = await app.DATABASE.get_workflow_run(workflow_run_id, organization_id=organization.organization_id)
+    if not workflow_run:
+        raise WorkflowRunNotFound(workflow_run_id)
+    if workflow_run.status not in RESUMABLE_WORKFLOW_RUN_STATUSES:
+        raise WorkflowRunNotResumable(workflow_run_id, workflow_run.status)
+
+    LOG.info("Resuming workflow run", workflow_run_id=workflow_run_id, previous_status=workflow_run.status)
+    workflow_run = await app.DATABASE.update_workflow_run(
+        workflow_run_id=workflow_run_id,
+        status=WorkflowRunStatus.queued,
+        failure_reason=None,
+    )
+    # the timeline of the stopped run was cached as final, the resumed run adds to it
+    await app.CACHE.delete(get_workflow_run_timeline_cache_key(workflow_run_id, organization.organization_id))
+    await AsyncExecutorFactory.get_executor().execute_workflow(
+        request=request,
+        background_tasks=background_tasks,
+        organization=organization,
+        workflow_id=workflow_run.workflow_id,
+        workflow_run_id=workflow_run.workflow_run_id,
+        max_steps_override=None,
+        browser_session_id=browser_session_id,
+        api_key=api_key,
     )
     return workflow_run
 
@@ -4,6 +4,7 @@ import json
 import os
 import urllib.parse
 import uuid
+from collections import deque
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Awaitable, Callable, List
@@ -91,8 +92,8 @@ from skyvern.webeye.scraper.scraper import (
     CleanupElementTreeFunc,
     IncrementalScrapePage,
     ScrapedPage,
+    elements_to_html,
     hash_element,
-    json_to_html,
     trim_element_tree,
 )
 from skyvern.webeye.utils.dom import DomUtil, InteractiveElement, SkyvernElement
@@ -2349,7 +2350,7 @@ async def input_or_auto_complete_input(
                 navigation_goal=task.navigation_goal,
                 navigation_payload_str=json.dumps(task.navigation_payload),
                 tried_values=json.dumps(tried_values),
-                popped_up_elements="".join([json_to_html(element) for element in cleaned_new_elements]),
+                popped_up_elements=elements_to_html(cleaned_new_elements),
                 local_datetime=datetime.now(skyvern_context.ensure_context().tz_info).isoformat(),
             )
             json_respone = await app.SECONDARY_LLM_API_HANDLER(
@@ -2537,7 +2538,7 @@ async def sequentially_select_from_dropdown(
             mini_goal=mini_goal,
             navigation_goal=task.navigation_goal,
             navigation_payload_str=json.dumps(task.navigation_payload),
-            elements="".join(json_to_html(element) for element in secondary_increment_element),
+            elements=elements_to_html(secondary_increment_element),
             select_history=json.dumps(build_sequential_select_history(select_history)),
             local_datetime=datetime.now(ensure_context().tz_info).isoformat(),
         )
@@ -3345,7 +3346,7 @@ async def extract_information_for_navigation_goal(
     1. JSON representation of what the user is seeing
     2. The scraped page
     """
-    scraped_page_refreshed = await scraped_page.refresh()
+    scraped_page_refreshed = await scraped_page.refresh(reuse_cached_scrape=True)
     context = ensure_context()
     extract_information_prompt = load_prompt_with_elements(
         scraped_page=scraped_page_refreshed,
@@ -3387,9 +3388,9 @@ async def click_listbox_option(
         return False
 
     LOG.info("starting bfs", listbox_element_id=listbox_element_id)
-    bfs_queue = [child for child in listbox_element["children"]]
+    bfs_queue = deque(listbox_element["children"])
     while bfs_queue:
-        child = bfs_queue.pop(0)
+        child = bfs_queue.popleft()
         LOG.info("popped child", element_id=child["id"])
         if "attributes" in child and "role" in child["attributes"] and child["attributes"]["role"] == "option":
             LOG.info("found option", element_id=child["id"])
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
 import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
 
 import structlog
 from playwright.async_api import async_playwright
@@ -14,6 +17,14 @@ from skyvern.webeye.browser_factory import BrowserContextFactory, BrowserState,
 
 LOG = structlog.get_logger()
 
+# set by the parallel iterations of a loop block, every scope of a workflow run gets its own browser state
+_browser_state_scope: ContextVar[str | None] = ContextVar("browser_state_scope", default=None)
+
+
+def _get_workflow_run_key(workflow_run_id: str) -> str:
+    scope = _browser_state_scope.get()
+    return f"{workflow_run_id}#{scope}" if scope else workflow_run_id
+
 
 class BrowserManager:
     instance = None
@@ -57,13 +68,13 @@ class BrowserManager:
         if task_id in self.pages:
             return self.pages[task_id]
 
-        if workflow_run_id and workflow_run_id in self.pages:
+        if workflow_run_id and _get_workflow_run_key(workflow_run_id) in self.pages:
             LOG.info(
                 "Browser state for task not found. Using browser state for workflow run",
                 task_id=task_id,
                 workflow_run_id=workflow_run_id,
             )
-            self.pages[task_id] = self.pages[workflow_run_id]
+            self.pages[task_id] = self.pages[_get_workflow_run_key(workflow_run_id)]
             return self.pages[task_id]
 
         return None
@@ -118,7 +129,7 @@ class BrowserManager:
 
         self.pages[task.task_id] = browser_state
         if task.workflow_run_id:
-            self.pages[task.workflow_run_id] = browser_state
+            self.pages[_get_workflow_run_key(task.workflow_run_id)] = browser_state
 
         # The URL here is only used when creating a new page, and not when using an existing page.
         # This will make sure browser_state.page is not None.
@@ -140,9 +151,9 @@ class BrowserManager:
         )
         if browser_state:
             # always keep the browser state for the workflow run and the parent workflow run synced
-            self.pages[workflow_run_id] = browser_state
+            self.pages[_get_workflow_run_key(workflow_run_id)] = browser_state
             if parent_workflow_run_id:
-                self.pages[parent_workflow_run_id] = browser_state
+                self.pages[_get_workflow_run_key(parent_workflow_run_id)] = browser_state
             return browser_state
 
         if browser_session_id:
@@ -185,9 +196,9 @@ class BrowserManager:
                 organization_id=workflow_run.organization_id,
             )
 
-        self.pages[workflow_run_id] = browser_state
+        self.pages[_get_workflow_run_key(workflow_run_id)] = browser_state
         if parent_workflow_run_id:
-            self.pages[parent_workflow_run_id] = browser_state
+            self.pages[_get_workflow_run_key(parent_workflow_run_id)] = browser_state
 
         # The URL here is only used when creating a new page, and not when using an existing page.
         # This will make sure browser_state.page is not None.
@@ -202,17 +213,17 @@ class BrowserManager:
     def get_for_workflow_run(
         self, workflow_run_id: str, parent_workflow_run_id: str | None = None
     ) -> BrowserState | None:
-        if parent_workflow_run_id and parent_workflow_run_id in self.pages:
-            return self.pages[parent_workflow_run_id]
+        if parent_workflow_run_id and _get_workflow_run_key(parent_workflow_run_id) in self.pages:
+            return self.pages[_get_workflow_run_key(parent_workflow_run_id)]
 
-        if workflow_run_id in self.pages:
-            return self.pages[workflow_run_id]
+        if _get_workflow_run_key(workflow_run_id) in self.pages:
+            return self.pages[_get_workflow_run_key(workflow_run_id)]
 
         return None
 
     def set_video_artifact_for_task(self, task: Task, artifacts: list[VideoArtifact]) -> None:
-        if task.workflow_run_id and task.workflow_run_id in self.pages:
-            self.pages[task.workflow_run_id].browser_artifacts.video_artifacts = artifacts
+        if task.workflow_run_id and _get_workflow_run_key(task.workflow_run_id) in self.pages:
+            self.pages[_get_workflow_run_key(task.workflow_run_id)].browser_artifacts.video_artifacts = artifacts
             return
         if task.task_id in self.pages:
             self.pages[task.task_id].browser_artifacts.video_artifacts = artifacts
@@ -282,6 +293,24 @@ class BrowserManager:
 
         return await browser_state.browser_artifacts.read_browser_console_log()
 
+    @staticmethod
+    @contextmanager
+    def scope_browser_state(scope: str) -> Iterator[None]:
+        """
+        Give the workflow runs a browser state of their own while in the scope, isolated from the shared one.
+        """
+        token = _browser_state_scope.set(scope)
+        try:
+            yield
+        finally:
+            _browser_state_scope.reset(token)
+
+    async def cleanup_for_scope(self, workflow_run_id: str, scope: str) -> BrowserState | None:
+        browser_state_to_close = self.pages.pop(f"{workflow_run_id}#{scope}", None)
+        if browser_state_to_close:
+            await browser_state_to_close.close()
+        return browser_state_to_close
+
     @classmethod
     async def close(cls) -> None:
         LOG.info("Closing BrowserManager")
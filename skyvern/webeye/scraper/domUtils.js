@@ -631,6 +631,28 @@ function isValidCSSSelector(selector) {
   }
 }
 
+// the elements made interactable by a pointer cursor, including the one of their hover styles
+const CURSOR_INTERACTABLE_TAG_NAMES = new Set([
+  "div",
+  "img",
+  "span",
+  "a",
+  "i",
+  "li",
+  "p",
+  "td",
+  "svg",
+  "strong",
+]);
+
+// whether isInteractable may look the element up in the hover styles map
+function mayNeedHoverStyles(element) {
+  return (
+    CURSOR_INTERACTABLE_TAG_NAMES.has(element.tagName.toLowerCase()) &&
+    getElementComputedStyle(element)?.cursor === "auto"
+  );
+}
+
 function isInteractable(element, hoverStylesMap) {
   if (!isElementVisible(element)) {
     return false;
@@ -767,18 +789,7 @@ function isInteractable(element, hoverStylesMap) {
     return true;
   }
 
-  if (
-    tagName === "div" ||
-    tagName === "img" ||
-    tagName === "span" ||
-    tagName === "a" ||
-    tagName === "i" ||
-    tagName === "li" ||
-    tagName === "p" ||
-    tagName === "td" ||
-    tagName === "svg" ||
-    tagName === "strong"
-  ) {
+  if (CURSOR_INTERACTABLE_TAG_NAMES.has(tagName)) {
     const elementCursor = getElementComputedStyle(element)?.cursor;
     if (elementCursor === "pointer") {
       return true;
@@ -786,7 +797,7 @@ function isInteractable(element, hoverStylesMap) {
 
     // Check if element has hover styles that change cursor to pointer
     // This is to handle the case where an element's cursor is "auto", but resolves to "pointer" on hover
-    if (elementCursor === "auto") {
+    if (elementCursor === "auto" && hoverStylesMap) {
       // TODO: we need a better algorithm to match the selector with better performance
       for (const [selector, styles] of hoverStylesMap) {
         let shouldMatch = false;
@@ -1423,6 +1434,134 @@ async function buildTreeFromBody(
   return await buildElementTree(document.body, frame);
 }
 
+// build the element tree for the body, in the compact format of compactElementTree
+// scrape_mode (see ScrapeMode in scraper.py):
+// - "full": the whole page
+// - "viewport": the elements visible in the viewport
+// - "interactables": the interactable elements
+// - "container": the subtree of the element matching container_selector, the whole page when there is none
+async function buildCompactTreeFromBody(
+  frame = "main.frame",
+  frame_index = undefined,
+  scrape_mode = "full",
+  container_selector = null,
+) {
+  let elements, resultArray;
+  const container =
+    scrape_mode === "container" && container_selector
+      ? document.querySelector(container_selector)
+      : null;
+  if (container) {
+    if (
+      window.GlobalSkyvernFrameIndex === undefined &&
+      frame_index !== undefined
+    ) {
+      window.GlobalSkyvernFrameIndex = frame_index;
+    }
+    [elements, resultArray] = await buildElementTree(container, frame);
+  } else {
+    [elements, resultArray] = await buildTreeFromBody(frame, frame_index);
+  }
+
+  if (scrape_mode === "viewport") {
+    // the rect of an element is cropped to the viewport, null when the element is out of it
+    [elements, resultArray] = filterElementTree(
+      elements,
+      resultArray,
+      (element) => !!element.rect,
+    );
+  } else if (scrape_mode === "interactables") {
+    // the frames are kept for the interactable elements inside them
+    const frameTags = new Set(["iframe", "frame", "frameset"]);
+    [elements, resultArray] = filterElementTree(
+      elements,
+      resultArray,
+      (element) => element.interactable || frameTags.has(element.tagName),
+    );
+  }
+  return compactElementTree(elements, resultArray);
+}
+
+// keep the elements of the tree matching `keep`, the children of a dropped element are moved to its closest kept
+// ancestor. The elements trimmed out of the tree are dropped.
+function filterElementTree(elements, resultArray, keep) {
+  const keptElements = new Set();
+  const filterChildren = (children) => {
+    const keptChildren = [];
+    for (const element of children) {
+      const keptDescendants = filterChildren(element.children ?? []);
+      if (keep(element)) {
+        element.children = keptDescendants;
+        keptElements.add(element);
+        keptChildren.push(element);
+      } else {
+        keptChildren.push(...keptDescendants);
+      }
+    }
+    return keptChildren;
+  };
+  const keptResultArray = filterChildren(resultArray);
+  return [
+    elements.filter((element) => keptElements.has(element)),
+    keptResultArray,
+  ];
+}
+
+// Serialize the elements and the element tree into a flat array sending every element once, instead of nested
+// objects repeating the tag names and the attribute names of every element.
+// - strings: the tag names, the attribute names and the field names, interned
+// - elements: [parent index, fields] for every element, in the order of `elements`. The fields are the flat pairs
+//   of (field name index, value), with the tag name as a string index, the attributes as the flat pairs of
+//   (attribute name index, value) and the children left out: they are rebuilt from the parent indices.
+//   The parent index is -1 for the roots of the tree and -2 for the elements trimmed out of it.
+function compactElementTree(elements, resultArray) {
+  const strings = [];
+  const stringIndex = new Map();
+  const intern = (value) => {
+    let index = stringIndex.get(value);
+    if (index === undefined) {
+      index = strings.length;
+      strings.push(value);
+      stringIndex.set(value, index);
+    }
+    return index;
+  };
+
+  const elementIndex = new Map();
+  elements.forEach((element, index) => elementIndex.set(element, index));
+  const parentIndexes = new Array(elements.length).fill(-2);
+  elements.forEach((element, index) => {
+    for (const child of element.children ?? []) {
+      parentIndexes[elementIndex.get(child)] = index;
+    }
+  });
+  for (const root of resultArray) {
+    parentIndexes[elementIndex.get(root)] = -1;
+  }
+
+  const compactElements = elements.map((element, index) => {
+    const fields = [];
+    for (const [key, value] of Object.entries(element)) {
+      if (key === "tagName") {
+        fields.push(intern(key), intern(value));
+      } else if (key === "attributes") {
+        const attributes = [];
+        for (const [attrKey, attrValue] of Object.entries(value)) {
+          attributes.push(intern(attrKey), attrValue);
+        }
+        fields.push(intern(key), attributes);
+      } else if (key === "children") {
+        fields.push(intern(key), 0);
+      } else {
+        fields.push(intern(key), value);
+      }
+    }
+    return [parentIndexes[index], fields];
+  });
+
+  return { strings: strings, elements: compactElements };
+}
+
 async function buildElementTree(
   starter = document.body,
   frame,
@@ -1430,13 +1569,10 @@ async function buildElementTree(
   needContext = true,
   hoverStylesMap = undefined,
 ) {
-  // Generate hover styles map at the start
-  if (hoverStylesMap === undefined) {
-    hoverStylesMap = await getHoverStylesMap();
-  }
-
   var elements = [];
   var resultArray = [];
+  // the elements by id, to find the parent of an element in O(1)
+  const elementById = new Map();
 
   async function processElement(
     element,
@@ -1481,6 +1617,10 @@ async function buildElementTree(
     }
     const isVisible = isElementVisible(element);
     if (isVisible && !isHidden(element) && !isScriptOrStyle(element)) {
+      // the hover styles map is only loaded once an element needs it
+      if (hoverStylesMap === undefined && mayNeedHoverStyles(element)) {
+        hoverStylesMap = await getCachedHoverStylesMap();
+      }
       const interactable = isInteractable(element, hoverStylesMap);
       let elementObj = null;
       let isParentSVG = null;
@@ -1532,6 +1672,7 @@ async function buildElementTree(
       if (elementObj) {
         elementObj.xpath = current_xpath;
         elements.push(elementObj);
+        elementById.set(elementObj.id, elementObj);
         // If the element is interactable but has no interactable parent,
         // then it starts a new tree, so add it to the result array
         // and set its id as the interactable parent id for the next elements
@@ -1542,10 +1683,7 @@ async function buildElementTree(
         // If the element is interactable and has an interactable parent,
         // then add it to the children of the parent
         else {
-          // TODO: use dict/object so that we access these in O(1) instead
-          elements
-            .find((element) => element.id === parentId)
-            .children.push(elementObj);
+          elementById.get(parentId).children.push(elementObj);
         }
         parentId = elementObj.id;
       }
@@ -1871,6 +2009,121 @@ async function buildElementsAndDrawBoundingBoxes(
   drawBoundingBoxes(elementsAndResultArray[0]);
 }
 
+// draw the bounding boxes of the elements of the whole page, not only of the ones in the viewport, for the
+// screenshots clipped out of the full page
+async function buildElementsAndDrawBoundingBoxesForFullPage(
+  frame = "main.frame",
+  frame_index = undefined,
+) {
+  const [elements] = await buildTreeFromBody(frame, frame_index);
+  const domElementById = new Map();
+  for (const domElement of document.querySelectorAll("[unique_id]")) {
+    domElementById.set(domElement.getAttribute("unique_id"), domElement);
+  }
+  for (const element of elements) {
+    const domElement = domElementById.get(element.id);
+    if (!domElement) {
+      continue;
+    }
+    // the rect of the element isn't cropped to the viewport
+    const clientRect = domElement.getBoundingClientRect();
+    element.rect =
+      clientRect.width >= 3 && clientRect.height >= 3
+        ? Rect.copy(clientRect)
+        : null;
+  }
+  drawBoundingBoxes(elements);
+}
+
+function getPageLayout() {
+  return {
+    scrollX: window.scrollX,
+    scrollY: window.scrollY,
+    viewportWidth: window.innerWidth,
+    viewportHeight: window.innerHeight,
+    scrollHeight: Math.max(
+      document.documentElement?.scrollHeight ?? 0,
+      document.body?.scrollHeight ?? 0,
+    ),
+  };
+}
+
+// mutations made by skyvern itself, which don't change what the page shows
+function isSkyvernMutation(mutation) {
+  if (mutation.type === "attributes") {
+    return mutation.attributeName === "unique_id";
+  }
+  if (mutation.target.id === "boundingBoxContainer") {
+    return true;
+  }
+  const nodes = [...mutation.addedNodes, ...mutation.removedNodes];
+  return (
+    nodes.length > 0 && nodes.every((node) => node.id === "boundingBoxContainer")
+  );
+}
+
+function countPageMutations(mutations) {
+  for (const mutation of mutations) {
+    if (!isSkyvernMutation(mutation)) {
+      window.globalSkyvernMutationCounter++;
+    }
+  }
+}
+
+// the values of the form fields aren't attributes, changing them isn't a mutation
+function getFormStateFingerprint() {
+  let hash = 0;
+  for (const field of document.querySelectorAll("input, textarea, select")) {
+    const state =
+      field.type === "checkbox" || field.type === "radio"
+        ? String(field.checked)
+        : String(field.value);
+    for (let i = 0; i < state.length; i++) {
+      hash = (hash * 31 + state.charCodeAt(i)) | 0;
+    }
+    // separate the fields
+    hash = (hash * 31 + 1) | 0;
+  }
+  return hash.toString(36);
+}
+
+// cheap fingerprint of the DOM of the page, it changes when the page navigates, mutates or a form field changes
+function getDomFingerprint() {
+  if (window.globalSkyvernMutationObserver === undefined) {
+    window.globalSkyvernMutationCounter = 0;
+    window.globalSkyvernDocumentId = Math.random().toString(36).slice(2);
+    window.globalSkyvernMutationObserver = new MutationObserver(
+      countPageMutations,
+    );
+    window.globalSkyvernMutationObserver.observe(document, {
+      subtree: true,
+      childList: true,
+      attributes: true,
+      characterData: true,
+    });
+  }
+  // count the mutations not delivered to the observer yet
+  countPageMutations(window.globalSkyvernMutationObserver.takeRecords());
+  return [
+    window.globalSkyvernDocumentId,
+    window.globalSkyvernMutationCounter,
+    document.location.href,
+    document.getElementsByTagName("*").length,
+    getFormStateFingerprint(),
+  ].join("|");
+}
+
+// the DOM fingerprint with the viewport, it also changes when the page scrolls or resizes
+function getPageFingerprint() {
+  return [
+    getDomFingerprint(),
+    window.scrollX,
+    window.scrollY,
+    window.innerWidth,
+    window.innerHeight,
+  ].join("|");
+}
+
 function captchaSolvedCallback() {
   _jsConsoleLog("captcha solved");
   if (!window["captchaSolvedCounter"]) {
@@ -2278,6 +2531,46 @@ async function getHoverStylesMap() {
   return hoverMap;
 }
 
+// fingerprint of the stylesheets of the page: their identity and their number of rules
+function getStyleSheetsFingerprint() {
+  if (!window.globalSkyvernStyleSheetIds) {
+    window.globalSkyvernStyleSheetIds = new WeakMap();
+    window.globalSkyvernStyleSheetCounter = 0;
+  }
+  const styleSheetIds = window.globalSkyvernStyleSheetIds;
+  const parts = [];
+  for (const sheet of document.styleSheets) {
+    if (!styleSheetIds.has(sheet)) {
+      styleSheetIds.set(sheet, ++window.globalSkyvernStyleSheetCounter);
+    }
+    let ruleCount = -1;
+    try {
+      ruleCount = sheet.cssRules.length;
+    } catch (e) {
+      // the rules of a cross-origin stylesheet can't be read
+    }
+    parts.push(styleSheetIds.get(sheet) + ":" + ruleCount);
+  }
+  return parts.join(",");
+}
+
+/**
+ * getHoverStylesMap cached in the page until a stylesheet is added, removed or changed
+ */
+async function getCachedHoverStylesMap() {
+  const cached = window.globalSkyvernHoverStylesMap;
+  if (cached && cached.fingerprint === getStyleSheetsFingerprint()) {
+    return cached.hoverStylesMap;
+  }
+  const hoverStylesMap = await getHoverStylesMap();
+  // fingerprinted after building the map, which recreates the cross-origin stylesheets it can
+  window.globalSkyvernHoverStylesMap = {
+    fingerprint: getStyleSheetsFingerprint(),
+    hoverStylesMap: hoverStylesMap,
+  };
+  return hoverStylesMap;
+}
+
 // Helper method for debugging
 function findNodeById(arr, targetId, path = []) {
   for (let i = 0; i < arr.length; i++) {
@@ -2375,7 +2668,6 @@ async function addIncrementalNodeToMap(parentNode, childrenNode) {
           "",
           true,
           false,
-          window.globalHoverStylesMap,
         );
         if (newNodeTree.length > 0) {
           newNodesTreeList.push(...newNodeTree);
@@ -2514,7 +2806,6 @@ async function startGlobalIncrementalObserver(element = null) {
   window.globalListnerFlag = true;
   window.globalDomDepthMap = new Map();
   window.globalOneTimeIncrementElements = [];
-  window.globalHoverStylesMap = await getHoverStylesMap();
   window.globalParsedElementCounter = new SafeCounter();
   window.globalObserverForDOMIncrement.takeRecords(); // cleanup the older data
   window.globalObserverForDOMIncrement.observe(document.body, {
@@ -2663,6 +2954,6 @@ _jsConsoleLog(tree);     // Tree structure
 
 // Test if a specific element is interactable
 const element = document.querySelector('button');
-const hoverMap = getHoverStylesMap();
+const hoverMap = await getCachedHoverStylesMap();
 _jsConsoleLog(isInteractable(element, hoverMap));
  */
@@ -1,9 +1,12 @@
 import asyncio
-import copy
+import functools
 import json
+import time
+import uuid
+import weakref
 from collections import defaultdict
 from enum import StrEnum
-from typing import Any, Awaitable, Callable, Self
+from typing import Any, Awaitable, Callable, NamedTuple, Self
 
 import structlog
 from playwright._impl._errors import TimeoutError
@@ -11,10 +14,17 @@ from playwright.async_api import ElementHandle, Frame, Locator, Page
 from pydantic import BaseModel, PrivateAttr
 
 from skyvern.config import settings
-from skyvern.constants import BUILDING_ELEMENT_TREE_TIMEOUT_MS, DEFAULT_MAX_TOKENS, SKYVERN_DIR, SKYVERN_ID_ATTR
+from skyvern.constants import (
+    BUILDING_ELEMENT_TREE_TIMEOUT_MS,
+    DEFAULT_MAX_TOKENS,
+    MAX_CONCURRENT_FRAME_SCRAPES,
+    SKYVERN_DIR,
+    SKYVERN_ID_ATTR,
+)
 from skyvern.exceptions import FailedToTakeScreenshot, ScrapingFailed, UnknownElementTreeFormat
 from skyvern.forge.sdk.api.crypto import calculate_sha256
-from skyvern.forge.sdk.core import skyvern_context
+from skyvern.forge.sdk.core import profiler, skyvern_context
+from skyvern.forge.sdk.core.metrics import ELEMENT_TREE_PRUNED_TOKENS
 from skyvern.utils.image_resizer import Resolution
 from skyvern.utils.token_counter import count_tokens
 from skyvern.webeye.browser_factory import BrowserState
@@ -93,74 +103,147 @@ def build_attribute(key: str, value: Any) -> str:
     return f'{key}="{str(value)}"' if value else key
 
 
+SELF_CLOSING_TAGS = {"img", "input", "br", "hr", "meta", "link"}
+# html of the subtrees, by (id of the element, need_skyvern_attrs)
+ElementHtmlCache = dict[tuple[int, bool], str]
+
+
+@functools.lru_cache(maxsize=1024)
+def _hash_href(href: str) -> str:
+    # jinja style can't accept the variable name starts with number
+    # adding "_" to make sure the variable name is valid.
+    return "_" + calculate_sha256(href)
+
+
 def json_to_html(element: dict, need_skyvern_attrs: bool = True) -> str:
     """
     if element is flagged as dropped, the html format is empty
     """
+    return elements_to_html([element], need_skyvern_attrs=need_skyvern_attrs)
+
+
+def elements_to_html(
+    elements: list[dict],
+    need_skyvern_attrs: bool = True,
+    html_cache: ElementHtmlCache | None = None,
+) -> str:
+    """
+    Convert the elements to HTML, written into a single buffer.
+    `html_cache` memoizes the html of the subtrees by element identity, for the trees sharing elements like the
+    trimmed and the economy trees of a scraped page. It must be dropped with the elements, their ids get reused.
+    """
+    buffer: list[str] = []
+    hashed_href_map = skyvern_context.ensure_context().hashed_href_map
+    for element in elements:
+        _write_element_html(element, need_skyvern_attrs, buffer, hashed_href_map, html_cache)
+    return "".join(buffer)
+
+
+def _write_element_html(
+    element: dict,
+    need_skyvern_attrs: bool,
+    buffer: list[str],
+    hashed_href_map: dict[str, str],
+    html_cache: ElementHtmlCache | None,
+) -> None:
+    if html_cache is None:
+        _write_element_html_uncached(element, need_skyvern_attrs, buffer, hashed_href_map, html_cache)
+        return
+
+    cache_key = (id(element), need_skyvern_attrs)
+    html = html_cache.get(cache_key)
+    if html is None:
+        start = len(buffer)
+        _write_element_html_uncached(element, need_skyvern_attrs, buffer, hashed_href_map, html_cache)
+        html = "".join(buffer[start:])
+        del buffer[start:]
+        html_cache[cache_key] = html
+    buffer.append(html)
+
+
+def _write_element_html_uncached(
+    element: dict,
+    need_skyvern_attrs: bool,
+    buffer: list[str],
+    hashed_href_map: dict[str, str],
+    html_cache: ElementHtmlCache | None,
+) -> None:
     tag = element["tagName"]
-    attributes: dict[str, Any] = copy.deepcopy(element.get("attributes", {}))
+    attributes: dict[str, Any] = element.get("attributes", {})
 
     interactable = element.get("interactable", False)
     if element.get("isDropped", False):
         if not interactable:
-            return ""
+            return
         else:
             LOG.info("Element is interactable. Trimmed all attributes instead of dropping it", element=element)
             attributes = {}
 
-    context = skyvern_context.ensure_context()
-
-    # FIXME: Theoretically, all href links with over 69(64+1+4) length could be hashed
-    # but currently, just hash length>150 links to confirm the solution goes well
-    if "href" in attributes and len(attributes.get("href", "")) > 150:
-        href = attributes.get("href", "")
-        # jinja style can't accept the variable name starts with number
-        # adding "_" to make sure the variable name is valid.
-        hashed_href = "_" + calculate_sha256(href)
-        context.hashed_href_map[hashed_href] = href
-        attributes["href"] = "{{" + hashed_href + "}}"
-
+    # adding the node attribute to attributes, it replaces the attribute of the same name
+    node_attributes: dict[str, Any] = {}
     if need_skyvern_attrs:
-        # adding the node attribute to attributes
         for attr in ELEMENT_NODE_ATTRIBUTES:
             value = element.get(attr)
-            if value is None:
-                continue
-            attributes[attr] = value
-
-    attributes_html = " ".join(build_attribute(key, value) for key, value in attributes.items())
+            if value is not None:
+                node_attributes[attr] = value
+
+    attribute_htmls = []
+    for key, value in attributes.items():
+        if key in node_attributes:
+            value = node_attributes.pop(key)
+        # FIXME: Theoretically, all href links with over 69(64+1+4) length could be hashed
+        # but currently, just hash length>150 links to confirm the solution goes well
+        elif key == "href" and len(value) > 150:
+            hashed_href = _hash_href(value)
+            hashed_href_map[hashed_href] = value
+            value = "{{" + hashed_href + "}}"
+        attribute_htmls.append(build_attribute(key, value))
+    for key, value in node_attributes.items():
+        attribute_htmls.append(build_attribute(key, value))
+    attributes_html = " ".join(attribute_htmls)
 
     if element.get("isSelectable", False):
         tag = "select"
 
-    text = element.get("text", "")
-    # build children HTML
-    children_html = "".join(
-        json_to_html(child, need_skyvern_attrs=need_skyvern_attrs) for child in element.get("children", [])
-    )
-    # build option HTML
-    option_html = "".join(
-        f'<option index="{option.get("optionIndex")}">{option.get("text")}</option>'
-        for option in element.get("options", [])
-    )
-
     if element.get("purgeable", False):
-        return children_html + option_html
+        _write_children_html(element, need_skyvern_attrs, buffer, hashed_href_map, html_cache)
+        return
 
+    open_tag = f"<{tag}{attributes_html if not attributes_html else ' ' + attributes_html}>"
     before_pseudo_text = element.get("beforePseudoText") or ""
     after_pseudo_text = element.get("afterPseudoText") or ""
+    text = element.get("text", "")
+
+    open_tag_index = len(buffer)
+    buffer.append(open_tag)
+    _write_children_html(element, need_skyvern_attrs, buffer, hashed_href_map, html_cache)
 
     # Check if the element is self-closing
     if (
-        tag in ["img", "input", "br", "hr", "meta", "link"]
-        and not option_html
-        and not children_html
+        tag in SELF_CLOSING_TAGS
         and not before_pseudo_text
         and not after_pseudo_text
+        and not any(buffer[open_tag_index + 1 :])
     ):
-        return f"<{tag}{attributes_html if not attributes_html else ' ' + attributes_html}>"
-    else:
-        return f"<{tag}{attributes_html if not attributes_html else ' ' + attributes_html}>{before_pseudo_text}{text}{children_html + option_html}{after_pseudo_text}</{tag}>"
+        del buffer[open_tag_index + 1 :]
+        return
+
+    buffer[open_tag_index] = f"{open_tag}{before_pseudo_text}{text}"
+    buffer.append(f"{after_pseudo_text}</{tag}>")
+
+
+def _write_children_html(
+    element: dict,
+    need_skyvern_attrs: bool,
+    buffer: list[str],
+    hashed_href_map: dict[str, str],
+    html_cache: ElementHtmlCache | None,
+) -> None:
+    for child in element.get("children", []):
+        _write_element_html(child, need_skyvern_attrs, buffer, hashed_href_map, html_cache)
+    # build option HTML
+    for option in element.get("options", []):
+        buffer.append(f'<option index="{option.get("optionIndex")}">{option.get("text")}</option>')
 
 
 def clean_element_before_hashing(element: dict) -> dict:
@@ -177,12 +260,55 @@ def clean_element_before_hashing(element: dict) -> dict:
     return clean_nested(element)
 
 
-def hash_element(element: dict) -> str:
-    hash_ready_element = clean_element_before_hashing(element)
+HASH_IGNORED_ELEMENT_KEYS = {"id", "rect", "frame_index"}
+# stands for the children of an element in its hash string, until they are serialized
+_HASH_CHILDREN_PLACEHOLDER = f"skyvern-children-{uuid.uuid4().hex}"
+_HASH_CHILDREN_PLACEHOLDER_JSON = json.dumps(_HASH_CHILDREN_PLACEHOLDER)
+
+
+def _element_hash_string(element: dict, element_hashes: dict[int, str] | None = None) -> str:
+    """
+    The string hashed for the element: the json of clean_element_before_hashing(element) with sorted keys.
+    It's built bottom-up, every element is serialized once and its children are spliced in as strings instead of
+    rebuilding and serializing the subtree at every level. With `element_hashes`, the hashes of the element and of
+    its descendants are recorded in it by element identity.
+    """
+    element_cleaned = {key: value for key, value in element.items() if key not in HASH_IGNORED_ELEMENT_KEYS}
+    if "attributes" in element:
+        element_cleaned["attributes"] = {
+            key: value for key, value in element["attributes"].items() if key != SKYVERN_ID_ATTR
+        }
+    if "children" in element:
+        element_cleaned["children"] = _HASH_CHILDREN_PLACEHOLDER
     # Sort the keys to ensure consistent ordering
-    element_string = json.dumps(hash_ready_element, sort_keys=True)
+    element_string = json.dumps(element_cleaned, sort_keys=True)
+    if "children" in element:
+        children_string = ", ".join(_element_hash_string(child, element_hashes) for child in element["children"])
+        element_string = element_string.replace(_HASH_CHILDREN_PLACEHOLDER_JSON, f"[{children_string}]", 1)
+    if element_hashes is not None:
+        element_hashes[id(element)] = calculate_sha256(element_string)
+    return element_string
+
+
+def hash_element(element: dict) -> str:
+    return calculate_sha256(_element_hash_string(element))
 
-    return calculate_sha256(element_string)
+
+def copy_element_tree(element_tree: list[dict]) -> list[dict]:
+    """
+    Copy the elements of the tree with their attributes and children, sharing everything else (rect, options, ...).
+    The cleanup and the trimming of the tree only change the keys of the elements and of their attributes, so the
+    copy protects the source tree like a deepcopy does, without duplicating the data of every element.
+    """
+    copied_tree: list[dict] = []
+    for element in element_tree:
+        copied_element = element.copy()
+        if "attributes" in element:
+            copied_element["attributes"] = element["attributes"].copy()
+        if "children" in element:
+            copied_element["children"] = copy_element_tree(element["children"])
+        copied_tree.append(copied_element)
+    return copied_tree
 
 
 def build_element_dict(
@@ -193,6 +319,7 @@ def build_element_dict(
     id_to_frame_dict: dict[str, str] = {}
     id_to_element_hash: dict[str, str] = {}
     hash_to_element_ids: dict[str, list[str]] = {}
+    element_hashes: dict[int, str] = {}
 
     for element in elements:
         element_id: str = element.get("id", "")
@@ -200,9 +327,12 @@ def build_element_dict(
         id_to_css_dict[element_id] = f"[{SKYVERN_ID_ATTR}='{element_id}']"
         id_to_element_dict[element_id] = element
         id_to_frame_dict[element_id] = element["frame"]
-        element_hash = hash_element(element)
+        # the hashes of the descendants are recorded while hashing their ancestor
+        if id(element) not in element_hashes:
+            _element_hash_string(element, element_hashes)
+        element_hash = element_hashes[id(element)]
         id_to_element_hash[element_id] = element_hash
-        hash_to_element_ids[element_hash] = hash_to_element_ids.get(element_hash, []) + [element_id]
+        hash_to_element_ids.setdefault(element_hash, []).append(element_id)
 
     return id_to_css_dict, id_to_element_dict, id_to_frame_dict, id_to_element_hash, hash_to_element_ids
 
@@ -212,6 +342,21 @@ class ElementTreeFormat(StrEnum):
     HTML = "html"
 
 
+class ScrapeMode(StrEnum):
+    """
+    Part of the page scraped. The modes other than FULL save browser time and prompt tokens when the step doesn't need
+    the whole page.
+    """
+
+    FULL = "full"
+    # the elements visible in the viewport, with a single screenshot of the viewport
+    VIEWPORT = "viewport"
+    # the subtree of the element matching the container selector
+    CONTAINER = "container"
+    # the interactable elements only
+    INTERACTABLES = "interactables"
+
+
 class ScrapedPage(BaseModel):
     """
     Scraped response from a webpage, including:
@@ -239,9 +384,12 @@ class ScrapedPage(BaseModel):
     html: str
     extracted_text: str | None = None
     window_dimension: dict[str, int] | None = None
+    scrape_mode: ScrapeMode = ScrapeMode.FULL
     _browser_state: BrowserState = PrivateAttr()
     _clean_up_func: CleanupElementTreeFunc = PrivateAttr()
     _scrape_exclude: ScrapeExcludeFunc | None = PrivateAttr(default=None)
+    # html of the subtrees of the trimmed and the economy trees, which share their elements
+    _html_cache: ElementHtmlCache = PrivateAttr(default_factory=dict)
 
     def __init__(self, **data: Any) -> None:
         missing_attrs = [attr for attr in ["_browser_state", "_clean_up_func"] if attr not in data]
@@ -267,9 +415,8 @@ class ScrapedPage(BaseModel):
             return json.dumps(self.element_tree_trimmed)
 
         if fmt == ElementTreeFormat.HTML:
-            return "".join(
-                json_to_html(element, need_skyvern_attrs=html_need_skyvern_attrs)
-                for element in self.element_tree_trimmed
+            return elements_to_html(
+                self.element_tree_trimmed, need_skyvern_attrs=html_need_skyvern_attrs, html_cache=self._html_cache
             )
 
         raise UnknownElementTreeFormat(fmt=fmt)
@@ -281,14 +428,14 @@ class ScrapedPage(BaseModel):
         percent_to_keep: float = 1,
     ) -> str:
         """
-        Economy elements tree doesn't include secondary elements like SVG, etc
+        Economy elements tree doesn't include secondary elements like SVG, etc.
+        It shares the elements of the trimmed tree, only the elements losing children are copied.
         """
         if not self.economy_element_tree:
             economy_elements = []
-            copied_element_tree_trimmed = copy.deepcopy(self.element_tree_trimmed)
 
             # Process each root element
-            for root_element in copied_element_tree_trimmed:
+            for root_element in self.element_tree_trimmed:
                 processed_element = self._process_element_for_economy_tree(root_element)
                 if processed_element:
                     economy_elements.append(processed_element)
@@ -302,8 +449,8 @@ class ScrapedPage(BaseModel):
             return json.dumps(final_element_tree)
 
         if fmt == ElementTreeFormat.HTML:
-            return "".join(
-                json_to_html(element, need_skyvern_attrs=html_need_skyvern_attrs) for element in final_element_tree
+            return elements_to_html(
+                final_element_tree, need_skyvern_attrs=html_need_skyvern_attrs, html_cache=self._html_cache
             )
 
         raise UnknownElementTreeFormat(fmt=fmt)
@@ -324,10 +471,20 @@ class ScrapedPage(BaseModel):
                 processed_child = self._process_element_for_economy_tree(child)
                 if processed_child:
                     new_children.append(processed_child)
-            element["children"] = new_children
+            if len(new_children) != len(element["children"]) or any(
+                new_child is not child for new_child, child in zip(new_children, element["children"])
+            ):
+                return {**element, "children": new_children}
         return element
 
-    async def refresh(self, draw_boxes: bool = True, scroll: bool = True) -> Self:
+    async def refresh(
+        self,
+        draw_boxes: bool = True,
+        scroll: bool = True,
+        scrape_mode: ScrapeMode = ScrapeMode.FULL,
+        container_selector: str | None = None,
+        reuse_cached_scrape: bool = False,
+    ) -> Self:
         refreshed_page = await scrape_website(
             browser_state=self._browser_state,
             url=self.url,
@@ -335,6 +492,9 @@ class ScrapedPage(BaseModel):
             scrape_exclude=self._scrape_exclude,
             draw_boxes=draw_boxes,
             scroll=scroll,
+            scrape_mode=scrape_mode,
+            container_selector=container_selector,
+            reuse_cached_scrape=reuse_cached_scrape,
         )
         self.elements = refreshed_page.elements
         self.id_to_css_dict = refreshed_page.id_to_css_dict
@@ -344,10 +504,12 @@ class ScrapedPage(BaseModel):
         self.hash_to_element_ids = refreshed_page.hash_to_element_ids
         self.element_tree = refreshed_page.element_tree
         self.element_tree_trimmed = refreshed_page.element_tree_trimmed
+        self._html_cache = {}
         self.screenshots = refreshed_page.screenshots or self.screenshots
         self.html = refreshed_page.html
         self.extracted_text = refreshed_page.extracted_text
         self.url = refreshed_page.url
+        self.scrape_mode = refreshed_page.scrape_mode
         return self
 
     async def generate_scraped_page(
@@ -367,6 +529,7 @@ class ScrapedPage(BaseModel):
         return await self.generate_scraped_page(take_screenshots=False)
 
 
+@profiler.profiled("scrape")
 async def scrape_website(
     browser_state: BrowserState,
     url: str,
@@ -377,6 +540,9 @@ async def scrape_website(
     draw_boxes: bool = True,
     max_screenshot_number: int = settings.MAX_NUM_SCREENSHOTS,
     scroll: bool = True,
+    scrape_mode: ScrapeMode = ScrapeMode.FULL,
+    container_selector: str | None = None,
+    reuse_cached_scrape: bool = False,
 ) -> ScrapedPage:
     """
     ************************************************************************************************
@@ -394,6 +560,11 @@ async def scrape_website(
     :param url: URL of the web page to be scraped.
     :param page: Optional Page instance for scraping, a new page is created if None.
     :param num_retry: Tracks number of retries if scraping fails, defaults to 0.
+    :param scrape_mode: Part of the page to scrape, the whole page by default.
+    :param container_selector: CSS selector of the container scraped in the CONTAINER mode.
+    :param reuse_cached_scrape: Return the previous scrape of the page with the same arguments when the page didn't
+        change since, see SCRAPE_CACHE_TTL_SECONDS, and cache this scrape otherwise. For the steps only reading the
+        page.
 
     :return: Tuple containing Page instance, base64 encoded screenshot, and page elements.
 
@@ -410,6 +581,9 @@ async def scrape_website(
             draw_boxes=draw_boxes,
             max_screenshot_number=max_screenshot_number,
             scroll=scroll,
+            scrape_mode=scrape_mode,
+            container_selector=container_selector,
+            reuse_cached_scrape=reuse_cached_scrape,
         )
     except Exception as e:
         # NOTE: MAX_SCRAPING_RETRIES is set to 0 in both staging and production
@@ -435,19 +609,25 @@ async def scrape_website(
             draw_boxes=draw_boxes,
             max_screenshot_number=max_screenshot_number,
             scroll=scroll,
+            scrape_mode=scrape_mode,
+            container_selector=container_selector,
+            reuse_cached_scrape=reuse_cached_scrape,
         )
 
 
-async def get_frame_text(iframe: Frame) -> str:
+async def get_frame_text(iframe: Frame, semaphore: asyncio.Semaphore | None = None) -> str:
     """
     Get all the visible text in the iframe.
     :param iframe: Frame instance to get the text from.
+    :param semaphore: Semaphore bounding the frames read at once, shared with the child frames.
     :return: All the visible text from the iframe.
     """
     js_script = "() => document.body.innerText"
+    semaphore = semaphore or asyncio.Semaphore(MAX_CONCURRENT_FRAME_SCRAPES)
 
     try:
-        text = await SkyvernFrame.evaluate(frame=iframe, expression=js_script)
+        async with semaphore:
+            text = await SkyvernFrame.evaluate(frame=iframe, expression=js_script)
     except Exception:
         LOG.warning(
             "failed to get text from iframe",
@@ -455,26 +635,103 @@ async def get_frame_text(iframe: Frame) -> str:
         )
         return ""
 
-    for child_frame in iframe.child_frames:
-        if child_frame.is_detached():
-            continue
+    child_frame_texts = await asyncio.gather(
+        *[_get_child_frame_text(child_frame, semaphore) for child_frame in iframe.child_frames]
+    )
+    return text + "".join(child_frame_texts)
 
-        try:
+
+async def _get_child_frame_text(child_frame: Frame, semaphore: asyncio.Semaphore) -> str:
+    if child_frame.is_detached():
+        return ""
+
+    try:
+        # the semaphore isn't held while reading the child frames, they would wait for their parent forever
+        async with semaphore:
             child_frame_element = await child_frame.frame_element()
-        except Exception:
-            LOG.warning(
-                "Unable to get child_frame_element",
-                exc_info=True,
-            )
-            continue
+            # it will get stuck when we `frame.evaluate()` on an invisible iframe
+            is_visible = await child_frame_element.is_visible()
+    except Exception:
+        LOG.warning(
+            "Unable to get child_frame_element",
+            exc_info=True,
+        )
+        return ""
 
-        # it will get stuck when we `frame.evaluate()` on an invisible iframe
-        if not await child_frame_element.is_visible():
-            continue
+    if not is_visible:
+        return ""
+    return await get_frame_text(child_frame, semaphore)
 
-        text += await get_frame_text(child_frame)
 
-    return text
+# the fingerprint reads every frame of the page, a page with an unresponsive frame isn't cached
+SCRAPE_FINGERPRINT_TIMEOUT_MS = 2000
+
+
+class ScrapeCacheKey(NamedTuple):
+    take_screenshots: bool
+    draw_boxes: bool
+    max_screenshot_number: int
+    scroll: bool
+    scrape_mode: ScrapeMode
+    container_selector: str | None
+
+
+class ScrapeCacheEntry(NamedTuple):
+    key: ScrapeCacheKey
+    fingerprint: str
+    expires_at: float
+    scraped_page: ScrapedPage
+
+
+# the last scrape of every page, reused by the next scrape asking for it while the page doesn't change
+_scrape_cache: weakref.WeakKeyDictionary[Page, ScrapeCacheEntry] = weakref.WeakKeyDictionary()
+
+
+async def _get_frame_fingerprint(frame: Frame, with_viewport: bool) -> str:
+    function_name = "getPageFingerprint" if with_viewport else "getDomFingerprint"
+    js_script = f"() => typeof {function_name} === 'function' ? {function_name}() : null"
+    fingerprint = await SkyvernFrame.evaluate(frame=frame, expression=js_script)
+    if fingerprint is None:
+        # the JS functions are only injected in the frames which weren't scraped since their last navigation
+        await SkyvernFrame.evaluate(frame=frame, expression=JS_FUNCTION_DEFS)
+        fingerprint = await SkyvernFrame.evaluate(frame=frame, expression=js_script)
+    return fingerprint
+
+
+async def get_scrape_fingerprint(page: Page, scroll: bool) -> str | None:
+    """
+    Fingerprint of the DOM of the page and of its frames, None when it can't be taken. The viewport is part of it for
+    the scrapes without scrolling, their screenshots are of the current viewport.
+    """
+    frames = [frame for frame in page.frames if not frame.is_detached()]
+    try:
+        async with asyncio.timeout(SCRAPE_FINGERPRINT_TIMEOUT_MS / 1000):
+            fingerprints = await asyncio.gather(
+                *[
+                    _get_frame_fingerprint(frame, with_viewport=not scroll and frame == page.main_frame)
+                    for frame in frames
+                ]
+            )
+    except Exception:
+        LOG.debug("Failed to fingerprint the page for the scrape cache", url=page.url, exc_info=True)
+        return None
+    return "\n".join(fingerprints)
+
+
+async def get_cached_scrape(page: Page, key: ScrapeCacheKey) -> ScrapedPage | None:
+    entry = _scrape_cache.get(page)
+    if entry is None or entry.key != key:
+        return None
+    if time.monotonic() > entry.expires_at:
+        del _scrape_cache[page]
+        return None
+    if await get_scrape_fingerprint(page, key.scroll) != entry.fingerprint:
+        return None
+    # a copy, refresh() updates the scraped page in place
+    scraped_page = entry.scraped_page.model_copy()
+    # the cached html has the href placeholders of the previous context, it's built again for the current one
+    scraped_page._html_cache = {}
+    return scraped_page
 
 
 async def scrape_web_unsafe(
@@ -486,6 +743,9 @@ async def scrape_web_unsafe(
     draw_boxes: bool = True,
     max_screenshot_number: int = settings.MAX_NUM_SCREENSHOTS,
     scroll: bool = True,
+    scrape_mode: ScrapeMode = ScrapeMode.FULL,
+    container_selector: str | None = None,
+    reuse_cached_scrape: bool = False,
 ) -> ScrapedPage:
     """
     Asynchronous function that performs web scraping without any built-in error handling. This function is intended
@@ -500,6 +760,23 @@ async def scrape_web_unsafe(
     """
     # browser state must have the page instance, otherwise we should not do scraping
     page = await browser_state.must_get_working_page()
+    scrape_cache_key = ScrapeCacheKey(
+        take_screenshots=take_screenshots,
+        draw_boxes=draw_boxes,
+        max_screenshot_number=max_screenshot_number,
+        scroll=scroll,
+        scrape_mode=scrape_mode,
+        container_selector=container_selector,
+    )
+    if reuse_cached_scrape and settings.SCRAPE_CACHE_TTL_SECONDS > 0:
+        cached_scraped_page = await get_cached_scrape(page, scrape_cache_key)
+        if cached_scraped_page is not None:
+            LOG.info("Reusing the scrape of the unchanged page", url=url)
+            scraped_page = cached_scraped_page
+            scraped_page._clean_up_func = cleanup_element_tree
+            scraped_page._scrape_exclude = scrape_exclude
+            return scraped_page
+
     # Take screenshots of the page with the bounding boxes. We will remove the bounding boxes later.
     # Scroll to the top of the page and take a screenshot.
     # Scroll to the next page and take a screenshot until we reach the end of the page.
@@ -508,28 +785,46 @@ async def scrape_web_unsafe(
     # clicking start my quote)
 
     LOG.info("Waiting for 3 seconds before scraping the website.")
-    await asyncio.sleep(3)
+    with profiler.span("scrape.wait"):
+        await asyncio.sleep(3)
 
-    elements, element_tree = await get_interactable_element_tree(page, scrape_exclude)
-    element_tree = await cleanup_element_tree(page, url, copy.deepcopy(element_tree))
-    element_tree_trimmed = trim_element_tree(copy.deepcopy(element_tree))
+    # only the scrapes which could reuse a cached scrape are cached, the others don't pay for the fingerprints
+    scrape_cache_fingerprint = None
+    if reuse_cached_scrape and settings.SCRAPE_CACHE_TTL_SECONDS > 0:
+        scrape_cache_fingerprint = await get_scrape_fingerprint(page, scrape_cache_key.scroll)
+
+    with profiler.span("scrape.build_tree"):
+        elements, element_tree = await get_interactable_element_tree(
+            page, scrape_exclude, scrape_mode=scrape_mode, container_selector=container_selector
+        )
+        if not elements and scrape_mode != ScrapeMode.FULL:
+            LOG.info("No elements found in the scrape mode, scraping the full page", scrape_mode=scrape_mode, url=url)
+            scrape_mode = ScrapeMode.FULL
+            elements, element_tree = await get_interactable_element_tree(page, scrape_exclude)
+    with profiler.span("scrape.cleanup"):
+        element_tree = await cleanup_element_tree(page, url, copy_element_tree(element_tree))
+    element_tree_trimmed = trim_element_tree(copy_element_tree(element_tree))
+
+    if scrape_mode == ScrapeMode.VIEWPORT:
+        # the screenshot of the viewport the elements were scraped from
+        max_screenshot_number = 1
+        scroll = False
 
     screenshots = []
     if take_screenshots:
-        element_tree_trimmed_html_str = "".join(
-            json_to_html(element, need_skyvern_attrs=False) for element in element_tree_trimmed
-        )
+        element_tree_trimmed_html_str = elements_to_html(element_tree_trimmed, need_skyvern_attrs=False)
         token_count = count_tokens(element_tree_trimmed_html_str)
         if token_count > DEFAULT_MAX_TOKENS:
             max_screenshot_number = min(max_screenshot_number, 1)
 
-        screenshots = await SkyvernFrame.take_split_screenshots(
-            page=page,
-            url=url,
-            draw_boxes=draw_boxes,
-            max_number=max_screenshot_number,
-            scroll=scroll,
-        )
+        with profiler.span("scrape.screenshots"):
+            screenshots = await SkyvernFrame.take_split_screenshots(
+                page=page,
+                url=url,
+                draw_boxes=draw_boxes,
+                max_number=max_screenshot_number,
+                scroll=scroll,
+            )
     id_to_css_dict, id_to_element_dict, id_to_frame_dict, id_to_element_hash, hash_to_element_ids = build_element_dict(
         elements
     )
@@ -554,7 +849,7 @@ async def scrape_web_unsafe(
             exc_info=True,
         )
 
-    return ScrapedPage(
+    scraped_page = ScrapedPage(
         elements=elements,
         id_to_css_dict=id_to_css_dict,
         id_to_element_dict=id_to_element_dict,
@@ -568,11 +863,25 @@ async def scrape_web_unsafe(
         html=html,
         extracted_text=text_content,
         window_dimension=window_dimension,
+        scrape_mode=scrape_mode,
         _browser_state=browser_state,
         _clean_up_func=cleanup_element_tree,
         _scrape_exclude=scrape_exclude,
     )
 
+    # only cached when the page didn't change while scraping it
+    if scrape_cache_fingerprint is not None and scrape_cache_fingerprint == await get_scrape_fingerprint(
+        page, scrape_cache_key.scroll
+    ):
+        _scrape_cache[page] = ScrapeCacheEntry(
+            key=scrape_cache_key,
+            fingerprint=scrape_cache_fingerprint,
+            expires_at=time.monotonic() + settings.SCRAPE_CACHE_TTL_SECONDS,
+            # the returned scraped page is updated in place by refresh()
+            scraped_page=scraped_page.model_copy(),
+        )
+    return scraped_page
+
 
 async def get_all_children_frames(page: Page) -> list[Frame]:
     start_index = 0
@@ -599,59 +908,121 @@ async def filter_frames(frames: list[Frame], scrape_exclude: ScrapeExcludeFunc |
     return filtered_frames
 
 
-async def add_frame_interactable_elements(
+def _group_frames_by_depth(frames: list[Frame]) -> list[list[Frame]]:
+    frames_by_depth: dict[int, list[Frame]] = {}
+    for frame in frames:
+        depth = 0
+        parent_frame = frame.parent_frame
+        while parent_frame is not None:
+            depth += 1
+            parent_frame = parent_frame.parent_frame
+        frames_by_depth.setdefault(depth, []).append(frame)
+    return [frames_by_depth[depth] for depth in sorted(frames_by_depth)]
+
+
+COMPACT_TREE_ROOT_INDEX = -1
+
+
+def decode_compact_element_tree(compact_tree: dict[str, Any]) -> tuple[list[dict], list[dict]]:
+    """
+    Rebuild the elements and the element tree from the output of `compactElementTree` in domUtils.js.
+    The elements of the tree are the elements of the list, not copies.
+    """
+    strings: list[str] = compact_tree["strings"]
+    elements: list[dict] = []
+    element_tree: list[dict] = []
+    for parent_index, fields in compact_tree["elements"]:
+        element: dict[str, Any] = {}
+        for i in range(0, len(fields), 2):
+            key = strings[fields[i]]
+            value = fields[i + 1]
+            if key == "tagName":
+                value = strings[value]
+            elif key == "attributes":
+                value = {strings[value[j]]: value[j + 1] for j in range(0, len(value), 2)}
+            elif key == "children":
+                value = []
+            element[key] = value
+        elements.append(element)
+        # the elements are in the depth-first order of the tree, a parent always comes before its children
+        if parent_index == COMPACT_TREE_ROOT_INDEX:
+            element_tree.append(element)
+        elif parent_index >= 0:
+            elements[parent_index]["children"].append(element)
+    return elements, element_tree
+
+
+async def build_frame_element_tree(
     frame: Frame,
     frame_index: int,
-    elements: list[dict],
-    element_tree: list[dict],
-) -> tuple[list[dict], list[dict]]:
+    scrape_mode: ScrapeMode = ScrapeMode.FULL,
+) -> tuple[str | None, list[dict], list[dict]] | None:
     """
-    Add the interactable element of the frame to the elements and element_tree.
+    Build the elements and the element tree of the frame, with the unique_id of the iframe element holding it.
+    Returns None for an invisible frame or a frame failing to build, the page is scraped without it.
     """
     try:
         frame_element = await frame.frame_element()
         # it will get stuck when we `frame.evaluate()` on an invisible iframe
         if not await frame_element.is_visible():
-            return elements, element_tree
+            return None
         unique_id = await frame_element.get_attribute("unique_id")
     except Exception:
         LOG.warning(
             "Unable to get unique_id from frame_element",
             exc_info=True,
         )
-        return elements, element_tree
-
-    frame_js_script = f"async () => await buildTreeFromBody('{unique_id}', {frame_index})"
+        return None
 
-    await SkyvernFrame.evaluate(frame=frame, expression=JS_FUNCTION_DEFS)
-    frame_elements, frame_element_tree = await SkyvernFrame.evaluate(
-        frame=frame, expression=frame_js_script, timeout_ms=BUILDING_ELEMENT_TREE_TIMEOUT_MS
-    )
+    # the container of the CONTAINER mode is in the main frame, the frames inside it are scraped fully
+    if scrape_mode == ScrapeMode.CONTAINER:
+        scrape_mode = ScrapeMode.FULL
+    frame_js_script = f"async () => await buildCompactTreeFromBody('{unique_id}', {frame_index}, '{scrape_mode}')"
 
-    for element in elements:
-        if element["id"] == unique_id:
-            element["children"] = frame_element_tree
-
-    elements = elements + frame_elements
+    try:
+        await SkyvernFrame.evaluate(frame=frame, expression=JS_FUNCTION_DEFS)
+        compact_tree = await SkyvernFrame.evaluate(
+            frame=frame, expression=frame_js_script, timeout_ms=BUILDING_ELEMENT_TREE_TIMEOUT_MS
+        )
+        frame_elements, frame_element_tree = decode_compact_element_tree(compact_tree)
+    except Exception:
+        LOG.warning(
+            "Failed to build the element tree of the frame, scraping the page without it",
+            frame_url=frame.url,
+            frame_index=frame_index,
+            exc_info=True,
+        )
+        return None
 
-    return elements, element_tree
+    return unique_id, frame_elements, frame_element_tree
 
 
 async def get_interactable_element_tree(
     page: Page,
     scrape_exclude: ScrapeExcludeFunc | None = None,
+    scrape_mode: ScrapeMode = ScrapeMode.FULL,
+    container_selector: str | None = None,
 ) -> tuple[list[dict], list[dict]]:
     """
     Get the element tree of the page, including all the elements that are interactable.
     :param page: Page instance to get the element tree from.
+    :param scrape_mode: Part of the page to get the element tree of.
+    :param container_selector: CSS selector of the container, for the CONTAINER mode.
     :return: Tuple containing the element tree and a map of element IDs to elements.
     """
     await SkyvernFrame.evaluate(frame=page, expression=JS_FUNCTION_DEFS)
     # main page index is 0
-    main_frame_js_script = "async () => await buildTreeFromBody('main.frame', 0)"
-    elements, element_tree = await SkyvernFrame.evaluate(
-        frame=page, expression=main_frame_js_script, timeout_ms=BUILDING_ELEMENT_TREE_TIMEOUT_MS
+    main_frame_js_script = (
+        "async ([scrapeMode, containerSelector]) => "
+        "await buildCompactTreeFromBody('main.frame', 0, scrapeMode, containerSelector)"
+    )
+    compact_tree = await SkyvernFrame.evaluate(
+        frame=page,
+        expression=main_frame_js_script,
+        arg=[str(scrape_mode), container_selector],
+        timeout_ms=BUILDING_ELEMENT_TREE_TIMEOUT_MS,
     )
+    elements, element_tree = decode_compact_element_tree(compact_tree)
 
     context = skyvern_context.ensure_context()
     frames = await get_all_children_frames(page)
@@ -663,14 +1034,35 @@ async def get_interactable_element_tree(
             frame_index = len(context.frame_index_map) + 1
             context.frame_index_map[frame] = frame_index
 
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FRAME_SCRAPES)
+
+    async def build_frame(frame: Frame) -> tuple[str | None, list[dict], list[dict]] | None:
+        async with semaphore:
+            return await build_frame_element_tree(frame, context.frame_index_map[frame], scrape_mode)
+
+    # the iframe elements get their unique_id while building the tree of their parent frame, so the frames are built
+    # concurrently one depth at a time
+    frame_results: dict[Frame, tuple[str | None, list[dict], list[dict]] | None] = {}
+    for depth_frames in _group_frames_by_depth(frames):
+        depth_results = await asyncio.gather(*[build_frame(frame) for frame in depth_frames])
+        frame_results.update(zip(depth_frames, depth_results))
+
+    # merged in the order of the frames, as when they were built one at a time. A frame comes after its parent frame,
+    # whose elements hold its iframe element
+    element_by_id = {element["id"]: element for element in elements}
     for frame in frames:
-        frame_index = context.frame_index_map[frame]
-        elements, element_tree = await add_frame_interactable_elements(
-            frame,
-            frame_index,
-            elements,
-            element_tree,
-        )
+        frame_result = frame_results[frame]
+        if frame_result is None:
+            continue
+        unique_id, frame_elements, frame_element_tree = frame_result
+        iframe_element = element_by_id.get(unique_id) if unique_id else None
+        # the iframe element isn't in the scraped part of its parent frame, neither is the frame
+        if iframe_element is None and scrape_mode != ScrapeMode.FULL:
+            continue
+        if iframe_element is not None:
+            iframe_element["children"] = frame_element_tree
+        elements.extend(frame_elements)
+        element_by_id.update((element["id"], element) for element in frame_elements)
 
     return elements, element_tree
 
@@ -716,8 +1108,8 @@ class IncrementalScrapePage:
 
         self.elements = incremental_elements
 
-        incremental_tree = await cleanup_element_tree(frame, frame.url, copy.deepcopy(incremental_tree))
-        trimmed_element_tree = trim_element_tree(copy.deepcopy(incremental_tree))
+        incremental_tree = await cleanup_element_tree(frame, frame.url, copy_element_tree(incremental_tree))
+        trimmed_element_tree = trim_element_tree(copy_element_tree(incremental_tree))
 
         self.element_tree = incremental_tree
         self.element_tree_trimmed = trimmed_element_tree
@@ -799,7 +1191,7 @@ class IncrementalScrapePage:
         return None
 
     def build_html_tree(self, element_tree: list[dict] | None = None) -> str:
-        return "".join([json_to_html(element) for element in (element_tree or self.element_tree_trimmed)])
+        return elements_to_html(element_tree or self.element_tree_trimmed)
 
 
 def _should_keep_unique_id(element: dict) -> bool:
@@ -818,64 +1210,294 @@ def _should_keep_unique_id(element: dict) -> bool:
     return element.get("interactable", False)
 
 
-def trim_element(element: dict) -> dict:
-    queue = [element]
-    while queue:
-        queue_ele = queue.pop(0)
-        if "frame" in queue_ele:
-            del queue_ele["frame"]
+# rough number of characters per token, to estimate the tokens saved by the pruning rules
+CHARS_PER_TOKEN = 4
+MAX_NAME_ATTRIBUTE_LENGTH = 500
+MAX_TEXT_LENGTH = 1000
 
-        if "frame_index" in queue_ele:
-            del queue_ele["frame_index"]
 
-        if "id" in queue_ele and not _should_keep_unique_id(queue_ele):
-            del queue_ele["id"]
+def _estimate_attribute_size(key: str, value: Any) -> int:
+    # key="value" and the space before it
+    return len(key) + len(str(value)) + 4
+
+
+def _estimate_removed_attributes_size(attributes: dict, new_attributes: dict) -> int:
+    return sum(_estimate_attribute_size(key, value) for key, value in attributes.items() if key not in new_attributes)
+
+
+def _estimate_element_size(element: dict) -> int:
+    """
+    Rough size of the element and its descendants rendered to HTML.
+    """
+    size = 0
+    stack = [element]
+    while stack:
+        current = stack.pop()
+        # <tag></tag>
+        size += 2 * len(current.get("tagName", "")) + 5
+        for key, value in current.get("attributes", {}).items():
+            size += _estimate_attribute_size(key, value)
+        for key in ("text", "beforePseudoText", "afterPseudoText"):
+            size += len(str(current.get(key) or ""))
+        stack.extend(current.get("children", []))
+    return size
+
+
+class PruningStats:
+    """
+    Characters removed by every pruning rule, to estimate the tokens it saves.
+    """
+
+    def __init__(self) -> None:
+        self.removed_chars: dict[str, int] = defaultdict(int)
+
+    def record(self, rule_name: str, removed_chars: int) -> None:
+        if removed_chars > 0:
+            self.removed_chars[rule_name] += removed_chars
+
+    def estimated_tokens_saved(self) -> dict[str, int]:
+        return {rule_name: chars // CHARS_PER_TOKEN for rule_name, chars in self.removed_chars.items()}
+
+
+class PruningRule:
+    """
+    A rule of the element tree pruning.
+
+    prune_element prunes an element in place before its children are pruned, returning False drops the element with its
+    descendants. prune_children prunes the children of an element once they are all pruned.
+    """
+
+    name: str = ""
+
+    def prune_element(self, element: dict, stats: PruningStats) -> bool:
+        return True
+
+    def prune_children(self, children: list[dict], stats: PruningStats) -> list[dict]:
+        return children
+
+
+class DropInternalKeysRule(PruningRule):
+    name = "drop_internal_keys"
+
+    def prune_element(self, element: dict, stats: PruningStats) -> bool:
+        element.pop("frame", None)
+        element.pop("frame_index", None)
+        return True
+
+
+class DropUniqueIdRule(PruningRule):
+    name = "drop_unique_id"
+
+    def prune_element(self, element: dict, stats: PruningStats) -> bool:
+        if "id" in element and not _should_keep_unique_id(element):
+            stats.record(self.name, _estimate_attribute_size("id", element.pop("id")))
+        return True
 
-        if "attributes" in queue_ele:
-            new_attributes = _trimmed_base64_data(queue_ele["attributes"])
+
+class DropBase64DataRule(PruningRule):
+    name = "drop_base64_data"
+
+    def prune_element(self, element: dict, stats: PruningStats) -> bool:
+        if "attributes" in element:
+            attributes = element["attributes"]
+            new_attributes = _trimmed_base64_data(attributes)
+            stats.record(self.name, _estimate_removed_attributes_size(attributes, new_attributes))
             if new_attributes:
-                queue_ele["attributes"] = new_attributes
+                element["attributes"] = new_attributes
             else:
-                del queue_ele["attributes"]
+                del element["attributes"]
+        return True
 
-        if "attributes" in queue_ele and not queue_ele.get("keepAllAttr", False):
-            new_attributes = _trimmed_attributes(queue_ele["attributes"])
+
+class TrimAttributesRule(PruningRule):
+    name = "trim_attributes"
+
+    def prune_element(self, element: dict, stats: PruningStats) -> bool:
+        # remove the tag, don't need it in the HTML tree
+        keep_all_attributes = element.pop("keepAllAttr", False)
+        if "attributes" in element and not keep_all_attributes:
+            attributes = element["attributes"]
+            new_attributes = _trimmed_attributes(attributes)
+            stats.record(self.name, _estimate_removed_attributes_size(attributes, new_attributes))
             if new_attributes:
-                queue_ele["attributes"] = new_attributes
+                element["attributes"] = new_attributes
             else:
-                del queue_ele["attributes"]
-        # remove the tag, don't need it in the HTML tree
-        if "keepAllAttr" in queue_ele:
-            del queue_ele["keepAllAttr"]
-
-        if "children" in queue_ele:
-            queue.extend(queue_ele["children"])
-            if not queue_ele["children"]:
-                del queue_ele["children"]
-        if "text" in queue_ele:
-            element_text = str(queue_ele["text"]).strip()
-            if not element_text:
-                del queue_ele["text"]
-
-        if (
-            "attributes" in queue_ele
-            and "name" in queue_ele["attributes"]
-            and len(queue_ele["attributes"]["name"]) > 500
-        ):
-            queue_ele["attributes"]["name"] = queue_ele["attributes"]["name"][:500]
+                del element["attributes"]
+        return True
+
+
+class DropEmptyValuesRule(PruningRule):
+    name = "drop_empty_values"
+
+    def prune_element(self, element: dict, stats: PruningStats) -> bool:
+        if "text" in element and not str(element["text"]).strip():
+            stats.record(self.name, len(str(element.pop("text"))))
+        if "beforePseudoText" in element and not element.get("beforePseudoText"):
+            del element["beforePseudoText"]
+        if "afterPseudoText" in element and not element.get("afterPseudoText"):
+            del element["afterPseudoText"]
+        return True
 
-        if "beforePseudoText" in queue_ele and not queue_ele.get("beforePseudoText"):
-            del queue_ele["beforePseudoText"]
 
-        if "afterPseudoText" in queue_ele and not queue_ele.get("afterPseudoText"):
-            del queue_ele["afterPseudoText"]
+class CapNameAttributeRule(PruningRule):
+    name = "cap_name_attribute"
+
+    def prune_element(self, element: dict, stats: PruningStats) -> bool:
+        attributes = element.get("attributes")
+        if attributes and "name" in attributes and len(attributes["name"]) > MAX_NAME_ATTRIBUTE_LENGTH:
+            stats.record(self.name, len(attributes["name"]) - MAX_NAME_ATTRIBUTE_LENGTH)
+            attributes["name"] = attributes["name"][:MAX_NAME_ATTRIBUTE_LENGTH]
+        return True
+
+
+class DropInvisibleRule(PruningRule):
+    """
+    Drop the elements found invisible or blocked when cleaning up the tree, which aren't interactable.
+    """
+
+    name = "drop_invisible"
+
+    def prune_element(self, element: dict, stats: PruningStats) -> bool:
+        if element.get("isDropped", False) and not element.get("interactable", False):
+            stats.record(self.name, _estimate_element_size(element))
+            return False
+        return True
+
+
+class CapTextLengthRule(PruningRule):
+    name = "cap_text_length"
+
+    def prune_element(self, element: dict, stats: PruningStats) -> bool:
+        text = element.get("text")
+        if isinstance(text, str) and len(text) > MAX_TEXT_LENGTH:
+            stats.record(self.name, len(text) - MAX_TEXT_LENGTH)
+            element["text"] = text[:MAX_TEXT_LENGTH]
+        return True
+
 
+class CollapsePurgeableWrappersRule(PruningRule):
+    """
+    Replace the purgeable elements, only kept for the tree relationship, with their children.
+    """
+
+    name = "collapse_purgeable_wrappers"
+
+    def prune_children(self, children: list[dict], stats: PruningStats) -> list[dict]:
+        if not any(child.get("purgeable", False) for child in children):
+            return children
+        new_children: list[dict] = []
+        for child in children:
+            if child.get("purgeable", False):
+                stats.record(self.name, _estimate_element_size({**child, "children": []}))
+                new_children.extend(child.get("children", []))
+            else:
+                new_children.append(child)
+        return new_children
+
+
+class DedupeSiblingsRule(PruningRule):
+    """
+    Drop the elements identical to their previous sibling. The elements keeping their unique id are never identical.
+    """
+
+    name = "dedupe_siblings"
+
+    def prune_children(self, children: list[dict], stats: PruningStats) -> list[dict]:
+        new_children: list[dict] = []
+        for child in children:
+            if new_children and "id" not in child and child == new_children[-1]:
+                stats.record(self.name, _estimate_element_size(child))
+                continue
+            new_children.append(child)
+        return new_children
+
+
+PRUNING_RULES: dict[str, type[PruningRule]] = {
+    rule.name: rule
+    for rule in (
+        DropInternalKeysRule,
+        DropUniqueIdRule,
+        DropBase64DataRule,
+        TrimAttributesRule,
+        DropEmptyValuesRule,
+        CapNameAttributeRule,
+        DropInvisibleRule,
+        CapTextLengthRule,
+        CollapsePurgeableWrappersRule,
+        DedupeSiblingsRule,
+    )
+}
+# the rules trimming every element tree, settings.ELEMENT_TREE_PRUNING_RULES are applied after them
+TRIM_PRUNING_RULES = [
+    DropInternalKeysRule.name,
+    DropUniqueIdRule.name,
+    DropBase64DataRule.name,
+    TrimAttributesRule.name,
+    DropEmptyValuesRule.name,
+    CapNameAttributeRule.name,
+]
+
+
+class ElementTreePruner:
+    """
+    Prune an element tree in place with a list of rules, in a single pass over the tree.
+    """
+
+    def __init__(self, rules: list[PruningRule]) -> None:
+        self.rules = rules
+        self.stats = PruningStats()
+
+    @classmethod
+    def from_rule_names(cls, rule_names: list[str]) -> Self:
+        unknown_rule_names = [rule_name for rule_name in rule_names if rule_name not in PRUNING_RULES]
+        if unknown_rule_names:
+            raise ValueError(f"Unknown element tree pruning rules: {unknown_rule_names}")
+        return cls([PRUNING_RULES[rule_name]() for rule_name in rule_names])
+
+    def _prune_element(self, element: dict) -> bool:
+        for rule in self.rules:
+            if not rule.prune_element(element, self.stats):
+                return False
+        return True
+
+    def prune(self, elements: list[dict]) -> list[dict]:
+        root: dict = {"children": elements}
+        # the elements with children, each one before its descendants
+        parents: list[dict] = []
+        stack = [root]
+        while stack:
+            element = stack.pop()
+            children = element.get("children")
+            if not children:
+                element.pop("children", None)
+                continue
+            kept_children = [child for child in children if self._prune_element(child)]
+            element["children"] = kept_children
+            stack.extend(kept_children)
+            parents.append(element)
+
+        # the descendants first, the children rules see the pruned children
+        for element in reversed(parents):
+            children = element["children"]
+            for rule in self.rules:
+                children = rule.prune_children(children, self.stats)
+            if children:
+                element["children"] = children
+            else:
+                del element["children"]
+        return root.get("children", [])
+
+
+def trim_element(element: dict) -> dict:
+    ElementTreePruner.from_rule_names(TRIM_PRUNING_RULES).prune([element])
     return element
 
 
 def trim_element_tree(elements: list[dict]) -> list[dict]:
-    for element in elements:
-        trim_element(element)
+    pruner = ElementTreePruner.from_rule_names(TRIM_PRUNING_RULES + settings.ELEMENT_TREE_PRUNING_RULES)
+    elements = pruner.prune(elements)
+    for rule_name, tokens in pruner.stats.estimated_tokens_saved().items():
+        ELEMENT_TREE_PRUNED_TOKENS.inc(tokens, rule=rule_name)
     return elements
 
 
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import asyncio
-import copy
 import typing
 from enum import StrEnum
 from random import uniform
@@ -24,7 +23,13 @@ from skyvern.exceptions import (
     NoneFrameError,
     SkyvernException,
 )
-from skyvern.webeye.scraper.scraper import IncrementalScrapePage, ScrapedPage, json_to_html, trim_element
+from skyvern.webeye.scraper.scraper import (
+    IncrementalScrapePage,
+    ScrapedPage,
+    copy_element_tree,
+    json_to_html,
+    trim_element,
+)
 from skyvern.webeye.utils.page import SkyvernFrame
 
 LOG = structlog.get_logger()
@@ -148,7 +153,7 @@ class SkyvernElement:
     def build_HTML(self, need_trim_element: bool = True, need_skyvern_attrs: bool = True) -> str:
         element_dict = self.get_element_dict()
         if need_trim_element:
-            element_dict = trim_element(copy.deepcopy(element_dict))
+            element_dict = trim_element(copy_element_tree([element_dict])[0])
 
         return json_to_html(element_dict, need_skyvern_attrs)
 
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import asyncio
+import base64
 import time
+import weakref
 from typing import Any, Dict, List
 
 import structlog
@@ -30,6 +32,12 @@ def load_js_script() -> str:
 
 JS_FUNCTION_DEFS = load_js_script()
 
+# overlap of the consecutive screenshots of a page, like scrollToNextPage does
+SCREENSHOT_OVERLAP_PX = 200
+
+# the last viewport screenshot taken by take_reusable_screenshot, with the fingerprint of the page when it was taken
+_reusable_screenshots: weakref.WeakKeyDictionary[Page, tuple[str, bytes]] = weakref.WeakKeyDictionary()
+
 
 async def _current_viewpoint_screenshot_helper(
     page: Page,
@@ -124,6 +132,71 @@ async def _scrolling_screenshots_helper(
     return screenshots
 
 
+async def _clip_screenshots_helper(
+    page: Page,
+    url: str | None = None,
+    draw_boxes: bool = False,
+    max_number: int = settings.MAX_NUM_SCREENSHOTS,
+) -> List[bytes]:
+    """
+    Clip the screenshots out of the full page with the chrome devtools protocol, without scrolling the page: the
+    bounding boxes of the whole page are drawn once instead of after every scroll, and there is no scroll animation to
+    wait for. Falls back to the scrolling screenshots when CDP isn't available.
+    """
+    if page.is_closed():
+        raise FailedToTakeScreenshot(error_message="Page is closed")
+    try:
+        cdp_session = await page.context.new_cdp_session(page)
+    except Exception:
+        LOG.info("CDP is not available, taking the screenshots by scrolling", url=url, exc_info=True)
+        return await _scrolling_screenshots_helper(page=page, url=url, draw_boxes=draw_boxes, max_number=max_number)
+
+    skyvern_page = await SkyvernFrame.create_instance(frame=page)
+    screenshots: List[bytes] = []
+    try:
+        await page.wait_for_load_state(timeout=settings.BROWSER_LOADING_TIMEOUT_MS)
+        if draw_boxes:
+            await skyvern_page.build_elements_and_draw_bounding_boxes_for_full_page(frame="main.frame", frame_index=0)
+        layout = await skyvern_page.get_page_layout()
+        viewport_width = layout["viewportWidth"]
+        viewport_height = layout["viewportHeight"]
+        scroll_height = max(layout["scrollHeight"], viewport_height)
+
+        y = 0
+        while len(screenshots) < max_number:
+            params: dict[str, Any] = {
+                "format": settings.SCREENSHOT_FORMAT,
+                "captureBeyondViewport": True,
+                "clip": {
+                    "x": 0,
+                    "y": y,
+                    "width": viewport_width,
+                    "height": min(viewport_height, scroll_height - y),
+                    "scale": 1,
+                },
+            }
+            if settings.SCREENSHOT_FORMAT != "png" and settings.SCREENSHOT_QUALITY is not None:
+                params["quality"] = settings.SCREENSHOT_QUALITY
+            async with asyncio.timeout(settings.BROWSER_SCREENSHOT_TIMEOUT_MS / 1000):
+                result = await cdp_session.send("Page.captureScreenshot", params)
+            screenshots.append(base64.b64decode(result["data"]))
+            if y + viewport_height >= scroll_height:
+                break
+            y += max(viewport_height - SCREENSHOT_OVERLAP_PX, 1)
+    except asyncio.TimeoutError as e:
+        LOG.exception("Timeout error while clipping the screenshots", url=url)
+        raise FailedToTakeScreenshot(error_message=str(e)) from e
+    except Exception as e:
+        LOG.exception("Unknown error while clipping the screenshots", url=url)
+        raise FailedToTakeScreenshot(error_message=str(e)) from e
+    finally:
+        if draw_boxes:
+            await skyvern_page.remove_bounding_boxes()
+        await cdp_session.detach()
+
+    return screenshots
+
+
 class SkyvernFrame:
     @staticmethod
     async def evaluate(
@@ -163,10 +236,44 @@ class SkyvernFrame:
         scroll: bool = True,
     ) -> List[bytes]:
         if not scroll:
-            return [await _current_viewpoint_screenshot_helper(page=page)]
+            screenshot = await SkyvernFrame.get_reusable_screenshot(page=page)
+            if screenshot is None:
+                screenshot = await _current_viewpoint_screenshot_helper(page=page)
+            return [screenshot]
 
+        if settings.SCREENSHOT_CAPTURE_ENGINE == "cdp_clip":
+            return await _clip_screenshots_helper(page=page, url=url, max_number=max_number, draw_boxes=draw_boxes)
         return await _scrolling_screenshots_helper(page=page, url=url, max_number=max_number, draw_boxes=draw_boxes)
 
+    @staticmethod
+    async def take_reusable_screenshot(page: Page) -> bytes:
+        """
+        Take a screenshot of the viewport, reused by the next screenshot of the viewport as long as the page doesn't
+        change, e.g. the screenshot after an action is the screenshot of the next step.
+        """
+        skyvern_frame = await SkyvernFrame.create_instance(frame=page)
+        # the fingerprint is taken first, a change while taking the screenshot prevents reusing it
+        fingerprint = await skyvern_frame.get_page_fingerprint()
+        screenshot = await _current_viewpoint_screenshot_helper(page=page)
+        _reusable_screenshots[page] = (fingerprint, screenshot)
+        return screenshot
+
+    @staticmethod
+    async def get_reusable_screenshot(page: Page) -> bytes | None:
+        reusable_screenshot = _reusable_screenshots.get(page)
+        if reusable_screenshot is None:
+            return None
+        fingerprint, screenshot = reusable_screenshot
+        try:
+            skyvern_frame = await SkyvernFrame.create_instance(frame=page)
+            if await skyvern_frame.get_page_fingerprint() != fingerprint:
+                return None
+        except Exception:
+            LOG.debug("Failed to get the page fingerprint, not reusing the screenshot", exc_info=True)
+            return None
+        LOG.debug("Reusing the screenshot of the unchanged page")
+        return screenshot
+
     @classmethod
     async def create_instance(cls, frame: Page | Frame) -> SkyvernFrame:
         instance = cls(frame=frame)
@@ -183,6 +290,14 @@ class SkyvernFrame:
         async with asyncio.timeout(timeout):
             return await self.frame.content()
 
+    async def get_page_fingerprint(self) -> str:
+        js_script = "() => getPageFingerprint()"
+        return await self.evaluate(frame=self.frame, expression=js_script)
+
+    async def get_page_layout(self) -> dict[str, int]:
+        js_script = "() => getPageLayout()"
+        return await self.evaluate(frame=self.frame, expression=js_script)
+
     async def get_scroll_x_y(self) -> tuple[int, int]:
         js_script = "() => getScrollXY()"
         return await self.evaluate(frame=self.frame, expression=js_script)
@@ -268,6 +383,17 @@ class SkyvernFrame:
             arg=[frame, frame_index],
         )
 
+    async def build_elements_and_draw_bounding_boxes_for_full_page(self, frame: str, frame_index: int) -> None:
+        js_script = (
+            "async ([frame, frame_index]) => await buildElementsAndDrawBoundingBoxesForFullPage(frame, frame_index)"
+        )
+        await self.evaluate(
+            frame=self.frame,
+            expression=js_script,
+            timeout_ms=BUILDING_ELEMENT_TREE_TIMEOUT_MS,
+            arg=[frame, frame_index],
+        )
+
     async def is_window_scrollable(self) -> bool:
         js_script = "() => isWindowScrollable()"
         return await self.evaluate(frame=self.frame, expression=js_script)
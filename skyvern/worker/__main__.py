@@ -0,0 +1,9 @@
+import asyncio
+
+from dotenv import load_dotenv
+
+from skyvern.services.run_job_worker import start_worker
+
+if __name__ == "__main__":
+    load_dotenv()
+    asyncio.run(start_worker())
@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+
+from skyvern.forge.sdk.artifact import upload_queue
+from skyvern.forge.sdk.artifact.models import Artifact, ArtifactType
+from skyvern.forge.sdk.artifact.upload_queue import ArtifactUploadQueue
+
+
+def make_artifact(artifact_id):
+    return Artifact(
+        artifact_id=artifact_id,
+        artifact_type=ArtifactType.SCREENSHOT_LLM,
+        uri=f"s3://bucket/{artifact_id}.png",
+        organization_id="o_1",
+        task_id="tsk_1",
+        created_at=datetime(2025, 1, 1),
+        modified_at=datetime(2025, 1, 1),
+    )
+
+
+def spilled_files(spill_path):
+    return sorted(path.name.split(".", 1)[1] for path in spill_path.iterdir())
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    storage = MagicMock()
+    storage.store_artifact = AsyncMock()
+    storage.store_artifact_from_path = AsyncMock()
+    monkeypatch.setattr(upload_queue.app, "STORAGE", storage)
+    monkeypatch.setattr(upload_queue.settings, "ARTIFACT_UPLOAD_MAX_RETRY_DELAY_SECONDS", 0)
+    return storage
+
+
+@pytest_asyncio.fixture
+async def make_queue(tmp_path):
+    queues = []
+
+    def make_queue(**kwargs):
+        queue = ArtifactUploadQueue(concurrency=1, max_attempts=2, spill_path=str(tmp_path), **kwargs)
+        queues.append(queue)
+        return queue
+
+    yield make_queue
+    for queue in queues:
+        for task in [*queue.workers, queue.replay_task]:
+            if task:
+                task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_enqueued_uploads_are_stored(storage, make_queue):
+    queue = make_queue()
+
+    await queue.enqueue(make_artifact("a_1"), primary_key="tsk_1", data=b"data")
+    assert queue.pending_count("tsk_1") == 1
+
+    assert await queue.wait(["tsk_1"], timeout=5)
+    assert queue.pending_count() == 0
+    storage.store_artifact.assert_awaited_once()
+    assert storage.store_artifact.await_args.args[1] == b"data"
+
+
+@pytest.mark.asyncio
+async def test_uploads_overflowing_the_queue_are_spilled(storage, make_queue, tmp_path):
+    queue = make_queue(max_queue_bytes=4)
+
+    await queue.enqueue(make_artifact("a_1"), primary_key="tsk_1", data=b"too large")
+
+    # the spilled upload isn't pending anymore, it's replayed in the background
+    assert queue.pending_count("tsk_1") == 0
+    assert spilled_files(tmp_path) == ["data", "json"]
+    storage.store_artifact.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_failing_uploads_are_retried_then_spilled(storage, make_queue, tmp_path):
+    storage.store_artifact.side_effect = Exception("storage is down")
+    queue = make_queue()
+
+    await queue.enqueue(make_artifact("a_1"), primary_key="tsk_1", data=b"data")
+
+    assert await queue.wait(["tsk_1"], timeout=5)
+    assert storage.store_artifact.await_count == 2
+    assert spilled_files(tmp_path) == ["data", "json"]
+
+
+@pytest.mark.asyncio
+async def test_spilled_uploads_are_replayed(storage, make_queue, tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_queue.settings, "ARTIFACT_UPLOAD_SPILL_REPLAY_INTERVAL_SECONDS", 0.01)
+    artifact = make_artifact("a_1")
+    make_queue(max_queue_bytes=4)._write_spilled_upload(
+        upload_queue.UploadJob(artifact=artifact, primary_key="tsk_1", data=b"spilled")
+    )
+    stored = asyncio.Event()
+    storage.store_artifact_from_path.side_effect = lambda artifact, path: stored.set()
+
+    make_queue()._ensure_started()
+    await asyncio.wait_for(stored.wait(), timeout=5)
+    # the files are deleted right after the upload
+    await asyncio.sleep(0.1)
+
+    replayed_artifact, path = storage.store_artifact_from_path.await_args.args
+    assert replayed_artifact == artifact
+    assert path.endswith(".data")
+    assert spilled_files(tmp_path) == []
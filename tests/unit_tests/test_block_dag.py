@@ -0,0 +1,116 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from skyvern.forge.sdk.workflow import block_dag
+from skyvern.forge.sdk.workflow.models import block
+from skyvern.forge.sdk.workflow.models.block import (
+    FileUploadBlock,
+    ForLoopBlock,
+    NavigationBlock,
+    TextPromptBlock,
+    WaitBlock,
+)
+from skyvern.forge.sdk.workflow.models.parameter import OutputParameter
+
+
+def make_output_parameter(label):
+    return OutputParameter(
+        key=f"{label}_output",
+        output_parameter_id=f"op_{label}",
+        workflow_id="w_1",
+        created_at=datetime(2025, 1, 1),
+        modified_at=datetime(2025, 1, 1),
+    )
+
+
+def make_navigation_block(label, navigation_goal="go"):
+    return NavigationBlock(label=label, output_parameter=make_output_parameter(label), navigation_goal=navigation_goal)
+
+
+def make_text_prompt_block(label, prompt="summarize", parameters=None):
+    return TextPromptBlock(
+        label=label, output_parameter=make_output_parameter(label), prompt=prompt, parameters=parameters or []
+    )
+
+
+@pytest.fixture(autouse=True)
+def workflow_context_manager(monkeypatch):
+    workflow_run_context = MagicMock()
+    workflow_run_context.has_parameter.return_value = False
+    workflow_context_manager = MagicMock()
+    workflow_context_manager.get_workflow_run_context.return_value = workflow_run_context
+    monkeypatch.setattr(block.app, "WORKFLOW_CONTEXT_MANAGER", workflow_context_manager)
+
+
+def test_browser_blocks_run_in_order_and_browserless_blocks_run_alone():
+    blocks = [
+        make_navigation_block("nav_1"),
+        make_text_prompt_block("prompt"),
+        make_navigation_block("nav_2"),
+    ]
+
+    assert block_dag.get_block_dependencies(blocks, "wr_1") == {"nav_1": set(), "prompt": set(), "nav_2": {"nav_1"}}
+
+
+def test_blocks_depend_on_the_referenced_outputs():
+    nav = make_navigation_block("nav")
+    blocks = [
+        nav,
+        make_text_prompt_block("by_parameter", parameters=[nav.output_parameter]),
+        make_text_prompt_block("by_template", prompt="summarize {{ by_parameter_output }}"),
+        make_text_prompt_block("by_label", prompt="summarize {{ nav.extracted_information }}"),
+    ]
+
+    assert block_dag.get_block_dependencies(blocks, "wr_1") == {
+        "nav": set(),
+        "by_parameter": {"nav"},
+        "by_template": {"by_parameter"},
+        "by_label": {"nav"},
+    }
+
+
+def test_unparsable_template_depends_on_all_the_previous_blocks():
+    blocks = [
+        make_navigation_block("nav"),
+        make_text_prompt_block("prompt"),
+        make_text_prompt_block("broken", prompt="summarize {{ nav"),
+    ]
+
+    assert block_dag.get_block_dependencies(blocks, "wr_1")["broken"] == {"nav", "prompt"}
+
+
+def test_wait_block_is_a_barrier():
+    blocks = [
+        make_text_prompt_block("before"),
+        WaitBlock(label="wait", output_parameter=make_output_parameter("wait"), wait_sec=1),
+        make_text_prompt_block("after"),
+    ]
+
+    dependencies = block_dag.get_block_dependencies(blocks, "wr_1")
+
+    assert dependencies["wait"] == {"before"}
+    assert dependencies["after"] == {"wait"}
+
+
+def test_downloaded_files_blocks_depend_on_all_the_previous_browser_blocks():
+    blocks = [
+        make_navigation_block("nav_1"),
+        make_navigation_block("nav_2"),
+        make_text_prompt_block("prompt"),
+        FileUploadBlock(label="upload", output_parameter=make_output_parameter("upload")),
+    ]
+
+    assert block_dag.get_block_dependencies(blocks, "wr_1")["upload"] == {"nav_1", "nav_2"}
+
+
+def test_references_to_the_blocks_inside_a_loop_depend_on_the_loop():
+    loop = ForLoopBlock(
+        label="loop",
+        output_parameter=make_output_parameter("loop"),
+        loop_blocks=[make_text_prompt_block("inner")],
+    )
+    blocks = [loop, make_text_prompt_block("prompt", prompt="summarize {{ inner_output }}")]
+
+    assert block_dag.get_block_dependencies(blocks, "wr_1")["prompt"] == {"loop"}
@@ -1,46 +1,280 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
 import pytest
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from structlog.testing import capture_logs
 
+from skyvern.forge.sdk.schemas.workflow_schedules import CronCatchUpPolicy, WorkflowSchedule, WorkflowScheduleFire
 from skyvern.services import cron_scheduler
 
 
 class DummyWorkflow:
-    def __init__(self, cron_schedule=None, cron_timezone="UTC", workflow_permanent_id="wf"): 
+    def __init__(self, cron_schedule=None, cron_timezone="UTC", workflow_id="w_1"):
         self.cron_schedule = cron_schedule
         self.cron_timezone = cron_timezone
-        self.workflow_permanent_id = workflow_permanent_id
+        self.workflow_id = workflow_id
+
+
+def make_schedule(next_fire_at, cron_schedule="*/15 * * * *", cron_timezone="UTC"):
+    return WorkflowSchedule(
+        workflow_permanent_id="wpid",
+        organization_id="org",
+        workflow_id="w_1",
+        cron_schedule=cron_schedule,
+        cron_timezone=cron_timezone,
+        next_fire_at=next_fire_at,
+        created_at=datetime(2025, 1, 1),
+        modified_at=datetime(2025, 1, 1),
+    )
+
+
+def make_fire(fire_at=datetime(2025, 1, 1, 10, 0), attempts=0):
+    return WorkflowScheduleFire(
+        workflow_permanent_id="wpid",
+        fire_at=fire_at,
+        organization_id="org",
+        workflow_run_id="wr_1",
+        attempts=attempts,
+        created_at=datetime(2025, 1, 1),
+        modified_at=datetime(2025, 1, 1),
+    )
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = MagicMock()
+    for method in (
+        "get_workflow_by_permanent_id",
+        "get_workflow_schedule",
+        "create_or_update_workflow_schedule",
+        "delete_workflow_schedule",
+        "claim_workflow_schedule_fire",
+        "increment_workflow_schedule_fire_attempts",
+        "delete_workflow_schedule_fire",
+        "get_workflow_run",
+        "get_organization",
+    ):
+        setattr(database, method, AsyncMock())
+    monkeypatch.setattr(cron_scheduler.app, "DATABASE", database)
+    return database
+
+
+@pytest.mark.asyncio
+async def test_sync_workflow_invalid_cron(database):
+    database.get_workflow_by_permanent_id.return_value = DummyWorkflow(cron_schedule="invalid")
 
+    with capture_logs() as logs:
+        await cron_scheduler.CronScheduler().sync_workflow("wpid", "org")
 
-class DummyOrganization:
-    def __init__(self, organization_id="org"):
-        self.organization_id = organization_id
+    database.delete_workflow_schedule.assert_awaited_once_with("wpid")
+    database.create_or_update_workflow_schedule.assert_not_awaited()
+    assert any("Invalid cron schedule" in log["event"] for log in logs)
 
 
 @pytest.mark.asyncio
-async def test_schedule_workflow_invalid_cron(monkeypatch, caplog):
-    scheduler = AsyncIOScheduler()
-    monkeypatch.setattr(cron_scheduler, "scheduler", scheduler)
+async def test_sync_workflow_invalid_timezone(database):
+    database.get_workflow_by_permanent_id.return_value = DummyWorkflow(
+        cron_schedule="* * * * *", cron_timezone="Invalid/Zone"
+    )
 
-    workflow = DummyWorkflow(cron_schedule="invalid")
-    org = DummyOrganization()
+    with capture_logs() as logs:
+        await cron_scheduler.CronScheduler().sync_workflow("wpid", "org")
+
+    database.delete_workflow_schedule.assert_awaited_once_with("wpid")
+    database.create_or_update_workflow_schedule.assert_not_awaited()
+    assert any("Invalid cron schedule" in log["event"] for log in logs)
+
+
+@pytest.mark.asyncio
+async def test_sync_workflow_without_cron_schedule(database):
+    database.get_workflow_by_permanent_id.return_value = DummyWorkflow(cron_schedule=None)
+
+    await cron_scheduler.CronScheduler().sync_workflow("wpid", "org")
+
+    database.delete_workflow_schedule.assert_awaited_once_with("wpid")
+    database.create_or_update_workflow_schedule.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_sync_workflow_keeps_the_next_fire_time_of_an_unchanged_schedule(database):
+    next_fire_at = datetime(2025, 1, 1, 10, 0)
+    database.get_workflow_by_permanent_id.return_value = DummyWorkflow(cron_schedule="*/15 * * * *")
+    database.get_workflow_schedule.return_value = make_schedule(next_fire_at)
 
-    with caplog.at_level("ERROR"):
-        await cron_scheduler.schedule_workflow(workflow, org)
+    await cron_scheduler.CronScheduler().sync_workflow("wpid", "org")
 
-    assert scheduler.get_jobs() == []
-    assert any("Invalid cron schedule" in rec.message for rec in caplog.records)
+    database.create_or_update_workflow_schedule.assert_awaited_once()
+    assert database.create_or_update_workflow_schedule.await_args.kwargs["next_fire_at"] == next_fire_at
 
 
 @pytest.mark.asyncio
-async def test_schedule_workflow_invalid_timezone(monkeypatch, caplog):
-    scheduler = AsyncIOScheduler()
-    monkeypatch.setattr(cron_scheduler, "scheduler", scheduler)
+async def test_sync_workflow_reschedules_a_changed_schedule(database):
+    database.get_workflow_by_permanent_id.return_value = DummyWorkflow(cron_schedule="0 * * * *")
+    database.get_workflow_schedule.return_value = make_schedule(datetime(2025, 1, 1, 10, 15))
+
+    await cron_scheduler.CronScheduler().sync_workflow("wpid", "org")
+
+    kwargs = database.create_or_update_workflow_schedule.await_args.kwargs
+    assert kwargs["cron_schedule"] == "0 * * * *"
+    assert kwargs["next_fire_at"] > datetime.utcnow()
+    assert kwargs["next_fire_at"].minute == 0
+
+
+def test_get_next_fire_time():
+    trigger = cron_scheduler.build_trigger("*/15 * * * *", "UTC")
+
+    assert cron_scheduler.get_next_fire_time(trigger, datetime(2025, 1, 1, 10, 7)) == datetime(2025, 1, 1, 10, 15)
+    # strictly after
+    assert cron_scheduler.get_next_fire_time(trigger, datetime(2025, 1, 1, 10, 15)) == datetime(2025, 1, 1, 10, 30)
+
+
+def test_get_next_fire_time_in_the_timezone_of_the_schedule():
+    trigger = cron_scheduler.build_trigger("0 9 * * *", "America/New_York")
+
+    # naive UTC datetimes, 9:00 in New York is 14:00 UTC in the winter and 13:00 UTC in the summer
+    assert cron_scheduler.get_next_fire_time(trigger, datetime(2025, 1, 1)) == datetime(2025, 1, 1, 14, 0)
+    assert cron_scheduler.get_next_fire_time(trigger, datetime(2025, 7, 1)) == datetime(2025, 7, 1, 13, 0)
+
+
+def get_fire_times(catch_up_policy, now, misfire_grace_seconds=60, max_catch_up_runs=10):
+    trigger = cron_scheduler.build_trigger("*/15 * * * *", "UTC")
+    return cron_scheduler.get_fire_times(
+        trigger,
+        next_fire_at=datetime(2025, 1, 1, 10, 0),
+        now=now,
+        catch_up_policy=catch_up_policy,
+        misfire_grace_seconds=misfire_grace_seconds,
+        max_catch_up_runs=max_catch_up_runs,
+    )
+
+
+@pytest.mark.parametrize("catch_up_policy", list(CronCatchUpPolicy))
+def test_get_fire_times_on_time(catch_up_policy):
+    fire_times, next_fire_at = get_fire_times(catch_up_policy, now=datetime(2025, 1, 1, 10, 0, 5))
+
+    assert fire_times == [datetime(2025, 1, 1, 10, 0)]
+    assert next_fire_at == datetime(2025, 1, 1, 10, 15)
+
+
+def test_get_fire_times_not_due():
+    fire_times, next_fire_at = get_fire_times(CronCatchUpPolicy.all, now=datetime(2025, 1, 1, 9, 59))
+
+    assert fire_times == []
+    assert next_fire_at == datetime(2025, 1, 1, 10, 0)
+
+
+def test_get_fire_times_catch_up_all():
+    fire_times, next_fire_at = get_fire_times(CronCatchUpPolicy.all, now=datetime(2025, 1, 1, 10, 50))
+
+    assert fire_times == [datetime(2025, 1, 1, 10, minute) for minute in (0, 15, 30, 45)]
+    assert next_fire_at == datetime(2025, 1, 1, 11, 0)
 
-    workflow = DummyWorkflow(cron_schedule="* * * * *", cron_timezone="Invalid/Zone")
-    org = DummyOrganization()
 
-    with caplog.at_level("ERROR"):
-        await cron_scheduler.schedule_workflow(workflow, org)
+def test_get_fire_times_catch_up_all_keeps_the_latest_fires():
+    fire_times, next_fire_at = get_fire_times(
+        CronCatchUpPolicy.all, now=datetime(2025, 1, 1, 10, 50), max_catch_up_runs=2
+    )
+
+    assert fire_times == [datetime(2025, 1, 1, 10, 30), datetime(2025, 1, 1, 10, 45)]
+    assert next_fire_at == datetime(2025, 1, 1, 11, 0)
+
+
+def test_get_fire_times_catch_up_once():
+    fire_times, next_fire_at = get_fire_times(CronCatchUpPolicy.once, now=datetime(2025, 1, 1, 10, 50))
+
+    assert fire_times == [datetime(2025, 1, 1, 10, 45)]
+    assert next_fire_at == datetime(2025, 1, 1, 11, 0)
+
+
+def test_get_fire_times_skip():
+    fire_times, next_fire_at = get_fire_times(
+        CronCatchUpPolicy.skip, now=datetime(2025, 1, 1, 10, 50), misfire_grace_seconds=10 * 60
+    )
+
+    # only the fire missed by less than the grace time
+    assert fire_times == [datetime(2025, 1, 1, 10, 45)]
+    assert next_fire_at == datetime(2025, 1, 1, 11, 0)
+
+    fire_times, _ = get_fire_times(CronCatchUpPolicy.skip, now=datetime(2025, 1, 1, 10, 50), misfire_grace_seconds=60)
+    assert fire_times == []
+
+
+@pytest.mark.asyncio
+async def test_fire_schedule_already_claimed(database, monkeypatch):
+    database.claim_workflow_schedule_fire.return_value = None
+    scheduler = cron_scheduler.CronScheduler()
+    monkeypatch.setattr(scheduler, "run_fire", AsyncMock())
+
+    await scheduler.fire_schedule(make_schedule(datetime(2025, 1, 1, 10, 0)), datetime(2025, 1, 1, 10, 0, 5))
+
+    scheduler.run_fire.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_fire_schedule_runs_the_claimed_fires(database, monkeypatch):
+    fire = make_fire()
+    database.claim_workflow_schedule_fire.return_value = [fire]
+    scheduler = cron_scheduler.CronScheduler()
+    monkeypatch.setattr(scheduler, "run_fire", AsyncMock())
+
+    await scheduler.fire_schedule(make_schedule(datetime(2025, 1, 1, 10, 0)), datetime(2025, 1, 1, 10, 0, 5))
+
+    kwargs = database.claim_workflow_schedule_fire.await_args.kwargs
+    assert kwargs["fire_at"] == datetime(2025, 1, 1, 10, 0)
+    assert kwargs["next_fire_at"] == datetime(2025, 1, 1, 10, 15)
+    assert kwargs["fire_times"] == [datetime(2025, 1, 1, 10, 0)]
+    scheduler.run_fire.assert_awaited_once_with(fire)
+
+
+@pytest.mark.asyncio
+async def test_run_fire_creates_the_workflow_run(database, monkeypatch):
+    fire = make_fire()
+    organization = MagicMock()
+    database.get_workflow_run.return_value = None
+    database.get_organization.return_value = organization
+    scheduler = cron_scheduler.CronScheduler()
+    monkeypatch.setattr(scheduler, "run_workflow", AsyncMock())
+
+    await scheduler.run_fire(fire)
+
+    scheduler.run_workflow.assert_awaited_once_with(fire, organization)
+    database.delete_workflow_schedule_fire.assert_awaited_once_with("wpid", fire.fire_at)
+
+
+@pytest.mark.asyncio
+async def test_run_fire_keeps_the_fire_when_the_run_fails(database, monkeypatch):
+    database.get_workflow_run.return_value = None
+    scheduler = cron_scheduler.CronScheduler()
+    monkeypatch.setattr(scheduler, "run_workflow", AsyncMock(side_effect=RuntimeError("boom")))
+
+    with pytest.raises(RuntimeError):
+        await scheduler.run_fire(make_fire())
+
+    database.increment_workflow_schedule_fire_attempts.assert_awaited_once()
+    database.delete_workflow_schedule_fire.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_run_fire_with_the_run_already_created(database, monkeypatch):
+    database.get_workflow_run.return_value = MagicMock()
+    scheduler = cron_scheduler.CronScheduler()
+    monkeypatch.setattr(scheduler, "run_workflow", AsyncMock())
+
+    await scheduler.run_fire(make_fire())
+
+    database.get_workflow_run.assert_awaited_once_with("wr_1", organization_id="org")
+    scheduler.run_workflow.assert_not_awaited()
+    database.delete_workflow_schedule_fire.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_run_fire_gives_up_after_the_max_attempts(database, monkeypatch):
+    monkeypatch.setattr(cron_scheduler.settings, "CRON_WORKFLOW_MAX_FIRE_ATTEMPTS", 3)
+    scheduler = cron_scheduler.CronScheduler()
+    monkeypatch.setattr(scheduler, "run_workflow", AsyncMock())
+
+    await scheduler.run_fire(make_fire(attempts=3))
 
-    assert scheduler.get_jobs() == []
-    assert any("Invalid timezone" in rec.message for rec in caplog.records)
+    scheduler.run_workflow.assert_not_awaited()
+    database.increment_workflow_schedule_fire_attempts.assert_not_awaited()
+    database.delete_workflow_schedule_fire.assert_awaited_once()
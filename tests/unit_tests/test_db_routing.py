@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from skyvern.forge.sdk.core import skyvern_context
+from skyvern.forge.sdk.core.skyvern_context import SkyvernContext
+from skyvern.forge.sdk.db import client
+from skyvern.forge.sdk.db.client import AgentDB
+from skyvern.forge.sdk.db.routing import read_only
+
+# the engines connect lazily, no database is needed to check which one a session is bound to
+PRIMARY_STRING = "postgresql+psycopg://skyvern@primary/skyvern"
+REPLICA_STRING = "postgresql+asyncpg://skyvern@replica/skyvern"
+
+
+@read_only
+async def get_read_only_session_bind(database):
+    return database.Session().bind
+
+
+async def get_session_bind(database):
+    return database.Session().bind
+
+
+def commit_on_primary(database):
+    database.engine.sync_engine.dispatch.commit(MagicMock())
+
+
+@pytest.fixture
+def context():
+    skyvern_context.set(SkyvernContext())
+    yield skyvern_context.current()
+    skyvern_context.reset()
+
+
+@pytest.mark.asyncio
+async def test_read_only_methods_read_the_replica_until_the_context_writes(context):
+    database = AgentDB(PRIMARY_STRING, replica_database_string=REPLICA_STRING)
+
+    assert await get_read_only_session_bind(database) is database.replica_engine
+    assert await get_session_bind(database) is database.engine
+
+    commit_on_primary(database)
+    # the context reads its own writes from now on
+    assert context.database_written
+    assert await get_read_only_session_bind(database) is database.engine
+
+
+@pytest.mark.asyncio
+async def test_every_method_reads_the_primary_without_a_replica(context):
+    database = AgentDB(PRIMARY_STRING)
+
+    assert await get_read_only_session_bind(database) is database.engine
+    assert "replica_pool" not in database.get_stats()
+
+
+def test_connect_args_follow_the_driver_of_each_database(monkeypatch):
+    connect_args = {}
+    create_async_engine = client.create_async_engine
+
+    def record_connect_args(url, **kwargs):
+        connect_args[url.drivername] = kwargs["connect_args"]
+        return create_async_engine(url, **kwargs)
+
+    monkeypatch.setattr(client, "create_async_engine", record_connect_args)
+    monkeypatch.setattr(client.settings, "DATABASE_STATEMENT_CACHE_SIZE", None)
+
+    AgentDB(PRIMARY_STRING, replica_database_string=REPLICA_STRING)
+
+    assert set(connect_args["postgresql+psycopg"]) == {"options"}
+    assert set(connect_args["postgresql+asyncpg"]) == {"server_settings"}
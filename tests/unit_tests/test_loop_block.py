@@ -0,0 +1,241 @@
+import asyncio
+from contextlib import nullcontext
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from skyvern.forge.sdk.workflow import service
+from skyvern.forge.sdk.workflow.context_manager import WorkflowRunContext
+from skyvern.forge.sdk.workflow.models import block
+from skyvern.forge.sdk.workflow.models.block import (
+    BlockResult,
+    BlockStatus,
+    ForLoopBlock,
+    LoopIterationResult,
+    TextPromptBlock,
+)
+from skyvern.forge.sdk.workflow.models.checkpoint import (
+    CheckpointedBlockResult,
+    CheckpointedLoopIteration,
+    WorkflowRunCheckpoint,
+)
+from skyvern.forge.sdk.workflow.models.parameter import OutputParameter
+from skyvern.forge.sdk.workflow.service import WorkflowService
+
+
+def make_output_parameter(label):
+    return OutputParameter(
+        key=f"{label}_output",
+        output_parameter_id=f"op_{label}",
+        workflow_id="w_1",
+        created_at=datetime(2025, 1, 1),
+        modified_at=datetime(2025, 1, 1),
+    )
+
+
+def make_for_loop_block(loop_blocks=None):
+    return ForLoopBlock(
+        label="loop", output_parameter=make_output_parameter("loop"), loop_blocks=loop_blocks or [], max_concurrency=2
+    )
+
+
+@pytest.fixture
+def browser_manager(monkeypatch):
+    browser_manager = MagicMock()
+    browser_manager.scope_browser_state = lambda scope: nullcontext()
+    browser_manager.cleanup_for_scope = AsyncMock(return_value=None)
+    monkeypatch.setattr(block.app, "BROWSER_MANAGER", browser_manager)
+    workflow_context_manager = MagicMock()
+    workflow_context_manager.scope_workflow_run_context = lambda workflow_run_id, context: nullcontext()
+    monkeypatch.setattr(block.app, "WORKFLOW_CONTEXT_MANAGER", workflow_context_manager)
+    return browser_manager
+
+
+def make_workflow_run_context():
+    workflow_run_context = MagicMock()
+    workflow_run_context.values = {}
+    return workflow_run_context
+
+
+async def execute_loop(for_loop_block, loop_over_values):
+    return await for_loop_block.execute_loop_parallel_helper(
+        workflow_run_id="wr_1",
+        workflow_run_block_id="wrb_1",
+        workflow_run_context=make_workflow_run_context(),
+        loop_over_values=loop_over_values,
+        max_concurrency=2,
+    )
+
+
+@pytest.mark.asyncio
+async def test_failing_iteration_cancels_the_running_ones(monkeypatch, browser_manager):
+    canceled = asyncio.Event()
+
+    async def execute_loop_iteration(self, loop_idx, **kwargs):
+        if loop_idx == 0:
+            await asyncio.sleep(0)
+            raise ValueError("iteration failed")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            canceled.set()
+            raise
+
+    monkeypatch.setattr(ForLoopBlock, "execute_loop_iteration", execute_loop_iteration)
+
+    with pytest.raises(ValueError):
+        await execute_loop(make_for_loop_block(), ["a", "b", "c"])
+
+    assert canceled.is_set()
+    # the browsers of the started iterations are closed, the last one never started
+    assert browser_manager.cleanup_for_scope.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_stopped_iteration_cancels_the_later_ones(monkeypatch, browser_manager):
+    async def execute_loop_iteration(self, loop_idx, loop_over_value, **kwargs):
+        if loop_idx == 1:
+            await asyncio.sleep(10)
+        return LoopIterationResult(
+            output_values=[{"value": loop_over_value}], block_outputs=[], last_block=None, stopped=loop_idx == 0
+        )
+
+    monkeypatch.setattr(ForLoopBlock, "execute_loop_iteration", execute_loop_iteration)
+
+    result = await asyncio.wait_for(execute_loop(make_for_loop_block(), ["a", "b", "c"]), timeout=5)
+
+    assert result.outputs_with_loop_values == [[{"value": "a"}]]
+
+
+@pytest.mark.asyncio
+async def test_iteration_browser_artifacts_are_persisted(monkeypatch, browser_manager):
+    browser_state = MagicMock()
+    browser_manager.cleanup_for_scope.return_value = browser_state
+    browser_manager.get_video_artifacts = AsyncMock(return_value=[MagicMock(video_artifact_id="a_1", video_data=b"v")])
+    browser_manager.get_har_data = AsyncMock(return_value=b"har")
+    artifact_manager = MagicMock()
+    artifact_manager.update_artifact_data = AsyncMock()
+    artifact_manager.create_workflow_run_block_artifact = AsyncMock()
+    monkeypatch.setattr(block.app, "ARTIFACT_MANAGER", artifact_manager)
+    database = MagicMock()
+    database.get_workflow_run_block = AsyncMock()
+    monkeypatch.setattr(block.app, "DATABASE", database)
+
+    async def execute_loop_iteration(self, loop_over_value, **kwargs):
+        return LoopIterationResult(output_values=[{"value": loop_over_value}], block_outputs=[], last_block=None)
+
+    monkeypatch.setattr(ForLoopBlock, "execute_loop_iteration", execute_loop_iteration)
+
+    await execute_loop(make_for_loop_block(), ["a", "b"])
+
+    assert artifact_manager.update_artifact_data.await_count == 2
+    assert artifact_manager.update_artifact_data.await_args.kwargs["data"] == b"v"
+    assert artifact_manager.create_workflow_run_block_artifact.await_count == 2
+    assert artifact_manager.create_workflow_run_block_artifact.await_args.kwargs["data"] == b"har"
+
+
+def make_checkpoint(completed_blocks, loop_iterations=None, context_values=None):
+    return WorkflowRunCheckpoint(
+        workflow_run_id="wr_1",
+        organization_id="o_1",
+        completed_blocks={label: CheckpointedBlockResult(success=True) for label in completed_blocks},
+        loop_iterations=loop_iterations or {},
+        context_values=context_values or {},
+        blocks_metadata={},
+        created_at=datetime(2025, 1, 1),
+        modified_at=datetime(2025, 1, 1),
+    )
+
+
+def make_checkpointed_iteration(loop_value):
+    return CheckpointedLoopIteration(
+        loop_value=loop_value,
+        output_values=[f"output of {loop_value}"],
+        block_results=[CheckpointedBlockResult(success=True, status=BlockStatus.completed)],
+    )
+
+
+@pytest.fixture
+def workflow_run_context(monkeypatch):
+    workflow_run_context = WorkflowRunContext()
+    workflow_context_manager = MagicMock()
+    workflow_context_manager.get_workflow_run_context.return_value = workflow_run_context
+    workflow_context_manager.checkpoint_loop_iteration = AsyncMock()
+    monkeypatch.setattr(service.app, "WORKFLOW_CONTEXT_MANAGER", workflow_context_manager)
+    return workflow_run_context
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = MagicMock()
+    database.get_workflow_run_checkpoint = AsyncMock()
+    monkeypatch.setattr(service.app, "DATABASE", database)
+    return database
+
+
+@pytest.mark.asyncio
+async def test_restore_workflow_run_checkpoint(workflow_run_context, database):
+    blocks = [MagicMock(label="done"), MagicMock(label="loop"), MagicMock(label="next")]
+    database.get_workflow_run_checkpoint.return_value = make_checkpoint(
+        ["done"],
+        loop_iterations={"loop": {0: make_checkpointed_iteration("a")}},
+        context_values={"done_output": "value"},
+    )
+
+    remaining_blocks = await WorkflowService()._restore_workflow_run_checkpoint("wr_1", "o_1", blocks)
+
+    assert [block.label for block in remaining_blocks] == ["loop", "next"]
+    assert workflow_run_context.root_block_labels == {"done", "loop", "next"}
+    assert workflow_run_context.values == {"done_output": "value"}
+    assert set(workflow_run_context.checkpointed_blocks) == {"done"}
+    assert workflow_run_context.checkpointed_loop_iterations == {"loop": {0: make_checkpointed_iteration("a")}}
+
+
+@pytest.mark.asyncio
+async def test_restore_workflow_run_checkpoint_executes_all_the_blocks_without_a_checkpoint(
+    workflow_run_context, database
+):
+    blocks = [MagicMock(label="first"), MagicMock(label="second")]
+
+    database.get_workflow_run_checkpoint.return_value = None
+    assert await WorkflowService()._restore_workflow_run_checkpoint("wr_1", "o_1", blocks) == blocks
+
+    database.get_workflow_run_checkpoint.side_effect = Exception("db is down")
+    assert await WorkflowService()._restore_workflow_run_checkpoint("wr_1", "o_1", blocks) == blocks
+
+
+@pytest.mark.asyncio
+async def test_resumed_loop_skips_the_checkpointed_iterations(monkeypatch, workflow_run_context):
+    executed_blocks = []
+
+    async def execute_safe(self, **kwargs):
+        executed_blocks.append(self.label)
+        return BlockResult(success=True, output_parameter=self.output_parameter, status=BlockStatus.completed)
+
+    monkeypatch.setattr(TextPromptBlock, "execute_safe", execute_safe)
+    monkeypatch.setattr(block.app, "WORKFLOW_CONTEXT_MANAGER", service.app.WORKFLOW_CONTEXT_MANAGER)
+    inner_block = TextPromptBlock(label="prompt", output_parameter=make_output_parameter("prompt"), prompt="go")
+    for_loop_block = make_for_loop_block(loop_blocks=[inner_block])
+    workflow_run_context.root_block_labels.add("loop")
+    workflow_run_context.checkpointed_loop_iterations["loop"] = {
+        0: make_checkpointed_iteration("a"),
+        # the loop values changed since the checkpoint, the iteration runs again
+        1: make_checkpointed_iteration("stale"),
+    }
+
+    result = await for_loop_block.execute_loop_helper(
+        workflow_run_id="wr_1",
+        workflow_run_block_id="wrb_1",
+        workflow_run_context=workflow_run_context,
+        loop_over_values=["a", "b", "c"],
+        organization_id="o_1",
+    )
+
+    assert executed_blocks == ["prompt", "prompt"]
+    assert [outputs[0]["output_value"] for outputs in result.outputs_with_loop_values] == ["output of a", None, None]
+    assert result.block_outputs[0].output_parameter_value == "output of a"
+    checkpointed_loop_idxs = [
+        call.kwargs["loop_idx"] for call in block.app.WORKFLOW_CONTEXT_MANAGER.checkpoint_loop_iteration.await_args_list
+    ]
+    assert checkpointed_loop_idxs == [1, 2]
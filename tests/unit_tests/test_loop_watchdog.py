@@ -0,0 +1,33 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from skyvern.forge.sdk.core.loop_watchdog import LoopWatchdog
+
+
+def run_workflow_block(workflow_run):
+    # blocks the event loop with the workflow run in the locals of the frame
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_recorded_with_the_run_ids():
+    watchdog = LoopWatchdog(threshold_ms=100, sample_interval_seconds=0.02)
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.05)
+        run_workflow_block(SimpleNamespace(workflow_run_id="wr_1"))
+        # let the heartbeat report the blocking call
+        await asyncio.sleep(0.1)
+    finally:
+        watchdog.stop()
+
+    assert watchdog.blocking_call_count == 1
+    blocking_call = watchdog.blocking_calls[0]
+    assert blocking_call.blocked_ms >= 100
+    assert blocking_call.workflow_run_id == "wr_1"
+    assert blocking_call.task_id is None
+    assert "run_workflow_block" in "".join(blocking_call.stack)
+    assert watchdog.snapshot()["max_lag_ms"] >= 100
@@ -0,0 +1,97 @@
+import pytest
+
+from skyvern.forge.sdk.core import profiler
+from skyvern.forge.sdk.core.profiler import StepProfile
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(profiler.time, "perf_counter", clock)
+    # the spans aren't exported
+    monkeypatch.setattr(profiler, "_otel_tracer", False)
+    return clock
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(profiler.settings, "ENABLE_STEP_PROFILER", True)
+
+
+def test_step_profile_to_dict(clock):
+    profile = StepProfile(task_id="tsk_1", step_id="stp_1")
+    profile.record("llm", 1.0)
+    profile.record("llm", 0.5)
+    profile.record("db", 0.01)
+    clock.advance(2)
+    profile.finish()
+    clock.advance(1)
+
+    assert profile.to_dict() == {
+        "total_ms": 2000.0,
+        "phases": {
+            "db": {"count": 1, "total_ms": 10.0, "max_ms": 10.0},
+            "llm": {"count": 2, "total_ms": 1500.0, "max_ms": 1000.0},
+        },
+    }
+
+
+def test_nested_spans_are_both_timed(clock, enabled):
+    with profiler.profile_step(task_id="tsk_1", step_id="stp_1") as profile:
+        with profiler.span("action"):
+            clock.advance(1)
+            with profiler.span("action.db"):
+                clock.advance(0.25)
+            clock.advance(0.5)
+        clock.advance(1)
+
+    assert profile is not None
+    # the nested phase is also counted in the outer one
+    assert profile.to_dict() == {
+        "total_ms": 2750.0,
+        "phases": {
+            "action": {"count": 1, "total_ms": 1750.0, "max_ms": 1750.0},
+            "action.db": {"count": 1, "total_ms": 250.0, "max_ms": 250.0},
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_profiled_times_the_calls_of_the_profiled_steps(clock, enabled):
+    @profiler.profiled("scrape")
+    async def scrape(seconds):
+        clock.advance(seconds)
+        return seconds
+
+    assert await scrape(1) == 1
+    with profiler.profile_step() as profile:
+        assert await scrape(0.5) == 0.5
+        assert await scrape(0.25) == 0.25
+
+    assert profile is not None
+    assert profile.to_dict()["phases"] == {"scrape": {"count": 2, "total_ms": 750.0, "max_ms": 500.0}}
+    assert scrape.__name__ == "scrape"
+
+
+def test_profiler_is_a_noop_when_disabled(clock, monkeypatch):
+    monkeypatch.setattr(profiler.settings, "ENABLE_STEP_PROFILER", False)
+
+    with profiler.profile_step() as profile:
+        assert profile is None
+        assert profiler.span("action") is profiler._NOOP_SPAN
+        with profiler.span("action"):
+            clock.advance(1)
+        profiler.record("action", 1)
+
+    assert profiler._current_profile.get() is None
@@ -0,0 +1,139 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from skyvern.forge.sdk.artifact.models import Artifact, ArtifactType
+from skyvern.forge.sdk.schemas.retention import RetentionAction, RetentionPolicy, RetentionTable
+from skyvern.services import retention_service
+
+
+def make_policy(**kwargs):
+    return RetentionPolicy(table=kwargs.pop("table", RetentionTable.artifacts), retention_days=30, **kwargs)
+
+
+def make_artifact(artifact_id):
+    return Artifact(
+        artifact_id=artifact_id,
+        artifact_type=ArtifactType.SCREENSHOT_LLM,
+        uri=f"s3://bucket/{artifact_id}.png",
+        created_at=datetime(2025, 1, 1),
+        modified_at=datetime(2025, 1, 1),
+    )
+
+
+def test_excluded_organization_ids():
+    default_policy = make_policy()
+    org_policy = make_policy(organization_id="o_1")
+    actions_policy = make_policy(table=RetentionTable.actions, organization_id="o_2")
+    policies = [default_policy, org_policy, actions_policy]
+
+    # the organizations with their own policy for the same table only
+    assert retention_service._get_excluded_organization_ids(default_policy, policies) == ["o_1"]
+    assert retention_service._get_excluded_organization_ids(org_policy, policies) == []
+    assert retention_service._get_excluded_organization_ids(actions_policy, policies) == []
+
+
+def test_organizations_with_artifact_type_policies_keep_the_policies_without_organization():
+    default_policy = make_policy()
+    recording_policy = make_policy(artifact_types=[ArtifactType.RECORDING, ArtifactType.HAR])
+    org_recording_policy = make_policy(organization_id="o_1", artifact_types=[ArtifactType.RECORDING])
+    org_har_policy = make_policy(organization_id="o_2", artifact_types=[ArtifactType.HAR])
+    org_log_policy = make_policy(organization_id="o_2", artifact_types=[ArtifactType.SKYVERN_LOG])
+    policies = [default_policy, recording_policy, org_recording_policy, org_har_policy, org_log_policy]
+
+    # the other artifact types of the organizations are still purged by the policies without organization
+    assert retention_service._get_excluded_organization_ids(default_policy, policies) == []
+    assert retention_service._get_excluded_organization_artifact_types(default_policy, policies) == {
+        "o_1": [ArtifactType.RECORDING],
+        "o_2": [ArtifactType.HAR, ArtifactType.SKYVERN_LOG],
+    }
+    assert retention_service._get_excluded_organization_ids(recording_policy, policies) == []
+    assert retention_service._get_excluded_organization_artifact_types(recording_policy, policies) == {
+        "o_1": [ArtifactType.RECORDING],
+        "o_2": [ArtifactType.HAR],
+    }
+    assert retention_service._get_excluded_organization_artifact_types(org_recording_policy, policies) == {}
+
+    # an organization covering all the artifact types of the policy is excluded from it
+    org_policy = make_policy(organization_id="o_1", artifact_types=[ArtifactType.HAR])
+    policies.append(org_policy)
+    assert retention_service._get_excluded_organization_ids(recording_policy, policies) == ["o_1"]
+    assert retention_service._get_excluded_organization_artifact_types(recording_policy, policies) == {
+        "o_2": [ArtifactType.HAR]
+    }
+
+
+def test_excluded_artifact_types():
+    default_policy = make_policy()
+    recording_policy = make_policy(artifact_types=[ArtifactType.RECORDING])
+    org_policy = make_policy(organization_id="o_1")
+    org_log_policy = make_policy(organization_id="o_1", artifact_types=[ArtifactType.SKYVERN_LOG])
+    policies = [default_policy, recording_policy, org_policy, org_log_policy]
+
+    # the artifact types with their own policy in the same organization scope only
+    assert retention_service._get_excluded_artifact_types(default_policy, policies) == [ArtifactType.RECORDING]
+    assert retention_service._get_excluded_artifact_types(org_policy, policies) == [ArtifactType.SKYVERN_LOG]
+    assert retention_service._get_excluded_artifact_types(recording_policy, policies) == []
+
+
+def test_archive_only_for_artifacts():
+    with pytest.raises(ValueError):
+        make_policy(table=RetentionTable.steps, action=RetentionAction.archive)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = MagicMock()
+    database.get_artifacts_created_before = AsyncMock()
+    database.mark_artifacts_archived = AsyncMock()
+    database.delete_artifacts_by_ids = AsyncMock()
+    monkeypatch.setattr(retention_service.app, "DATABASE", database)
+    return database
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    storage = MagicMock()
+    storage.archive_artifact = AsyncMock()
+    storage.delete_artifacts = AsyncMock()
+    monkeypatch.setattr(retention_service.app, "STORAGE", storage)
+    return storage
+
+
+@pytest.mark.asyncio
+async def test_archive_keeps_the_rows_with_the_archived_uris(database, storage):
+    artifacts = [make_artifact("a_1"), make_artifact("a_2")]
+    database.get_artifacts_created_before.return_value = artifacts
+    # the second artifact fails to be archived
+    storage.archive_artifact.side_effect = ["s3://bucket/archive/a_1.png", None]
+
+    count = await retention_service._purge_artifacts_batch(
+        make_policy(action=RetentionAction.archive),
+        created_before=datetime(2025, 2, 1),
+        exclude_organization_ids=[],
+        exclude_artifact_types=[],
+    )
+
+    assert count == 1
+    assert database.get_artifacts_created_before.await_args.kwargs["exclude_archived"] is True
+    database.mark_artifacts_archived.assert_awaited_once_with({"a_1": "s3://bucket/archive/a_1.png"})
+    database.delete_artifacts_by_ids.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_delete_removes_the_files_and_the_rows(database, storage):
+    artifacts = [make_artifact("a_1"), make_artifact("a_2")]
+    database.get_artifacts_created_before.return_value = artifacts
+
+    count = await retention_service._purge_artifacts_batch(
+        make_policy(),
+        created_before=datetime(2025, 2, 1),
+        exclude_organization_ids=[],
+        exclude_artifact_types=[],
+    )
+
+    assert count == 2
+    assert database.get_artifacts_created_before.await_args.kwargs["exclude_archived"] is False
+    storage.delete_artifacts.assert_awaited_once_with(artifacts)
+    database.delete_artifacts_by_ids.assert_awaited_once_with(["a_1", "a_2"])
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from skyvern.forge.sdk.executor import async_executor
+from skyvern.forge.sdk.executor.scheduling import estimate_start_time, select_fair_run_jobs
+from skyvern.forge.sdk.schemas.run_jobs import RunJob, RunJobStatus, RunJobType
+
+NOW = datetime(2025, 1, 1)
+
+
+def make_run_job(run_id, organization_id, age_seconds=0, priority=0):
+    return RunJob(
+        run_job_id=f"rj_{run_id}",
+        organization_id=organization_id,
+        job_type=RunJobType.task,
+        run_id=run_id,
+        status=RunJobStatus.queued,
+        priority=priority,
+        max_attempts=3,
+        created_at=NOW - timedelta(seconds=age_seconds),
+        modified_at=NOW,
+    )
+
+
+def run_ids(run_jobs):
+    return [run_job.run_id for run_job in run_jobs]
+
+
+def test_select_fair_run_jobs_round_robins_the_organizations():
+    candidates = [
+        make_run_job("a1", "org_a", age_seconds=30),
+        make_run_job("a2", "org_a", age_seconds=20),
+        make_run_job("a3", "org_a", age_seconds=10),
+        make_run_job("b1", "org_b", age_seconds=5),
+    ]
+
+    # the organization flooding the queue doesn't starve the other one
+    assert run_ids(select_fair_run_jobs(candidates, running_counts={}, limit=3)) == ["a1", "b1", "a2"]
+
+
+def test_select_fair_run_jobs_favors_the_organizations_with_fewer_running_runs():
+    candidates = [make_run_job("a1", "org_a", age_seconds=30), make_run_job("b1", "org_b", age_seconds=5)]
+
+    assert run_ids(select_fair_run_jobs(candidates, running_counts={"org_a": 2}, limit=1)) == ["b1"]
+
+
+def test_select_fair_run_jobs_picks_by_priority_within_an_organization():
+    candidates = [
+        make_run_job("a1", "org_a", age_seconds=30),
+        make_run_job("a2", "org_a", age_seconds=10, priority=5),
+    ]
+
+    assert run_ids(select_fair_run_jobs(candidates, running_counts={}, limit=2)) == ["a2", "a1"]
+
+
+def test_select_fair_run_jobs_caps_the_runs_per_organization():
+    candidates = [make_run_job("a1", "org_a", age_seconds=30), make_run_job("a2", "org_a", age_seconds=20)]
+
+    selected = select_fair_run_jobs(candidates, running_counts={"org_a": 1}, limit=2, max_concurrent_runs_per_org=2)
+
+    assert run_ids(selected) == ["a1"]
+
+
+def test_select_fair_run_jobs_weights_the_organizations():
+    candidates = [make_run_job(f"a{i}", "org_a", age_seconds=30 - i) for i in range(3)] + [
+        make_run_job(f"b{i}", "org_b", age_seconds=30 - i) for i in range(3)
+    ]
+
+    selected = select_fair_run_jobs(candidates, running_counts={}, limit=3, organization_weights={"org_a": 2.0})
+
+    assert sorted(run_ids(selected)) == ["a0", "a1", "b0"]
+
+
+def test_estimate_start_time():
+    assert estimate_start_time(queue_position=3, average_duration_seconds=None, slots=2) is None
+    start_time = estimate_start_time(queue_position=4, average_duration_seconds=60, slots=2)
+    assert start_time is not None
+    assert timedelta(seconds=110) < start_time - datetime.utcnow() <= timedelta(seconds=120)
+
+
+@pytest.mark.asyncio
+async def test_db_queue_executor_enqueues_with_the_priority(monkeypatch):
+    database = MagicMock()
+    database.update_workflow_run = AsyncMock()
+    database.create_run_job = AsyncMock()
+    monkeypatch.setattr(async_executor.app, "DATABASE", database)
+    monkeypatch.setattr(async_executor.settings, "RUN_JOB_MAX_QUEUED_RUNS_PER_ORG", None)
+    organization = MagicMock(organization_id="org_a")
+
+    await async_executor.DBQueueExecutor().execute_workflow(
+        request=None,
+        background_tasks=None,
+        organization=organization,
+        workflow_id="w_1",
+        workflow_run_id="wr_1",
+        max_steps_override=None,
+        api_key=None,
+        browser_session_id=None,
+        priority=7,
+    )
+
+    kwargs = database.create_run_job.await_args.kwargs
+    assert kwargs["job_type"] == RunJobType.workflow
+    assert kwargs["run_id"] == "wr_1"
+    assert kwargs["priority"] == 7
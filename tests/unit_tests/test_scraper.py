@@ -0,0 +1,397 @@
+import json
+import time
+import weakref
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from skyvern.constants import SKYVERN_ID_ATTR
+from skyvern.forge.sdk.api.crypto import calculate_sha256
+from skyvern.forge.sdk.core import skyvern_context
+from skyvern.forge.sdk.core.skyvern_context import SkyvernContext
+from skyvern.webeye.scraper import scraper
+
+
+def make_frame(name, parent_frame=None):
+    frame = MagicMock(name=name)
+    frame.parent_frame = parent_frame
+    return frame
+
+
+def make_element(element_id, unique_id=None):
+    return {"id": element_id, "tagName": "iframe" if unique_id else "div", "unique_id": unique_id, "children": []}
+
+
+LONG_HREF = "https://example.com/" + "a" * 150
+
+
+def make_html_tree():
+    return [
+        {
+            "id": "form",
+            "tagName": "form",
+            "attributes": {"id": "main", "class": "box", "aria-hidden": False, "tabindex": 0},
+            "beforePseudoText": "*",
+            "text": "Sign in",
+            "children": [
+                {"id": "link", "tagName": "a", "attributes": {"href": LONG_HREF, "title": ""}, "text": "Home"},
+                {"id": "img", "tagName": "img", "attributes": {"src": "logo.png"}, "children": []},
+                {"id": "img_text", "tagName": "img", "attributes": {}, "afterPseudoText": "!", "children": []},
+                {
+                    "id": "wrapper",
+                    "tagName": "div",
+                    "purgeable": True,
+                    "children": [{"id": "input", "tagName": "input", "attributes": {"type": "text"}}],
+                },
+                {
+                    "id": "select",
+                    "tagName": "div",
+                    "isSelectable": True,
+                    "options": [{"optionIndex": 0, "text": "One"}, {"optionIndex": 1, "text": "Two"}],
+                },
+                {"id": "dropped", "tagName": "span", "isDropped": True, "text": "hidden"},
+                {
+                    "id": "dropped_button",
+                    "tagName": "button",
+                    "isDropped": True,
+                    "interactable": True,
+                    "attributes": {"class": "btn"},
+                    "text": "Go",
+                },
+            ],
+        },
+        {"id": "footer", "tagName": "footer", "text": "Bye"},
+    ]
+
+
+@pytest.fixture
+def context():
+    skyvern_context.set(SkyvernContext())
+    yield
+    skyvern_context.reset()
+
+
+def test_group_frames_by_depth():
+    frame_a = make_frame("a", parent_frame=make_frame("main"))
+    frame_b = make_frame("b", parent_frame=frame_a.parent_frame)
+    frame_c = make_frame("c", parent_frame=frame_a)
+
+    assert scraper._group_frames_by_depth([frame_a, frame_c, frame_b]) == [[frame_a, frame_b], [frame_c]]
+
+
+@pytest.mark.asyncio
+async def test_frame_elements_merged_in_the_order_of_the_frames(monkeypatch, context):
+    main_frame = make_frame("main")
+    frame_a = make_frame("a", parent_frame=main_frame)
+    frame_b = make_frame("b", parent_frame=main_frame)
+    frame_c = make_frame("c", parent_frame=frame_a)
+    main_elements = [make_element("main_a", unique_id="main_a"), make_element("main_b", unique_id="main_b")]
+    frame_trees = {
+        frame_a: ("main_a", [make_element("a_1"), make_element("a_c", unique_id="a_c")]),
+        frame_b: ("main_b", [make_element("b_1")]),
+        frame_c: ("a_c", [make_element("c_1")]),
+    }
+
+    async def build_frame_element_tree(frame, frame_index, scrape_mode):
+        unique_id, frame_elements = frame_trees[frame]
+        return unique_id, frame_elements, frame_elements
+
+    monkeypatch.setattr(scraper.SkyvernFrame, "evaluate", AsyncMock())
+    monkeypatch.setattr(scraper, "decode_compact_element_tree", lambda _: (list(main_elements), list(main_elements)))
+    # a frame comes before the frames of its next sibling, as in a depth-first walk
+    monkeypatch.setattr(scraper, "get_all_children_frames", AsyncMock(return_value=[frame_a, frame_c, frame_b]))
+    monkeypatch.setattr(scraper, "filter_frames", AsyncMock(side_effect=lambda frames, _: frames))
+    monkeypatch.setattr(scraper, "build_frame_element_tree", build_frame_element_tree)
+
+    elements, element_tree = await scraper.get_interactable_element_tree(MagicMock())
+
+    assert [element["id"] for element in elements] == ["main_a", "main_b", "a_1", "a_c", "c_1", "b_1"]
+    assert [element["id"] for element in element_tree[0]["children"]] == ["a_1", "a_c"]
+    assert [element["id"] for element in element_tree[0]["children"][1]["children"]] == ["c_1"]
+    assert [element["id"] for element in element_tree[1]["children"]] == ["b_1"]
+
+
+def test_decode_compact_element_tree():
+    strings = ["id", "tagName", "div", "attributes", "class", "children", "text", "a", "href"]
+    compact_tree = {
+        "strings": strings,
+        "elements": [
+            [scraper.COMPACT_TREE_ROOT_INDEX, [0, "root", 1, 2, 3, [4, "box"], 5, 0]],
+            [0, [0, "link", 1, 7, 3, [8, "/home", 4, "nav"], 6, "Home", 5, 0]],
+            [0, [0, "text", 1, 2, 3, [], 5, 0]],
+            # an element left out of the tree, like the ones of a pruned subtree
+            [-2, [0, "detached", 1, 2, 5, 0]],
+        ],
+    }
+
+    elements, element_tree = scraper.decode_compact_element_tree(compact_tree)
+
+    assert elements == [
+        {
+            "id": "root",
+            "tagName": "div",
+            "attributes": {"class": "box"},
+            "children": [elements[1], elements[2]],
+        },
+        {"id": "link", "tagName": "a", "attributes": {"href": "/home", "class": "nav"}, "text": "Home", "children": []},
+        {"id": "text", "tagName": "div", "attributes": {}, "children": []},
+        {"id": "detached", "tagName": "div", "children": []},
+    ]
+    assert element_tree == [elements[0]]
+    # the elements of the tree are the elements of the list
+    assert element_tree[0]["children"][0] is elements[1]
+
+
+HASHED_HREF = "_42f4ffd21389fe9610c09bc6a6e616d301f4cf294156682d6c2ef69114d35f4f"
+# the html of make_html_tree() from the recursive json_to_html the buffered serializer replaced
+HTML_WITH_SKYVERN_ATTRS = (
+    '<form id="form" class="box" aria-hidden="false" tabindex="0">*Sign in'
+    f'<a href="{{{{{HASHED_HREF}}}}}" title id="link">Home</a><img src="logo.png" id="img"><img id="img_text">!</img>'
+    '<input type="text" id="input"><select id="select"><option index="0">One</option><option index="1">Two</option>'
+    '</select><button id="dropped_button">Go</button></form><footer id="footer">Bye</footer>'
+)
+HTML_WITHOUT_SKYVERN_ATTRS = (
+    '<form id="main" class="box" aria-hidden="false" tabindex="0">*Sign in'
+    f'<a href="{{{{{HASHED_HREF}}}}}" title>Home</a><img src="logo.png"><img>!</img><input type="text">'
+    '<select><option index="0">One</option><option index="1">Two</option></select><button>Go</button></form>'
+    "<footer>Bye</footer>"
+)
+
+
+@pytest.mark.parametrize(
+    "need_skyvern_attrs, expected_html",
+    [(True, HTML_WITH_SKYVERN_ATTRS), (False, HTML_WITHOUT_SKYVERN_ATTRS)],
+)
+def test_elements_to_html(context, need_skyvern_attrs, expected_html):
+    element_tree = make_html_tree()
+
+    assert scraper.elements_to_html(element_tree, need_skyvern_attrs=need_skyvern_attrs) == expected_html
+    assert "".join(scraper.json_to_html(element, need_skyvern_attrs) for element in element_tree) == expected_html
+    assert skyvern_context.ensure_context().hashed_href_map == {HASHED_HREF: LONG_HREF}
+
+
+def test_elements_to_html_with_the_html_cache(context):
+    element_tree = make_html_tree()
+    html_cache: scraper.ElementHtmlCache = {}
+
+    assert scraper.elements_to_html(element_tree, html_cache=html_cache) == HTML_WITH_SKYVERN_ATTRS
+    # a tree sharing the subtrees reuses their html
+    html_cache[(id(element_tree[1]), True)] = "<footer>cached</footer>"
+    assert scraper.elements_to_html([element_tree[1]], html_cache=html_cache) == "<footer>cached</footer>"
+    assert scraper.elements_to_html(element_tree, need_skyvern_attrs=False, html_cache=html_cache) == (
+        HTML_WITHOUT_SKYVERN_ATTRS
+    )
+
+
+def legacy_hash_element(element):
+    # the hash before the bottom-up hashing: the json of the whole cleaned subtree with sorted keys
+    return calculate_sha256(json.dumps(scraper.clean_element_before_hashing(element), sort_keys=True))
+
+
+def make_hashed_elements():
+    button = {
+        "id": "button",
+        "frame": "main.frame",
+        "frame_index": 0,
+        "tagName": "button",
+        "attributes": {SKYVERN_ID_ATTR: "button", "type": "submit"},
+        "rect": {"x": 1, "y": 2},
+        # a text looking like the json of the children doesn't get mixed up with them
+        "text": 'Sign in "children": [] — ünïcode',
+        "children": [],
+    }
+    span = {"id": "span", "frame": "main.frame", "tagName": "span", "text": "[]"}
+    form = {
+        "id": "form",
+        "frame": "main.frame",
+        "tagName": "form",
+        "attributes": {SKYVERN_ID_ATTR: "form", "class": "box"},
+        "children": [button, span],
+    }
+    root = {"id": "root", "frame": "main.frame", "tagName": "div", "children": [form, dict(button, id="button_2")]}
+    return [root, form, button, span, root["children"][1]]
+
+
+def test_element_hashes_equal_the_legacy_hashes():
+    elements = make_hashed_elements()
+
+    _, _, _, id_to_element_hash, hash_to_element_ids = scraper.build_element_dict(elements)
+
+    expected_hashes = {element["id"]: legacy_hash_element(element) for element in elements}
+    assert id_to_element_hash == expected_hashes
+    assert {element["id"]: scraper.hash_element(element) for element in elements} == expected_hashes
+    # the elements only differing by their id have the same hash
+    assert hash_to_element_ids[expected_hashes["button"]] == ["button", "button_2"]
+
+
+def make_untrimmed_tree():
+    return {
+        "id": "root",
+        "frame": "main.frame",
+        "frame_index": 0,
+        "tagName": "div",
+        "attributes": {"class": "page", "style": "color: red"},
+        "text": "  ",
+        "beforePseudoText": "",
+        "afterPseudoText": None,
+        "children": [
+            {
+                "id": "input",
+                "frame": "main.frame",
+                "tagName": "input",
+                "interactable": True,
+                "attributes": {"name": "n" * 600, "type": "text", "data-test": "x"},
+                "children": [],
+            },
+            {
+                "id": "image",
+                "tagName": "img",
+                "attributes": {"src": "data:image/png;base64,AAAA", "alt": "logo"},
+                "children": [],
+            },
+            {
+                "id": "disabled_button",
+                "tagName": "button",
+                "attributes": {"disabled": True, "onclick": "go()"},
+                "text": "Go",
+                "beforePseudoText": "*",
+            },
+            {
+                "id": "listbox",
+                "tagName": "ul",
+                "keepAllAttr": True,
+                "attributes": {"role": "listbox", "data-value": "1", "poster": "data:x"},
+                "children": [
+                    {
+                        "id": "option",
+                        "frame_index": 1,
+                        "tagName": "li",
+                        "interactable": True,
+                        "attributes": {"role": "option", "class": "item"},
+                        "text": "One",
+                    }
+                ],
+            },
+            {"id": "empty", "tagName": "span", "attributes": {"class": "icon"}, "children": [], "text": ""},
+        ],
+    }
+
+
+# the tree of make_untrimmed_tree() trimmed by the trim_element the pruning rules replaced
+TRIMMED_TREE = {
+    "tagName": "div",
+    "children": [
+        {"id": "input", "tagName": "input", "interactable": True, "attributes": {"name": "n" * 500, "type": "text"}},
+        {"tagName": "img", "attributes": {"alt": "logo"}},
+        {
+            "id": "disabled_button",
+            "tagName": "button",
+            "attributes": {"disabled": True},
+            "text": "Go",
+            "beforePseudoText": "*",
+        },
+        {
+            "tagName": "ul",
+            "attributes": {"role": "listbox", "data-value": "1"},
+            "children": [
+                {"id": "option", "tagName": "li", "interactable": True, "attributes": {"role": "option"}, "text": "One"}
+            ],
+        },
+        {"tagName": "span"},
+    ],
+}
+
+
+def test_trim_pruning_rules_equal_the_legacy_trim_element(monkeypatch):
+    pruner = scraper.ElementTreePruner.from_rule_names(scraper.TRIM_PRUNING_RULES)
+
+    assert pruner.prune([make_untrimmed_tree()]) == [TRIMMED_TREE]
+    assert scraper.trim_element(make_untrimmed_tree()) == TRIMMED_TREE
+    monkeypatch.setattr(scraper.settings, "ELEMENT_TREE_PRUNING_RULES", [])
+    assert scraper.trim_element_tree([make_untrimmed_tree()]) == [TRIMMED_TREE]
+    assert pruner.stats.estimated_tokens_saved()
+
+
+SCRAPE_CACHE_KEY = scraper.ScrapeCacheKey(
+    take_screenshots=True,
+    draw_boxes=True,
+    max_screenshot_number=3,
+    scroll=True,
+    scrape_mode=scraper.ScrapeMode.FULL,
+    container_selector=None,
+)
+
+
+def make_scraped_page():
+    return scraper.ScrapedPage(
+        elements=[],
+        id_to_css_dict={},
+        id_to_element_hash={},
+        hash_to_element_ids={},
+        element_tree=[],
+        element_tree_trimmed=[],
+        screenshots=[],
+        url="https://example.com",
+        html="",
+        _browser_state=MagicMock(),
+        _clean_up_func=AsyncMock(),
+        _scrape_exclude=None,
+    )
+
+
+@pytest.fixture
+def scrape_cache(monkeypatch):
+    page = MagicMock()
+    scraped_page = make_scraped_page()
+    scraped_page._html_cache[(1, True)] = "<div></div>"
+    monkeypatch.setattr(scraper, "get_scrape_fingerprint", AsyncMock(return_value="fingerprint"))
+    monkeypatch.setattr(
+        scraper,
+        "_scrape_cache",
+        weakref.WeakKeyDictionary(
+            {
+                page: scraper.ScrapeCacheEntry(
+                    key=SCRAPE_CACHE_KEY,
+                    fingerprint="fingerprint",
+                    expires_at=time.monotonic() + 30,
+                    scraped_page=scraped_page,
+                )
+            }
+        ),
+    )
+    return page
+
+
+@pytest.mark.asyncio
+async def test_cached_scrape_is_a_copy_without_the_html_cache(scrape_cache):
+    cached_scraped_page = await scraper.get_cached_scrape(scrape_cache, SCRAPE_CACHE_KEY)
+
+    entry = scraper._scrape_cache[scrape_cache]
+    assert cached_scraped_page is not None
+    assert cached_scraped_page is not entry.scraped_page
+    assert cached_scraped_page.url == entry.scraped_page.url
+    assert cached_scraped_page._html_cache == {}
+    assert entry.scraped_page._html_cache == {(1, True): "<div></div>"}
+
+
+@pytest.mark.asyncio
+async def test_cached_scrape_of_other_scrape_options_is_not_reused(scrape_cache):
+    key = SCRAPE_CACHE_KEY._replace(scroll=False)
+
+    assert await scraper.get_cached_scrape(scrape_cache, key) is None
+    assert scrape_cache in scraper._scrape_cache
+
+
+@pytest.mark.asyncio
+async def test_expired_cached_scrape_is_dropped(scrape_cache):
+    scraper._scrape_cache[scrape_cache] = scraper._scrape_cache[scrape_cache]._replace(expires_at=time.monotonic() - 1)
+
+    assert await scraper.get_cached_scrape(scrape_cache, SCRAPE_CACHE_KEY) is None
+    assert scrape_cache not in scraper._scrape_cache
+
+
+@pytest.mark.asyncio
+async def test_cached_scrape_of_a_changed_page_is_not_reused(scrape_cache):
+    scraper.get_scrape_fingerprint.return_value = "changed"
+
+    assert await scraper.get_cached_scrape(scrape_cache, SCRAPE_CACHE_KEY) is None
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from structlog.testing import capture_logs
+
+from skyvern.forge.sdk.schemas.workflow_runs import WorkflowRunBlock
+from skyvern.forge.sdk.workflow.models.block import BlockType
+from skyvern.forge.sdk.workflow.service import WorkflowService
+
+NOW = datetime(2025, 1, 1)
+
+
+def make_workflow_run_block(workflow_run_block_id, workflow_run_id="wr_1", parent_workflow_run_block_id=None):
+    return WorkflowRunBlock(
+        workflow_run_block_id=workflow_run_block_id,
+        workflow_run_id=workflow_run_id,
+        parent_workflow_run_block_id=parent_workflow_run_block_id,
+        block_type=BlockType.TASK,
+        created_at=NOW,
+        modified_at=NOW,
+    )
+
+
+def block_ids(timelines):
+    return [timeline.block.workflow_run_block_id for timeline in timelines]
+
+
+def test_build_workflow_run_block_trees():
+    workflow_run_blocks = [
+        make_workflow_run_block("loop"),
+        # a child listed before its parent is still attached to it
+        make_workflow_run_block("inner_task", parent_workflow_run_block_id="inner_loop"),
+        make_workflow_run_block("inner_loop", parent_workflow_run_block_id="loop"),
+        make_workflow_run_block("task", parent_workflow_run_block_id="loop"),
+        make_workflow_run_block("child_run_task", workflow_run_id="wr_2"),
+    ]
+
+    block_trees = WorkflowService._build_workflow_run_block_trees(workflow_run_blocks)
+
+    assert set(block_trees) == {"wr_1", "wr_2"}
+    assert block_ids(block_trees["wr_1"]) == ["loop"]
+    loop_children = block_trees["wr_1"][0].children
+    assert block_ids(loop_children) == ["inner_loop", "task"]
+    assert block_ids(loop_children[0].children) == ["inner_task"]
+    assert block_ids(block_trees["wr_2"]) == ["child_run_task"]
+
+
+def test_build_workflow_run_block_trees_skips_the_blocks_without_their_parent():
+    workflow_run_blocks = [
+        make_workflow_run_block("task"),
+        make_workflow_run_block("orphan", parent_workflow_run_block_id="missing"),
+    ]
+
+    with capture_logs() as logs:
+        block_trees = WorkflowService._build_workflow_run_block_trees(workflow_run_blocks)
+
+    assert block_ids(block_trees["wr_1"]) == ["task"]
+    assert [log["workflow_run_block_id"] for log in logs if log["log_level"] == "warning"] == ["orphan"]